@@ -25,20 +25,48 @@ requirements: [boto3, botocore]
 options:
   state:
     description:
-      - Ensure NAT Gateway is present or absent
+      - Ensure NAT Gateway is present or absent.
+      - replaced creates a new NAT Gateway next to nat_gateway_id and waits
+        until it is available. It then points every route that targets
+        nat_gateway_id at the new gateway with ReplaceRoute, concurrently
+        across route tables, and finally deletes nat_gateway_id. The new
+        gateway goes in subnet_id, or in the subnet of nat_gateway_id, and
+        uses allocation_id, eip_address, eip_pool_tags or a new EIP. wait
+        and release_eip apply to the deletion of nat_gateway_id. Every run
+        replaces the gateway again, so this state is not idempotent.
     required: false
     default: "present"
-    choices: ["present", "absent"]
+    choices: ["present", "absent", "replaced"]
   nat_gateway_id:
     description:
       - The id AWS dynamically allocates to the NAT Gateway on creation.
-        This is required when the absent option is present.
+        This is required when the absent or the replaced option is present.
+    required: false
+    default: None
+  nat_gateway_ids:
+    description:
+      - A list of NAT Gateway ids to remove together with the absent state.
+        Every deletion is issued up front, then all of the gateways are
+        polled together and each EIP is released, when release_eip is set,
+        as soon as its own gateway is deleted.
+      - Mutually exclusive with nat_gateway_id.
     required: false
     default: None
   subnet_id:
     description:
       - The id of the subnet to create the NAT Gateway in. This is required
-        with the present option.
+        with the present option, unless subnet_ids is passed.
+    required: false
+    default: None
+  subnet_ids:
+    description:
+      - A list of subnet ids in a single VPC, used to manage a fleet of NAT
+        Gateways with one NAT Gateway per availability zone. Availability
+        zones that already have a NAT Gateway in one of these subnets are
+        left alone, otherwise a NAT Gateway with a newly allocated EIP is
+        created in the first subnet (sorted by id) of that zone.
+      - Mutually exclusive with subnet_id, allocation_id, eip_address and
+        client_token.
     required: false
     default: None
   allocation_id:
@@ -53,6 +81,16 @@ options:
         If this is not passed and the allocation_id is not passed.
         An EIP is generated for this Nat Gateway
     required: false
+  eip_pool_tags:
+    description:
+      - Draw the EIPs of the new NAT Gateways from a pre-reserved pool of
+        unassociated, VPC scoped EIPs that have all of these tags, instead of
+        allocating new EIPs. Addresses are handed out sorted by allocation
+        id. The module fails before creating anything if the pool does not
+        have enough addresses.
+      - Mutually exclusive with allocation_id and eip_address.
+    required: false
+    default: None
   if_exist_do_not_create:
     description:
       - if a Nat Gateway exists already in the subnet_id, then do not create a new one.
@@ -74,6 +112,34 @@ options:
       - How many seconds to wait for an operation to complete before timing out
     required: false
     default: 300
+  poll_interval:
+    description:
+      - The minimum number of seconds between 2 describe calls while
+        waiting on NAT Gateways, measured from the start of one call to the
+        start of the next.
+    required: false
+    default: 5
+  max_poll_calls:
+    description:
+      - The maximum number of describe calls made by each wait, on top of
+        wait_timeout.
+    required: false
+    default: None
+  connectivity_type:
+    description:
+      - Whether the NAT Gateway is public, with an EIP, or private, for
+        traffic to other VPCs and on-premises networks. No EIP is looked up
+        or allocated for a private NAT Gateway, so allocation_id,
+        eip_address and eip_pool_tags can not be used with it. A private
+        NAT Gateway that already exists in the subnet is reused.
+      - The type applies to the present state, including subnet_ids. The
+        replaced state keeps the type of the NAT Gateway it replaces.
+      - private needs a botocore release whose CreateNatGateway takes
+        ConnectivityType. botocore 1.4.7 from requirements.txt does not,
+        and the task fails before any change is made.
+    required: false
+    default: public
+    choices: ["public", "private"]
   client_token:
     description:
       - Optional unique token to be used during create to ensure idempotency.
@@ -136,6 +202,37 @@ EXAMPLES = '''
     if_exist_do_not_create: true
   register: new_nat_gateway
 
+- name: Ensure there is one nat gateway per availability zone
+  ec2_vpc_nat_gateway:
+    state: present
+    subnet_ids:
+      - subnet-12345678
+      - subnet-23456789
+      - subnet-34567890
+    wait: yes
+    region: ap-southeast-2
+  register: nat_gateway_fleet
+
+- name: Ensure one nat gateway per availability zone, using partner allowlisted EIPs
+  ec2_vpc_nat_gateway:
+    state: present
+    subnet_ids:
+      - subnet-12345678
+      - subnet-23456789
+    eip_pool_tags:
+      pool: partners
+    wait: yes
+    region: ap-southeast-2
+
+- name: Create a private nat gateway for inter-vpc egress
+  ec2_vpc_nat_gateway:
+    state: present
+    subnet_id: subnet-12345678
+    connectivity_type: private
+    wait: yes
+    region: ap-southeast-2
+  register: private_nat_gateway
+
 - name: Delete nat gateway using discovered nat gateways from facts module
   ec2_vpc_nat_gateway:
     state: absent
@@ -160,6 +257,27 @@ EXAMPLES = '''
     nat_gateway_id: nat-12345678
     release_eip: yes
     region: ap-southeast-2
+
+- name: Move a nat gateway to a new EIP without downtime
+  ec2_vpc_nat_gateway:
+    state: replaced
+    nat_gateway_id: nat-12345678
+    eip_address: 52.1.1.2
+    release_eip: yes
+    wait_timeout: 600
+    region: ap-southeast-2
+  register: replaced_nat_gateway
+
+- name: Delete every nat gateway of a vpc at once and release their EIPs
+  ec2_vpc_nat_gateway:
+    state: absent
+    nat_gateway_ids:
+      - nat-12345678
+      - nat-23456789
+      - nat-34567890
+    release_eip: yes
+    wait_timeout: 600
+    region: ap-southeast-2
 '''
 
 RETURN = '''
@@ -188,6 +306,48 @@ vpc_id:
   returned: In all cases.
   type: string
   sample: "vpc-12345"
+nat_gateways:
+  description: The nat gateways of the fleet keyed by availability zone, or
+    the removed nat gateways keyed by id.
+  returned: when subnet_ids or nat_gateway_ids is passed
+  type: dict
+  sample: {
+      "ap-southeast-2a": {
+          "nat_gateway_id": "nat-0d1e3a878585988f8",
+          "subnet_id": "subnet-12345678",
+          "state": "available",
+          "vpc_id": "vpc-12345"
+      }
+  }
+replaced_nat_gateway_id:
+  description: id of the NAT Gateway that was replaced.
+  returned: when state is replaced
+  type: string
+  sample: "nat-0d1e3a878585988f8"
+replaced_routes:
+  description: The routes that were pointed at the new NAT Gateway.
+  returned: when state is replaced
+  type: list
+  sample: [
+      {
+          "route_table_id": "rtb-12345678",
+          "destination": "0.0.0.0/0",
+          "destination_type": "ipv4"
+      }
+  ]
+poll_metrics:
+  description: The describe calls made and the seconds spent while waiting on NAT Gateways.
+  returned: when the module waited
+  type: dict
+  sample: {
+      "calls": 12,
+      "elapsed_secs": 57.3
+  }
+released_eips:
+  description: The allocation ids of the EIPs released by a bulk removal or a replacement.
+  returned: when nat_gateway_ids is passed or state is replaced
+  type: list
+  sample: ["eipalloc-12345678"]
 nat_gateway_addresses:
   description: List of dictionairies containing the public_ip, network_interface_id, private_ip, and allocation_id.
   returned: In all cases.
@@ -209,12 +369,20 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+import copy
 import datetime
 import random
 import time
+from multiprocessing.pool import ThreadPool
 
 from dateutil.tz import tzutc
 
+# Upper bound on the number of EC2 api calls this module keeps in flight.
+MAX_CONCURRENT_REQUESTS = 10
+
+# Default number of seconds between 2 polls of the same nat gateways.
+POLLING_SECS = 5
+
 DRY_RUN_GATEWAYS = [
     {
         "nat_gateway_id": "nat-123456789",
@@ -250,18 +418,138 @@ DRY_RUN_GATEWAY_UNCONVERTED = [
     }
 ]
 
+DRY_RUN_PRIVATE_GATEWAY_UNCONVERTED = [
+    {
+        'VpcId': 'vpc-12345678',
+        'State': 'available',
+        'NatGatewayId': 'nat-234567891',
+        'SubnetId': 'subnet-456789123',
+        'ConnectivityType': 'private',
+        'NatGatewayAddresses': [
+            {
+                'NetworkInterfaceId': 'eni-2345678',
+                'PrivateIp': '10.0.3.10'
+            }
+        ],
+        'CreateTime': datetime.datetime(2016, 3, 5, 5, 19, 20, 282000, tzinfo=tzutc())
+    }
+]
+
+# Every state a nat gateway can be in.
+NAT_GATEWAY_STATES = ['pending', 'failed', 'available', 'deleting', 'deleted']
+
+# The describe_nat_gateways filters, and the key each one reads.
+NAT_GATEWAY_FILTER_KEYS = {
+    'nat-gateway-id': 'NatGatewayId',
+    'subnet-id': 'SubnetId',
+    'vpc-id': 'VpcId',
+    'state': 'State',
+}
+
 DRY_RUN_ALLOCATION_UNCONVERTED = {
     'Addresses': [
         {
             'PublicIp': '55.55.55.55',
             'Domain': 'vpc',
-            'AllocationId': 'eipalloc-1234567'
+            'AllocationId': 'eipalloc-1234567',
+            'AssociationId': 'eipassoc-1234567'
+        },
+        {
+            'PublicIp': '52.0.0.2',
+            'Domain': 'vpc',
+            'AllocationId': 'eipalloc-2345678',
+            'Tags': [{'Key': 'pool', 'Value': 'partners'}]
+        },
+        {
+            'PublicIp': '52.0.0.3',
+            'Domain': 'vpc',
+            'AllocationId': 'eipalloc-3456789',
+            'Tags': [{'Key': 'pool', 'Value': 'partners'}]
+        },
+        {
+            'PublicIp': '52.0.0.4',
+            'Domain': 'vpc',
+            'AllocationId': 'eipalloc-4567891',
+            'AssociationId': 'eipassoc-4567891',
+            'Tags': [{'Key': 'pool', 'Value': 'partners'}]
+        },
+        {
+            'PublicIp': '52.0.0.5',
+            'Domain': 'vpc',
+            'AllocationId': 'eipalloc-5678912',
+            'Tags': [{'Key': 'pool', 'Value': 'other'}]
         }
     ]
 }
 
+DRY_RUN_SUBNETS = [
+    {
+        'SubnetId': 'subnet-123456789',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2a'
+    },
+    {
+        'SubnetId': 'subnet-234567891',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2b'
+    },
+    {
+        'SubnetId': 'subnet-345678912',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2b'
+    },
+    {
+        'SubnetId': 'subnet-456789123',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2c'
+    }
+]
+
+DRY_RUN_ROUTE_TABLES = [
+    {
+        'RouteTableId': 'rtb-1234567',
+        'VpcId': 'vpc-12345678',
+        'Routes': [
+            {
+                'DestinationCidrBlock': '10.0.0.0/16',
+                'GatewayId': 'local'
+            },
+            {
+                'DestinationCidrBlock': '0.0.0.0/0',
+                'NatGatewayId': 'nat-123456789'
+            }
+        ]
+    },
+    {
+        'RouteTableId': 'rtb-2345678',
+        'VpcId': 'vpc-12345678',
+        'Routes': [
+            {
+                'DestinationCidrBlock': '10.0.0.0/16',
+                'GatewayId': 'local'
+            },
+            {
+                'DestinationCidrBlock': '0.0.0.0/0',
+                'NatGatewayId': 'nat-123456789'
+            },
+            {
+                'DestinationIpv6CidrBlock': '64:ff9b::/96',
+                'NatGatewayId': 'nat-123456789'
+            }
+        ]
+    }
+]
+
 DRY_RUN_MSGS = 'DryRun Mode:'
 
+# The route destination types, and the key each one is read from and
+# replaced with.
+ROUTE_DESTINATION_KEYS = [
+    ('ipv4', 'DestinationCidrBlock'),
+    ('ipv6', 'DestinationIpv6CidrBlock'),
+    ('prefix_list', 'DestinationPrefixListId'),
+]
+
 def convert_to_lower(data):
     """Convert all uppercase keys in dict with lowercase_
 
@@ -300,9 +588,109 @@ def convert_to_lower(data):
                 results[key] = val
     return results
 
+def run_concurrently(func, calls, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Run func once for every set of keyword arguments in calls, using a
+        bounded pool of threads. Boto3 clients are thread safe, so the same
+        client can be shared across every call.
+    Args:
+        func (function): The function to call.
+        calls (list): List of dictionaries, each one containing the keyword
+            arguments for a single call to func.
+
+    Kwargs:
+        max_workers (int): The maximum number of calls in flight at once.
+            default=MAX_CONCURRENT_REQUESTS
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> calls = [
+            {
+                'client': client,
+                'check_mode': True
+            }
+        ]
+        >>> run_concurrently(allocate_eip_address, calls)
+        [(True, 'eipalloc id eipalloc-1234567 created', 'eipalloc-1234567')]
+
+    Returns:
+        List, containing the result of each call in the same order as calls.
+    """
+    if not calls:
+        return list()
+    pool = ThreadPool(max(1, min(max_workers, len(calls))))
+    try:
+        return pool.map(lambda kwargs: func(**kwargs), calls)
+    finally:
+        pool.close()
+        pool.join()
+
+def nat_gateway_filters(subnet_id=None, vpc_id=None, nat_gateway_ids=None,
+                        states=None, tags=None):
+    """Build the server side filters of describe_nat_gateways.
+    Kwargs:
+        subnet_id (str): The subnet_id the nats reside in.
+        vpc_id (str): The vpc_id the nats reside in.
+        nat_gateway_ids (list): The Amazon nat ids.
+        states (list): States available (pending, failed, available, deleting, and deleted)
+        tags (dict): Tags every nat must have.
+
+    Basic Usage:
+        >>> nat_gateway_filters('subnet-12345678', states=['available'])
+        [
+            {'Name': 'subnet-id', 'Values': ['subnet-12345678']},
+            {'Name': 'state', 'Values': ['available']}
+        ]
+
+    Returns:
+        List
+    """
+    filters = list()
+    if nat_gateway_ids:
+        filters.append({'Name': 'nat-gateway-id', 'Values': nat_gateway_ids})
+    if subnet_id:
+        filters.append({'Name': 'subnet-id', 'Values': [subnet_id]})
+    if vpc_id:
+        filters.append({'Name': 'vpc-id', 'Values': [vpc_id]})
+    if states:
+        filters.append({'Name': 'state', 'Values': states})
+    for key, val in sorted((tags or dict()).items()):
+        filters.append({'Name': 'tag:{0}'.format(key), 'Values': [str(val)]})
+    return filters
+
+def filters_match(gateway, filters):
+    """Apply describe_nat_gateways filters to an unconverted gateway, the way
+        Amazon does. Used to answer the check mode describes.
+    Args:
+        gateway (dict): The unconverted nat gateway.
+        filters (list): The filters built by nat_gateway_filters.
+
+    Basic Usage:
+        >>> filters = nat_gateway_filters(vpc_id='vpc-12345678')
+        >>> filters_match(DRY_RUN_GATEWAY_UNCONVERTED[0], filters)
+        True
+
+    Returns:
+        Boolean
+    """
+    tags = dict(
+        (tag['Key'], tag['Value']) for tag in gateway.get('Tags', list())
+    )
+    for gw_filter in filters:
+        name = gw_filter['Name']
+        if name.startswith('tag:'):
+            val = tags.get(name[len('tag:'):])
+        else:
+            val = gateway.get(NAT_GATEWAY_FILTER_KEYS[name])
+        if val not in gw_filter['Values']:
+            return False
+    return True
+
 def get_nat_gateways(client, subnet_id=None, nat_gateway_id=None,
-                     states=None, check_mode=False):
-    """Retrieve a list of NAT Gateways
+                     states=None, check_mode=False, vpc_id=None,
+                     nat_gateway_ids=None, tags=None, match=None):
+    """Retrieve a list of NAT Gateways. Every filter is applied by Amazon,
+        every page is read, and only the gateways that are returned are
+        converted.
     Args:
         client (botocore.client.EC2): Boto3 client
 
@@ -310,6 +698,14 @@ def get_nat_gateways(client, subnet_id=None, nat_gateway_id=None,
         subnet_id (str): The subnet_id the nat resides in.
         nat_gateway_id (str): The Amazon nat id.
         states (list): States available (pending, failed, available, deleting, and deleted)
+            default=['available', 'pending']
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        vpc_id (str): The vpc_id the nat resides in.
+        nat_gateway_ids (list): The Amazon nat ids.
+        tags (dict): Tags every nat must have.
+        match (function): Called with each unconverted gateway, only the
+            gateways it returns True for are converted and returned.
             default=None
 
     Basic Usage:
@@ -339,51 +735,145 @@ def get_nat_gateways(client, subnet_id=None, nat_gateway_id=None,
     Returns:
         Tuple (bool, str, list)
     """
-    params = dict()
     err_msg = ""
     gateways_retrieved = False
+    existing_gateways = list()
+    gateways = list()
     if not states:
         states = ['available', 'pending']
+    nat_gateway_ids = list(nat_gateway_ids or list())
     if nat_gateway_id:
-        params['NatGatewayIds'] = [nat_gateway_id]
-    else:
-        params['Filter'] = [
-            {
-                'Name': 'subnet-id',
-                'Values': [subnet_id]
-            },
-            {
-                'Name': 'state',
-                'Values': states
-            }
-        ]
+        nat_gateway_ids.append(nat_gateway_id)
+    params = {
+        'Filter': nat_gateway_filters(
+            subnet_id, vpc_id, nat_gateway_ids, states, tags
+        ),
+        'MaxResults': 1000
+    }
 
     try:
         if not check_mode:
-            gateways = client.describe_nat_gateways(**params)['NatGateways']
-            existing_gateways = list()
-            if gateways:
-                for gw in gateways:
-                    existing_gateways.append(convert_to_lower(gw))
-            gateways_retrieved = True
+            while True:
+                response = client.describe_nat_gateways(**params)
+                gateways.extend(response.get('NatGateways', []))
+                if not response.get('NextToken'):
+                    break
+                params['NextToken'] = response['NextToken']
         else:
-            gateways_retrieved = True
-            existing_gateways = []
-            if nat_gateway_id:
-                if DRY_RUN_GATEWAYS[0]['nat_gateway_id'] == nat_gateway_id:
-                    existing_gateways = DRY_RUN_GATEWAYS
-            elif subnet_id:
-                if DRY_RUN_GATEWAYS[0]['subnet_id'] == subnet_id:
-                    existing_gateways = DRY_RUN_GATEWAYS
+            gateways = [
+                gw for gw in
+                DRY_RUN_GATEWAY_UNCONVERTED + DRY_RUN_PRIVATE_GATEWAY_UNCONVERTED
+                if filters_match(gw, params['Filter'])
+            ]
             err_msg = '{0} Retrieving gateways'.format(DRY_RUN_MSGS)
+        gateways_retrieved = True
 
-    except botocore.exceptions.ClientError, e:
-            err_msg = str(e)
+        for gw in gateways:
+            if match is None or match(gw):
+                existing_gateways.append(convert_to_lower(gw))
+
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
 
     return gateways_retrieved, err_msg, existing_gateways
 
+def describe_vpc_nat_gateways(client, vpc_id, states=None,
+                              check_mode=False):
+    """Retrieve every NAT Gateway in a VPC, following pagination and letting
+        EC2 filter on the vpc and the state.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        vpc_id (str): The vpc id the nat gateways reside in.
+
+    Kwargs:
+        states (list): States available (pending, failed, available, deleting, and deleted)
+            default=['available', 'pending']
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_vpc_nat_gateways(client, 'vpc-12345678')
+        [
+            true,
+            "",
+            [
+                {
+                    "nat_gateway_id": "nat-123456789",
+                    "subnet_id": "subnet-123456789",
+                    "state": "available",
+                    "vpc_id": "vpc-12345678"
+                }
+            ]
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    return get_nat_gateways(
+        client, vpc_id=vpc_id, states=states, check_mode=check_mode
+    )
+
+def poll(func, wait_timeout, polling_secs=POLLING_SECS, max_calls=None,
+         metrics=None, clock=time):
+    """Call func until it asks to stop, at most once every polling_secs,
+        until wait_timeout is reached or max_calls have been made. The
+        interval is measured from the start of one call to the start of the
+        next one, and no sleep goes past the timeout.
+    Args:
+        func (function): Called without arguments, returns a tuple
+            (stop, result). stop is True once polling is no longer needed.
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+
+    Kwargs:
+        polling_secs (int): The minimum number of seconds between 2 calls.
+            default=POLLING_SECS
+        max_calls (int): The maximum number of calls to make.
+            default=None, only the timeout applies
+        metrics (dict): The calls made and the seconds spent are added to
+            the calls and elapsed_secs keys of this dictionary.
+            default=None
+        clock (module): Provides time() and sleep().
+            default=time
+
+    Basic Usage:
+        >>> poll(lambda: (True, 'done'), 300)
+        (True, 'done', {'calls': 1, 'elapsed_secs': 0.0})
+
+    Returns:
+        Tuple (bool, object, dict)
+    """
+    started = clock.time()
+    deadline = started + wait_timeout
+    calls = 0
+    while True:
+        call_started = clock.time()
+        calls += 1
+        stop, result = func()
+        if stop:
+            break
+        if max_calls and calls >= max_calls:
+            break
+        next_call = call_started + polling_secs
+        if next_call > deadline:
+            break
+        delay = next_call - clock.time()
+        if delay > 0:
+            clock.sleep(delay)
+
+    poll_metrics = {
+        'calls': calls,
+        'elapsed_secs': clock.time() - started
+    }
+    if metrics is not None:
+        for key, val in poll_metrics.items():
+            metrics[key] = metrics.get(key, 0) + val
+
+    return stop, result, poll_metrics
+
 def wait_for_status(client, wait_timeout, nat_gateway_id, status,
-                    check_mode=False):
+                    check_mode=False, polling_secs=POLLING_SECS,
+                    max_calls=None, metrics=None, clock=time):
     """Wait for the Nat Gateway to reach a status
     Args:
         client (botocore.client.EC2): Boto3 client
@@ -392,11 +882,21 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
         status (str): The status to wait for.
             examples. status=available, status=deleted
 
+    Kwargs:
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        polling_secs (int): The minimum number of seconds between 2 describes.
+            default=POLLING_SECS
+        max_calls (int): The maximum number of describes to make.
+            default=None
+        metrics (dict): Collects the describes made and the seconds spent.
+            default=None
+        clock (module): Provides time() and sleep().
+            default=time
+
     Basic Usage:
         >>> client = boto3.client('ec2')
-        >>> subnet_id = 'subnet-12345678'
-        >>> allocation_id = 'eipalloc-12345678'
-        >>> wait_for_status(client, subnet_id, allocation_id)
+        >>> wait_for_status(client, 500, 'nat-123456789', 'available')
         [
             true,
             "",
@@ -411,91 +911,199 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
                         "allocation_id": "eipalloc-12345678"
                     }
                 ],
-                "state": "deleted",
+                "state": "available",
                 "create_time": "2016-03-05T00:33:21.209000+00:00",
-                "delete_time": "2016-03-05T00:36:37.329000+00:00",
                 "vpc_id": "vpc-12345677"
             }
         ]
 
     Returns:
-        Tuple (bool, str, list)
+        Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
-    status_achieved = False
-    nat_gateway = list()
-    states = ['pending', 'failed', 'available', 'deleting', 'deleted']
-    err_msg = ""
+    errors = list()
 
-    while wait_timeout > time.time():
-        try:
-            gws_retrieved, err_msg, nat_gateway = (
-                get_nat_gateways(
-                    client, nat_gateway_id=nat_gateway_id,
-                    states=states, check_mode=check_mode
-                )
+    def check():
+        gws_retrieved, err_msg, gws = (
+            get_nat_gateways(
+                client, nat_gateway_id=nat_gateway_id,
+                states=NAT_GATEWAY_STATES, check_mode=check_mode
             )
-            if gws_retrieved and nat_gateway:
-                nat_gateway = nat_gateway[0]
-                if check_mode:
-                    nat_gateway['state'] = status
-
-                if nat_gateway.get('state') == status:
-                    status_achieved = True
-                    break
-
-                elif nat_gateway.get('state') == 'failed':
-                    err_msg = nat_gateway.get('failure_message')
-                    break
-
-                elif nat_gateway.get('state') == 'pending':
-                    if nat_gateway.has_key('failure_message'):
-                        err_msg = nat_gateway.get('failure_message')
-                        status_achieved = False
-                        break
-
-            else:
-                time.sleep(polling_increment_secs)
-
-        except botocore.exceptions.ClientError, e:
-            err_msg = str(e)
+        )
+        if not gws_retrieved:
+            errors.append(err_msg)
+            return False, dict()
+        if not gws:
+            return False, dict()
+        nat_gateway = gws[0]
+        if check_mode:
+            nat_gateway = copy.deepcopy(nat_gateway)
+            nat_gateway['state'] = status
+        stop = (
+            nat_gateway.get('state') in [status, 'failed']
+            or 'failure_message' in nat_gateway
+        )
+        return stop, nat_gateway
 
+    stopped, nat_gateway, _ = (
+        poll(
+            check, wait_timeout, polling_secs=polling_secs,
+            max_calls=max_calls, metrics=metrics, clock=clock
+        )
+    )
+    status_achieved = nat_gateway.get('state') == status
+    err_msg = ""
     if not status_achieved:
-        err_msg = "Wait time out reached, while waiting for results"
+        if stopped:
+            err_msg = nat_gateway.get('failure_message')
+        else:
+            err_msg = "Wait time out reached, while waiting for results"
+        if errors:
+            err_msg = '{0}: {1}'.format(err_msg, errors[-1])
 
     return status_achieved, err_msg, nat_gateway
 
-def gateway_in_subnet_exists(client, subnet_id, allocation_id=None,
-                             check_mode=False):
-    """Retrieve all NAT Gateways for a subnet.
+def wait_for_gateways(client, wait_timeout, nat_gateway_ids, status,
+                      on_status=None, check_mode=False,
+                      polling_secs=POLLING_SECS, max_calls=None,
+                      metrics=None, clock=time):
+    """Wait for a group of Nat Gateways to reach a status. Every poll
+        describes all of the gateways that are still pending in one call.
     Args:
-        subnet_id (str): The subnet_id the nat resides in.
+        client (botocore.client.EC2): Boto3 client
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+        nat_gateway_ids (list): The Amazon nat ids.
+        status (str): The status to wait for.
+            examples. status=available, status=deleted
 
     Kwargs:
-        allocation_id (str): The eip Amazon identifier.
+        on_status (function): Called after every poll with the list of
+            gateways that reached the status during that poll, so work can
+            start on them while the others are still pending.
             default = None
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        polling_secs (int): The minimum number of seconds between 2 polls.
+            default=POLLING_SECS
+        max_calls (int): The maximum number of polls to make.
+            default=None
+        metrics (dict): Collects the polls made and the seconds spent.
+            default=None
+        clock (module): Provides time() and sleep().
+            default=time
 
     Basic Usage:
         >>> client = boto3.client('ec2')
-        >>> subnet_id = 'subnet-1234567'
-        >>> allocation_id = 'eipalloc-1234567'
-        >>> gateway_in_subnet_exists(client, subnet_id, allocation_id)
-        (
-            [
-                {
+        >>> nat_gateway_ids = ['nat-123456789', 'nat-987654321']
+        >>> wait_for_gateways(client, 300, nat_gateway_ids, 'available')
+        [
+            true,
+            "",
+            {
+                "nat-123456789": {
                     "nat_gateway_id": "nat-123456789",
-                    "subnet_id": "subnet-123456789",
-                    "nat_gateway_addresses": [
-                        {
-                            "public_ip": "55.55.55.55",
-                            "network_interface_id": "eni-1234567",
-                            "private_ip": "10.0.0.102",
-                            "allocation_id": "eipalloc-1234567"
-                        }
-                    ],
-                    "state": "deleted",
-                    "create_time": "2016-03-05T00:33:21.209000+00:00",
+                    "state": "available"
+                },
+                "nat-987654321": {
+                    "nat_gateway_id": "nat-987654321",
+                    "state": "available"
+                }
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    gateways = dict()
+    pending = set(nat_gateway_ids)
+    errors = list()
+
+    if check_mode:
+        return True, "", gateways
+
+    def check():
+        params = {
+            'NatGatewayIds': sorted(pending)
+        }
+        reached = list()
+        try:
+            while True:
+                response = client.describe_nat_gateways(**params)
+                for gw in response.get('NatGateways', []):
+                    gw = convert_to_lower(gw)
+                    gateways[gw['nat_gateway_id']] = gw
+                    if gw.get('state') == status:
+                        pending.discard(gw['nat_gateway_id'])
+                        reached.append(gw)
+                    elif gw.get('state') == 'failed':
+                        errors.append(
+                            'Nat gateway {0} failed: {1}'.format(
+                                gw['nat_gateway_id'],
+                                gw.get('failure_message')
+                            )
+                        )
+                if not response.get('NextToken'):
+                    break
+                params['NextToken'] = response['NextToken']
+
+        except botocore.exceptions.ClientError as e:
+            errors.append(str(e))
+            return True, gateways
+
+        if on_status and reached:
+            on_status(reached)
+        return bool(errors) or not pending, gateways
+
+    poll(
+        check, wait_timeout, polling_secs=polling_secs, max_calls=max_calls,
+        metrics=metrics, clock=clock
+    )
+    if errors:
+        return False, errors[0], gateways
+    if pending:
+        err_msg = (
+            "Wait time out reached, while waiting for {0}"
+            .format(', '.join(sorted(pending)))
+        )
+        return False, err_msg, gateways
+
+    return True, "", gateways
+
+def gateway_in_subnet_exists(client, subnet_id, allocation_id=None,
+                             connectivity_type='public', check_mode=False):
+    """Retrieve the NAT Gateways of a subnet that match the connectivity
+        type and, for public gateways, the allocation id. The subnet and the
+        state are filtered by Amazon, and only the matching gateways are
+        converted.
+    Args:
+        subnet_id (str): The subnet_id the nat resides in.
+
+    Kwargs:
+        allocation_id (str): The eip Amazon identifier.
+            default = None
+        connectivity_type (str): Only gateways of this type match, public
+            or private. Private gateways have no eip to match on.
+            default = public
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> subnet_id = 'subnet-1234567'
+        >>> allocation_id = 'eipalloc-1234567'
+        >>> gateway_in_subnet_exists(client, subnet_id, allocation_id)
+        (
+            [
+                {
+                    "nat_gateway_id": "nat-123456789",
+                    "subnet_id": "subnet-123456789",
+                    "nat_gateway_addresses": [
+                        {
+                            "public_ip": "55.55.55.55",
+                            "network_interface_id": "eni-1234567",
+                            "private_ip": "10.0.0.102",
+                            "allocation_id": "eipalloc-1234567"
+                        }
+                    ],
+                    "state": "deleted",
+                    "create_time": "2016-03-05T00:33:21.209000+00:00",
                     "delete_time": "2016-03-05T00:36:37.329000+00:00",
                     "vpc_id": "vpc-1234567"
                 }
@@ -506,24 +1114,29 @@ def gateway_in_subnet_exists(client, subnet_id, allocation_id=None,
     Returns:
         Tuple (list, bool)
     """
-    allocation_id_exists = False
-    gateways = []
     states = ['available', 'pending']
-    gws_retrieved, _, gws = (
+
+    def matches(gw):
+        if gw.get('ConnectivityType', 'public') != connectivity_type:
+            return False
+        if connectivity_type == 'private' or not allocation_id:
+            return True
+        return allocation_id in [
+            address.get('AllocationId')
+            for address in gw.get('NatGatewayAddresses', list())
+        ]
+
+    gws_retrieved, _, gateways = (
         get_nat_gateways(
-            client, subnet_id, states=states, check_mode=check_mode
+            client, subnet_id, states=states, check_mode=check_mode,
+            match=matches
         )
     )
     if not gws_retrieved:
-        return gateways, allocation_id_exists
-    for gw in gws:
-        for address in gw['nat_gateway_addresses']:
-            if allocation_id:
-                if address.get('allocation_id') == allocation_id:
-                    allocation_id_exists = True
-                    gateways.append(gw)
-            else:
-                gateways.append(gw)
+        return list(), False
+    allocation_id_exists = bool(
+        allocation_id and connectivity_type != 'private' and gateways
+    )
 
     return gateways, allocation_id_exists
 
@@ -624,6 +1237,170 @@ def allocate_eip_address(client, check_mode=False):
 
     return ip_allocated, err_msg, new_eip
 
+def address_filters(pool_tags=None):
+    """Build the describe_addresses filters of the VPC scoped Elastic IP
+        Addresses that have every one of pool_tags. The tags are matched by
+        ec2, the installed botocore may not be able to read them back.
+    Kwargs:
+        pool_tags (dict): The tags every address must have.
+            default = None
+
+    Basic Usage:
+        >>> address_filters({'pool': 'partners'})
+        [
+            {'Name': 'domain', 'Values': ['vpc']},
+            {'Name': 'tag:pool', 'Values': ['partners']}
+        ]
+
+    Returns:
+        List
+    """
+    filters = [
+        {
+            'Name': 'domain',
+            'Values': ['vpc']
+        }
+    ]
+    for key, value in sorted((pool_tags or dict()).items()):
+        filters.append(
+            {
+                'Name': 'tag:{0}'.format(key),
+                'Values': [str(value)]
+            }
+        )
+    return filters
+
+def address_matches(address, filters):
+    """Tell whether a dry run Elastic IP Address matches the filters built by
+        address_filters, the way ec2 would.
+    Args:
+        address (dict): The address, with its Domain and Tags.
+        filters (list): The output of address_filters.
+
+    Basic Usage:
+        >>> address = {'Domain': 'vpc', 'Tags': [{'Key': 'pool', 'Value': 'partners'}]}
+        >>> address_matches(address, address_filters({'pool': 'partners'}))
+        True
+
+    Returns:
+        Bool
+    """
+    tags = dict(
+        (tag['Key'], tag['Value']) for tag in address.get('Tags', list())
+    )
+    for address_filter in filters:
+        if address_filter['Name'] == 'domain':
+            value = address.get('Domain')
+        else:
+            value = tags.get(address_filter['Name'][len('tag:'):])
+        if value not in address_filter['Values']:
+            return False
+    return True
+
+def describe_addresses(client, pool_tags=None, check_mode=False):
+    """Retrieve every VPC scoped Elastic IP Address of the account that has
+        all of pool_tags, in one call.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+
+    Kwargs:
+        pool_tags (dict): The tags every address must have.
+            default = None
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_addresses(client, {'pool': 'partners'})
+        [
+            true,
+            "",
+            [
+                {
+                    'PublicIp': '52.0.0.2',
+                    'Domain': 'vpc',
+                    'AllocationId': 'eipalloc-2345678'
+                }
+            ]
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ""
+    addresses = list()
+    params = {
+        'Filters': address_filters(pool_tags)
+    }
+    try:
+        if not check_mode:
+            addresses = client.describe_addresses(**params)['Addresses']
+        else:
+            addresses = [
+                address
+                for address in DRY_RUN_ALLOCATION_UNCONVERTED['Addresses']
+                if address_matches(address, params['Filters'])
+            ]
+        success = True
+
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+
+    return success, err_msg, addresses
+
+def get_pool_allocation_ids(client, pool_tags, count, exclude=None,
+                            check_mode=False):
+    """Draw Elastic IP Addresses from a pool of pre reserved, tagged and
+        unassociated addresses. ec2 selects the addresses by their tags.
+        Addresses are handed out sorted by their allocation id, so the same
+        pool always hands out the same addresses.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        pool_tags (dict): The tags every address of the pool has.
+        count (int): The number of addresses that are needed.
+
+    Kwargs:
+        exclude (list): Allocation ids that must not be handed out, because
+            they are already in use by nat gateways that are pending.
+            default = None
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> get_pool_allocation_ids(client, {'pool': 'partners'}, 2)
+        [
+            true,
+            "",
+            ['eipalloc-2345678', 'eipalloc-3456789']
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success, err_msg, addresses = (
+        describe_addresses(client, pool_tags, check_mode=check_mode)
+    )
+    if not success:
+        return success, err_msg, list()
+
+    exclude = set(exclude or list())
+    pool = sorted(
+        address['AllocationId'] for address in addresses
+        if not address.get('AssociationId')
+        and address['AllocationId'] not in exclude
+    )
+
+    if len(pool) < count:
+        err_msg = (
+            'EIP pool {0} has {1} unassociated addresses, {2} are needed'
+            .format(pool_tags, len(pool), count)
+        )
+        return False, err_msg, list()
+
+    return True, err_msg, pool[:count]
+
 def release_address(client, allocation_id, check_mode=False):
     """Release an EIP from your EIP Pool
     Args:
@@ -638,30 +1415,53 @@ def release_address(client, allocation_id, check_mode=False):
         >>> client = boto3.client('ec2')
         >>> allocation_id = "eipalloc-123456"
         >>> release_address(client, allocation_id)
-        True
+        (True, '')
 
     Returns:
-        Boolean
+        Tuple (bool, str)
     """
     if check_mode:
-        return True
+        return True, ''
 
     ip_released = False
+    err_msg = ''
     params = {
         'AllocationId': allocation_id,
     }
     try:
         client.release_address(**params)
         ip_released = True
-    except botocore.exceptions.ClientError:
-        pass
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+
+    return ip_released, err_msg
 
-    return ip_released
+def supports_connectivity_type(client):
+    """Check whether the botocore model of the client can create private
+        NAT Gateways. CreateNatGateway only takes SubnetId, AllocationId and
+        ClientToken in older releases, such as the pinned botocore 1.4.7.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> supports_connectivity_type(client)
+        False
+
+    Returns:
+        Bool
+    """
+    operation_model = (
+        client.meta.service_model.operation_model('CreateNatGateway')
+    )
+    return 'ConnectivityType' in operation_model.input_shape.members
 
 def create(client, subnet_id, allocation_id, client_token=None,
            wait=False, wait_timeout=0, if_exist_do_not_create=False,
-           check_mode=False):
-    """Create an Amazon NAT Gateway.
+           connectivity_type='public', poll_options=None, check_mode=False):
+    """Create an Amazon NAT Gateway. A private NAT Gateway fails right
+        away, in check mode as well, when botocore does not support it
+        (see supports_connectivity_type).
     Args:
         client (botocore.client.EC2): Boto3 client
         subnet_id (str): The subnet_id the nat resides in.
@@ -677,6 +1477,9 @@ def create(client, subnet_id, allocation_id, client_token=None,
             default = 0
         client_token (str):
             default = None
+        poll_options (dict): Keyword arguments for the waiter, such as
+            polling_secs, max_calls and metrics.
+            default = None
 
     Basic Usage:
         >>> client = boto3.client('ec2')
@@ -708,9 +1511,19 @@ def create(client, subnet_id, allocation_id, client_token=None,
         Tuple (bool, str, list)
     """
     params = {
-        'SubnetId': subnet_id,
-        'AllocationId': allocation_id
+        'SubnetId': subnet_id
     }
+    if connectivity_type == 'private':
+        if not supports_connectivity_type(client):
+            err_msg = (
+                'botocore {0} can not create a private nat gateway, '
+                'CreateNatGateway has no ConnectivityType. A newer botocore '
+                'is required.'.format(botocore.__version__)
+            )
+            return False, False, err_msg, None
+        params['ConnectivityType'] = connectivity_type
+    else:
+        params['AllocationId'] = allocation_id
     request_time = datetime.datetime.utcnow()
     changed = False
     success = False
@@ -725,10 +1538,19 @@ def create(client, subnet_id, allocation_id, client_token=None,
         if not check_mode:
             result = client.create_nat_gateway(**params)["NatGateway"]
         else:
-            result = DRY_RUN_GATEWAY_UNCONVERTED[0]
+            result = copy.deepcopy(DRY_RUN_GATEWAY_UNCONVERTED[0])
             result['CreateTime'] = datetime.datetime.utcnow()
-            result['NatGatewayAddresses'][0]['AllocationId'] = allocation_id
             result['SubnetId'] = subnet_id
+            if connectivity_type == 'private':
+                result['ConnectivityType'] = connectivity_type
+                result['NatGatewayAddresses'] = [
+                    {
+                        'NetworkInterfaceId': 'eni-1234567',
+                        'PrivateIp': '10.0.0.102'
+                    }
+                ]
+            else:
+                result['NatGatewayAddresses'][0]['AllocationId'] = allocation_id
 
         success = True
         changed = True
@@ -736,10 +1558,11 @@ def create(client, subnet_id, allocation_id, client_token=None,
         if token_provided and (request_time > create_time):
             changed = False
         elif wait:
+            created = result
             success, err_msg, result = (
                 wait_for_status(
                     client, wait_timeout, result['NatGatewayId'], 'available',
-                    check_mode=check_mode
+                    check_mode=check_mode, **(poll_options or dict())
                 )
             )
             if success:
@@ -747,8 +1570,8 @@ def create(client, subnet_id, allocation_id, client_token=None,
                     'Nat gateway {0} created'.format(result['nat_gateway_id'])
                 )
             if check_mode:
-                result['nat_gateway_addresses'][0]['allocation_id'] = allocation_id
-                result['subnet_id'] = subnet_id
+                result = convert_to_lower(created)
+                result['state'] = 'available'
 
     except botocore.exceptions.ClientError as e:
         if "IdempotentParameterMismatch" in e.message:
@@ -761,11 +1584,22 @@ def create(client, subnet_id, allocation_id, client_token=None,
             changed = False
             result = None
 
+    except botocore.exceptions.ParamValidationError as e:
+        err_msg = (
+            'botocore {0} can not create the nat gateway: {1}'
+            .format(botocore.__version__, str(e))
+        )
+        success = False
+        changed = False
+        result = None
+
     return success, changed, err_msg, result
 
 def pre_create(client, subnet_id, allocation_id=None, eip_address=None,
               if_exist_do_not_create=False, wait=False, wait_timeout=0,
-              client_token=None, check_mode=False):
+              client_token=None, eip_pool_tags=None,
+              connectivity_type='public', poll_options=None,
+              check_mode=False):
     """Create an Amazon NAT Gateway.
     Args:
         client (botocore.client.EC2): Boto3 client
@@ -785,6 +1619,16 @@ def pre_create(client, subnet_id, allocation_id=None, eip_address=None,
             default = 0
         client_token (str):
             default = None
+        eip_pool_tags (dict): Draw the EIP from the unassociated addresses
+            with these tags, instead of allocating a new one.
+            default = None
+        connectivity_type (str): public or private. A private nat gateway
+            has no EIP, so no address is looked up or allocated, and any
+            private nat gateway in the subnet makes the call idempotent.
+            default = public
+        poll_options (dict): Keyword arguments for the waiter, such as
+            polling_secs, max_calls and metrics.
+            default = None
 
     Basic Usage:
         >>> client = boto3.client('ec2')
@@ -820,7 +1664,22 @@ def pre_create(client, subnet_id, allocation_id=None, eip_address=None,
     err_msg = ""
     results = list()
 
-    if not allocation_id and not eip_address:
+    if connectivity_type == 'private':
+        existing_gateways, _ = (
+            gateway_in_subnet_exists(
+                client, subnet_id, connectivity_type=connectivity_type,
+                check_mode=check_mode
+            )
+        )
+        if existing_gateways:
+            err_msg = (
+                'Nat Gateway {0} already exists in subnet_id {1}'
+                .format(existing_gateways[0]['nat_gateway_id'], subnet_id)
+            )
+            return True, False, err_msg, existing_gateways[0]
+        allocation_id = None
+
+    elif not allocation_id and not eip_address:
         existing_gateways, allocation_id_exists = (
             gateway_in_subnet_exists(client, subnet_id, check_mode=check_mode)
         )
@@ -836,6 +1695,21 @@ def pre_create(client, subnet_id, allocation_id=None, eip_address=None,
                 )
             )
             return success, changed, err_msg, results
+        elif eip_pool_tags:
+            in_use = [
+                address.get('allocation_id')
+                for gw in existing_gateways
+                for address in gw['nat_gateway_addresses']
+            ]
+            success, err_msg, allocation_ids = (
+                get_pool_allocation_ids(
+                    client, eip_pool_tags, 1, exclude=in_use,
+                    check_mode=check_mode
+                )
+            )
+            if not success:
+                return success, False, err_msg, dict()
+            allocation_id = allocation_ids[0]
         else:
             success, err_msg, allocation_id = (
                 allocate_eip_address(client, check_mode=check_mode)
@@ -874,126 +1748,1031 @@ def pre_create(client, subnet_id, allocation_id=None, eip_address=None,
 
     success, changed, err_msg, results = create(
         client, subnet_id, allocation_id, client_token,
-        wait, wait_timeout, if_exist_do_not_create, check_mode=check_mode
+        wait, wait_timeout, if_exist_do_not_create,
+        connectivity_type=connectivity_type, poll_options=poll_options,
+        check_mode=check_mode
     )
 
     return success, changed, err_msg, results
 
-def remove(client, nat_gateway_id, wait=False, wait_timeout=0,
-           release_eip=False, check_mode=False):
-    """Delete an Amazon NAT Gateway.
+def describe_subnets(client, subnet_ids, check_mode=False):
+    """Retrieve the vpc and availability zone of a list of subnets.
     Args:
         client (botocore.client.EC2): Boto3 client
-        nat_gateway_id (str): The Amazon nat id.
+        subnet_ids (list): The subnet ids to describe.
 
     Kwargs:
-        wait (bool): Wait for the nat to be in the deleted state before returning.
-        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
-        release_eip (bool): Once the nat has been deleted, you can deallocate the eip from the vpc.
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
 
     Basic Usage:
         >>> client = boto3.client('ec2')
-        >>> nat_gw_id = 'nat-03835afb6e31df79b'
-        >>> remove(client, nat_gw_id, wait=True, wait_timeout=500, release_eip=True)
+        >>> describe_subnets(client, ['subnet-123456789'])
         [
             true,
             "",
             {
-                "nat_gateway_id": "nat-03835afb6e31df79b",
-                "subnet_id": "subnet-w4t12897",
-                "nat_gateway_addresses": [
-                    {
-                        "public_ip": "52.87.29.36",
-                        "network_interface_id": "eni-5579742d",
-                        "private_ip": "10.0.0.102",
-                        "allocation_id": "eipalloc-36014da3"
-                    }
-                ],
-                "state": "deleted",
-                "create_time": "2016-03-05T00:33:21.209000+00:00",
-                "delete_time": "2016-03-05T00:36:37.329000+00:00",
-                "vpc_id": "vpc-w68571b5"
+                "subnet-123456789": {
+                    "SubnetId": "subnet-123456789",
+                    "VpcId": "vpc-12345678",
+                    "AvailabilityZone": "us-west-2a"
+                }
             }
         ]
 
     Returns:
-        Tuple (bool, str, list)
+        Tuple (bool, str, dict)
     """
-    params = {
-        'NatGatewayId': nat_gateway_id
-    }
     success = False
-    changed = False
     err_msg = ""
-    results = list()
-    states = ['pending', 'available' ]
+    subnets = dict()
     try:
-        exist, _, gw = (
-            get_nat_gateways(
-                client, nat_gateway_id=nat_gateway_id,
-                states=states, check_mode=check_mode
-            )
-        )
-        if exist and len(gw) == 1:
-            results = gw[0]
-            if not check_mode:
-                client.delete_nat_gateway(**params)
-
-            allocation_id = (
-                results['nat_gateway_addresses'][0]['allocation_id']
-            )
-            changed = True
-            success = True
+        if not check_mode:
+            response = client.describe_subnets(SubnetIds=subnet_ids)
+            for subnet in response['Subnets']:
+                subnets[subnet['SubnetId']] = subnet
+        else:
+            for subnet in DRY_RUN_SUBNETS:
+                if subnet['SubnetId'] in subnet_ids:
+                    subnets[subnet['SubnetId']] = subnet
+        missing = sorted(set(subnet_ids).difference(subnets.keys()))
+        if missing:
             err_msg = (
-                'Nat gateway {0} is in a deleting state. Delete was successfull'
-                .format(nat_gateway_id)
+                'Subnets {0} do not exist'.format(', '.join(missing))
             )
-
-            if wait:
-                status_achieved, err_msg, results = (
-                    wait_for_status(
-                        client, wait_timeout, nat_gateway_id, 'deleted',
-                        check_mode=check_mode
-                    )
-                )
-                if status_achieved:
-                    err_msg = (
-                        'Nat gateway {0} was deleted successfully'
-                        .format(nat_gateway_id)
-                    )
+        else:
+            success = True
 
     except botocore.exceptions.ClientError as e:
         err_msg = str(e)
 
-    if release_eip:
-        eip_released = (
-            release_address(client, allocation_id, check_mode=check_mode)
-        )
-        if not eip_released:
-            err_msg = "Failed to release eip %s".format(allocation_id)
+    return success, err_msg, subnets
 
-    return success, changed, err_msg, results
+def fleet(client, subnet_ids, wait=False, wait_timeout=0, eip_pool_tags=None,
+          connectivity_type='public', poll_options=None, check_mode=False):
+    """Ensure there is one Amazon NAT Gateway per availability zone across a
+        list of subnets. Availability zones that already have a gateway in
+        one of the subnets are left alone, otherwise a gateway is created in
+        the first subnet (sorted by id) of that zone.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        subnet_ids (list): The subnet ids the nat gateways may reside in.
+            Every subnet must belong to the same vpc.
 
-def main():
-    argument_spec = ec2_argument_spec()
-    argument_spec.update(dict(
-        subnet_id=dict(type='str'),
-        eip_address=dict(type='str'),
-        allocation_id=dict(type='str'),
-        if_exist_do_not_create=dict(type='bool', default=False),
-        state=dict(default='present', choices=['present', 'absent']),
-        wait=dict(type='bool', default=False),
+    Kwargs:
+        wait (bool): Wait for the new nat gateways to be available before returning.
+            default = False
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+            default = 0
+        eip_pool_tags (dict): Draw the EIPs from the unassociated addresses
+            with these tags, instead of allocating new ones. The zones are
+            handed the addresses in order, and nothing is created when the
+            pool is too small.
+            default = None
+        connectivity_type (str): public or private. Only gateways of this
+            type count for a zone, and private gateways get no EIP.
+            default = public
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        poll_options (dict): Keyword arguments for the waiter, such as
+            polling_secs, max_calls and metrics.
+            default = None
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> subnet_ids = ['subnet-123456789', 'subnet-234567891']
+        >>> fleet(client, subnet_ids, wait=True, wait_timeout=500)
+        [
+            true,
+            true,
+            "Nat gateways created in us-west-2b",
+            {
+                "vpc_id": "vpc-12345678",
+                "nat_gateways": {
+                    "us-west-2a": {
+                        "nat_gateway_id": "nat-123456789",
+                        "subnet_id": "subnet-123456789",
+                        "state": "available",
+                        "vpc_id": "vpc-12345678"
+                    },
+                    "us-west-2b": {
+                        "nat_gateway_id": "nat-234567891",
+                        "subnet_id": "subnet-234567891",
+                        "state": "available",
+                        "vpc_id": "vpc-12345678"
+                    }
+                }
+            }
+        ]
+
+    Returns:
+        Tuple (bool, bool, str, dict)
+    """
+    changed = False
+    results = {
+        'nat_gateways': dict()
+    }
+
+    success, err_msg, subnets = (
+        describe_subnets(client, subnet_ids, check_mode=check_mode)
+    )
+    if not success:
+        return success, changed, err_msg, results
+
+    vpc_ids = set(subnet['VpcId'] for subnet in subnets.values())
+    if len(vpc_ids) != 1:
+        err_msg = (
+            'Subnets must belong to a single vpc, found {0}'
+            .format(', '.join(sorted(vpc_ids)))
+        )
+        return False, changed, err_msg, results
+    vpc_id = vpc_ids.pop()
+    results['vpc_id'] = vpc_id
+
+    success, err_msg, gateways = (
+        describe_vpc_nat_gateways(client, vpc_id, check_mode=check_mode)
+    )
+    if not success:
+        return success, changed, err_msg, results
+
+    zones = dict()
+    for subnet_id in sorted(subnets.keys()):
+        zone = subnets[subnet_id]['AvailabilityZone']
+        zones.setdefault(zone, list()).append(subnet_id)
+
+    missing_zones = list()
+    for zone in sorted(zones.keys()):
+        existing = [
+            gw for gw in gateways if gw['subnet_id'] in zones[zone]
+            and gw.get('connectivity_type', 'public') == connectivity_type
+        ]
+        if existing:
+            results['nat_gateways'][zone] = existing[0]
+        else:
+            missing_zones.append(zone)
+
+    if not missing_zones:
+        err_msg = 'Nat gateways already exist in every availability zone'
+        return True, changed, err_msg, results
+
+    allocated = False
+    if connectivity_type == 'private':
+        allocation_ids = [None] * len(missing_zones)
+    elif eip_pool_tags:
+        in_use = [
+            address.get('allocation_id')
+            for gw in gateways
+            for address in gw['nat_gateway_addresses']
+        ]
+        success, err_msg, allocation_ids = (
+            get_pool_allocation_ids(
+                client, eip_pool_tags, len(missing_zones), exclude=in_use,
+                check_mode=check_mode
+            )
+        )
+        if not success:
+            return success, changed, err_msg, results
+    else:
+        allocated = True
+        allocations = run_concurrently(
+            allocate_eip_address,
+            [{'client': client, 'check_mode': check_mode}] * len(missing_zones)
+        )
+        # Python 2 list comprehensions leak their variables, so they must
+        # not rebind allocated, which decides what is released below.
+        allocation_ids = [
+            allocation_id for ok, _, allocation_id in allocations if ok
+        ]
+        if len(allocation_ids) != len(missing_zones):
+            for allocation_id in allocation_ids:
+                release_address(client, allocation_id, check_mode=check_mode)
+            err_msg = [msg for ok, msg, _ in allocations if not ok][0]
+            return False, changed, err_msg, results
+
+    creates = run_concurrently(
+        create,
+        [
+            {
+                'client': client,
+                'subnet_id': zones[zone][0],
+                'allocation_id': allocation_id,
+                'connectivity_type': connectivity_type,
+                'check_mode': check_mode
+            }
+            for zone, allocation_id in zip(missing_zones, allocation_ids)
+        ]
+    )
+    errors = list()
+    created = dict()
+    for zone, allocation_id, create_result in (
+            zip(missing_zones, allocation_ids, creates)):
+        created_ok, created_changed, create_msg, gw = create_result
+        if created_ok:
+            changed = changed or created_changed
+            created[zone] = convert_to_lower(gw)
+        else:
+            if allocated:
+                release_address(client, allocation_id, check_mode=check_mode)
+            errors.append('{0}: {1}'.format(zone, create_msg))
+    results['nat_gateways'].update(created)
+
+    if errors:
+        return False, changed, '; '.join(errors), results
+
+    err_msg = (
+        'Nat gateways created in {0}'.format(', '.join(sorted(created)))
+    )
+    if wait:
+        success, wait_msg, waited = (
+            wait_for_gateways(
+                client, wait_timeout,
+                [gw['nat_gateway_id'] for gw in created.values()],
+                'available', check_mode=check_mode, **(poll_options or dict())
+            )
+        )
+        for zone, gw in created.items():
+            if gw['nat_gateway_id'] in waited:
+                results['nat_gateways'][zone] = waited[gw['nat_gateway_id']]
+        if not success:
+            err_msg = wait_msg
+
+    return success, changed, err_msg, results
+
+def remove(client, nat_gateway_id, wait=False, wait_timeout=0,
+           release_eip=False, poll_options=None, check_mode=False):
+    """Delete an Amazon NAT Gateway.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        nat_gateway_id (str): The Amazon nat id.
+
+    Kwargs:
+        wait (bool): Wait for the nat to be in the deleted state before returning.
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+        release_eip (bool): Once the nat has been deleted, you can deallocate the eip from the vpc.
+        poll_options (dict): Keyword arguments for the waiter, such as
+            polling_secs, max_calls and metrics.
+            default = None
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> nat_gw_id = 'nat-03835afb6e31df79b'
+        >>> remove(client, nat_gw_id, wait=True, wait_timeout=500, release_eip=True)
+        [
+            true,
+            "",
+            {
+                "nat_gateway_id": "nat-03835afb6e31df79b",
+                "subnet_id": "subnet-w4t12897",
+                "nat_gateway_addresses": [
+                    {
+                        "public_ip": "52.87.29.36",
+                        "network_interface_id": "eni-5579742d",
+                        "private_ip": "10.0.0.102",
+                        "allocation_id": "eipalloc-36014da3"
+                    }
+                ],
+                "state": "deleted",
+                "create_time": "2016-03-05T00:33:21.209000+00:00",
+                "delete_time": "2016-03-05T00:36:37.329000+00:00",
+                "vpc_id": "vpc-w68571b5"
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    params = {
+        'NatGatewayId': nat_gateway_id
+    }
+    success = False
+    changed = False
+    err_msg = ""
+    results = list()
+    states = ['pending', 'available' ]
+    try:
+        exist, _, gw = (
+            get_nat_gateways(
+                client, nat_gateway_id=nat_gateway_id,
+                states=states, check_mode=check_mode
+            )
+        )
+        if exist and len(gw) == 1:
+            results = gw[0]
+            if not check_mode:
+                client.delete_nat_gateway(**params)
+
+            allocation_id = (
+                results['nat_gateway_addresses'][0].get('allocation_id')
+            )
+            changed = True
+            success = True
+            err_msg = (
+                'Nat gateway {0} is in a deleting state. Delete was successfull'
+                .format(nat_gateway_id)
+            )
+
+            if wait:
+                status_achieved, err_msg, results = (
+                    wait_for_status(
+                        client, wait_timeout, nat_gateway_id, 'deleted',
+                        check_mode=check_mode, **(poll_options or dict())
+                    )
+                )
+                if status_achieved:
+                    err_msg = (
+                        'Nat gateway {0} was deleted successfully'
+                        .format(nat_gateway_id)
+                    )
+
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+
+    if release_eip and success and allocation_id:
+        eip_released, release_msg = (
+            release_address(client, allocation_id, check_mode=check_mode)
+        )
+        if not eip_released:
+            err_msg = (
+                "Failed to release eip {0}: {1}"
+                .format(allocation_id, release_msg)
+            )
+
+    return success, changed, err_msg, results
+
+def get_nat_gateways_by_id(client, nat_gateway_ids, check_mode=False):
+    """Retrieve a group of NAT Gateways by id in one call. Ids that do not
+        exist are left out, instead of failing the whole call.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        nat_gateway_ids (list): The Amazon nat ids.
+
+    Kwargs:
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> get_nat_gateways_by_id(client, ['nat-123456789'])
+        [
+            true,
+            "",
+            {
+                "nat-123456789": {
+                    "nat_gateway_id": "nat-123456789",
+                    "state": "available"
+                }
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    success, err_msg, found = (
+        get_nat_gateways(
+            client, nat_gateway_ids=nat_gateway_ids,
+            states=NAT_GATEWAY_STATES, check_mode=check_mode
+        )
+    )
+    gateways = dict()
+    for gw in found:
+        gateways[gw['nat_gateway_id']] = gw
+
+    return success, err_msg, gateways
+
+def delete_gateway(client, nat_gateway_id, check_mode=False):
+    """Issue the deletion of an Amazon NAT Gateway, without waiting for it.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        nat_gateway_id (str): The Amazon nat id.
+
+    Kwargs:
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> delete_gateway(client, 'nat-123456789')
+        (True, '')
+
+    Returns:
+        Tuple (bool, str)
+    """
+    err_msg = ''
+    if check_mode:
+        return True, err_msg
+    try:
+        client.delete_nat_gateway(NatGatewayId=nat_gateway_id)
+        return True, err_msg
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+    return False, err_msg
+
+def bulk_remove(client, nat_gateway_ids, wait=False, wait_timeout=0,
+                release_eip=False, poll_options=None, check_mode=False):
+    """Delete a group of Amazon NAT Gateways. Every deletion is issued up
+        front, then all of the gateways are polled together and each EIP is
+        released as soon as its gateway is deleted, so the total time is the
+        time of the slowest gateway instead of the sum of all of them.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        nat_gateway_ids (list): The Amazon nat ids.
+
+    Kwargs:
+        wait (bool): Wait for the nats to be in the deleted state before returning.
+            default = False
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+            default = 0
+        release_eip (bool): Release the EIP of every nat once it is deleted.
+            This always waits for the deleted state.
+            default = False
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        poll_options (dict): Keyword arguments for the waiter, such as
+            polling_secs, max_calls and metrics.
+            default = None
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> nat_gateway_ids = ['nat-123456789', 'nat-987654321']
+        >>> bulk_remove(client, nat_gateway_ids, wait_timeout=500, release_eip=True)
+        [
+            true,
+            true,
+            "Nat gateways nat-123456789, nat-987654321 were deleted successfully",
+            {
+                "nat_gateways": {
+                    "nat-123456789": {
+                        "nat_gateway_id": "nat-123456789",
+                        "state": "deleted"
+                    },
+                    "nat-987654321": {
+                        "nat_gateway_id": "nat-987654321",
+                        "state": "deleted"
+                    }
+                },
+                "released_eips": ["eipalloc-1234567", "eipalloc-7654321"]
+            }
+        ]
+
+    Returns:
+        Tuple (bool, bool, str, dict)
+    """
+    changed = False
+    results = {
+        'nat_gateways': dict(),
+        'released_eips': list()
+    }
+    errors = list()
+
+    success, err_msg, gateways = (
+        get_nat_gateways_by_id(client, nat_gateway_ids, check_mode=check_mode)
+    )
+    if not success:
+        return success, changed, err_msg, results
+    results['nat_gateways'] = gateways
+
+    to_delete = sorted(
+        gw_id for gw_id, gw in gateways.items()
+        if gw['state'] in ['pending', 'available']
+    )
+    deletes = run_concurrently(
+        delete_gateway,
+        [
+            {
+                'client': client,
+                'nat_gateway_id': gw_id,
+                'check_mode': check_mode
+            }
+            for gw_id in to_delete
+        ]
+    )
+    deleting = [
+        gw_id for gw_id, gw in gateways.items() if gw['state'] == 'deleting'
+    ]
+    for gw_id, (deleted, delete_msg) in zip(to_delete, deletes):
+        if deleted:
+            changed = True
+            deleting.append(gw_id)
+        else:
+            errors.append('{0}: {1}'.format(gw_id, delete_msg))
+
+    def release_eips(deleted_gateways):
+        allocation_ids = sorted(
+            address['allocation_id']
+            for gw in deleted_gateways
+            for address in gw.get('nat_gateway_addresses', [])
+            if address.get('allocation_id')
+        )
+        releases = run_concurrently(
+            release_address,
+            [
+                {
+                    'client': client,
+                    'allocation_id': allocation_id,
+                    'check_mode': check_mode
+                }
+                for allocation_id in allocation_ids
+            ]
+        )
+        for allocation_id, (released, release_msg) in (
+                zip(allocation_ids, releases)):
+            if released:
+                results['released_eips'].append(allocation_id)
+            else:
+                errors.append(
+                    'Failed to release eip {0}: {1}'
+                    .format(allocation_id, release_msg)
+                )
+
+    if deleting and check_mode:
+        for gw_id in deleting:
+            gateways[gw_id]['state'] = 'deleted'
+        if release_eip:
+            release_eips([gateways[gw_id] for gw_id in deleting])
+
+    elif deleting and (wait or release_eip):
+        on_status = None
+        if release_eip:
+            on_status = release_eips
+        status_achieved, wait_msg, waited = (
+            wait_for_gateways(
+                client, wait_timeout, deleting, 'deleted',
+                on_status=on_status, check_mode=check_mode,
+                **(poll_options or dict())
+            )
+        )
+        gateways.update(waited)
+        if not status_achieved:
+            errors.append(wait_msg)
+
+    missing = sorted(set(nat_gateway_ids).difference(gateways.keys()))
+    if errors:
+        return False, changed, '; '.join(errors), results
+    if deleting and (wait or release_eip):
+        err_msg = (
+            'Nat gateways {0} were deleted successfully'
+            .format(', '.join(sorted(deleting)))
+        )
+    elif deleting:
+        err_msg = (
+            'Nat gateways {0} are in a deleting state'
+            .format(', '.join(sorted(deleting)))
+        )
+    if missing:
+        err_msg = (
+            '{0} Nat gateways {1} do not exist'
+            .format(err_msg, ', '.join(missing)).strip()
+        )
+
+    return True, changed, err_msg, results
+
+def describe_nat_routes(client, nat_gateway_id, check_mode=False):
+    """Retrieve every route that targets a NAT Gateway. Amazon filters the
+        route tables on the nat gateway id, and returns them all in a single
+        call, DescribeRouteTables takes no MaxResults in the pinned botocore.
+        A route whose destination the installed botocore can not read, such
+        as an IPv6 route with the pinned botocore, has no destination_type.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        nat_gateway_id (str): The Amazon nat id.
+
+    Kwargs:
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_nat_routes(client, 'nat-123456789')
+        [
+            true,
+            "",
+            [
+                {
+                    "route_table_id": "rtb-1234567",
+                    "destination": "0.0.0.0/0",
+                    "destination_type": "ipv4"
+                }
+            ]
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ""
+    routes = list()
+    route_tables = list()
+    params = {
+        'Filters': [
+            {
+                'Name': 'route.nat-gateway-id',
+                'Values': [nat_gateway_id]
+            }
+        ]
+    }
+    try:
+        if not check_mode:
+            route_tables = (
+                client.describe_route_tables(**params)['RouteTables']
+            )
+        else:
+            route_tables = DRY_RUN_ROUTE_TABLES
+        success = True
+
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+
+    for route_table in route_tables:
+        for route in route_table.get('Routes', list()):
+            if route.get('NatGatewayId') != nat_gateway_id:
+                continue
+            nat_route = {
+                'route_table_id': route_table['RouteTableId'],
+                'destination': None,
+                'destination_type': None
+            }
+            for destination_type, key in ROUTE_DESTINATION_KEYS:
+                if route.get(key):
+                    nat_route['destination'] = route[key]
+                    nat_route['destination_type'] = destination_type
+                    break
+            routes.append(nat_route)
+
+    return success, err_msg, routes
+
+def unreplaceable_routes(client, routes):
+    """List the routes that replace_route can not point at another NAT
+        Gateway with the installed botocore, because it could not read
+        their destination or because ReplaceRoute can not take it.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        routes (list): The output of describe_nat_routes.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> routes = [
+            {
+                "route_table_id": "rtb-1234567",
+                "destination": "pl-1234567",
+                "destination_type": "prefix_list"
+            }
+        ]
+        >>> unreplaceable_routes(client, routes)
+        [
+            "rtb-1234567 pl-1234567: botocore 1.4.7 can not replace the route, ReplaceRoute has no DestinationPrefixListId"
+        ]
+
+    Returns:
+        List
+    """
+    operation_model = client.meta.service_model.operation_model('ReplaceRoute')
+    members = operation_model.input_shape.members
+    keys = dict(ROUTE_DESTINATION_KEYS)
+    errors = list()
+    for route in routes:
+        if not route['destination_type']:
+            errors.append(
+                '{0}: botocore {1} can not read the destination of a route'
+                .format(route['route_table_id'], botocore.__version__)
+            )
+        elif keys[route['destination_type']] not in members:
+            errors.append(
+                '{0} {1}: botocore {2} can not replace the route, '
+                'ReplaceRoute has no {3}'.format(
+                    route['route_table_id'], route['destination'],
+                    botocore.__version__, keys[route['destination_type']]
+                )
+            )
+    return errors
+
+def replace_route(client, route_table_id, destination, nat_gateway_id,
+                  destination_type='ipv4', check_mode=False):
+    """Point an existing route at another NAT Gateway.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        route_table_id (str): The route table id.
+        destination (str): The IPv4 or IPv6 cidr, or the prefix list id, of
+            the route.
+        nat_gateway_id (str): The Amazon nat id to route to.
+
+    Kwargs:
+        destination_type (str): ipv4, ipv6 or prefix_list.
+            default = ipv4
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> replace_route(client, 'rtb-1234567', '0.0.0.0/0', 'nat-234567891')
+        (True, '')
+
+    Returns:
+        Tuple (bool, str)
+    """
+    err_msg = ''
+    params = {
+        'RouteTableId': route_table_id,
+        'NatGatewayId': nat_gateway_id
+    }
+    params[dict(ROUTE_DESTINATION_KEYS)[destination_type]] = destination
+    if check_mode:
+        return True, err_msg
+    try:
+        client.replace_route(**params)
+        return True, err_msg
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+    except botocore.exceptions.ParamValidationError as e:
+        err_msg = (
+            'botocore {0} can not replace the route: {1}'
+            .format(botocore.__version__, str(e))
+        )
+    return False, err_msg
+
+def replace(client, nat_gateway_id, subnet_id=None, allocation_id=None,
+            eip_address=None, eip_pool_tags=None, wait=False, wait_timeout=0,
+            release_eip=False, poll_options=None, check_mode=False):
+    """Replace an Amazon NAT Gateway without downtime. The routes of the
+        old gateway are checked first, nothing is created when one of them
+        can not be swapped. The new gateway is then created and waited on
+        until it is available, the routes are looked up again and every one
+        of them is swapped with ReplaceRoute, concurrently across route
+        tables, and only then is the old gateway deleted. Traffic only moves
+        during the ReplaceRoute call of its own route. When the new gateway
+        does not become available, or the routes of the old one can not be
+        looked up or swapped, the new gateway is deleted and an EIP
+        allocated for it is released.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        nat_gateway_id (str): The Amazon nat id of the gateway to replace.
+
+    Kwargs:
+        subnet_id (str): The subnet of the new gateway. The new gateway has
+            the connectivity type of the gateway being replaced, and the
+            eip arguments are ignored for private gateways.
+            default = the subnet of the gateway being replaced
+        allocation_id (str): The eip Amazon identifier of the new gateway.
+            default = None
+        eip_address (str): The Elastic IP Address of the new gateway.
+            default = None
+        eip_pool_tags (dict): Draw the EIP of the new gateway from the
+            unassociated addresses with these tags.
+            default = None
+        wait (bool): Wait for the old nat to be in the deleted state before returning.
+            default = False
+        wait_timeout (int): Number of seconds to wait for each gateway.
+            default = 0
+        release_eip (bool): Release the EIP of the old nat once it is deleted.
+            default = False
+        check_mode (bool): if set to true, do not run anything and
+            falsify the results.
+        poll_options (dict): Keyword arguments for the waiter, such as
+            polling_secs, max_calls and metrics.
+            default = None
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> replace(client, 'nat-123456789', wait_timeout=500, release_eip=True)
+        [
+            true,
+            true,
+            "Nat gateway nat-123456789 was replaced by nat-234567891",
+            {
+                "nat_gateway_id": "nat-234567891",
+                "subnet_id": "subnet-123456789",
+                "state": "available",
+                "replaced_nat_gateway_id": "nat-123456789",
+                "replaced_routes": [
+                    {
+                        "route_table_id": "rtb-1234567",
+                        "destination": "0.0.0.0/0",
+                        "destination_type": "ipv4"
+                    }
+                ],
+                "released_eips": ["eipalloc-1234567"]
+            }
+        ]
+
+    Returns:
+        Tuple (bool, bool, str, dict)
+    """
+    changed = False
+    results = dict()
+
+    success, err_msg, gateways = (
+        get_nat_gateways_by_id(client, [nat_gateway_id], check_mode=check_mode)
+    )
+    if not success:
+        return success, changed, err_msg, results
+    old_gateway = gateways.get(nat_gateway_id)
+    if not old_gateway or old_gateway['state'] != 'available':
+        err_msg = (
+            'Nat gateway {0} does not exist or is not available'
+            .format(nat_gateway_id)
+        )
+        return False, changed, err_msg, results
+    if not subnet_id:
+        subnet_id = old_gateway['subnet_id']
+    connectivity_type = old_gateway.get('connectivity_type', 'public')
+
+    success, err_msg, routes = (
+        describe_nat_routes(client, nat_gateway_id, check_mode=check_mode)
+    )
+    if not success:
+        return success, changed, err_msg, results
+    errors = unreplaceable_routes(client, routes)
+    if errors:
+        err_msg = (
+            'Nat gateway {0} can not be replaced, some of its routes can not '
+            'be swapped: {1}'.format(nat_gateway_id, '; '.join(errors))
+        )
+        return False, changed, err_msg, results
+
+    allocated = False
+    if connectivity_type == 'private':
+        allocation_id = None
+    elif eip_address:
+        allocation_id, err_msg = (
+            get_eip_allocation_id_by_address(
+                client, eip_address, check_mode=check_mode
+            )
+        )
+        if not allocation_id:
+            return False, changed, err_msg, results
+    elif eip_pool_tags:
+        in_use = [
+            address.get('allocation_id')
+            for address in old_gateway['nat_gateway_addresses']
+        ]
+        success, err_msg, allocation_ids = (
+            get_pool_allocation_ids(
+                client, eip_pool_tags, 1, exclude=in_use,
+                check_mode=check_mode
+            )
+        )
+        if not success:
+            return success, changed, err_msg, results
+        allocation_id = allocation_ids[0]
+    elif not allocation_id:
+        allocated, err_msg, allocation_id = (
+            allocate_eip_address(client, check_mode=check_mode)
+        )
+        if not allocated:
+            return False, changed, err_msg, results
+
+    success, changed, err_msg, new_gateway = (
+        create(
+            client, subnet_id, allocation_id,
+            connectivity_type=connectivity_type, check_mode=check_mode
+        )
+    )
+    if not success:
+        if allocated:
+            release_address(client, allocation_id, check_mode=check_mode)
+        return success, changed, err_msg, results
+    new_gateway = convert_to_lower(new_gateway)
+    new_gateway_id = new_gateway['nat_gateway_id']
+    results.update(new_gateway)
+    results['replaced_nat_gateway_id'] = nat_gateway_id
+
+    def discard_new_gateway(err_msg):
+        """Delete the new gateway, and release its EIP when it was allocated
+            by replace. A failed gateway is not deleted by bulk_remove, its
+            EIP is released right away.
+        """
+        removed_ok, _, remove_msg, removed = (
+            bulk_remove(
+                client, [new_gateway_id], wait_timeout=wait_timeout,
+                release_eip=allocated, poll_options=poll_options,
+                check_mode=check_mode
+            )
+        )
+        errors = list()
+        if not removed_ok:
+            errors.append(remove_msg)
+        if allocated and allocation_id not in removed['released_eips']:
+            released, release_msg = (
+                release_address(client, allocation_id, check_mode=check_mode)
+            )
+            if not released:
+                errors.append(release_msg)
+        if errors:
+            return (
+                '{0}. Nat gateway {1} could not be cleaned up: {2}'
+                .format(err_msg, new_gateway_id, '; '.join(errors))
+            )
+        return (
+            '{0}. Nat gateway {1} was deleted'.format(err_msg, new_gateway_id)
+        )
+
+    success, err_msg, waited = (
+        wait_for_gateways(
+            client, wait_timeout, [new_gateway_id], 'available',
+            check_mode=check_mode, **(poll_options or dict())
+        )
+    )
+    results.update(waited.get(new_gateway_id, dict()))
+    if not success:
+        return success, changed, discard_new_gateway(err_msg), results
+
+    # Routes may have been added while the new gateway was coming up.
+    success, err_msg, routes = (
+        describe_nat_routes(client, nat_gateway_id, check_mode=check_mode)
+    )
+    if not success:
+        return success, changed, discard_new_gateway(err_msg), results
+    errors = unreplaceable_routes(client, routes)
+    if errors:
+        err_msg = (
+            'Some routes of nat gateway {0} can not be swapped: {1}'
+            .format(nat_gateway_id, '; '.join(errors))
+        )
+        return False, changed, discard_new_gateway(err_msg), results
+
+    swaps = run_concurrently(
+        replace_route,
+        [
+            {
+                'client': client,
+                'route_table_id': route['route_table_id'],
+                'destination': route['destination'],
+                'nat_gateway_id': new_gateway_id,
+                'destination_type': route['destination_type'],
+                'check_mode': check_mode
+            }
+            for route in routes
+        ]
+    )
+    results['replaced_routes'] = list()
+    errors = list()
+    for route, (swapped, swap_msg) in zip(routes, swaps):
+        if swapped:
+            results['replaced_routes'].append(route)
+        else:
+            errors.append(
+                '{0} {1}: {2}'.format(
+                    route['route_table_id'], route['destination'], swap_msg
+                )
+            )
+    if errors:
+        err_msg = (
+            'Nat gateway {0} was kept, some routes still target it: {1}'
+            .format(nat_gateway_id, '; '.join(errors))
+        )
+        return False, changed, err_msg, results
+
+    success, _, err_msg, removed = (
+        bulk_remove(
+            client, [nat_gateway_id], wait, wait_timeout, release_eip,
+            poll_options=poll_options, check_mode=check_mode
+        )
+    )
+    results['released_eips'] = removed.get('released_eips', list())
+    if success:
+        err_msg = (
+            'Nat gateway {0} was replaced by {1}'
+            .format(nat_gateway_id, new_gateway_id)
+        )
+
+    return success, changed, err_msg, results
+
+def main():
+    argument_spec = ec2_argument_spec()
+    argument_spec.update(dict(
+        subnet_id=dict(type='str'),
+        subnet_ids=dict(type='list'),
+        eip_address=dict(type='str'),
+        allocation_id=dict(type='str'),
+        eip_pool_tags=dict(type='dict'),
+        if_exist_do_not_create=dict(type='bool', default=False),
+        state=dict(
+            default='present', choices=['present', 'absent', 'replaced']
+        ),
+        wait=dict(type='bool', default=False),
         wait_timeout=dict(type='int', default=320, required=False),
+        poll_interval=dict(type='int', default=POLLING_SECS),
+        max_poll_calls=dict(type='int'),
         release_eip=dict(type='bool', default=False),
         nat_gateway_id=dict(type='str'),
+        nat_gateway_ids=dict(type='list'),
         client_token=dict(type='str'),
+        connectivity_type=dict(
+            default='public', choices=['public', 'private']
+        ),
         )
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
         mutually_exclusive=[
-            ['allocation_id', 'eip_address']
+            ['allocation_id', 'eip_address'],
+            ['subnet_id', 'subnet_ids'],
+            ['subnet_ids', 'allocation_id'],
+            ['subnet_ids', 'eip_address'],
+            ['subnet_ids', 'client_token'],
+            ['eip_pool_tags', 'allocation_id'],
+            ['eip_pool_tags', 'eip_address'],
+            ['nat_gateway_id', 'nat_gateway_ids']
         ]
     )
 
@@ -1004,14 +2783,24 @@ def main():
     state = module.params.get('state').lower()
     check_mode = module.check_mode
     subnet_id = module.params.get('subnet_id')
+    subnet_ids = module.params.get('subnet_ids')
     allocation_id = module.params.get('allocation_id')
     eip_address = module.params.get('eip_address')
+    eip_pool_tags = module.params.get('eip_pool_tags')
     nat_gateway_id = module.params.get('nat_gateway_id')
+    nat_gateway_ids = module.params.get('nat_gateway_ids')
     wait = module.params.get('wait')
     wait_timeout = module.params.get('wait_timeout')
     release_eip = module.params.get('release_eip')
     client_token = module.params.get('client_token')
     if_exist_do_not_create = module.params.get('if_exist_do_not_create')
+    connectivity_type = module.params.get('connectivity_type')
+    poll_metrics = dict()
+    poll_options = {
+        'polling_secs': module.params.get('poll_interval'),
+        'max_calls': module.params.get('max_poll_calls'),
+        'metrics': poll_metrics
+    }
 
     try:
         region, ec2_url, aws_connect_kwargs = (
@@ -1029,8 +2818,24 @@ def main():
     changed = False
     err_msg = ''
 
+    if connectivity_type == 'private' and state == 'present':
+        for param in ['allocation_id', 'eip_address', 'eip_pool_tags']:
+            if module.params.get(param):
+                module.fail_json(
+                    msg='{0} can not be used with a private nat gateway'
+                    .format(param)
+                )
+
     #Ensure resource is present
-    if state == 'present':
+    if state == 'present' and subnet_ids:
+        success, changed, err_msg, results = (
+            fleet(
+                client, subnet_ids, wait, wait_timeout, eip_pool_tags,
+                connectivity_type=connectivity_type,
+                poll_options=poll_options, check_mode=check_mode
+            )
+        )
+    elif state == 'present':
         if not subnet_id:
             module.fail_json(msg='subnet_id is required for creation')
 
@@ -1038,7 +2843,27 @@ def main():
             pre_create(
                 client, subnet_id, allocation_id, eip_address,
                 if_exist_do_not_create, wait, wait_timeout,
-                client_token, check_mode=check_mode
+                client_token, eip_pool_tags,
+                connectivity_type=connectivity_type,
+                poll_options=poll_options, check_mode=check_mode
+            )
+        )
+    elif state == 'replaced':
+        if not nat_gateway_id:
+            module.fail_json(msg='nat_gateway_id is required for replacement')
+
+        success, changed, err_msg, results = (
+            replace(
+                client, nat_gateway_id, subnet_id, allocation_id, eip_address,
+                eip_pool_tags, wait, wait_timeout, release_eip,
+                poll_options=poll_options, check_mode=check_mode
+            )
+        )
+    elif nat_gateway_ids:
+        success, changed, err_msg, results = (
+            bulk_remove(
+                client, nat_gateway_ids, wait, wait_timeout, release_eip,
+                poll_options=poll_options, check_mode=check_mode
             )
         )
     else:
@@ -1049,10 +2874,13 @@ def main():
             success, changed, err_msg, results = (
                 remove(
                     client, nat_gateway_id, wait, wait_timeout, release_eip,
-                    check_mode=check_mode
+                    poll_options=poll_options, check_mode=check_mode
                 )
             )
 
+    if poll_metrics:
+        results['poll_metrics'] = poll_metrics
+
     if not success:
         module.exit_json(
             msg=err_msg, success=success, changed=changed
@@ -0,0 +1,721 @@
+#!/usr/bin/python
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+DOCUMENTATION = '''
+---
+module: ec2_vpc_nat_gateway_facts
+short_description: Retrieve the facts of every NAT Gateway in an AWS virtual private cloud.
+description:
+  - Retrieve every NAT Gateway of a VPC, indexed by NAT Gateway id, together with the route tables that send traffic to each of them.
+  - The NAT Gateways, the route tables and the subnets of the VPC are each described once, following every page of NAT Gateways, and the 3 calls run concurrently. The gateways are indexed by subnet, availability zone, EIP and state, and every filter is answered from that index, so no call is made per gateway.
+version_added: "2.2"
+author: "Allen Sanabria (@linuxdynasty)"
+requirements: [boto3, botocore]
+options:
+  vpc_id:
+    description:
+      - The VPC to retrieve the NAT Gateways from.
+    required: true
+  subnet_ids:
+    description:
+      - Only return the NAT Gateways in one of these subnets.
+    required: false
+  availability_zones:
+    description:
+      - Only return the NAT Gateways in one of these availability zones.
+    required: false
+  eip_addresses:
+    description:
+      - Only return the NAT Gateways that use one of these EIPs. An EIP can be a public ip or an allocation id.
+    required: false
+  states:
+    description:
+      - Only return the NAT Gateways in one of these states.
+    required: false
+    choices: ['pending', 'failed', 'available', 'deleting', 'deleted']
+extends_documentation_fragment:
+    - aws
+    - ec2
+requirements: ['boto3']
+'''
+
+EXAMPLES = '''
+# Retrieve every NAT Gateway in a VPC and the route tables that use them
+- ec2_vpc_nat_gateway_facts:
+    vpc_id: vpc-12345678
+  register: nat_gateways
+
+# Retrieve the available NAT Gateway of an availability zone
+- ec2_vpc_nat_gateway_facts:
+    vpc_id: vpc-12345678
+    availability_zones:
+      - us-west-2a
+    states:
+      - available
+  register: nat_gateways
+
+# Find the NAT Gateway that uses a partner allowlisted EIP
+- ec2_vpc_nat_gateway_facts:
+    vpc_id: vpc-12345678
+    eip_addresses:
+      - 55.55.55.55
+  register: nat_gateways
+'''
+
+RETURN = '''
+nat_gateways:
+    description: The matching NAT Gateways, indexed by NAT Gateway id. Each gateway carries its availability zone and the routes that target it.
+    returned: success
+    type: dict
+    sample: {
+        "nat-123456789": {
+            "nat_gateway_id": "nat-123456789",
+            "subnet_id": "subnet-123456789",
+            "availability_zone": "us-west-2a",
+            "nat_gateway_addresses": [
+                {
+                    "public_ip": "55.55.55.55",
+                    "network_interface_id": "eni-1234567",
+                    "private_ip": "10.0.0.102",
+                    "allocation_id": "eipalloc-1234567"
+                }
+            ],
+            "state": "available",
+            "create_time": "2016-03-05T05:19:20.282000+00:00",
+            "vpc_id": "vpc-12345678",
+            "route_tables": [
+                {
+                    "route_table_id": "rtb-1234567",
+                    "destination": "0.0.0.0/0",
+                    "main": false,
+                    "subnet_ids": ["subnet-2345678"]
+                }
+            ]
+        }
+    }
+'''
+import re
+import datetime
+from multiprocessing.pool import ThreadPool
+
+try:
+    import boto3
+    import botocore.exceptions
+    HAS_BOTO3 = True
+except ImportError:
+    HAS_BOTO3 = False
+
+# The indexes built by index_nat_gateways.
+INDEX_NAMES = [
+    'subnet_id', 'availability_zone', 'allocation_id', 'public_ip', 'state'
+]
+
+# Upper bound on the number of EC2 api calls this module keeps in flight.
+MAX_CONCURRENT_REQUESTS = 10
+
+DRY_RUN_NAT_GATEWAYS = [
+    {
+        'VpcId': 'vpc-12345678',
+        'State': 'available',
+        'NatGatewayId': 'nat-123456789',
+        'SubnetId': 'subnet-123456789',
+        'NatGatewayAddresses': [
+            {
+                'PublicIp': '55.55.55.55',
+                'NetworkInterfaceId': 'eni-1234567',
+                'AllocationId': 'eipalloc-1234567',
+                'PrivateIp': '10.0.0.102'
+            }
+        ],
+        'CreateTime': datetime.datetime(2016, 3, 5, 5, 19, 20, 282000)
+    },
+    {
+        'VpcId': 'vpc-12345678',
+        'State': 'available',
+        'NatGatewayId': 'nat-234567891',
+        'SubnetId': 'subnet-234567891',
+        'NatGatewayAddresses': [
+            {
+                'PublicIp': '55.55.55.56',
+                'NetworkInterfaceId': 'eni-2345678',
+                'AllocationId': 'eipalloc-2345678',
+                'PrivateIp': '10.0.1.102'
+            }
+        ],
+        'CreateTime': datetime.datetime(2016, 3, 5, 5, 19, 20, 282000)
+    },
+    {
+        'VpcId': 'vpc-12345678',
+        'State': 'deleted',
+        'NatGatewayId': 'nat-345678912',
+        'SubnetId': 'subnet-123456789',
+        'NatGatewayAddresses': [
+            {
+                'PublicIp': '55.55.55.57',
+                'NetworkInterfaceId': 'eni-3456789',
+                'AllocationId': 'eipalloc-3456789',
+                'PrivateIp': '10.0.0.103'
+            }
+        ],
+        'CreateTime': datetime.datetime(2016, 3, 1, 5, 19, 20, 282000),
+        'DeleteTime': datetime.datetime(2016, 3, 2, 5, 19, 20, 282000)
+    }
+]
+
+DRY_RUN_SUBNETS = [
+    {
+        'SubnetId': 'subnet-123456789',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2a'
+    },
+    {
+        'SubnetId': 'subnet-234567891',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2b'
+    },
+    {
+        'SubnetId': 'subnet-345678912',
+        'VpcId': 'vpc-12345678',
+        'AvailabilityZone': 'us-west-2a'
+    }
+]
+
+DRY_RUN_ROUTE_TABLES = [
+    {
+        'RouteTableId': 'rtb-1234567',
+        'VpcId': 'vpc-12345678',
+        'Routes': [
+            {
+                'DestinationCidrBlock': '10.0.0.0/16',
+                'GatewayId': 'local',
+                'State': 'active'
+            },
+            {
+                'DestinationCidrBlock': '0.0.0.0/0',
+                'NatGatewayId': 'nat-123456789',
+                'State': 'active'
+            }
+        ],
+        'Associations': [
+            {
+                'RouteTableAssociationId': 'rtbassoc-1234567',
+                'RouteTableId': 'rtb-1234567',
+                'SubnetId': 'subnet-345678912',
+                'Main': False
+            }
+        ]
+    },
+    {
+        'RouteTableId': 'rtb-2345678',
+        'VpcId': 'vpc-12345678',
+        'Routes': [
+            {
+                'DestinationCidrBlock': '10.0.0.0/16',
+                'GatewayId': 'local',
+                'State': 'active'
+            },
+            {
+                'DestinationCidrBlock': '0.0.0.0/0',
+                'NatGatewayId': 'nat-123456789',
+                'State': 'active'
+            },
+            {
+                'DestinationCidrBlock': '192.168.0.0/16',
+                'NatGatewayId': 'nat-234567891',
+                'State': 'active'
+            }
+        ],
+        'Associations': [
+            {
+                'RouteTableAssociationId': 'rtbassoc-2345678',
+                'RouteTableId': 'rtb-2345678',
+                'Main': True
+            }
+        ]
+    }
+]
+
+
+def convert_to_lower(data):
+    """Convert all uppercase keys in dict with lowercase_
+    Args:
+        data (dict): Dictionary with keys that have upper cases in them
+            Example.. FooBar == foo_bar
+            if a val is of type datetime.datetime, it will be converted to
+            the ISO 8601
+    Basic Usage:
+        >>> test = {'FooBar': []}
+        >>> test = convert_to_lower(test)
+        {
+            'foo_bar': []
+        }
+
+    Returns:
+        Dictionary
+    """
+    results = dict()
+    if isinstance(data, dict):
+        for key, val in data.items():
+            key = re.sub(r'(([A-Z]{1,3}){1})', r'_\1', key).lower()
+            if key[0] == '_':
+                key = key[1:]
+            if isinstance(val, datetime.datetime):
+                results[key] = val.isoformat()
+            elif isinstance(val, dict):
+                results[key] = convert_to_lower(val)
+            elif isinstance(val, list):
+                converted = list()
+                for item in val:
+                    converted.append(convert_to_lower(item))
+                results[key] = converted
+            else:
+                results[key] = val
+    elif isinstance(data, basestring):
+        return data
+    return results
+
+
+def run_concurrently(func, calls, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Run func once for every set of keyword arguments in calls, using a
+        bounded pool of threads. Boto3 clients are thread safe, so the same
+        client can be shared across every call.
+    Args:
+        func (function): The function to call.
+        calls (list): List of dictionaries, each one containing the keyword
+            arguments for a single call to func.
+
+    Kwargs:
+        max_workers (int): The maximum number of calls in flight at once.
+            default=MAX_CONCURRENT_REQUESTS
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> calls = [
+            {
+                'client': client,
+                'vpc_id': 'vpc-12345678'
+            }
+        ]
+        >>> run_concurrently(describe_subnets, calls)
+        [(True, '', [...])]
+
+    Returns:
+        List, containing the result of each call in the same order as calls.
+    """
+    if not calls:
+        return list()
+    pool = ThreadPool(max(1, min(max_workers, len(calls))))
+    try:
+        return pool.map(lambda kwargs: func(**kwargs), calls)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def vpc_filter(vpc_id):
+    """Return the server side filter on a vpc id.
+    Args:
+        vpc_id (str): The vpc id.
+
+    Basic Usage:
+        >>> vpc_filter('vpc-12345678')
+        [{'Name': 'vpc-id', 'Values': ['vpc-12345678']}]
+
+    Returns:
+        List
+    """
+    return [{'Name': 'vpc-id', 'Values': [vpc_id]}]
+
+
+def describe_nat_gateways(client, vpc_id, check_mode=False):
+    """Retrieve every NAT Gateway of a vpc, following the NextToken until
+        all pages have been read.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_id (str): The vpc id.
+
+    Kwargs:
+        check_mode (bool): Return DRY_RUN_NAT_GATEWAYS instead of making
+            the api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_nat_gateways(client, 'vpc-12345678')
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = True
+    err_msg = ''
+    results = list()
+    params = {
+        'Filter': vpc_filter(vpc_id),
+        'MaxResults': 1000,
+    }
+    try:
+        if check_mode:
+            results = [
+                gw for gw in DRY_RUN_NAT_GATEWAYS if gw['VpcId'] == vpc_id
+            ]
+        else:
+            while True:
+                response = client.describe_nat_gateways(**params)
+                results.extend(response['NatGateways'])
+                if not response.get('NextToken'):
+                    break
+                params['NextToken'] = response['NextToken']
+    except botocore.exceptions.ClientError as e:
+        success = False
+        err_msg = str(e)
+
+    return success, err_msg, results
+
+
+def describe_route_tables(client, vpc_id, check_mode=False):
+    """Retrieve every route table of a vpc in a single call.
+        DescribeRouteTables takes no MaxResults or NextToken in the pinned
+        botocore, and returns every matching route table at once.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_id (str): The vpc id.
+
+    Kwargs:
+        check_mode (bool): Return DRY_RUN_ROUTE_TABLES instead of making
+            the api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_route_tables(client, 'vpc-12345678')
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = True
+    err_msg = ''
+    results = list()
+    params = {
+        'Filters': vpc_filter(vpc_id),
+    }
+    try:
+        if check_mode:
+            results = [
+                route_table for route_table in DRY_RUN_ROUTE_TABLES
+                if route_table['VpcId'] == vpc_id
+            ]
+        else:
+            results = client.describe_route_tables(**params)['RouteTables']
+    except botocore.exceptions.ClientError as e:
+        success = False
+        err_msg = str(e)
+
+    return success, err_msg, results
+
+
+def describe_subnets(client, vpc_id, check_mode=False):
+    """Retrieve every subnet of a vpc.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_id (str): The vpc id.
+
+    Kwargs:
+        check_mode (bool): Return DRY_RUN_SUBNETS instead of making the
+            api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_subnets(client, 'vpc-12345678')
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = True
+    err_msg = ''
+    results = list()
+    try:
+        if check_mode:
+            results = [
+                subnet for subnet in DRY_RUN_SUBNETS
+                if subnet['VpcId'] == vpc_id
+            ]
+        else:
+            results = (
+                client.describe_subnets(Filters=vpc_filter(vpc_id))['Subnets']
+            )
+    except botocore.exceptions.ClientError as e:
+        success = False
+        err_msg = str(e)
+
+    return success, err_msg, results
+
+
+def route_references(route_tables):
+    """Return the routes that target a NAT Gateway, indexed by NAT Gateway
+        id, together with the subnets the route table is associated with.
+    Args:
+        route_tables (list): List of route tables, as returned by
+            describe_route_tables.
+
+    Basic Usage:
+        >>> references = route_references(DRY_RUN_ROUTE_TABLES)
+        >>> references['nat-234567891']
+        [
+            {
+                'route_table_id': 'rtb-2345678',
+                'destination': '192.168.0.0/16',
+                'main': True,
+                'subnet_ids': []
+            }
+        ]
+
+    Returns:
+        Dictionary
+    """
+    references = dict()
+    for route_table in route_tables:
+        associations = route_table.get('Associations', list())
+        subnet_ids = sorted(
+            association['SubnetId'] for association in associations
+            if association.get('SubnetId')
+        )
+        main = any(
+            association.get('Main', False) for association in associations
+        )
+        for route in route_table.get('Routes', list()):
+            nat_gateway_id = route.get('NatGatewayId')
+            if not nat_gateway_id:
+                continue
+            destination = (
+                route.get('DestinationCidrBlock')
+                or route.get('DestinationIpv6CidrBlock')
+            )
+            references.setdefault(nat_gateway_id, list()).append(
+                {
+                    'route_table_id': route_table['RouteTableId'],
+                    'destination': destination,
+                    'main': main,
+                    'subnet_ids': subnet_ids,
+                }
+            )
+    return references
+
+
+def index_nat_gateways(gateways, subnet_zones):
+    """Index NAT Gateways by subnet, availability zone, allocation id,
+        public ip and state. Every index maps a value to the set of NAT
+        Gateway ids that have it.
+    Args:
+        gateways (list): List of NAT Gateways, as returned by
+            describe_nat_gateways.
+        subnet_zones (dict): The availability zone of every subnet id.
+
+    Basic Usage:
+        >>> subnet_zones = {'subnet-123456789': 'us-west-2a'}
+        >>> index = index_nat_gateways(DRY_RUN_NAT_GATEWAYS, subnet_zones)
+        >>> index['availability_zone']['us-west-2a']
+        set(['nat-123456789', 'nat-345678912'])
+
+    Returns:
+        Dictionary
+    """
+    index = dict()
+    for name in INDEX_NAMES:
+        index[name] = dict()
+    for gw in gateways:
+        nat_gateway_id = gw['NatGatewayId']
+        addresses = gw.get('NatGatewayAddresses', list())
+        values = {
+            'subnet_id': [gw.get('SubnetId')],
+            'availability_zone': [subnet_zones.get(gw.get('SubnetId'))],
+            'allocation_id': [
+                address.get('AllocationId') for address in addresses
+            ],
+            'public_ip': [address.get('PublicIp') for address in addresses],
+            'state': [gw.get('State')],
+        }
+        for name, keys in values.items():
+            for key in keys:
+                if key:
+                    index[name].setdefault(key, set()).add(nat_gateway_id)
+    return index
+
+
+def lookup(index, name, keys):
+    """Return the ids of the NAT Gateways that match one of keys in one of
+        the indexes.
+    Args:
+        index (dict): The output of index_nat_gateways.
+        name (str): One of INDEX_NAMES.
+        keys (list): The values to look up.
+
+    Basic Usage:
+        >>> subnet_zones = {'subnet-123456789': 'us-west-2a'}
+        >>> index = index_nat_gateways(DRY_RUN_NAT_GATEWAYS, subnet_zones)
+        >>> lookup(index, 'state', ['available'])
+        set(['nat-123456789', 'nat-234567891'])
+
+    Returns:
+        Set
+    """
+    found = set()
+    for key in keys:
+        found.update(index[name].get(key, set()))
+    return found
+
+
+def get_nat_gateways(client, vpc_id, subnet_ids=None, availability_zones=None,
+                     eip_addresses=None, states=None, check_mode=False):
+    """Retrieve the NAT Gateways of a vpc that match every filter, indexed by
+        NAT Gateway id, with the route tables that reference each of them.
+        The gateways, route tables and subnets are described once each and
+        concurrently, and every filter is answered from the index, so only
+        the matching gateways are converted.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_id (str): The vpc id.
+
+    Kwargs:
+        subnet_ids (list): List of subnet ids.
+        availability_zones (list): List of availability zones.
+        eip_addresses (list): List of public ips or allocation ids.
+        states (list): List of NAT Gateway states.
+        check_mode (bool): Use the DRY_RUN data instead of making the api
+            calls.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> get_nat_gateways(client, 'vpc-12345678', states=['available'])
+        (
+            True,
+            '',
+            {
+                'nat_gateways': {
+                    'nat-123456789': {
+                        'nat_gateway_id': 'nat-123456789',
+                        'availability_zone': 'us-west-2a',
+                        'route_tables': [...],
+                        ...
+                    }
+                }
+            }
+        )
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    results = {'nat_gateways': dict()}
+    describes = run_concurrently(
+        lambda func, **kwargs: func(**kwargs),
+        [
+            {
+                'func': func,
+                'client': client,
+                'vpc_id': vpc_id,
+                'check_mode': check_mode
+            }
+            for func in [
+                describe_nat_gateways, describe_route_tables, describe_subnets
+            ]
+        ]
+    )
+    for success, err_msg, _ in describes:
+        if not success:
+            return success, err_msg, results
+    gateways, route_tables, subnets = [found for _, _, found in describes]
+
+    subnet_zones = dict()
+    for subnet in subnets:
+        subnet_zones[subnet['SubnetId']] = subnet['AvailabilityZone']
+    index = index_nat_gateways(gateways, subnet_zones)
+    references = route_references(route_tables)
+
+    gateways_by_id = dict()
+    for gw in gateways:
+        gateways_by_id[gw['NatGatewayId']] = gw
+
+    matched = set(gateways_by_id)
+    for name, keys in [('subnet_id', subnet_ids),
+                       ('availability_zone', availability_zones),
+                       ('state', states)]:
+        if keys:
+            matched.intersection_update(lookup(index, name, keys))
+    if eip_addresses:
+        matched.intersection_update(
+            lookup(index, 'allocation_id', eip_addresses).union(
+                lookup(index, 'public_ip', eip_addresses)
+            )
+        )
+
+    for nat_gateway_id in matched:
+        gw = convert_to_lower(gateways_by_id[nat_gateway_id])
+        gw['availability_zone'] = subnet_zones.get(gw.get('subnet_id'))
+        gw['route_tables'] = references.get(nat_gateway_id, list())
+        results['nat_gateways'][nat_gateway_id] = gw
+
+    return True, '', results
+
+
+def main():
+    argument_spec = ec2_argument_spec()
+    argument_spec.update(dict(
+        vpc_id=dict(type='str', required=True),
+        subnet_ids=dict(type='list'),
+        availability_zones=dict(type='list'),
+        eip_addresses=dict(type='list'),
+        states=dict(type='list'),
+    ))
+
+    module = (
+        AnsibleModule(
+            argument_spec=argument_spec,
+            supports_check_mode=True,
+        )
+    )
+
+    if not HAS_BOTO3:
+        module.fail_json(msg='boto3 required for this module')
+
+    try:
+        region, ec2_url, aws_connect_kwargs = get_aws_connection_info(module, boto3=True)
+        client = boto3_conn(module, conn_type='client', resource='ec2', region=region, endpoint=ec2_url, **aws_connect_kwargs)
+    except botocore.exceptions.ClientError as e:
+        module.fail_json(msg="Boto3 Client Error - " + str(e.msg))
+
+    success, err_msg, results = (
+        get_nat_gateways(
+            client, module.params.get('vpc_id'),
+            subnet_ids=module.params.get('subnet_ids'),
+            availability_zones=module.params.get('availability_zones'),
+            eip_addresses=module.params.get('eip_addresses'),
+            states=module.params.get('states'),
+            check_mode=module.check_mode
+        )
+    )
+    if success:
+        module.exit_json(success=success, **results)
+    else:
+        module.fail_json(msg=err_msg)
+
+
+# import module snippets
+from ansible.module_utils.basic import *
+from ansible.module_utils.ec2 import *
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,12 @@ short_description: create, delete, accept, and reject VPC peering connections be
 description:
   - Read the AWS documentation for VPC Peering Connections
     U(http://docs.aws.amazon.com/AmazonVPC/latest/UserGuide/vpc-peering.html)
+  - With state=present, the primary and secondary IPv4 cidr blocks of both
+    vpcs, and the routes already in the route tables that will get a route
+    to the other vpc, are checked before anything is changed. The task fails
+    with the list of conflicts when the cidr blocks overlap, or when a
+    route table has a more specific route inside the cidr block of the
+    other vpc.
 version_added: "2.2"
 author: Allen Sanabria(@linuxdynasty)
 extends_documentation_fragment: aws
@@ -34,13 +40,29 @@ options:
     required: false
   accepter_routes:
     description:
-      - List of route table ids. These route tables will be updated with the
-      - CIDR block of the vpc_id using the vpc_peering_id that is generated when the peer is created.
+      - List of route table ids in the requester vpc. These route tables will be updated with the
+      - CIDR block of the vpc_peer_id using the vpc_peering_id that is generated when the peer is created.
+      - A route to that CIDR block with another target is replaced.
     required: false
   requester_routes:
     description:
-      - List of route table ids. These route tables will be updated with the
-      - CIDR block of the vpc_peer_id using the vpc_peering_id that is generated when the peer is created.
+      - List of route table ids in the accepter vpc. These route tables will be updated with the
+      - CIDR block of the vpc_id using the vpc_peering_id that is generated when the peer is created.
+      - When accept_with_profile is set, these route tables are updated with that profile.
+      - A route to that CIDR block with another target is replaced.
+    required: false
+  accepter_routes_selector:
+    description:
+      - Selects route tables in the requester vpc, that are updated like the
+        accepter_routes. A dictionary with all (every route table in the vpc),
+        tags (a dictionary of tags every route table has to match) or
+        subnet_ids (the route tables associated with these subnets).
+      - Resolved with a single describe_route_tables call per vpc.
+    required: false
+  requester_routes_selector:
+    description:
+      - Selects route tables in the accepter vpc, that are updated like the
+        requester_routes. Takes the same keys as accepter_routes_selector.
     required: false
   resource_tags:
     description:
@@ -61,9 +83,62 @@ options:
   state:
     description:
       - Create, delete, accept, reject a peering connection.
+      - mesh reconciles the peering connections between every vpc in vpcs.
     required: false
     default: present
-    choices: ['present', 'absent', 'accept', 'reject']
+    choices: ['present', 'absent', 'accept', 'reject', 'mesh']
+  vpcs:
+    description:
+      - Used with state=mesh. List of dictionaries containing vpc_id, and
+        optionally profile (the boto3 profile of the account that owns the
+        vpc), owner_id (the id of that account), route_tables (route table
+        ids that get a route to every vpc this vpc is peered with) and
+        route_table_selector (selects more of these route tables, like
+        accepter_routes_selector).
+      - Peering a vpc of another profile needs the id of its account. It is
+        taken from owner_id, or else from a peering connection of that vpc
+        found in the mesh snapshot, as describe_vpcs does not return it.
+    required: false
+  edges:
+    description:
+      - Used with state=mesh. List of [requester vpc id, accepter vpc id]
+        pairs that should be peered. Defaults to every pair of vpcs.
+    required: false
+  purge_edges:
+    description:
+      - Used with state=mesh. Delete the peering connections between vpcs
+        that are not part of edges.
+    required: false
+    default: false
+  wait_timeout:
+    description:
+      - Number of seconds to wait for a peering connection to become
+        pending-acceptance and then active, once it is created or accepted.
+        Every peering connection being waited on in an account is described
+        in a single call per poll, and the delay between polls backs off
+        up to 16 seconds.
+    required: false
+    default: 300
+  requester_options:
+    description:
+      - Peering options of the requester vpc, applied with profile once the
+        peering connection is active. Valid keys are
+        allow_dns_resolution_from_remote_vpc,
+        allow_egress_from_local_classic_link_to_remote_vpc and
+        allow_egress_from_local_vpc_to_remote_classic_link. Only the
+        options that differ from the current ones are modified.
+      - The task fails when the peering connection is not active yet, for
+        example without accept_peer, and when the installed botocore has
+        no modify_vpc_peering_connection_options (botocore 1.4.7 does
+        not).
+    required: false
+  accepter_options:
+    description:
+      - Peering options of the accepter vpc, applied with
+        accept_with_profile once the peering connection is active. Takes
+        the same keys as requester_options. Can also be used with
+        state=accept.
+    required: false
 '''
 EXAMPLES = '''
 # Complete example to create and accept a local peering connection and auto accept.
@@ -115,6 +190,26 @@ EXAMPLES = '''
       - Env: development
   register: vpc_peer
 
+# Add the routes to every route table in the requester vpc, and to the route
+# tables of the private subnets in the accepter vpc, without listing them.
+- name: Create local account VPC peering Connection and route every private subnet
+  ec2_vpc_peer:
+    region: us-west-2
+    vpc_id: vpc-12345678
+    peer_vpc_id: vpc-87654321
+    state: present
+    accept_peer: yes
+    accepter_routes_selector:
+      all: yes
+    requester_routes_selector:
+      subnet_ids:
+        - subnet-12345678
+        - subnet-87654321
+    resource_tags:
+      - Name: new_peer
+      - Env: development
+  register: vpc_peer
+
 # Complete example to create and accept a cross account peering connection and auto accept.
 # Boto3 profile for the other account must exist in ~/.aws/credentials
 - name: Create cross account VPC peering Connection and auto accept
@@ -130,6 +225,26 @@ EXAMPLES = '''
       - Env: development
   register: vpc_peer
 
+# Create a cross account peering connection and resolve the private dns
+# hostnames of each vpc from the other one.
+- name: Create cross account VPC peering Connection with dns resolution
+  ec2_vpc_peer:
+    region: us-west-2
+    vpc_id: vpc-12345678
+    peer_vpc_id: vpc-87654321
+    state: present
+    accept_peer: yes
+    accept_with_profile: boto3_profile_goes_here
+    peer_owner_id: 12345678910
+    requester_options:
+      allow_dns_resolution_from_remote_vpc: yes
+    accepter_options:
+      allow_dns_resolution_from_remote_vpc: yes
+    resource_tags:
+      - Name: new_peer
+      - Env: development
+  register: vpc_peer
+
 # Complete example to delete a local account peering connection.
 # Boto3 profile for the other account must exist in ~/.aws/credentials
 - name: Create cross account VPC peering Connection and auto accept
@@ -214,6 +329,28 @@ EXAMPLES = '''
     state: reject
     profile: boto3_profile_goes_here
   register: vpc_peer
+
+# Peer 3 vpcs, one of them in another account, and route between them.
+# Boto3 profile for the other account must exist in ~/.aws/credentials
+- name: Create a partial mesh of VPC peering Connections
+  ec2_vpc_peer:
+    region: us-west-2
+    state: mesh
+    vpcs:
+      - vpc_id: vpc-12345678
+        route_tables:
+          - rtb-12345678
+      - vpc_id: vpc-87654321
+        profile: boto3_profile_goes_here
+        route_tables:
+          - rtb-87654321
+      - vpc_id: vpc-11111111
+    edges:
+      - [vpc-12345678, vpc-87654321]
+      - [vpc-12345678, vpc-11111111]
+    resource_tags:
+      Env: development
+  register: vpc_mesh
 '''
 RETURN = '''
 success:
@@ -271,6 +408,48 @@ requester_vpc_info:
         "vpc_id": "vpc-12345678",
         "cidr_block": "10.100.0.0/16"
     }
+client_timings:
+  description: How long each boto3 session and client took to build. Clients are pooled per profile, region and service, so each one appears once.
+  returned: When run with -vv or more.
+  type: list
+  sample:
+    [
+        {
+            "profile": "boto3_profile_goes_here",
+            "region": "us-west-2",
+            "service": "ec2",
+            "session_secs": 0.0412,
+            "client_secs": 0.1873
+        }
+    ]
+edges:
+  description: One report per edge of the mesh, with the action taken.
+    One of create, accept, route (the peering connection is provisioning),
+    exists or delete. The routes of existing edges are reconciled too, and
+    changed is set when one was added or replaced.
+  returned: When state is mesh.
+  type: list
+  sample:
+    [
+        {
+            "requester_vpc_id": "vpc-12345678",
+            "accepter_vpc_id": "vpc-87654321",
+            "action": "create",
+            "success": true,
+            "changed": true,
+            "msg": "",
+            "vpc_peering_connection_id": "pcx-12345678"
+        }
+    ]
+cidr_conflicts:
+  description: The overlapping cidr blocks and the more specific routes found by the preflight, that stopped the peering connection from being created.
+  returned: When state is present and the preflight fails.
+  type: list
+  sample:
+    [
+        "vpc-12345678 10.100.0.0/16 overlaps vpc-87654321 10.100.0.0/20",
+        "rtb-12345678: route 172.31.1.0/24 to nat-12345678 is more specific than 172.31.0.0/16"
+    ]
 '''
 
 try:
@@ -281,11 +460,60 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+import bisect
 import datetime
 import re
+import socket
+import struct
+import threading
+import time
+from itertools import combinations
+from multiprocessing.pool import ThreadPool
+
+# Upper bound on the number of EC2 api calls kept in flight per account.
+MAX_CONCURRENT_REQUESTS = 10
+
+# Boto3 sessions and clients, shared by everything in this process.
+# See create_client_with_profile.
+SESSION_POOL = dict()
+CLIENT_POOL = dict()
+CLIENT_POOL_LOCK = threading.Lock()
+# How long each pooled session and client took to build.
+CLIENT_TIMINGS = list()
+
+# Status codes of a peering connection that has not been torn down.
+LIVE_STATUS_CODES = [
+    'initiating-request', 'pending-acceptance', 'provisioning', 'active'
+]
+
+# Order in which a peering connection moves towards active.
+PEERING_STATUS_ORDER = LIVE_STATUS_CODES
+
+# Module option name to the key of PeeringConnectionOptions.
+PEERING_OPTIONS = {
+    'allow_dns_resolution_from_remote_vpc':
+        'AllowDnsResolutionFromRemoteVpc',
+    'allow_egress_from_local_classic_link_to_remote_vpc':
+        'AllowEgressFromLocalClassicLinkToRemoteVpc',
+    'allow_egress_from_local_vpc_to_remote_classic_link':
+        'AllowEgressFromLocalVpcToRemoteClassicLink',
+}
+
+# Keys of a route that hold its target.
+ROUTE_TARGET_KEYS = [
+    'GatewayId', 'NatGatewayId', 'InstanceId', 'NetworkInterfaceId',
+    'VpcPeeringConnectionId', 'EgressOnlyInternetGatewayId',
+]
+
+# A peering connection in one of these will never become active.
+PEERING_FAILED_STATUS_CODES = ['failed', 'rejected', 'expired', 'deleted']
 
 def create_client_with_profile(profile_name, region, resource_name='ec2'):
-    """ Create a new boto3 client with a boto3 profile  in ~/.aws/credentials
+    """ Return a boto3 client for a boto3 profile in ~/.aws/credentials.
+        Sessions and clients are kept in CLIENT_POOL, keyed by
+        (profile_name, region, resource_name), so every caller in this
+        process reuses the same client instead of paying for session
+        creation, credential resolution and endpoint loading again.
     Args:
         profile_name (str): The name of the profile that you have set in your
             ~/.aws/credentials profile.
@@ -301,18 +529,56 @@ def create_client_with_profile(profile_name, region, resource_name='ec2'):
     """
     client = None
     err_msg = ''
-    try:
-        session = (
-            boto3.session.Session(
-                profile_name=profile_name, region_name=region
+    key = (profile_name, region, resource_name)
+    with CLIENT_POOL_LOCK:
+        if key in CLIENT_POOL:
+            return CLIENT_POOL[key], err_msg
+        try:
+            start = time.time()
+            session = SESSION_POOL.get((profile_name, region))
+            if not session:
+                session = (
+                    boto3.session.Session(
+                        profile_name=profile_name, region_name=region
+                    )
+                )
+                SESSION_POOL[(profile_name, region)] = session
+            session_secs = time.time() - start
+            client = session.client(resource_name)
+            CLIENT_POOL[key] = client
+            CLIENT_TIMINGS.append(
+                {
+                    'profile': profile_name,
+                    'region': region,
+                    'service': resource_name,
+                    'session_secs': round(session_secs, 4),
+                    'client_secs': round(time.time() - start - session_secs, 4),
+                }
             )
-        )
-        client = session.client(resource_name)
-    except Exception as e:
-        err_msg = str(e)
+        except Exception as e:
+            err_msg = str(e)
 
     return client, err_msg
 
+def register_client(client, profile_name, region, resource_name='ec2'):
+    """Add a client that was created elsewhere, such as the default client
+        built by boto3_conn, to CLIENT_POOL.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        profile_name (str): The boto3 profile, None for the default.
+        region (str): The aws region of the client.
+
+    Kwargs:
+        resource_name (str): Valid aws resource.
+            default=ec2
+
+    Basic Usage:
+        >>> client = boto3.client('ec2', 'us-west-2')
+        >>> register_client(client, None, 'us-west-2')
+    """
+    with CLIENT_POOL_LOCK:
+        CLIENT_POOL[(profile_name, region, resource_name)] = client
+
 def convert_to_lower(data):
     """Convert all uppercase keys in dict with lowercase_
     Args:
@@ -518,6 +784,149 @@ def describe_peering_connections(client, vpc_id=None, vpc_peer_id=None,
 
     return success, err_msg, result
 
+def run_concurrently(func, calls, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Run func once for every set of keyword arguments in calls, using a
+        bounded pool of threads. Boto3 clients are thread safe, so the same
+        client can be shared across every call.
+    Args:
+        func (function): The function to call.
+        calls (list): List of dictionaries, each one containing the keyword
+            arguments for a single call to func.
+
+    Kwargs:
+        max_workers (int): The maximum number of calls in flight at once.
+            default=MAX_CONCURRENT_REQUESTS
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> calls = [
+            {
+                'client': client,
+                'resource_id': 'pcx-1234567',
+                'tags': [{'Key': 'env', 'Value': 'development'}]
+            }
+        ]
+        >>> run_concurrently(tags_action, calls)
+        [(True, '')]
+
+    Returns:
+        List, containing the result of each call in the same order as calls.
+    """
+    if not calls:
+        return list()
+    pool = ThreadPool(max(1, min(max_workers, len(calls))))
+    try:
+        return pool.map(lambda kwargs: func(**kwargs), calls)
+    finally:
+        pool.close()
+        pool.join()
+
+def describe_all_peering_connections(client, vpc_ids=None, status_codes=None,
+                                     check_mode=False):
+    """Retrieve every peering connection requested by one of vpc_ids, in a
+        single call. DescribeVpcPeeringConnections is not paginated in the
+        pinned botocore, so there is no NextToken to follow.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+
+    Kwargs:
+        vpc_ids (list): List of requester vpc ids. Every peering connection
+            visible to this account is returned when not set.
+        status_codes (list): The codes to filter on.
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> vpc_ids = ['vpc-1234567', 'vpc-7654321']
+        >>> describe_all_peering_connections(client, vpc_ids, LIVE_STATUS_CODES)
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ''
+    results = list()
+    params = {
+        'DryRun': check_mode,
+        'Filters': list(),
+    }
+    if vpc_ids:
+        params['Filters'].append(
+            {
+                'Name': 'requester-vpc-info.vpc-id',
+                'Values': vpc_ids,
+            }
+        )
+    if status_codes:
+        params['Filters'].append(
+            {
+                'Name': 'status-code',
+                'Values': status_codes,
+            }
+        )
+    try:
+        response = client.describe_vpc_peering_connections(**params)
+        results = response['VpcPeeringConnections']
+        success = True
+
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == 'DryRunOperation':
+            success = True
+            err_msg = e.message
+        else:
+            err_msg = str(e)
+
+    return success, err_msg, results
+
+def describe_vpcs(client, vpc_ids, check_mode=False):
+    """Retrieve the vpcs in vpc_ids, indexed by vpc id.
+    Args:
+        client (botocore.client.EC2): Boto3 client
+        vpc_ids (list): List of vpc ids.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_vpcs(client, ['vpc-1234567'])
+        [
+            True,
+            "",
+            {
+                "vpc-1234567": {
+                    "VpcId": "vpc-1234567",
+                    "CidrBlock": "10.100.0.0/16"
+                }
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    success = False
+    err_msg = ''
+    results = dict()
+    params = {
+        'DryRun': check_mode,
+        'VpcIds': vpc_ids,
+    }
+    try:
+        for vpc in client.describe_vpcs(**params)['Vpcs']:
+            results[vpc['VpcId']] = vpc
+        success = True
+
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == 'DryRunOperation':
+            success = True
+            err_msg = e.message
+        else:
+            err_msg = str(e)
+
+    return success, err_msg, results
+
 def is_active(peering_conn):
     return peering_conn['status']['code'] == 'active'
 
@@ -542,6 +951,116 @@ def is_provisioning(peering_conn):
 def is_rejected(peering_conn):
     return peering_conn['status']['code'] == 'rejected'
 
+def wait_for_peering_status(client, vpc_peering_ids, status,
+                            wait_timeout=300, polling_secs=1,
+                            max_polling_secs=16, check_mode=False):
+    """Wait until every peering connection in vpc_peering_ids has reached
+        status. Peering connections move through PEERING_STATUS_ORDER, so a
+        connection that is already past status (for example active, while
+        waiting for pending-acceptance) is done as well, and one that moves
+        to a status in PEERING_FAILED_STATUS_CODES fails right away. All of
+        the peering connections still being waited on are described in a
+        single call per poll, and the delay between polls doubles up to
+        max_polling_secs.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_peering_ids (list): List of vpc peering connection ids.
+        status (str): One of PEERING_STATUS_ORDER.
+
+    Kwargs:
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+            default=300
+        polling_secs (int): Number of seconds to wait after the first poll.
+            default=1
+        max_polling_secs (int): The longest delay between 2 polls.
+            default=16
+        check_mode (bool): Do not wait in check mode.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> vpc_peering_ids = ['pcx-1234567', 'pcx-7654321']
+        >>> wait_for_peering_status(client, vpc_peering_ids, 'active')
+        [
+            True,
+            "",
+            {
+                "pcx-1234567": {
+                    "Status": {
+                        "Message": "Active",
+                        "Code": "active"
+                    },
+                    "VpcPeeringConnectionId": "pcx-1234567",
+                    ...
+                },
+                ...
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    success = True
+    err_msg = ''
+    results = dict()
+    if check_mode or not vpc_peering_ids:
+        return success, err_msg, results
+
+    target = PEERING_STATUS_ORDER.index(status)
+    waiting = set(vpc_peering_ids)
+    last_status = dict()
+    failed = list()
+    delay = polling_secs
+    deadline = time.time() + wait_timeout
+    while waiting:
+        params = {
+            'VpcPeeringConnectionIds': sorted(waiting),
+        }
+        try:
+            peerings = (
+                client.describe_vpc_peering_connections(**params)
+                ['VpcPeeringConnections']
+            )
+        except botocore.exceptions.ClientError as e:
+            # A newly created peering connection can take a moment to be
+            # visible, keep polling until it is.
+            if not re.search('NotFound', e.response['Error']['Code']):
+                return False, str(e), results
+            peerings = list()
+
+        for peering in peerings:
+            vpc_peering_id = peering['VpcPeeringConnectionId']
+            code = peering['Status']['Code']
+            last_status[vpc_peering_id] = code
+            if code in PEERING_FAILED_STATUS_CODES:
+                waiting.discard(vpc_peering_id)
+                results[vpc_peering_id] = peering
+                failed.append('{0} is {1}'.format(vpc_peering_id, code))
+            elif (code in PEERING_STATUS_ORDER and
+                    PEERING_STATUS_ORDER.index(code) >= target):
+                waiting.discard(vpc_peering_id)
+                results[vpc_peering_id] = peering
+
+        if not waiting:
+            break
+        if time.time() + delay > deadline:
+            for vpc_peering_id in sorted(waiting):
+                failed.append(
+                    '{0} did not reach {1}, last status {2}'.format(
+                        vpc_peering_id, status,
+                        last_status.get(vpc_peering_id, 'unknown')
+                    )
+                )
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, max_polling_secs)
+
+    if failed:
+        success = False
+        err_msg = ', '.join(failed)
+
+    return success, err_msg, results
+
 def make_tags_in_proper_format(tags):
     """Take a list of aws tags and convert them into a list of dictionaries.
        Where the key is the actual key and not Key.
@@ -706,185 +1225,685 @@ def recreate_tags_from_list(list_of_tags):
         )
     return tags
 
-def update_routes(client, vpc_peering_id, cidr, route_table_ids,
-                  check_mode=False):
-    """Update routes in multiple route tables.
+def route_target_matches(client, route_table_id, cidr, vpc_peering_id):
+    """Check if the route for cidr in a route table already points at the
+        vpc peering connection.
     Args:
         client (botocore.client.EC2): Boto3 client.
-        vpc_peering_id (str): The vpc peering connection id.
+        route_table_id (str): The route table id.
         cidr (str): The dest cidr block.
-            example.. 0.0.0.0/0
-        route_table_ids (list): List of route table ids.
-
-    Kwargs:
-        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
-            default=False
+        vpc_peering_id (str): The vpc peering connection id.
 
     Basic Usage:
         >>> client = boto3.client('ec2')
-        >>> vpc_peering_id = 'vpx-1234567'
-        >>> cidr = '0.0.0.0/0'
-        >>> route_table_ids = ['rtb-1234567', 'rtb-7654321']
-        [
-            True,
-            True,
-            ''
-        ]
+        >>> route_target_matches(client, 'rtb-1234567', '10.0.0.0/16', 'pcx-1234567')
+        [True, '', False]
 
     Returns:
-        Tuple (bool, bool, str)
+        Tuple (bool, str, bool)
     """
     success = False
-    changed = False
     err_msg = ''
-    for route_table_id in route_table_ids:
-        params = {
-            'RouteTableId': route_table_id,
-            'DestinationCidrBlock': cidr,
-            'VpcPeeringConnectionId': vpc_peering_id,
-            'DryRun': check_mode,
-        }
-        try:
-            completed = client.create_route(**params)
-            if completed.get('Return') == True:
-                success, changed = True, True
+    matches = False
+    params = {
+        'RouteTableIds': [route_table_id],
+    }
+    try:
+        route_tables = client.describe_route_tables(**params)['RouteTables']
+        success = True
+        for route_table in route_tables:
+            for route in route_table.get('Routes', list()):
+                if route.get('DestinationCidrBlock') == cidr:
+                    matches = (
+                        route.get('VpcPeeringConnectionId') == vpc_peering_id
+                    )
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
 
-        except botocore.exceptions.ClientError, e:
-            err_msg = str(e)
-            if e.response['Error']['Code'] == 'DryRunOperation':
-                success = True
-                err_msg = e.message
-            elif re.search('RouteAlreadyExists', err_msg):
-                success = True
-    return success, changed, err_msg
+    return success, err_msg, matches
 
-def pre_update_routes(client, peer_info, accepter_routes=None,
-                      requester_routes=None, check_mode=False):
-    """Does the pre work before updating a route.
+def update_route(client, vpc_peering_id, cidr, route_table_id,
+                 check_mode=False):
+    """Create a route to cidr through the vpc peering connection. If a route
+        to cidr already exists with a different target, it is replaced.
     Args:
         client (botocore.client.EC2): Boto3 client.
-        peer_info (dict): This contains the output of describe_peering_connections
+        vpc_peering_id (str): The vpc peering connection id.
+        cidr (str): The dest cidr block.
+        route_table_id (str): The route table id.
 
     Kwargs:
-        accepter_routes (list): list of route table ids that you want
-            to add routes to the cidr that belongs to the peer of the newly
-            created peering_connection
-            default=None
-        requester_routes (list): list of route table ids that you want
-            to add routes to the cidr that belongs to the vpc that is
-            initiating the creation of the newly created peering_connection
-            default=None
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
 
     Basic Usage:
         >>> client = boto3.client('ec2')
-        >>> _, _, vpc_peer_info = describe_peering_connections(
-                client, vpc_peering_id='vpx-1234567'
-        )
-        >>> accepter_routes = ['rtb-1234567', 'rtb-7654321']
-        >>> pre_update_routes(client, vpc_peer_info[0], accepter_routes)
-        [
-            True,
-            True,
-            ''
-        ]
+        >>> update_route(client, 'pcx-1234567', '10.0.0.0/16', 'rtb-1234567')
+        [True, True, '']
 
     Returns:
         Tuple (bool, bool, str)
     """
     success = False
     changed = False
-    err_msg = 'Need to pass either accepter_routes or requester_routes.'
-    vpc_peering_id = peer_info['vpc_peering_connection_id']
-    if accepter_routes and peer_info['accepter_vpc_info'].get('cidr_block', None):
-        routes = accepter_routes
-        cidr = peer_info['accepter_vpc_info']['cidr_block']
-        success, changed, err_msg = (
-            update_routes(client, vpc_peering_id, cidr, routes)
+    err_msg = ''
+    params = {
+        'RouteTableId': route_table_id,
+        'DestinationCidrBlock': cidr,
+        'VpcPeeringConnectionId': vpc_peering_id,
+        'DryRun': check_mode,
+    }
+    try:
+        completed = client.create_route(**params)
+        if completed.get('Return') == True:
+            success, changed = True, True
+
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+        if e.response['Error']['Code'] == 'DryRunOperation':
+            success = True
+            err_msg = e.message
+        elif re.search('RouteAlreadyExists', err_msg):
+            success, err_msg, matches = (
+                route_target_matches(
+                    client, route_table_id, cidr, vpc_peering_id
+                )
+            )
+            if success and not matches:
+                try:
+                    client.replace_route(**params)
+                    changed = True
+                except botocore.exceptions.ClientError as e:
+                    success = False
+                    err_msg = str(e)
+
+    return success, changed, err_msg
+
+def update_routes(client, vpc_peering_id, cidr, route_table_ids,
+                  check_mode=False):
+    """Update routes in multiple route tables concurrently.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_peering_id (str): The vpc peering connection id.
+        cidr (str): The dest cidr block.
+            example.. 0.0.0.0/0
+        route_table_ids (list): List of route table ids.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> vpc_peering_id = 'vpx-1234567'
+        >>> cidr = '0.0.0.0/0'
+        >>> route_table_ids = ['rtb-1234567', 'rtb-7654321']
+        [
+            True,
+            True,
+            ''
+        ]
+
+    Returns:
+        Tuple (bool, bool, str)
+    """
+    calls = list()
+    for route_table_id in route_table_ids:
+        calls.append(
+            {
+                'client': client,
+                'vpc_peering_id': vpc_peering_id,
+                'cidr': cidr,
+                'route_table_id': route_table_id,
+                'check_mode': check_mode,
+            }
         )
+    return aggregate_route_results(run_concurrently(update_route, calls))
+
+def aggregate_route_results(route_results):
+    """Combine the (success, changed, err_msg) results of many route updates.
+    Args:
+        route_results (list): List of (success, changed, err_msg) tuples.
+
+    Basic Usage:
+        >>> aggregate_route_results([(True, True, ''), (True, False, '')])
+        (True, True, '')
+
+    Returns:
+        Tuple (bool, bool, str)
+    """
+    success = True
+    changed = False
+    err_msgs = list()
+    for route_success, route_changed, route_msg in route_results:
+        changed = changed or route_changed
+        if not route_success:
+            success = False
+            err_msgs.append(route_msg)
+    return success, changed, ', '.join(err_msgs)
+
+def route_table_filters(vpc_id, selector):
+    """Build the describe_route_tables filters of a route table selector.
+    Args:
+        vpc_id (str): The vpc id the route tables belong to.
+        selector (dict): A dictionary with one or more of the keys
+            all (bool), tags (dict) and subnet_ids (list).
+
+    Basic Usage:
+        >>> selector = {'tags': {'Tier': 'private'}}
+        >>> route_table_filters('vpc-1234567', selector)
+        [
+            {
+                'Name': 'vpc-id',
+                'Values': ['vpc-1234567']
+            },
+            {
+                'Name': 'tag:Tier',
+                'Values': ['private']
+            }
+        ]
+
+    Returns:
+        List
+    """
+    filters = [
+        {
+            'Name': 'vpc-id',
+            'Values': [vpc_id],
+        }
+    ]
+    for key, val in sorted((selector.get('tags') or dict()).items()):
+        filters.append(
+            {
+                'Name': 'tag:{0}'.format(key),
+                'Values': [val],
+            }
+        )
+    if selector.get('subnet_ids'):
+        filters.append(
+            {
+                'Name': 'association.subnet-id',
+                'Values': selector['subnet_ids'],
+            }
+        )
+    return filters
+
+def describe_route_tables(client, filters=None, route_table_ids=None):
+    """Retrieve the route tables that match filters or route_table_ids.
+        The pinned botocore has no MaxResults or NextToken for
+        DescribeRouteTables, so a single call returns every route table.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        filters (list): List of filters. See route_table_filters.
+        route_table_ids (list): List of route table ids.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_route_tables(client, route_table_ids=['rtb-1234567'])
+        [
+            True,
+            '',
+            [
+                {
+                    'RouteTableId': 'rtb-1234567',
+                    'VpcId': 'vpc-1234567',
+                    'Routes': [...],
+                    ...
+                }
+            ]
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ''
+    route_tables = list()
+    params = dict()
+    if filters:
+        params['Filters'] = filters
+    if route_table_ids:
+        params['RouteTableIds'] = route_table_ids
+    try:
+        route_tables = client.describe_route_tables(**params)['RouteTables']
+        success = True
+    except botocore.exceptions.ClientError as e:
+        err_msg = str(e)
+
+    return success, err_msg, route_tables
+
+def select_route_tables(client, vpc_id, selector):
+    """Retrieve the ids of the route tables of a vpc that match a route
+        table selector, with a single describe_route_tables call.
+        Describing is read only, so it is done in check mode as well.
+    Args:
+        client (botocore.client.EC2): Boto3 client of the account that owns
+            the vpc.
+        vpc_id (str): The vpc id the route tables belong to.
+        selector (dict): See route_table_filters.
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> selector = {'subnet_ids': ['subnet-1234567']}
+        >>> select_route_tables(client, 'vpc-1234567', selector)
+        [
+            True,
+            '',
+            ['rtb-1234567']
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ''
+    route_table_ids = list()
+    if not (selector.get('all') or selector.get('tags')
+            or selector.get('subnet_ids')):
+        err_msg = (
+            'Route table selector {0} needs all, tags or subnet_ids'
+            .format(selector)
+        )
+        return success, err_msg, route_table_ids
+
+    success, err_msg, route_tables = (
+        describe_route_tables(
+            client, filters=route_table_filters(vpc_id, selector)
+        )
+    )
+    for route_table in route_tables:
+        route_table_ids.append(route_table['RouteTableId'])
+
+    return success, err_msg, sorted(set(route_table_ids))
+
+def resolve_route_selectors(client, peer_info, accepter_routes_selector=None,
+                            requester_routes_selector=None,
+                            accepter_client=None):
+    """Resolve the route table selectors of both vpcs of a peering
+        connection concurrently, one describe per vpc.
+    Args:
+        client (botocore.client.EC2): Boto3 client of the requester account.
+        peer_info (dict): This contains the output of describe_peering_connections,
+            converted by convert_to_lower.
+
+    Kwargs:
+        accepter_routes_selector (dict): Selects route tables in the
+            requester vpc, like accepter_routes.
+        requester_routes_selector (dict): Selects route tables in the
+            accepter vpc, like requester_routes.
+        accepter_client (botocore.client.EC2): Boto3 client of the accepter
+            account, used for the requester_routes_selector.
+            default=client
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> _, _, vpc_peer_info = describe_peering_connections(
+                client, vpc_peering_id='vpx-1234567'
+        )
+        >>> selector = {'all': True}
+        >>> resolve_route_selectors(
+                client, convert_to_lower(vpc_peer_info[0]), selector
+            )
+        [
+            True,
+            '',
+            ['rtb-1234567', 'rtb-7654321'],
+            []
+        ]
+
+    Returns:
+        Tuple (bool, str, list, list)
+    """
+    if not accepter_client:
+        accepter_client = client
+    calls = list()
+    selectors = [
+        (accepter_routes_selector, client, 'requester_vpc_info'),
+        (requester_routes_selector, accepter_client, 'accepter_vpc_info'),
+    ]
+    for selector, selector_client, vpc_info_key in selectors:
+        if selector:
+            calls.append(
+                {
+                    'client': selector_client,
+                    'vpc_id': peer_info[vpc_info_key]['vpc_id'],
+                    'selector': selector,
+                }
+            )
+    resolved = run_concurrently(select_route_tables, calls)
+    route_table_ids = list()
+    for selector, _, _ in selectors:
+        if selector:
+            success, err_msg, ids = resolved.pop(0)
+            if not success:
+                return success, err_msg, list(), list()
+            route_table_ids.append(ids)
+        else:
+            route_table_ids.append(list())
+
+    return True, '', route_table_ids[0], route_table_ids[1]
+
+def pre_update_routes(client, peer_info, accepter_routes=None,
+                      requester_routes=None, check_mode=False,
+                      accepter_client=None):
+    """Does the pre work before updating a route. The accepter and requester
+        route tables are updated concurrently.
+    Args:
+        client (botocore.client.EC2): Boto3 client of the requester account.
+        peer_info (dict): This contains the output of describe_peering_connections
+
+    Kwargs:
+        accepter_routes (list): list of route table ids, in the requester
+            vpc, that you want to add routes to the cidr that belongs to the
+            peer of the newly created peering_connection
+            default=None
+        requester_routes (list): list of route table ids, in the accepter
+            vpc, that you want to add routes to the cidr that belongs to the
+            vpc that is initiating the creation of the newly created
+            peering_connection
+            default=None
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+        accepter_client (botocore.client.EC2): Boto3 client of the accepter
+            account, used for the requester_routes.
+            default=client
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> _, _, vpc_peer_info = describe_peering_connections(
+                client, vpc_peering_id='vpx-1234567'
+        )
+        >>> accepter_routes = ['rtb-1234567', 'rtb-7654321']
+        >>> pre_update_routes(client, vpc_peer_info[0], accepter_routes)
+        [
+            True,
+            True,
+            ''
+        ]
+
+    Returns:
+        Tuple (bool, bool, str)
+    """
+    vpc_peering_id = peer_info['vpc_peering_connection_id']
+    if not accepter_client:
+        accepter_client = client
+    calls = list()
+    if accepter_routes and peer_info['accepter_vpc_info'].get('cidr_block', None):
+        for route_table_id in accepter_routes:
+            calls.append(
+                {
+                    'client': client,
+                    'vpc_peering_id': vpc_peering_id,
+                    'cidr': peer_info['accepter_vpc_info']['cidr_block'],
+                    'route_table_id': route_table_id,
+                    'check_mode': check_mode,
+                }
+            )
     if requester_routes and peer_info['requester_vpc_info'].get('cidr_block', None):
-        routes = requester_routes
-        cidr = peer_info['requester_vpc_info']['cidr_block']
-        success, changed, err_msg = (
-            update_routes(client, vpc_peering_id, cidr, routes)
+        for route_table_id in requester_routes:
+            calls.append(
+                {
+                    'client': accepter_client,
+                    'vpc_peering_id': vpc_peering_id,
+                    'cidr': peer_info['requester_vpc_info']['cidr_block'],
+                    'route_table_id': route_table_id,
+                    'check_mode': check_mode,
+                }
+            )
+    if not calls:
+        err_msg = 'Need to pass either accepter_routes or requester_routes.'
+        return False, False, err_msg
+
+    return aggregate_route_results(run_concurrently(update_route, calls))
+
+def peering_options_to_update(current_options, options):
+    """Return the peering options that differ from the current ones, in the
+        format modify_vpc_peering_connection_options expects.
+    Args:
+        current_options (dict): The peering_options of one side of a
+            peering connection, as returned by describe_peering_connections
+            and converted by convert_to_lower.
+        options (dict): The desired options, with the keys in
+            PEERING_OPTIONS.
+
+    Basic Usage:
+        >>> current_options = {
+            'allow_dns_resolution_from_remote_vpc': False,
+            'allow_egress_from_local_classic_link_to_remote_vpc': False,
+            'allow_egress_from_local_vpc_to_remote_classic_link': False
+        }
+        >>> options = {'allow_dns_resolution_from_remote_vpc': True}
+        >>> peering_options_to_update(current_options, options)
+        {
+            'AllowDnsResolutionFromRemoteVpc': True
+        }
+
+    Returns:
+        Dictionary
+    """
+    options_to_update = dict()
+    current_options = current_options or dict()
+    for key, val in (options or dict()).items():
+        if val is None:
+            continue
+        if bool(current_options.get(key, False)) != bool(val):
+            options_to_update[PEERING_OPTIONS[key]] = bool(val)
+    return options_to_update
+
+def modify_peering_options(client, vpc_peering_id, side, options,
+                           check_mode=False):
+    """Modify the peering options of one side of a peering connection. The
+        options of a side can only be modified by the account that owns
+        the vpc of that side. Older botocore releases, such as the 1.4.7
+        pinned in requirements.txt, have no
+        modify_vpc_peering_connection_options, which is reported as a
+        failure.
+    Args:
+        client (botocore.client.EC2): Boto3 client of the account that owns
+            the vpc of side.
+        vpc_peering_id (str): The vpc peering connection id.
+        side (str): requester or accepter.
+        options (dict): The options to set, as returned by
+            peering_options_to_update.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> options = {'AllowDnsResolutionFromRemoteVpc': True}
+        >>> modify_peering_options(client, 'pcx-1234567', 'accepter', options)
+        [
+            True,
+            ''
+        ]
+
+    Returns:
+        Tuple (bool, str)
+    """
+    success = False
+    err_msg = ''
+    params = {
+        'VpcPeeringConnectionId': vpc_peering_id,
+        'DryRun': check_mode,
+    }
+    if side == 'requester':
+        params['RequesterPeeringConnectionOptions'] = options
+    else:
+        params['AccepterPeeringConnectionOptions'] = options
+    if not hasattr(client, 'modify_vpc_peering_connection_options'):
+        err_msg = (
+            'botocore {0} can not modify the {1} peering options of {2}, '
+            'a botocore release with modify_vpc_peering_connection_options '
+            'is required'.format(botocore.__version__, side, vpc_peering_id)
+        )
+        return success, err_msg
+    try:
+        client.modify_vpc_peering_connection_options(**params)
+        success = True
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == 'DryRunOperation':
+            success = True
+        else:
+            err_msg = str(e)
+    except botocore.exceptions.ParamValidationError as e:
+        err_msg = (
+            'botocore {0} can not modify the {1} peering options of {2}: {3}'
+            .format(botocore.__version__, side, vpc_peering_id, str(e))
         )
 
-    return success, changed, err_msg
+    return success, err_msg
+
+def update_peering_options(client, peer_info, requester_options=None,
+                           accepter_options=None, check_mode=False,
+                           accepter_client=None):
+    """Diff the requester and accepter options against the peering options
+        already returned by describe_peering_connections, and modify each
+        side that differs with a single call. Both sides are modified
+        concurrently.
+    Args:
+        client (botocore.client.EC2): Boto3 client of the requester account.
+        peer_info (dict): This contains the output of describe_peering_connections,
+            converted by convert_to_lower.
+
+    Kwargs:
+        requester_options (dict): The desired options of the requester
+            vpc, with the keys in PEERING_OPTIONS.
+        accepter_options (dict): The desired options of the accepter vpc,
+            with the keys in PEERING_OPTIONS.
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+        accepter_client (botocore.client.EC2): Boto3 client of the accepter
+            account, used for the accepter_options.
+            default=client
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> _, _, vpc_peer_info = describe_peering_connections(
+                client, vpc_peering_id='vpx-1234567'
+        )
+        >>> accepter_options = {'allow_dns_resolution_from_remote_vpc': True}
+        >>> update_peering_options(
+                client, convert_to_lower(vpc_peer_info[0]),
+                accepter_options=accepter_options
+            )
+        [
+            True,
+            True,
+            ''
+        ]
+
+    Returns:
+        Tuple (bool, bool, str)
+    """
+    vpc_peering_id = peer_info['vpc_peering_connection_id']
+    if not accepter_client:
+        accepter_client = client
+    calls = list()
+    sides = [
+        ('requester', client, requester_options),
+        ('accepter', accepter_client, accepter_options),
+    ]
+    for side, side_client, options in sides:
+        vpc_info = peer_info.get('{0}_vpc_info'.format(side), dict())
+        options_to_update = (
+            peering_options_to_update(
+                vpc_info.get('peering_options'), options
+            )
+        )
+        if options_to_update:
+            calls.append(
+                {
+                    'client': side_client,
+                    'vpc_peering_id': vpc_peering_id,
+                    'side': side,
+                    'options': options_to_update,
+                    'check_mode': check_mode,
+                }
+            )
+    if not calls:
+        return True, False, ''
 
-def update_tags(client, resource_id, tags, check_mode=False):
+    success = True
+    err_msgs = list()
+    for side_success, side_msg in run_concurrently(modify_peering_options, calls):
+        if not side_success:
+            success = False
+            err_msgs.append(side_msg)
+
+    return success, True, ', '.join(err_msgs)
+
+def update_tags(client, resource_id, tags, current_tags=None,
+                check_mode=False):
     """Update tags for an amazon resource. This will delete any tag that is
-        not part of the tags parameter and update|create.
+        not part of the tags parameter and update|create. Tags whose value
+        changed are overwritten by create_tags, so only the removed keys
+        are deleted, and nothing is called when the tags already match.
     Args:
         resource_id (str): The Amazon resource id.
         tags (list): List of dictionaries.
             examples.. [{Name: "", Values: [""]}]
 
     Kwargs:
+        current_tags (list): The Tags of the resource, as already returned
+            by a describe call. find_tags is only called when not set.
+            default=None
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
 
     Basic Usage:
         >>> client = boto3.client('ec2')
         >>> resource_id = 'pcx-123345678'
-        >>> tags = [{'Name': 'env', 'Values': ['Development']}]
+        >>> tags = [{'Key': 'env', 'Value': 'Development'}]
         >>> update_tags(client, resource_id, tags)
-        [True, '']
+        [True, True, '']
 
     Return:
-        Tuple (bool, str)
+        Tuple (bool, bool, str)
     """
-    success = False
-    err_msg = ''
-    find_success, find_err, current_tags = (
-        find_tags(client, resource_id, check_mode=check_mode)
-    )
-    if find_success:
-        if current_tags:
-            current_tags_set = (
-                set(
-                    reduce(
-                        lambda x, y: x + y,
-                        [x.items() for x in make_tags_in_proper_format(current_tags)]
-                    )
-                )
-            )
+    if current_tags is None:
+        find_success, find_err, current_tags = (
+            find_tags(client, resource_id, check_mode=check_mode)
+        )
+        if not find_success:
+            return find_success, False, find_err
 
-            new_tags_set = (
-                set(
-                    reduce(
-                        lambda x, y: x + y,
-                        [x.items() for x in make_tags_in_proper_format(tags)]
-                    )
-                )
+    current = convert_list_of_tags(current_tags or list())
+    desired = convert_list_of_tags(tags or list())
+    tags_to_delete = [
+        {'Key': key} for key in sorted(current) if key not in desired
+    ]
+    tags_to_create = [
+        {'Key': key, 'Value': desired[key]} for key in sorted(desired)
+        if current.get(key) != desired[key]
+    ]
+    if not tags_to_delete and not tags_to_create:
+        return True, False, ''
+
+    if tags_to_delete:
+        delete_success, delete_msg = (
+            tags_action(
+                client, resource_id, tags_to_delete, action='delete',
+                check_mode=check_mode
             )
-            tags_to_delete = list(current_tags_set.difference(new_tags_set))
-            tags_to_update = list(new_tags_set.difference(current_tags_set))
-            if tags_to_delete:
-                tags_to_delete = recreate_tags_from_list(tags_to_delete)
-                delete_success, delete_msg = (
-                    tags_action(
-                        client, resource_id, tags_to_delete, action='delete',
-                        check_mode=False
-                    )
-                )
-                if not delete_success:
-                    return delete_success, delete_msg
-            if tags_to_update:
-                tags = recreate_tags_from_list(tags_to_update)
-                if not tags:
-                    return delete_success, delete_msg
+        )
+        if not delete_success:
+            return delete_success, False, delete_msg
 
-    if tags:
+    if tags_to_create:
         create_success, create_msg = (
             tags_action(
-                client, resource_id, tags, action='create',
-                check_mode=False
+                client, resource_id, tags_to_create, action='create',
+                check_mode=check_mode
             )
         )
-        return create_success, create_msg
+        if not create_success:
+            return create_success, False, create_msg
 
-    return success, err_msg
+    return True, True, ''
 
 def runner(client, state, params):
     """Generic function that will handle the calls to create, delete, reject and accept.
@@ -978,6 +1997,12 @@ def runner(client, state, params):
         else:
             err_msg = str(e)
 
+    except botocore.exceptions.ParamValidationError, e:
+        err_msg = (
+            'botocore {0} can not {1} the peering connection: {2}'
+            .format(botocore.__version__, state, str(e))
+        )
+
     return success, changed, err_msg, result
 
 def run(client, vpc_peering_id, state, check_mode=False):
@@ -1127,156 +2152,596 @@ def delete(client, vpc_peering_id, check_mode=False):
 
 def update(client, vpc_peering_id, tags, accept_peer=False,
            accept_with_profile=None, region=None,
-           accepter_routes=None, requester_routes=None, check_mode=False):
-    """Add Tags to a VPC Peering Connection and or Accept the peer.
+           accepter_routes=None, requester_routes=None,
+           requester_options=None, accepter_options=None,
+           accepter_routes_selector=None, requester_routes_selector=None,
+           peering=None, wait_timeout=300, check_mode=False):
+    """Add Tags to a VPC Peering Connection and or Accept the peer. The
+        current tags are taken from the describe output, so tags are only
+        mutated when they differ, at most once per account.
+
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        vpc_peering_id (str): The vpc peering connection id.
+        tags (list): List of dictionaries.
+            examples.. [{Name: "", Values: [""]}]
+
+    Kwargs:
+        accept_peer (bool): if set to True, the peer will be accepted.
+        accept_with_profile (str): Boto3 Profile to use with accept.
+        region (str): if accept_with_profile is passed, than this region
+            also needs to be passed.
+            default=None
+        accepter_routes (list): list of route table ids that you want
+            to add routes to the cidr that belongs to the peer of the newly
+            created peering_connection
+            default=None
+        requester_routes (list): list of route table ids that you want
+            to add routes to the cidr that belongs to the vpc that is
+            initiating the creation of the newly created peering_connection
+            default=None
+        requester_options (dict): The desired peering options of the
+            requester vpc, with the keys in PEERING_OPTIONS. Applied once
+            the peering connection is active, requesting them on a peering
+            connection that is not active yet is a failure.
+            default=None
+        accepter_options (dict): The desired peering options of the
+            accepter vpc, applied with the accept_with_profile client.
+            default=None
+        accepter_routes_selector (dict): Selects more route tables in
+            the requester vpc, that get the same routes as accepter_routes.
+            See route_table_filters.
+            default=None
+        requester_routes_selector (dict): Selects more route tables in
+            the accepter vpc, that get the same routes as requester_routes.
+            default=None
+        peering (dict): The peering connection, as already returned by
+            describe_peering_connections. It is described when not set.
+            default=None
+        wait_timeout (int): Number of seconds to wait for the peering
+            connection to be pending-acceptance and then active.
+            default=300
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> vpc_peering_id = 'pcx-12345'
+        >>> tags = [{'Name': 'Service', 'Values': ['Development']}]
+        >>> accept_peer = True
+        >>> update(client, vpc_peering_id, tags, accept_peer)
+        [
+            True,
+            True,
+            "",
+            {
+                "status": {
+                    "message": "Active",
+                    "code": "active"
+                },
+                "tags": [
+                    {
+                        "value": "web",
+                        "key": "service"
+                    },
+                    {
+                        "value": "Shaolin Allen",
+                        "key": "Name"
+                    },
+                    {
+                        "value": "development",
+                        "key": "env"
+                    }
+                ],
+                "accepter_vpc_info": {
+                    "owner_id": "12345678910",
+                    "vpc_id": "vpc-12345678",
+                    "cidr_block": "172.31.0.0/16"
+                },
+                "vpc_peering_connection_id": "pcx-12345678",
+                "requester_vpc_info": {
+                    "owner_id": "12345678910",
+                    "vpc_id": "vpc-12345678",
+                    "cidr_block": "10.100.0.0/16"
+                }
+            }
+        ]
+
+    Return:
+        Tuple (bool, bool, str, dict)
+    """
+    success = True
+    changed = False
+    err_msg = ""
+    result = dict()
+    if peering:
+        results = [peering]
+    else:
+        success, err_msg, results = (
+            describe_peering_connections(
+                client, vpc_peering_id=vpc_peering_id,
+                status_codes=LIVE_STATUS_CODES, check_mode=check_mode
+            )
+        )
+    if not results:
+        return success, changed, err_msg, result
+
+    peering = results[0]
+    vpc_peering_id = peering['VpcPeeringConnectionId']
+    success, changed, err_msg = (
+        update_tags(
+            client, vpc_peering_id, tags,
+            current_tags=peering.get('Tags', list()), check_mode=check_mode
+        )
+    )
+    if not success:
+        return success, changed, err_msg, result
+    peering['Tags'] = tags
+
+    original_client = client
+    if accept_peer:
+        if accept_with_profile:
+            ###Switch client to use boto3 profile
+            client, err_msg = (
+                create_client_with_profile(accept_with_profile, region)
+            )
+            if err_msg:
+                return False, changed, err_msg, result
+
+        status_code = peering['Status']['Code']
+        if status_code == 'initiating-request':
+            success, err_msg, pending = (
+                wait_for_peering_status(
+                    client, [vpc_peering_id], 'pending-acceptance',
+                    wait_timeout, check_mode=check_mode
+                )
+            )
+            if not success:
+                return success, changed, err_msg, result
+            if pending:
+                status_code = pending[vpc_peering_id]['Status']['Code']
+
+        if status_code == 'pending-acceptance':
+            params = {
+                'VpcPeeringConnectionId': vpc_peering_id,
+                'DryRun': check_mode,
+            }
+            success, _, err_msg, _ = runner(client, 'accept', params)
+            if not success:
+                return success, changed, err_msg, result
+            changed = True
+
+        success, err_msg, active = (
+            wait_for_peering_status(
+                client, [vpc_peering_id], 'active', wait_timeout,
+                check_mode=check_mode
+            )
+        )
+        if not success:
+            return success, changed, err_msg, result
+        if active:
+            peering = active[vpc_peering_id]
+
+        if client is not original_client:
+            ###Tags are kept per account, update the ones of the accepter
+            ###account, using the boto3 profile
+            success, tags_changed, err_msg = (
+                update_tags(
+                    client, vpc_peering_id, tags,
+                    current_tags=peering.get('Tags') if active else None,
+                    check_mode=check_mode
+                )
+            )
+            if not success:
+                return success, changed, err_msg, result
+            changed = changed or tags_changed
+            peering['Tags'] = tags
+
+    result = convert_to_lower(peering)
+    if accepter_routes_selector or requester_routes_selector:
+        success, err_msg, selected_accepter_routes, selected_requester_routes = (
+            resolve_route_selectors(
+                original_client, result, accepter_routes_selector,
+                requester_routes_selector, accepter_client=client
+            )
+        )
+        if not success:
+            return success, changed, err_msg, result
+        accepter_routes = sorted(
+            set(accepter_routes or list()).union(selected_accepter_routes)
+        )
+        requester_routes = sorted(
+            set(requester_routes or list()).union(selected_requester_routes)
+        )
+    if accepter_routes or requester_routes:
+        success, routes_changed, err_msg = (
+            pre_update_routes(
+                original_client, result, accepter_routes,
+                requester_routes, check_mode,
+                accepter_client=client
+            )
+        )
+        changed = changed or routes_changed
+    if (success and not check_mode and not is_active(result)
+            and (requester_options or accepter_options)):
+        success = False
+        err_msg = (
+            'Can not apply the peering options of {0} on a {1} state, they '
+            'are applied once it is active. Accept it and run again.'
+            .format(vpc_peering_id, result['status']['code'])
+        )
+    elif (success and is_active(result)
+            and (requester_options or accepter_options)):
+        success, options_changed, err_msg = (
+            update_peering_options(
+                original_client, result, requester_options,
+                accepter_options, check_mode,
+                accepter_client=client
+            )
+        )
+        changed = changed or options_changed
+
+    return success, changed, err_msg, result
+
+def cidr_to_range(cidr):
+    """Convert an IPv4 cidr block into the first and last address it covers.
+    Args:
+        cidr (str): An IPv4 cidr block.
+
+    Basic Usage:
+        >>> cidr_to_range('10.100.0.0/16')
+        (174325760, 174391295, 16)
+
+    Returns:
+        Tuple (int, int, int)
+    """
+    address, prefix_len = cidr.split('/')
+    prefix_len = int(prefix_len)
+    if not 0 <= prefix_len <= 32:
+        raise ValueError('Invalid cidr block {0}'.format(cidr))
+    try:
+        network = struct.unpack('!I', socket.inet_aton(address))[0]
+    except socket.error:
+        raise ValueError('Invalid cidr block {0}'.format(cidr))
+    size = 1 << (32 - prefix_len)
+    start = network & ~(size - 1) & 0xFFFFFFFF
+    return start, start + size - 1, prefix_len
+
+def build_cidr_index(entries):
+    """Build an interval index of cidr blocks. Cidr blocks are either nested
+        or disjoint, so the blocks inside a cidr are found with a binary
+        search on the sorted first addresses, and the blocks around it by
+        looking up each of its supernets.
+    Args:
+        entries (list): List of dictionaries, each one with a cidr key.
+
+    Basic Usage:
+        >>> index = build_cidr_index([{'cidr': '10.100.0.0/16'}])
+
+    Returns:
+        Dictionary
+    """
+    intervals = list()
+    networks = dict()
+    for entry in entries:
+        start, end, prefix_len = cidr_to_range(entry['cidr'])
+        intervals.append((start, end, prefix_len, entry))
+        networks.setdefault((start, prefix_len), list()).append(entry)
+    intervals.sort(key=lambda interval: interval[:3])
+    return {
+        'starts': [interval[0] for interval in intervals],
+        'intervals': intervals,
+        'networks': networks,
+    }
+
+def find_overlapping_cidrs(index, cidr):
+    """Return the entries of a cidr index that overlap cidr.
+    Args:
+        index (dict): The output of build_cidr_index.
+        cidr (str): An IPv4 cidr block.
+
+    Basic Usage:
+        >>> index = build_cidr_index([{'cidr': '10.100.0.0/16'}])
+        >>> find_overlapping_cidrs(index, '10.100.4.0/24')
+        [{'cidr': '10.100.0.0/16'}]
+
+    Returns:
+        List, the blocks that contain cidr followed by the ones inside it.
+    """
+    start, end, prefix_len = cidr_to_range(cidr)
+    overlapping = list()
+    for supernet_len in range(prefix_len):
+        supernet = start & ~((1 << (32 - supernet_len)) - 1) & 0xFFFFFFFF
+        overlapping.extend(
+            index['networks'].get((supernet, supernet_len), list())
+        )
+    first = bisect.bisect_left(index['starts'], start)
+    last = bisect.bisect_right(index['starts'], end)
+    for interval in index['intervals'][first:last]:
+        # Supernets that start at the same address were found above.
+        if interval[2] >= prefix_len:
+            overlapping.append(interval[3])
+    return overlapping
+
+def vpc_ipv4_cidrs(vpc):
+    """Return the primary and the associated secondary IPv4 cidr blocks of a
+        vpc.
+    Args:
+        vpc (dict): The vpc, as returned by describe_vpcs.
+
+    Basic Usage:
+        >>> vpc = {
+            'CidrBlock': '10.100.0.0/16',
+            'CidrBlockAssociationSet': [
+                {
+                    'CidrBlock': '10.101.0.0/16',
+                    'CidrBlockState': {'State': 'associated'}
+                }
+            ]
+        }
+        >>> vpc_ipv4_cidrs(vpc)
+        ['10.100.0.0/16', '10.101.0.0/16']
+
+    Returns:
+        List
+    """
+    cidrs = [vpc['CidrBlock']]
+    for association in vpc.get('CidrBlockAssociationSet', list()):
+        state = association.get('CidrBlockState', dict()).get('State')
+        if (state in [None, 'associating', 'associated']
+                and association['CidrBlock'] not in cidrs):
+            cidrs.append(association['CidrBlock'])
+    return cidrs
+
+def route_conflicts(route_tables, cidr, vpc_peering_id=None):
+    """Find the routes of route tables that are more specific than cidr,
+        and would keep part of the traffic to cidr off the peering
+        connection. A route to cidr itself is replaced by update_route, and
+        a less specific route is overridden by the new route, so neither is
+        a conflict. Neither is a route through the peering connection
+        itself.
+    Args:
+        route_tables (list): List of route tables, as returned by
+            describe_route_tables.
+        cidr (str): The cidr block that will be routed through the peering
+            connection.
+
+    Kwargs:
+        vpc_peering_id (str): The id of the peering connection, when it
+            already exists.
+            default=None
+
+    Basic Usage:
+        >>> route_tables = [
+            {
+                'RouteTableId': 'rtb-1234567',
+                'Routes': [
+                    {
+                        'DestinationCidrBlock': '10.200.1.0/24',
+                        'NatGatewayId': 'nat-1234567'
+                    }
+                ]
+            }
+        ]
+        >>> route_conflicts(route_tables, '10.200.0.0/16')
+        ['rtb-1234567: route 10.200.1.0/24 to nat-1234567 is more specific than 10.200.0.0/16']
 
+    Returns:
+        List
+    """
+    entries = list()
+    for route_table in route_tables:
+        for route in route_table.get('Routes', list()):
+            if not route.get('DestinationCidrBlock'):
+                continue
+            target = 'local'
+            for key in ROUTE_TARGET_KEYS:
+                if route.get(key):
+                    target = route[key]
+                    break
+            if target in ['local', vpc_peering_id]:
+                continue
+            entries.append(
+                {
+                    'cidr': route['DestinationCidrBlock'],
+                    'route_table_id': route_table['RouteTableId'],
+                    'target': target,
+                }
+            )
+    _, _, prefix_len = cidr_to_range(cidr)
+    conflicts = list()
+    for entry in find_overlapping_cidrs(build_cidr_index(entries), cidr):
+        if cidr_to_range(entry['cidr'])[2] > prefix_len:
+            conflicts.append(
+                '{0}: route {1} to {2} is more specific than {3}'.format(
+                    entry['route_table_id'], entry['cidr'], entry['target'],
+                    cidr
+                )
+            )
+    return conflicts
+
+def peering_preflight(client, vpc_id, vpc_peer_id, accepter_client=None,
+                      accepter_routes=None, requester_routes=None,
+                      accepter_routes_selector=None,
+                      requester_routes_selector=None, vpc_peering_id=None):
+    """Check, before any change is made, that the cidr blocks of 2 vpcs do
+        not overlap, and that the route tables that will get a route to the
+        other vpc have no more specific route in its way. Only describe
+        calls are made, concurrently, so this runs in check mode as well.
+        The route table selectors are resolved on the way, so the route
+        tables are not described again when the routes are added.
     Args:
-        client (botocore.client.EC2): Boto3 client.
-        vpc_peering_id (str): The vpc peering connection id.
-        tags (list): List of dictionaries.
-            examples.. [{Name: "", Values: [""]}]
+        client (botocore.client.EC2): Boto3 client of the requester account.
+        vpc_id (str): The requester vpc id.
+        vpc_peer_id (str): The accepter vpc id.
 
     Kwargs:
-        accept_peer (bool): if set to True, the peer will be accepted.
-        accept_with_profile (str): Boto3 Profile to use with accept.
-        region (str): if accept_with_profile is passed, than this region
-            also needs to be passed.
-            default=None
-        accepter_routes (list): list of route table ids that you want
-            to add routes to the cidr that belongs to the peer of the newly
-            created peering_connection
+        accepter_client (botocore.client.EC2): Boto3 client of the accepter
+            account. When the accepter vpc is not visible to it, only the
+            requester side is checked.
+            default=client
+        accepter_routes (list): Route table ids in the requester vpc.
+        requester_routes (list): Route table ids in the accepter vpc.
+        accepter_routes_selector (dict): See route_table_filters.
+        requester_routes_selector (dict): See route_table_filters.
+        vpc_peering_id (str): The id of the peering connection between the
+            vpcs, when it already exists. Its own routes are not conflicts.
             default=None
-        requester_routes (list): list of route table ids that you want
-            to add routes to the cidr that belongs to the vpc that is
-            initiating the creation of the newly created peering_connection
-            default=None
-        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
-            default=False
 
     Basic Usage:
         >>> client = boto3.client('ec2')
-        >>> vpc_peering_id = 'pcx-12345'
-        >>> tags = [{'Name': 'Service', 'Values': ['Development']}]
-        >>> accept_peer = True
-        >>> update(client, vpc_peering_id, tags, accept_peer)
+        >>> peering_preflight(
+                client, 'vpc-1234567', 'vpc-7654321',
+                accepter_routes=['rtb-1234567']
+            )
         [
-            True,
-            True,
-            "",
+            False,
+            'Overlapping cidr blocks: vpc-1234567 10.100.0.0/16 overlaps vpc-7654321 10.100.0.0/20',
             {
-                "status": {
-                    "message": "Active",
-                    "code": "active"
-                },
-                "tags": [
-                    {
-                        "value": "web",
-                        "key": "service"
-                    },
-                    {
-                        "value": "Shaolin Allen",
-                        "key": "Name"
-                    },
-                    {
-                        "value": "development",
-                        "key": "env"
-                    }
+                'conflicts': [
+                    'vpc-1234567 10.100.0.0/16 overlaps vpc-7654321 10.100.0.0/20'
                 ],
-                "accepter_vpc_info": {
-                    "owner_id": "12345678910",
-                    "vpc_id": "vpc-12345678",
-                    "cidr_block": "172.31.0.0/16"
-                },
-                "vpc_peering_connection_id": "pcx-12345678",
-                "requester_vpc_info": {
-                    "owner_id": "12345678910",
-                    "vpc_id": "vpc-12345678",
-                    "cidr_block": "10.100.0.0/16"
-                }
+                'accepter_routes': ['rtb-1234567'],
+                'requester_routes': []
             }
         ]
 
-    Return:
-        Tuple (bool, bool, str, dict)
+    Returns:
+        Tuple (bool, str, dict)
     """
-    success = False
-    changed = False
-    err_msg = ""
-    result = dict()
-    success, err_msg, results = (
-        describe_peering_connections(
-            client, vpc_peering_id=vpc_peering_id,
-            status_codes=['active', 'pending-acceptance', 'initiating-request'],
-            check_mode=check_mode
+    if not accepter_client:
+        accepter_client = client
+    results = {
+        'conflicts': list(),
+        'accepter_routes': list(accepter_routes or list()),
+        'requester_routes': list(requester_routes or list()),
+    }
+
+    calls = [
+        {
+            'func': describe_vpcs,
+            'key': vpc_id,
+            'kwargs': {'client': client, 'vpc_ids': [vpc_id]},
+        },
+        {
+            'func': describe_vpcs,
+            'key': vpc_peer_id,
+            'kwargs': {'client': accepter_client, 'vpc_ids': [vpc_peer_id]},
+        },
+    ]
+    sides = [
+        ('accepter_routes', client, vpc_id, accepter_routes,
+         accepter_routes_selector),
+        ('requester_routes', accepter_client, vpc_peer_id, requester_routes,
+         requester_routes_selector),
+    ]
+    for key, side_client, side_vpc_id, route_table_ids, selector in sides:
+        if route_table_ids:
+            calls.append(
+                {
+                    'func': describe_route_tables,
+                    'key': key,
+                    'kwargs': {
+                        'client': side_client,
+                        'route_table_ids': route_table_ids,
+                    }
+                }
+            )
+        if selector:
+            if not (selector.get('all') or selector.get('tags')
+                    or selector.get('subnet_ids')):
+                err_msg = (
+                    'Route table selector {0} needs all, tags or subnet_ids'
+                    .format(selector)
+                )
+                return False, err_msg, results
+            calls.append(
+                {
+                    'func': describe_route_tables,
+                    'key': key,
+                    'kwargs': {
+                        'client': side_client,
+                        'filters': route_table_filters(side_vpc_id, selector),
+                    }
+                }
+            )
+
+    responses = (
+        run_concurrently(
+            lambda func, kwargs, key=None: func(**kwargs), calls
         )
     )
-    if results:
-        peer_info = convert_to_lower(results[0])
-        tag_update_success, tag_err_msg = (
-            update_tags(
-                client, vpc_peering_id, tags, check_mode=check_mode
+    vpcs = dict()
+    route_tables = {'accepter_routes': dict(), 'requester_routes': dict()}
+    for call, (success, err_msg, found) in zip(calls, responses):
+        if call['key'] == vpc_peer_id and not success:
+            # The accepter vpc belongs to an account this client can not
+            # describe, only the requester side can be checked.
+            continue
+        if not success:
+            return success, err_msg, results
+        if call['func'] is describe_vpcs:
+            vpcs.update(found)
+        else:
+            for route_table in found:
+                route_tables[call['key']][route_table['RouteTableId']] = (
+                    route_table
+                )
+
+    for key in route_tables:
+        results[key] = sorted(set(results[key]).union(route_tables[key]))
+
+    if vpc_id not in vpcs:
+        return False, 'vpc {0} not found'.format(vpc_id), results
+    requester_cidrs = vpc_ipv4_cidrs(vpcs[vpc_id])
+    if vpc_peer_id not in vpcs:
+        return True, '', results
+    accepter_cidrs = vpc_ipv4_cidrs(vpcs[vpc_peer_id])
+
+    requester_index = (
+        build_cidr_index([{'cidr': cidr} for cidr in requester_cidrs])
+    )
+    for cidr in accepter_cidrs:
+        for entry in find_overlapping_cidrs(requester_index, cidr):
+            results['conflicts'].append(
+                '{0} {1} overlaps {2} {3}'.format(
+                    vpc_id, entry['cidr'], vpc_peer_id, cidr
+                )
             )
+    results['conflicts'].extend(
+        route_conflicts(
+            route_tables['accepter_routes'].values(), accepter_cidrs[0],
+            vpc_peering_id
         )
-        if tag_update_success:
-            if (is_active(peer_info) or is_pending(peer_info)
-                    or is_initiating_request(peer_info)):
-                vpc_peering_id = peer_info['vpc_peering_connection_id']
-                changed = True
-                status_codes = ['pending-acceptance']
-                original_client = client
-                if accept_peer:
-                    if accept_with_profile:
-                        ###Switch client to use boto3 profile
-                        accept_client, err_msg = (
-                            create_client_with_profile(
-                                accept_with_profile, region
-                            )
-                        )
-                        if err_msg:
-                            success = False
-                        else:
-                            client = accept_client
-                    if success:
-                        success, changed, err_msg, results = (
-                            accept(
-                                client, vpc_peering_id, check_mode=check_mode
-                            )
-                        )
-                        status_codes.append('active')
-                        if success:
-                            ###Update tags for peered connection, using the boto3 profile
-                            success, err_msg = (
-                                update_tags(
-                                    client, vpc_peering_id, tags,
-                                    check_mode=check_mode
-                                )
-                            )
-
-                _, _, result = (
-                    describe_peering_connections(
-                        client, vpc_peering_id=vpc_peering_id,
-                        status_codes=status_codes, check_mode=check_mode
-                    )
-                )
-                if result and success:
-                    result = convert_to_lower(result[0])
-                    if (accepter_routes and not accept_with_profile or
-                            requester_routes):
-                        client = original_client
-                    if accepter_routes or requester_routes:
-                        success, changed, _ = (
-                            pre_update_routes(
-                                client, result, accepter_routes,
-                                requester_routes, check_mode
-                            )
-                        )
+    )
+    results['conflicts'].extend(
+        route_conflicts(
+            route_tables['requester_routes'].values(), requester_cidrs[0],
+            vpc_peering_id
+        )
+    )
 
-    return success, changed, err_msg, result
+    if results['conflicts']:
+        err_msg = (
+            'Overlapping cidr blocks: {0}'
+            .format('; '.join(results['conflicts']))
+        )
+        return False, err_msg, results
+
+    return True, '', results
 
 def create(client, vpc_id, vpc_peer_id, tags, peer_owner_id=None,
            accept_peer=False, accept_with_profile=None, region=None,
-           accepter_routes=None, requester_routes=None, check_mode=False):
-    """Create a local and cross account vpc peering connection
+           accepter_routes=None, requester_routes=None,
+           requester_options=None, accepter_options=None,
+           accepter_routes_selector=None, requester_routes_selector=None,
+           wait_timeout=300, check_mode=False):
+    """Create a local and cross account vpc peering connection. A preflight
+        (see peering_preflight) fails before any change is made when the cidr
+        blocks of the vpcs overlap, or when a route table has a more specific
+        route in the way of the peering routes. Routes through an active
+        peering connection between the vpcs are not in the way, so re-runs
+        pass the preflight.
 
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -1301,6 +2766,21 @@ def create(client, vpc_id, vpc_peer_id, tags, peer_owner_id=None,
             to add routes to the cidr that belongs to the vpc that is
             initiating the creation of the newly created peering_connection
             default=None
+        requester_options (dict): The desired peering options of the
+            requester vpc. See update.
+            default=None
+        accepter_options (dict): The desired peering options of the
+            accepter vpc. See update.
+            default=None
+        accepter_routes_selector (dict): Selects more route tables in
+            the requester vpc. See update.
+            default=None
+        requester_routes_selector (dict): Selects more route tables in
+            the accepter vpc. See update.
+            default=None
+        wait_timeout (int): Number of seconds to wait for the peering
+            connection to be accepted. See update.
+            default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
 
@@ -1350,8 +2830,6 @@ def create(client, vpc_id, vpc_peer_id, tags, peer_owner_id=None,
     Return:
         Tuple (bool, bool, str, dict)
     """
-    runit = False
-    updateit = False
     changed = False
     success = False
     err_msg = ''
@@ -1364,35 +2842,57 @@ def create(client, vpc_id, vpc_peer_id, tags, peer_owner_id=None,
     if peer_owner_id:
         params['PeerOwnerId'] = peer_owner_id
 
-    success, err_msg, results = (
+    accepter_client = client
+    if accept_with_profile:
+        accepter_client, err_msg = (
+            create_client_with_profile(accept_with_profile, region)
+        )
+        if err_msg:
+            return False, changed, err_msg, results
+    success, err_msg, found = (
         describe_peering_connections(
             client, params['VpcId'], params['PeerVpcId'],
             status_codes=['active']
         )
     )
-    if results:
-        updateit = True
-    else:
-        runit = True
+    if not success:
+        return success, changed, err_msg, results
+    peering = None
+    vpc_peering_id = None
+    if found:
+        peering = found[0]
+        vpc_peering_id = peering['VpcPeeringConnectionId']
+
+    success, err_msg, preflight = (
+        peering_preflight(
+            client, vpc_id, vpc_peer_id, accepter_client, accepter_routes,
+            requester_routes, accepter_routes_selector,
+            requester_routes_selector, vpc_peering_id
+        )
+    )
+    if not success:
+        results['cidr_conflicts'] = preflight['conflicts']
+        return success, changed, err_msg, results
 
-    if runit:
+    if not peering:
         success, changed, err_msg, results = (
             runner(client, 'present', params)
         )
-        if success and changed:
-            updateit = True
 
-    if updateit:
-        if isinstance(results, list):
-            results = convert_to_lower(results[0])
-        vpc_peering_id = results['vpc_peering_connection_id']
-        success, changed, err_msg, results = (
+    if peering or (success and changed):
+        vpc_peering_id = (
+            vpc_peering_id or results['vpc_peering_connection_id']
+        )
+        success, updated, err_msg, results = (
             update(
                 client, vpc_peering_id, tags, accept_peer,
-                accept_with_profile, region, accepter_routes,
-                requester_routes, check_mode
+                accept_with_profile, region, preflight['accepter_routes'],
+                preflight['requester_routes'], requester_options,
+                accepter_options, peering=peering,
+                wait_timeout=wait_timeout, check_mode=check_mode
             )
         )
+        changed = changed or updated
         if success:
             err_msg = ''
 
@@ -1402,6 +2902,504 @@ def create(client, vpc_id, vpc_peer_id, tags, peer_owner_id=None,
 
     return success, changed, err_msg, results
 
+def run_per_account(func, plans, profile_key, **kwargs):
+    """Run func for every plan, with a bounded pool of threads per account
+        and every account running at the same time. Plans that already
+        failed are skipped. This should not be called directly, except by
+        mesh.
+    Args:
+        func (function): Called as func(plan=plan, **kwargs).
+        plans (list): List of edge plans. See mesh.
+        profile_key (str): requester_profile or accepter_profile, the
+            account the calls of func are made in.
+
+    Basic Usage:
+        >>> run_per_account(create_mesh_edge, plans, 'requester_profile')
+    """
+    calls_by_profile = dict()
+    for plan in plans:
+        if plan['report']['success']:
+            call = dict(kwargs)
+            call['plan'] = plan
+            calls_by_profile.setdefault(plan[profile_key], list()).append(call)
+    account_calls = list()
+    for profile in sorted(calls_by_profile, key=str):
+        account_calls.append(
+            {'func': func, 'calls': calls_by_profile[profile]}
+        )
+    run_concurrently(run_concurrently, account_calls)
+
+def wait_per_account(plans, client_key, status, wait_timeout=300):
+    """Wait for the peering connections of every plan to reach status, with
+        one batched describe per poll per account. Plans whose peering
+        connection does not reach status are marked as failed, the others
+        keep the describe output of that account under requester_peering
+        or accepter_peering. This should not be called directly, except by
+        mesh.
+    Args:
+        plans (list): List of edge plans. See mesh.
+        client_key (str): requester_client or accepter_client, the account
+            the peering connections are described in.
+        status (str): One of PEERING_STATUS_ORDER.
+
+    Kwargs:
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+            default=300
+
+    Basic Usage:
+        >>> wait_per_account(plans, 'accepter_client', 'pending-acceptance')
+    """
+    side = client_key.split('_')[0]
+    plans_by_client = dict()
+    for plan in plans:
+        if plan['report']['success']:
+            plans_by_client.setdefault(
+                id(plan[client_key]), list()
+            ).append(plan)
+    wait_calls = list()
+    for account_plans in plans_by_client.values():
+        wait_calls.append(
+            {
+                'client': account_plans[0][client_key],
+                'vpc_peering_ids': [
+                    plan['report']['vpc_peering_connection_id']
+                    for plan in account_plans
+                ],
+                'status': status,
+                'wait_timeout': wait_timeout,
+            }
+        )
+    waited = run_concurrently(wait_for_peering_status, wait_calls)
+    for account_plans, (_, err_msg, peerings) in zip(
+            [plans_by_client[id(call['client'])] for call in wait_calls],
+            waited):
+        for plan in account_plans:
+            vpc_peering_id = plan['report']['vpc_peering_connection_id']
+            peering = peerings.get(vpc_peering_id)
+            if (not peering or peering['Status']['Code']
+                    in PEERING_FAILED_STATUS_CODES):
+                plan['report']['success'] = False
+                plan['report']['msg'] = err_msg
+            else:
+                plan[side + '_peering'] = peering
+
+def create_mesh_edge(plan):
+    """Create the peering connection of an edge plan. It is tagged by
+        finish_mesh_edge, once it is active. This should not be called
+        directly, except by mesh.
+    Args:
+        plan (dict): The edge plan. See mesh.
+    """
+    report = plan['report']
+    params = {
+        'VpcId': report['requester_vpc_id'],
+        'PeerVpcId': report['accepter_vpc_id'],
+        'DryRun': False,
+    }
+    if plan['accepter_owner_id']:
+        params['PeerOwnerId'] = plan['accepter_owner_id']
+    success, _, err_msg, result = (
+        runner(plan['requester_client'], 'present', params)
+    )
+    if success:
+        report['vpc_peering_connection_id'] = (
+            result['vpc_peering_connection_id']
+        )
+    else:
+        report.update({'success': False, 'msg': err_msg})
+
+def accept_mesh_edge(plan):
+    """Accept the peering connection of an edge plan. This should not be
+        called directly, except by mesh.
+    Args:
+        plan (dict): The edge plan. See mesh.
+    """
+    report = plan['report']
+    params = {
+        'VpcPeeringConnectionId': report['vpc_peering_connection_id'],
+        'DryRun': False,
+    }
+    success, _, err_msg, _ = runner(plan['accepter_client'], 'accept', params)
+    if not success:
+        report.update({'success': False, 'msg': err_msg})
+
+def finish_mesh_edge(plan, vpc_info, tags):
+    """Reconcile the tags of an accepted peering connection in both
+        accounts and add the routes on both sides. The current tags come
+        from the describe output of each account, so an account whose tags
+        already match is not called. The tags of edges that already existed
+        are left alone, only their routes are reconciled. The report is
+        marked as changed when a tag or a route changed. This should not be
+        called directly, except by mesh.
+    Args:
+        plan (dict): The edge plan. See mesh.
+        vpc_info (dict): The describe_vpcs output of every vpc in the mesh.
+        tags (list): List of tags in the AWS format.
+    """
+    report = plan['report']
+    vpc_peering_id = report['vpc_peering_connection_id']
+    tag_calls = list()
+    sides = [('requester', plan['requester_client'])]
+    if plan['accepter_client'] is not plan['requester_client']:
+        sides.append(('accepter', plan['accepter_client']))
+    if report['action'] == 'exists':
+        sides = list()
+    for side, client in sides:
+        peering = plan.get(side + '_peering')
+        tag_calls.append(
+            {
+                'client': client,
+                'resource_id': vpc_peering_id,
+                'tags': tags,
+                'current_tags': peering.get('Tags', list()) if peering else None,
+            }
+        )
+    tag_results = run_concurrently(update_tags, tag_calls)
+    for tag_success, tag_changed, tag_msg in tag_results:
+        if not tag_success:
+            report.update({'success': False, 'msg': tag_msg})
+            return
+        if tag_changed:
+            report['changed'] = True
+
+    route_calls = list()
+    for route_table_id in plan['requester'].get('route_tables') or list():
+        route_calls.append(
+            {
+                'client': plan['requester_client'],
+                'vpc_peering_id': vpc_peering_id,
+                'cidr': vpc_info[report['accepter_vpc_id']]['CidrBlock'],
+                'route_table_id': route_table_id,
+            }
+        )
+    for route_table_id in plan['accepter'].get('route_tables') or list():
+        route_calls.append(
+            {
+                'client': plan['accepter_client'],
+                'vpc_peering_id': vpc_peering_id,
+                'cidr': vpc_info[report['requester_vpc_id']]['CidrBlock'],
+                'route_table_id': route_table_id,
+            }
+        )
+    route_success, route_changed, route_msg = (
+        aggregate_route_results(run_concurrently(update_route, route_calls))
+    )
+    if not route_success:
+        report.update({'success': False, 'msg': route_msg})
+    elif route_changed:
+        report['changed'] = True
+
+def delete_mesh_edge(plan):
+    """Delete the peering connection of an edge plan. This should not be
+        called directly, except by mesh.
+    Args:
+        plan (dict): The edge plan. See mesh.
+    """
+    report = plan['report']
+    params = {
+        'VpcPeeringConnectionId': report['vpc_peering_connection_id'],
+        'DryRun': False,
+    }
+    success, _, err_msg, _ = (
+        runner(plan['requester_client'], 'absent', params)
+    )
+    if not success:
+        report.update({'success': False, 'msg': err_msg})
+
+def mesh(client, vpcs, tags, edges=None, region=None, purge_edges=False,
+         wait_timeout=300, check_mode=False):
+    """Reconcile a partial or full mesh of peering connections between many
+        vpcs, optionally spread across accounts. Every account is described
+        once, the missing and extra edges are computed from that snapshot,
+        and the edges are then created, accepted, tagged and routed with
+        bounded parallelism per account. Each step runs for every edge
+        before the next one starts, so waiting for the peering connections
+        to become pending-acceptance and then active takes one batched
+        describe per poll per account. Every edge is tracked by a plan, a
+        dictionary with the report of the edge, the requester and accepter
+        vpcs, profiles and clients, the account id of the accepter when it
+        is peered from another profile (accepter_owner_id), and the latest
+        describe output of the peering connection in each account
+        (requester_peering and accepter_peering).
+    Args:
+        client (botocore.client.EC2): Boto3 client, used for every vpc
+            without a profile.
+        vpcs (list): List of dictionaries with the keys vpc_id, and
+            optionally profile, owner_id (the account id of profile, needed
+            to peer with a vpc of another profile when no peering connection
+            of that vpc names it), route_tables and route_table_selector (see
+            route_table_filters). Route tables of a vpc get a route to the
+            cidr block of every vpc it is peered with.
+        tags (list): List of tags in the AWS format, applied to every
+            peering connection that is created.
+
+    Kwargs:
+        edges (list): List of [requester vpc id, accepter vpc id] pairs.
+            default=every pair of vpcs (full mesh)
+        region (str): The aws region, used to create the profile clients.
+        purge_edges (bool): Delete peering connections between the vpcs
+            that are not part of edges.
+            default=False
+        wait_timeout (int): Number of seconds to wait for the peering
+            connections to be accepted and become active.
+            default=300
+        check_mode (bool): Report the planned actions without making any
+            changes.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> vpcs = [
+            {'vpc_id': 'vpc-1234567', 'route_tables': ['rtb-1234567']},
+            {'vpc_id': 'vpc-7654321', 'profile': 'prod'},
+            {'vpc_id': 'vpc-1111111'}
+        ]
+        >>> edges = [['vpc-1234567', 'vpc-7654321'], ['vpc-1234567', 'vpc-1111111']]
+        >>> tags = [{'Key': 'env', 'Value': 'development'}]
+        >>> mesh(client, vpcs, tags, edges, region='us-west-2')
+        [
+            True,
+            True,
+            "",
+            {
+                "edges": [
+                    {
+                        "requester_vpc_id": "vpc-1234567",
+                        "accepter_vpc_id": "vpc-7654321",
+                        "action": "create",
+                        "success": true,
+                        "changed": true,
+                        "msg": "",
+                        "vpc_peering_connection_id": "pcx-1234567"
+                    },
+                    {
+                        "requester_vpc_id": "vpc-1234567",
+                        "accepter_vpc_id": "vpc-1111111",
+                        "action": "exists",
+                        "success": true,
+                        "changed": false,
+                        "msg": "",
+                        "vpc_peering_connection_id": "pcx-7654321"
+                    }
+                ]
+            }
+        ]
+
+    Returns:
+        Tuple (bool, bool, str, dict)
+    """
+    results = {'edges': list()}
+    vpcs_by_id = dict()
+    for vpc in vpcs:
+        vpcs_by_id[vpc['vpc_id']] = vpc
+
+    if edges is None:
+        edges = [list(edge) for edge in combinations(sorted(vpcs_by_id), 2)]
+    for edge in edges:
+        if len(edge) != 2 or edge[0] == edge[1]:
+            err_msg = 'Invalid edge {0}'.format(edge)
+            return False, False, err_msg, results
+        for vpc_id in edge:
+            if vpc_id not in vpcs_by_id:
+                err_msg = '{0} is not part of vpcs'.format(vpc_id)
+                return False, False, err_msg, results
+
+    clients = {None: client}
+    vpc_ids_by_profile = dict()
+    for vpc in vpcs:
+        profile = vpc.get('profile')
+        vpc_ids_by_profile.setdefault(profile, list()).append(vpc['vpc_id'])
+        if profile not in clients:
+            clients[profile], err_msg = (
+                create_client_with_profile(profile, region)
+            )
+            if err_msg:
+                return False, False, err_msg, results
+
+    # Describe calls are read only, so the snapshot is taken for real even
+    # in check mode, to report an accurate plan.
+    vpc_info = dict()
+    peerings = dict()
+    # describe_vpcs does not return the owner of a vpc, the peering
+    # connections of the vpc do.
+    owner_ids = dict(
+        (vpc['vpc_id'], vpc['owner_id']) for vpc in vpcs if vpc.get('owner_id')
+    )
+    all_vpc_ids = sorted(vpcs_by_id)
+    for profile, vpc_ids in vpc_ids_by_profile.items():
+        success, err_msg, found_vpcs = describe_vpcs(clients[profile], vpc_ids)
+        if not success:
+            return success, False, err_msg, results
+        vpc_info.update(found_vpcs)
+        success, err_msg, found_peerings = (
+            describe_all_peering_connections(
+                clients[profile], all_vpc_ids, LIVE_STATUS_CODES
+            )
+        )
+        if not success:
+            return success, False, err_msg, results
+        for peering in found_peerings:
+            for vpc_info_key in ['RequesterVpcInfo', 'AccepterVpcInfo']:
+                info = peering[vpc_info_key]
+                if info.get('OwnerId'):
+                    owner_ids.setdefault(info['VpcId'], info['OwnerId'])
+            key = frozenset(
+                [
+                    peering['RequesterVpcInfo']['VpcId'],
+                    peering['AccepterVpcInfo']['VpcId']
+                ]
+            )
+            if key.issubset(vpcs_by_id):
+                peerings[key] = peering
+
+    missing_vpcs = set(all_vpc_ids).difference(vpc_info)
+    if missing_vpcs:
+        err_msg = 'vpcs not found: {0}'.format(', '.join(sorted(missing_vpcs)))
+        return False, False, err_msg, results
+
+    selector_vpc_ids = [
+        vpc_id for vpc_id in all_vpc_ids
+        if vpcs_by_id[vpc_id].get('route_table_selector')
+    ]
+    selector_calls = [
+        {
+            'client': clients[vpcs_by_id[vpc_id].get('profile')],
+            'vpc_id': vpc_id,
+            'selector': vpcs_by_id[vpc_id]['route_table_selector'],
+        }
+        for vpc_id in selector_vpc_ids
+    ]
+    selected = run_concurrently(select_route_tables, selector_calls)
+    for vpc_id, (success, err_msg, route_table_ids) in zip(
+            selector_vpc_ids, selected):
+        if not success:
+            return success, False, err_msg, results
+        vpc = dict(vpcs_by_id[vpc_id])
+        vpc['route_tables'] = sorted(
+            set(vpc.get('route_tables') or list()).union(route_table_ids)
+        )
+        vpcs_by_id[vpc_id] = vpc
+
+    plans = list()
+    desired = set()
+    for requester_id, accepter_id in edges:
+        key = frozenset([requester_id, accepter_id])
+        desired.add(key)
+        peering = peerings.get(key)
+        action = 'create'
+        if peering:
+            requester_id = peering['RequesterVpcInfo']['VpcId']
+            accepter_id = peering['AccepterVpcInfo']['VpcId']
+            action = 'exists'
+            if peering['Status']['Code'] in ['initiating-request', 'pending-acceptance']:
+                action = 'accept'
+            elif peering['Status']['Code'] == 'provisioning':
+                action = 'route'
+        plans.append((requester_id, accepter_id, peering, action))
+
+    if purge_edges:
+        for key, peering in peerings.items():
+            if key not in desired:
+                plans.append(
+                    (
+                        peering['RequesterVpcInfo']['VpcId'],
+                        peering['AccepterVpcInfo']['VpcId'],
+                        peering, 'delete'
+                    )
+                )
+
+    for i, (requester_id, accepter_id, peering, action) in enumerate(plans):
+        requester = vpcs_by_id[requester_id]
+        accepter = vpcs_by_id[accepter_id]
+        report = {
+            'requester_vpc_id': requester_id,
+            'accepter_vpc_id': accepter_id,
+            'action': action,
+            'success': True,
+            'changed': action != 'exists',
+            'msg': '',
+            'vpc_peering_connection_id': None,
+        }
+        if peering:
+            report['vpc_peering_connection_id'] = (
+                peering['VpcPeeringConnectionId']
+            )
+        results['edges'].append(report)
+        plans[i] = {
+            'report': report,
+            'requester_peering': peering,
+            'accepter_peering': None,
+            'requester': requester,
+            'accepter': accepter,
+            'requester_profile': requester.get('profile'),
+            'accepter_profile': accepter.get('profile'),
+            'requester_client': clients[requester.get('profile')],
+            'accepter_client': clients[accepter.get('profile')],
+            'accepter_owner_id': None,
+        }
+        if (action == 'create'
+                and accepter.get('profile') != requester.get('profile')):
+            plans[i]['accepter_owner_id'] = owner_ids.get(accepter_id)
+            if not plans[i]['accepter_owner_id']:
+                report.update(
+                    {
+                        'success': False,
+                        'changed': False,
+                        'msg': (
+                            'The account of {0} is unknown, set the '
+                            'owner_id of {0} in vpcs'.format(accepter_id)
+                        )
+                    }
+                )
+
+    if not check_mode:
+        to_create = [
+            plan for plan in plans if plan['report']['action'] == 'create'
+        ]
+        to_accept = [
+            plan for plan in plans
+            if plan['report']['action'] in ['create', 'accept']
+        ]
+        to_activate = [
+            plan for plan in plans
+            if plan['report']['action'] in ['create', 'accept', 'route']
+        ]
+        # Active edges are finished as well, so their routes converge.
+        to_finish = [
+            plan for plan in plans if plan['report']['action'] != 'delete'
+        ]
+        to_delete = [
+            plan for plan in plans if plan['report']['action'] == 'delete'
+        ]
+        run_per_account(create_mesh_edge, to_create, 'requester_profile')
+        wait_per_account(
+            to_accept, 'accepter_client', 'pending-acceptance', wait_timeout
+        )
+        run_per_account(accept_mesh_edge, to_accept, 'accepter_profile')
+        wait_per_account(
+            to_activate, 'requester_client', 'active', wait_timeout
+        )
+        run_per_account(
+            finish_mesh_edge, to_finish, 'requester_profile',
+            vpc_info=vpc_info, tags=tags
+        )
+        run_per_account(delete_mesh_edge, to_delete, 'requester_profile')
+
+    success = all(report['success'] for report in results['edges'])
+    changed = any(report['changed'] for report in results['edges'])
+    err_msg = ''
+    if not success:
+        failed = [
+            '{0}-{1}: {2}'.format(
+                report['requester_vpc_id'], report['accepter_vpc_id'],
+                report['msg']
+            )
+            for report in results['edges'] if not report['success']
+        ]
+        err_msg = 'Failed edges: {0}'.format('; '.join(failed))
+
+    return success, changed, err_msg, results
+
 def main():
     argument_spec = ec2_argument_spec()
     argument_spec.update(
@@ -1416,9 +3414,17 @@ def main():
             profile=dict(),
             accept_with_profile=dict(),
             resource_tags=dict(type='dict'),
+            vpcs=dict(type='list'),
+            edges=dict(type='list'),
+            purge_edges=dict(type='bool', default=False),
+            wait_timeout=dict(type='int', default=300),
+            requester_options=dict(type='dict'),
+            accepter_routes_selector=dict(type='dict'),
+            requester_routes_selector=dict(type='dict'),
+            accepter_options=dict(type='dict'),
             state=dict(
                 default='present', choices=[
-                    'present', 'absent', 'accept', 'reject'
+                    'present', 'absent', 'accept', 'reject', 'mesh'
                 ]
             )
         )
@@ -1442,13 +3448,46 @@ def main():
     peer_owner_id = module.params.get('peer_owner_id')
     accept_peer = module.params.get('accept_peer')
     tags = module.params.get('resource_tags')
+    vpcs = module.params.get('vpcs')
+    edges = module.params.get('edges')
+    purge_edges = module.params.get('purge_edges')
+    wait_timeout = module.params.get('wait_timeout')
+    requester_options = module.params.get('requester_options')
+    accepter_options = module.params.get('accepter_options')
+    accepter_routes_selector = module.params.get('accepter_routes_selector')
+    requester_routes_selector = module.params.get('requester_routes_selector')
     state = module.params.get('state').lower()
 
     if tags:
         tags = make_tags_in_aws_format(tags)
 
-    if state == 'present' and not tags:
-        err_msg = "parameters state=present and tags are required together"
+    if state in ['present', 'mesh'] and not tags:
+        err_msg = (
+            "parameters state={0} and tags are required together"
+            .format(state)
+        )
+        module.fail_json(
+            success=False, changed=False, result={}, msg=err_msg
+        )
+
+    for options in [requester_options, accepter_options]:
+        invalid_options = set(options or dict()).difference(PEERING_OPTIONS)
+        if invalid_options:
+            err_msg = (
+                "Invalid peering options {0}, valid options are {1}"
+                .format(
+                    ', '.join(sorted(invalid_options)),
+                    ', '.join(sorted(PEERING_OPTIONS))
+                )
+            )
+            module.fail_json(
+                success=False, changed=False, result={}, msg=err_msg
+            )
+        for key, val in (options or dict()).items():
+            options[key] = module.boolean(val)
+
+    if state == 'mesh' and not vpcs:
+        err_msg = "parameters state=mesh and vpcs are required together"
         module.fail_json(
             success=False, changed=False, result={}, msg=err_msg
         )
@@ -1463,12 +3502,24 @@ def main():
         region, ec2_url, aws_connect_kwargs = (
             get_aws_connection_info(module, boto3=True)
         )
-        client = (
-            boto3_conn(
-                module, conn_type='client', resource='ec2',
-                region=region, endpoint=ec2_url, **aws_connect_kwargs
+        if not boto_profile:
+            start = time.time()
+            client = (
+                boto3_conn(
+                    module, conn_type='client', resource='ec2',
+                    region=region, endpoint=ec2_url, **aws_connect_kwargs
+                )
             )
-        )
+            CLIENT_TIMINGS.append(
+                {
+                    'profile': None,
+                    'region': region,
+                    'service': 'ec2',
+                    'session_secs': 0,
+                    'client_secs': round(time.time() - start, 4),
+                }
+            )
+            register_client(client, None, region)
     except botocore.exceptions.ClientError, e:
         err_msg = 'Boto3 Client Error - {0}'.format(str(e.msg))
         module.fail_json(
@@ -1491,6 +3542,24 @@ def main():
                 'Peering connection {0} accepted.'
                 .format(vpc_peering_id)
             )
+        if success and accepter_options:
+            success, options_msg, active = (
+                wait_for_peering_status(
+                    client, [vpc_peering_id], 'active', wait_timeout,
+                    check_mode=check_mode
+                )
+            )
+            if success and active:
+                success, options_changed, options_msg = (
+                    update_peering_options(
+                        client, convert_to_lower(active[vpc_peering_id]),
+                        accepter_options=accepter_options,
+                        check_mode=check_mode
+                    )
+                )
+                changed = changed or options_changed
+            if not success:
+                err_msg = options_msg
 
     elif state == 'present':
         success, changed, err_msg, results = (
@@ -1499,7 +3568,12 @@ def main():
                 tags=tags, accept_peer=accept_peer,
                 accept_with_profile=accept_with_profile,
                 accepter_routes=accepter_routes,
-                requester_routes=requester_routes, check_mode=check_mode,
+                requester_routes=requester_routes,
+                requester_options=requester_options,
+                accepter_options=accepter_options,
+                accepter_routes_selector=accepter_routes_selector,
+                requester_routes_selector=requester_routes_selector,
+                wait_timeout=wait_timeout, check_mode=check_mode,
                 region=region
             )
         )
@@ -1511,6 +3585,15 @@ def main():
                 .format(vpc_peering_id, status_code)
             )
 
+    elif state == 'mesh':
+        success, changed, err_msg, results = (
+            mesh(
+                client, vpcs, tags, edges=edges, region=region,
+                purge_edges=purge_edges, wait_timeout=wait_timeout,
+                check_mode=check_mode
+            )
+        )
+
     elif state == 'reject':
         success, changed, err_msg, results = (
             reject(client, vpc_peering_id, check_mode=check_mode)
@@ -1525,6 +3608,9 @@ def main():
         if success and changed:
             err_msg = 'Peering connection {0} deleted.'.format(vpc_peering_id)
 
+    if module._verbosity >= 2:
+        results['client_timings'] = CLIENT_TIMINGS
+
     if success:
         module.exit_json(
             success=success, changed=changed, msg=err_msg, **results
@@ -0,0 +1,538 @@
+#!/usr/bin/python
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+DOCUMENTATION = '''
+---
+module: ec2_vpc_peer_facts
+short_description: Retrieve the facts of every VPC peering connection in a region.
+description:
+  - Retrieve every VPC peering connection visible to the account in a region, indexed by peering connection id.
+  - The peering connections are described with a single call, DescribeVpcPeeringConnections is not paginated in the pinned botocore, and indexed by vpc id, cidr block, account and status. Every filter, including the vpc pairs, is answered from that index, so auditing many vpc pairs costs a single describe.
+  - The tags of the peering connections are part of the describe output, no other api call is made.
+version_added: "2.2"
+author: "Allen Sanabria (@linuxdynasty)"
+requirements: [boto3, botocore]
+options:
+  vpc_ids:
+    description:
+      - Only return the peering connections where one of these vpcs is the requester or the accepter.
+    required: false
+    aliases: [ "vpc_id" ]
+  cidrs:
+    description:
+      - Only return the peering connections where one of these cidr blocks belongs to the requester or the accepter vpc. The pinned botocore only returns the primary IPv4 cidr block of each vpc, secondary and IPv6 cidr blocks are matched when a newer botocore returns them.
+    required: false
+  owner_ids:
+    description:
+      - Only return the peering connections where one of these AWS accounts owns the requester or the accepter vpc.
+    required: false
+  status_codes:
+    description:
+      - Only return the peering connections in one of these states. This filter is applied by Amazon.
+    required: false
+    choices: ['initiating-request', 'pending-acceptance', 'provisioning', 'active', 'deleting', 'deleted', 'rejected', 'failed', 'expired']
+  pairs:
+    description:
+      - List of [vpc id, vpc id] pairs. The peering connections between each pair, in either direction, are returned under pairs.
+    required: false
+extends_documentation_fragment:
+    - aws
+    - ec2
+requirements: ['boto3']
+'''
+
+EXAMPLES = '''
+# Retrieve every peering connection in the region
+- ec2_vpc_peer_facts:
+  register: peerings
+
+# Retrieve the active peering connections of a VPC
+- ec2_vpc_peer_facts:
+    vpc_ids:
+      - vpc-1234567
+    status_codes:
+      - active
+  register: peerings
+
+# Retrieve the peering connections with another account
+- ec2_vpc_peer_facts:
+    owner_ids:
+      - 210987654321
+  register: peerings
+
+# Audit many vpc pairs with a single describe
+- ec2_vpc_peer_facts:
+    status_codes:
+      - active
+    pairs:
+      - [vpc-1234567, vpc-7654321]
+      - [vpc-1234567, vpc-1111111]
+  register: peerings
+'''
+
+RETURN = '''
+vpc_peering_connections:
+    description: The matching peering connections, indexed by peering connection id.
+    returned: success
+    type: dict
+    sample: {
+        "pcx-1234567": {
+            "vpc_peering_connection_id": "pcx-1234567",
+            "status": {
+                "message": "Active",
+                "code": "active"
+            },
+            "requester_vpc_info": {
+                "owner_id": "123456789012",
+                "vpc_id": "vpc-1234567",
+                "cidr_block": "10.100.0.0/16"
+            },
+            "accepter_vpc_info": {
+                "owner_id": "123456789012",
+                "vpc_id": "vpc-7654321",
+                "cidr_block": "10.200.0.0/16"
+            },
+            "tags": [
+                {
+                    "key": "Name",
+                    "value": "development-to-staging"
+                }
+            ]
+        }
+    }
+pairs:
+    description: The ids of the matching peering connections between each vpc pair, indexed by the 2 vpc ids joined with a comma, in the order they were passed.
+    returned: When pairs is passed.
+    type: dict
+    sample: {
+        "vpc-1234567,vpc-7654321": ["pcx-1234567"],
+        "vpc-1234567,vpc-2222222": []
+    }
+'''
+import re
+import datetime
+
+try:
+    import boto3
+    import botocore.exceptions
+    HAS_BOTO3 = True
+except ImportError:
+    HAS_BOTO3 = False
+
+# The indexes built by index_peering_connections.
+INDEX_NAMES = ['vpc_id', 'cidr', 'owner_id', 'status', 'pair']
+
+DRY_RUN_PEERING_CONNECTIONS = [
+    {
+        u'VpcPeeringConnectionId': 'pcx-1234567',
+        u'Status': {
+            u'Code': 'active',
+            u'Message': 'Active'
+        },
+        u'RequesterVpcInfo': {
+            u'OwnerId': '123456789012',
+            u'VpcId': 'vpc-1234567',
+            u'CidrBlock': '10.100.0.0/16',
+            u'CidrBlockSet': [
+                {u'CidrBlock': '10.100.0.0/16'},
+                {u'CidrBlock': '10.101.0.0/16'}
+            ]
+        },
+        u'AccepterVpcInfo': {
+            u'OwnerId': '123456789012',
+            u'VpcId': 'vpc-7654321',
+            u'CidrBlock': '10.200.0.0/16',
+            u'Ipv6CidrBlockSet': [
+                {u'Ipv6CidrBlock': '2600:1f14:abc:de00::/56'}
+            ]
+        },
+        u'Tags': [
+            {
+                u'Key': 'Name',
+                u'Value': 'development-to-staging'
+            }
+        ]
+    },
+    {
+        u'VpcPeeringConnectionId': 'pcx-7654321',
+        u'Status': {
+            u'Code': 'pending-acceptance',
+            u'Message': 'Pending Acceptance by 210987654321'
+        },
+        u'RequesterVpcInfo': {
+            u'OwnerId': '123456789012',
+            u'VpcId': 'vpc-1234567',
+            u'CidrBlock': '10.100.0.0/16'
+        },
+        u'AccepterVpcInfo': {
+            u'OwnerId': '210987654321',
+            u'VpcId': 'vpc-1111111',
+            u'CidrBlock': '172.31.0.0/16'
+        },
+        u'Tags': [
+            {
+                u'Key': 'Name',
+                u'Value': 'development-to-production'
+            }
+        ]
+    },
+    {
+        u'VpcPeeringConnectionId': 'pcx-1111111',
+        u'Status': {
+            u'Code': 'deleted',
+            u'Message': 'Deleted by 123456789012'
+        },
+        u'RequesterVpcInfo': {
+            u'OwnerId': '123456789012',
+            u'VpcId': 'vpc-7654321',
+            u'CidrBlock': '10.200.0.0/16'
+        },
+        u'AccepterVpcInfo': {
+            u'OwnerId': '210987654321',
+            u'VpcId': 'vpc-1111111',
+            u'CidrBlock': '172.31.0.0/16'
+        },
+        u'Tags': []
+    }
+]
+
+
+def convert_to_lower(data):
+    """Convert all uppercase keys in dict with lowercase_
+    Args:
+        data (dict): Dictionary with keys that have upper cases in them
+            Example.. FooBar == foo_bar
+            if a val is of type datetime.datetime, it will be converted to
+            the ISO 8601
+    Basic Usage:
+        >>> test = {'FooBar': []}
+        >>> test = convert_to_lower(test)
+        {
+            'foo_bar': []
+        }
+
+    Returns:
+        Dictionary
+    """
+    results = dict()
+    if isinstance(data, dict):
+        for key, val in data.items():
+            key = re.sub(r'(([A-Z]{1,3}){1})', r'_\1', key).lower()
+            if key[0] == '_':
+                key = key[1:]
+            if isinstance(val, datetime.datetime):
+                results[key] = val.isoformat()
+            elif isinstance(val, dict):
+                results[key] = convert_to_lower(val)
+            elif isinstance(val, list):
+                converted = list()
+                for item in val:
+                    converted.append(convert_to_lower(item))
+                results[key] = converted
+            else:
+                results[key] = val
+    elif isinstance(data, basestring):
+        return data
+    return results
+
+
+def describe_peering_connections(client, status_codes=None,
+                                 check_mode=False):
+    """Retrieve every peering connection visible to the account. The
+        pinned botocore has no MaxResults or NextToken for
+        DescribeVpcPeeringConnections, so a single call returns them all.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        status_codes (list): Only retrieve the peering connections in one
+            of these states.
+        check_mode (bool): Return DRY_RUN_PEERING_CONNECTIONS instead of
+            making the api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> describe_peering_connections(client, ['active'])
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = True
+    err_msg = ''
+    results = list()
+    params = dict()
+    if status_codes:
+        params['Filters'] = [
+            {
+                'Name': 'status-code',
+                'Values': status_codes,
+            }
+        ]
+    try:
+        if check_mode:
+            results = [
+                peering for peering in DRY_RUN_PEERING_CONNECTIONS
+                if not status_codes
+                or peering['Status']['Code'] in status_codes
+            ]
+        else:
+            results = (
+                client.describe_vpc_peering_connections(**params)
+                ['VpcPeeringConnections']
+            )
+    except botocore.exceptions.ClientError as e:
+        success = False
+        err_msg = str(e)
+
+    return success, err_msg, results
+
+
+def vpc_cidrs(vpc_info):
+    """Return every IPv4 and IPv6 cidr block of one side of a peering
+        connection.
+    Args:
+        vpc_info (dict): The RequesterVpcInfo or AccepterVpcInfo of a
+            peering connection.
+
+    Basic Usage:
+        >>> vpc_info = DRY_RUN_PEERING_CONNECTIONS[0]['RequesterVpcInfo']
+        >>> vpc_cidrs(vpc_info)
+        set(['10.100.0.0/16', '10.101.0.0/16'])
+
+    Returns:
+        Set
+    """
+    cidrs = set()
+    if vpc_info.get('CidrBlock'):
+        cidrs.add(vpc_info['CidrBlock'])
+    for cidr in vpc_info.get('CidrBlockSet', list()):
+        cidrs.add(cidr['CidrBlock'])
+    for cidr in vpc_info.get('Ipv6CidrBlockSet', list()):
+        cidrs.add(cidr['Ipv6CidrBlock'])
+    return cidrs
+
+
+def pair_key(vpc_id, peer_vpc_id):
+    """Return the key of a vpc pair in the pair index, the same whichever
+        vpc is the requester.
+    Args:
+        vpc_id (str): A vpc id.
+        peer_vpc_id (str): The other vpc id.
+
+    Basic Usage:
+        >>> pair_key('vpc-7654321', 'vpc-1234567')
+        ('vpc-1234567', 'vpc-7654321')
+
+    Returns:
+        Tuple
+    """
+    return tuple(sorted([vpc_id, peer_vpc_id]))
+
+
+def index_peering_connections(peerings):
+    """Index peering connections by vpc id, cidr block, account, status and
+        vpc pair. Every index maps a value to the set of peering connection
+        ids that have it on either side.
+    Args:
+        peerings (list): List of peering connections, as returned by
+            describe_peering_connections.
+
+    Basic Usage:
+        >>> index = index_peering_connections(DRY_RUN_PEERING_CONNECTIONS)
+        >>> index['vpc_id']['vpc-1111111']
+        set(['pcx-7654321', 'pcx-1111111'])
+
+    Returns:
+        Dictionary
+    """
+    index = dict()
+    for name in INDEX_NAMES:
+        index[name] = dict()
+    for peering in peerings:
+        vpc_peering_id = peering['VpcPeeringConnectionId']
+        requester = peering.get('RequesterVpcInfo', dict())
+        accepter = peering.get('AccepterVpcInfo', dict())
+        values = {
+            'vpc_id': [requester.get('VpcId'), accepter.get('VpcId')],
+            'cidr': vpc_cidrs(requester).union(vpc_cidrs(accepter)),
+            'owner_id': [requester.get('OwnerId'), accepter.get('OwnerId')],
+            'status': [peering['Status']['Code']],
+            'pair': [pair_key(requester.get('VpcId'), accepter.get('VpcId'))],
+        }
+        for name, keys in values.items():
+            for key in keys:
+                if key:
+                    index[name].setdefault(key, set()).add(vpc_peering_id)
+    return index
+
+
+def lookup(index, name, keys):
+    """Return the ids of the peering connections that match one of keys in
+        one of the indexes.
+    Args:
+        index (dict): The output of index_peering_connections.
+        name (str): One of INDEX_NAMES.
+        keys (list): The values to look up.
+
+    Basic Usage:
+        >>> index = index_peering_connections(DRY_RUN_PEERING_CONNECTIONS)
+        >>> lookup(index, 'owner_id', ['210987654321'])
+        set(['pcx-7654321', 'pcx-1111111'])
+
+    Returns:
+        Set
+    """
+    found = set()
+    for key in keys:
+        found.update(index[name].get(key, set()))
+    return found
+
+
+def get_peering_connections(client, vpc_ids=None, cidrs=None, owner_ids=None,
+                            status_codes=None, pairs=None, check_mode=False):
+    """Retrieve the peering connections that match every filter, indexed by
+        peering connection id. The peering connections are described once
+        and every filter is answered from the index, so only the matching
+        peering connections are converted.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        vpc_ids (list): List of vpc ids.
+        cidrs (list): List of IPv4 or IPv6 cidr blocks.
+        owner_ids (list): List of AWS account ids.
+        status_codes (list): List of peering connection states.
+        pairs (list): List of [vpc id, vpc id] pairs.
+        check_mode (bool): Use DRY_RUN_PEERING_CONNECTIONS instead of making
+            the api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> pairs = [['vpc-1234567', 'vpc-7654321']]
+        >>> get_peering_connections(client, status_codes=['active'], pairs=pairs)
+        (
+            True,
+            '',
+            {
+                'vpc_peering_connections': {
+                    'pcx-1234567': {
+                        'vpc_peering_connection_id': 'pcx-1234567',
+                        ...
+                    }
+                },
+                'pairs': {
+                    'vpc-1234567,vpc-7654321': ['pcx-1234567']
+                }
+            }
+        )
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    results = {'vpc_peering_connections': dict()}
+    for pair in pairs or list():
+        if len(pair) != 2:
+            return False, 'Invalid pair {0}'.format(pair), results
+
+    success, err_msg, peerings = (
+        describe_peering_connections(client, status_codes, check_mode)
+    )
+    if not success:
+        return success, err_msg, results
+
+    peerings_by_id = dict()
+    for peering in peerings:
+        peerings_by_id[peering['VpcPeeringConnectionId']] = peering
+    index = index_peering_connections(peerings)
+
+    matched = set(peerings_by_id)
+    for name, keys in [('vpc_id', vpc_ids), ('cidr', cidrs),
+                       ('owner_id', owner_ids)]:
+        if keys:
+            matched.intersection_update(lookup(index, name, keys))
+
+    if pairs:
+        results['pairs'] = dict()
+        pair_matches = set()
+        for pair in pairs:
+            found = index['pair'].get(pair_key(*pair), set()) & matched
+            results['pairs'][','.join(pair)] = sorted(found)
+            pair_matches.update(found)
+        matched = pair_matches
+
+    for vpc_peering_id in matched:
+        results['vpc_peering_connections'][vpc_peering_id] = (
+            convert_to_lower(peerings_by_id[vpc_peering_id])
+        )
+
+    return success, err_msg, results
+
+
+def main():
+    argument_spec = ec2_argument_spec()
+    argument_spec.update(dict(
+        vpc_ids=dict(type='list', aliases=['vpc_id']),
+        cidrs=dict(type='list'),
+        owner_ids=dict(type='list'),
+        status_codes=dict(type='list'),
+        pairs=dict(type='list'),
+    ))
+
+    module = (
+        AnsibleModule(
+            argument_spec=argument_spec,
+            supports_check_mode=True,
+        )
+    )
+
+    if not HAS_BOTO3:
+        module.fail_json(msg='boto3 required for this module')
+
+    try:
+        region, ec2_url, aws_connect_kwargs = get_aws_connection_info(module, boto3=True)
+        client = boto3_conn(module, conn_type='client', resource='ec2', region=region, endpoint=ec2_url, **aws_connect_kwargs)
+    except botocore.exceptions.ClientError as e:
+        module.fail_json(msg="Boto3 Client Error - " + str(e.msg))
+
+    owner_ids = module.params.get('owner_ids')
+    if owner_ids:
+        owner_ids = [str(owner_id) for owner_id in owner_ids]
+
+    success, err_msg, results = (
+        get_peering_connections(
+            client,
+            vpc_ids=module.params.get('vpc_ids'),
+            cidrs=module.params.get('cidrs'),
+            owner_ids=owner_ids,
+            status_codes=module.params.get('status_codes'),
+            pairs=module.params.get('pairs'),
+            check_mode=module.check_mode
+        )
+    )
+    if success:
+        module.exit_json(success=success, **results)
+    else:
+        module.fail_json(msg=err_msg)
+
+
+# import module snippets
+from ansible.module_utils.basic import *
+from ansible.module_utils.ec2 import *
+
+if __name__ == '__main__':
+    main()
@@ -33,7 +33,7 @@ options:
     choices: [ 'tag', 'id' ]
   propagating_vgw_ids:
     description:
-      - "Enable route propagation from virtual gateways specified by ID. Only 1 virtual gateway can only be applied to a vpc at a time."
+      - "Enable route propagation from virtual gateways specified by ID. Any virtual gateway propagating into the route table that is not in this list will be disabled."
     default: None
     required: false
   route_table_id:
@@ -44,7 +44,9 @@ options:
   routes:
     description:
       - "List of routes in the route table. Routes are specified as dicts
-      containing the keys 'dest' and one of 'gateway_id', 'instance_id', 'nat_gateway_id', interface_id', or 'vpc_peering_connection_id'. If 'gateway_id' is specified, you can refer to the VPC's IGW by using the value 'igw'."
+      containing the keys 'dest' and one of 'gateway_id', 'egress_only_internet_gateway_id', 'instance_id', 'nat_gateway_id', 'network_interface_id', or 'vpc_peering_connection_id'. If 'gateway_id' is specified, you can refer to the VPC's IGW by using the value 'igw'."
+      - "'dest' can be an IPv4 cidr, an IPv6 cidr or a managed prefix list id (pl-xxxxxxxx), so dual stack route tables can be managed in one task."
+      - "IPv6 and prefix list destinations and 'egress_only_internet_gateway_id' need a botocore release that supports them. With an older botocore those routes fail with an error naming the installed version."
     required: true
   state:
     description:
@@ -55,6 +57,7 @@ options:
   subnets:
     description:
       - "An array of subnets to add to this route table. Subnets may be specified by either subnet ID, Name tag, or by a CIDR such as '10.0.0.0/24'."
+      - "Subnets that are already associated with another route table are moved with a single ReplaceRouteTableAssociation call."
     required: true
   tags:
     description:
@@ -105,6 +108,32 @@ EXAMPLES = '''
         instance_id: "{{ nat.instance_id }}"
   register: nat_route_table
 
+- name: Set up a dual stack route table
+  ec2_vpc_route_table:
+    vpc_id: vpc-1245678
+    region: us-west-1
+    tags:
+      Name: DualStack
+    routes:
+      - dest: 0.0.0.0/0
+        nat_gateway_id: "{{ nat.nat_gateway_id }}"
+      - dest: ::/0
+        egress_only_internet_gateway_id: "{{ eigw.gateway_id }}"
+      - dest: pl-68a54001
+        gateway_id: "{{ vpce.vpc_endpoint_id }}"
+  register: dual_stack_route_table
+
+- name: Propagate routes from multiple virtual gateways
+  ec2_vpc_route_table:
+    vpc_id: vpc-1245678
+    region: us-west-1
+    tags:
+      Name: Hybrid
+    propagating_vgw_ids:
+      - vgw-1234567
+      - vgw-7654321
+  register: hybrid_route_table
+
 '''
 RETURN = '''
 associations:
@@ -176,6 +205,23 @@ vpc_id:
   returned: In all cases.
   type: string
   sample: "vpc-12345"
+route_analysis:
+  description: Destinations declared with different targets, and more specific routes that send traffic to a different target than the route covering them. Default routes and the local route never count as covering. It is computed before any change is made, against the routes the route table had at the start of the run. In check mode the route table can not be read, so only the declared routes are analyzed.
+  returned: when routes are passed
+  type: dict
+  sample: {
+      "duplicates": [],
+      "overlaps": [
+          {
+              "dest": "10.1.0.0/16",
+              "target": "pcx-1234567",
+              "source": "declared",
+              "more_specific_dest": "10.1.2.0/24",
+              "more_specific_target": "vgw-1234567",
+              "more_specific_source": "current"
+          }
+      ]
+  }
 '''
 try:
     import botocore
@@ -186,10 +232,16 @@ except ImportError:
 
 import re
 import datetime
+import socket
+from binascii import hexlify
 from functools import reduce
+from multiprocessing.pool import ThreadPool
 
 DRY_RUN_MATCH = re.compile(r'DryRun flag is set')
 
+# Upper bound on the number of EC2 api calls this module keeps in flight.
+MAX_CONCURRENT_REQUESTS = 10
+
 def convert_to_lower(data):
     """Convert all uppercase keys in dict with lowercase_
     Args:
@@ -221,7 +273,9 @@ def convert_to_lower(data):
             elif isinstance(val, list):
                 converted = list()
                 for item in val:
-                    converted.append(convert_to_lower(item))
+                    if isinstance(item, dict):
+                        item = convert_to_lower(item)
+                    converted.append(item)
                 results[key] = converted
             else:
                 results[key] = val
@@ -229,12 +283,19 @@ def convert_to_lower(data):
 
 GATEWAY_MAP = {
     'gateway_id': 'GatewayId',
+    'egress_only_internet_gateway_id': 'EgressOnlyInternetGatewayId',
     'instance_id': 'InstanceId',
     'network_interface_id': 'NetworkInterfaceId',
     'vpc_peering_connection_id': 'VpcPeeringConnectionId',
     'nat_gateway_id': 'NatGatewayId',
 }
 
+DESTINATION_MAP = {
+    'ipv4': 'DestinationCidrBlock',
+    'ipv6': 'DestinationIpv6CidrBlock',
+    'prefix_list': 'DestinationPrefixListId',
+}
+
 def valid_gateway_types():
     """List of currently supported gateway types in Boto3
 
@@ -246,12 +307,118 @@ def valid_gateway_types():
     """
     return  [
         'gateway_id',
+        'egress_only_internet_gateway_id',
         'instance_id',
         'network_interface_id',
         'vpc_peering_connection_id',
         'nat_gateway_id'
     ]
 
+def destination_type(dest):
+    """Return the kind of destination a route is for.
+    Args:
+        dest (str): An IPv4 cidr, an IPv6 cidr or a managed prefix list id.
+
+    Basic Usage:
+        >>> destination_type('0.0.0.0/0')
+        'ipv4'
+        >>> destination_type('::/0')
+        'ipv6'
+        >>> destination_type('pl-1234567')
+        'prefix_list'
+
+    Returns:
+        String
+    """
+    if dest.startswith('pl-'):
+        return 'prefix_list'
+    elif ':' in dest:
+        return 'ipv6'
+    return 'ipv4'
+
+def canonical_destination(dest):
+    """Normalise an IPv6 cidr, so that the same prefix written with a
+        different case or zero compression compares equal. IPv4 cidrs and
+        prefix list ids are returned unchanged.
+    Args:
+        dest (str): An IPv4 cidr, an IPv6 cidr or a managed prefix list id.
+
+    Basic Usage:
+        >>> canonical_destination('2001:DB8:0:0::/56')
+        '2001:db8::/56'
+
+    Returns:
+        String
+    """
+    if destination_type(dest) != 'ipv6':
+        return dest
+    address, _, prefix_len = dest.partition('/')
+    try:
+        address = socket.inet_ntop(
+            socket.AF_INET6, socket.inet_pton(socket.AF_INET6, address)
+        )
+    except (ValueError, socket.error):
+        return dest
+    if prefix_len:
+        return '{0}/{1}'.format(address, prefix_len)
+    return address
+
+def route_destination(route):
+    """Return the (destination type, destination) of a route returned by
+        describe_route_tables.
+    Args:
+        route (dict): Dictionary containing the route as returned by Amazon.
+
+    Basic Usage:
+        >>> route = {
+            u'DestinationIpv6CidrBlock': '::/0',
+            u'EgressOnlyInternetGatewayId': 'eigw-1234567'
+        }
+        >>> route_destination(route)
+        ('ipv6', '::/0')
+
+    Returns:
+        Tuple (str, str)
+    """
+    for dest_type, key in DESTINATION_MAP.items():
+        if route.get(key):
+            return dest_type, canonical_destination(route[key])
+    return None, None
+
+def index_routes(routes):
+    """Index the routes of a route table by (destination type, destination).
+    Args:
+        routes (list): List of routes as returned by describe_route_tables.
+
+    Basic Usage:
+        >>> routes = [
+            {
+                u'GatewayId': 'local',
+                u'DestinationCidrBlock': '10.100.0.0/16',
+                u'State': 'active',
+                u'Origin': 'CreateRouteTable'
+            }
+        ]
+        >>> index_routes(routes)
+        {
+            ('ipv4', '10.100.0.0/16'): {
+                u'GatewayId': 'local',
+                u'DestinationCidrBlock': '10.100.0.0/16',
+                u'State': 'active',
+                u'Origin': 'CreateRouteTable'
+            }
+        }
+
+    Returns:
+        Dict
+    """
+    index = dict()
+    for route in routes:
+        dest_type, dest = route_destination(route)
+        if dest:
+            index[(dest_type, dest)] = route
+    return index
+
 def valid_route_type(route):
     """Validate if dictionary contains a valid gateway key.
 
@@ -272,6 +439,7 @@ def valid_route_type(route):
             return success, key
         elif key != 'dest' and key not in valid_gateway_types():
             return success, key
+    return success, None
 
 def validate_routes(routes):
     """Validate if all of the routes contain valid gateway keys.
@@ -288,11 +456,203 @@ def validate_routes(routes):
     success = True
     err_msg = ''
     for route in routes:
+        if not route.get('dest'):
+            return False, 'dest is required for every route'
         success, route_type = valid_route_type(route)
         if not success:
             err_msg = '{0} is not a valid gateway type'.format(route_type)
+            return success, err_msg
     return success, err_msg
 
+def cidr_to_prefix(cidr):
+    """Convert an IPv4 or IPv6 cidr into its address family, the network
+        address as an integer and the prefix length.
+    Args:
+        cidr (str): The cidr to convert.
+
+    Basic Usage:
+        >>> cidr_to_prefix('10.0.0.0/8')
+        ('ipv4', 167772160, 8)
+
+    Returns:
+        Tuple (str, int, int)
+    """
+    if '/' in cidr:
+        address, prefix_len = cidr.split('/', 1)
+        prefix_len = int(prefix_len)
+    else:
+        address, prefix_len = cidr, None
+    if ':' in address:
+        family, width = 'ipv6', 128
+        packed = socket.inet_pton(socket.AF_INET6, address)
+    else:
+        family, width = 'ipv4', 32
+        packed = socket.inet_aton(address)
+        if address.count('.') != 3:
+            raise ValueError('{0} is not a valid cidr'.format(cidr))
+    if prefix_len is None:
+        prefix_len = width
+    if prefix_len < 0 or prefix_len > width:
+        raise ValueError('{0} is not a valid cidr'.format(cidr))
+    network = int(hexlify(packed), 16)
+    network &= ((1 << width) - 1) ^ ((1 << (width - prefix_len)) - 1)
+    return family, network, prefix_len
+
+def route_target(route):
+    """Return the target of a route, either as passed to this module or as
+        returned by describe_route_tables.
+    Args:
+        route (dict): Dictionary containing the route.
+
+    Basic Usage:
+        >>> route_target({'dest': '0.0.0.0/0', 'nat_gateway_id': 'nat-1234567'})
+        'nat-1234567'
+
+    Returns:
+        String
+    """
+    route = convert_to_lower(route)
+    for gateway_type in valid_gateway_types():
+        if route.get(gateway_type):
+            return route[gateway_type]
+    return None
+
+def analyze_routes(routes, current_routes=None):
+    """Find conflicting destinations and shadowed prefixes in a set of
+        routes. A destination conflicts when it is declared more than once
+        with different targets. A route is shadowed when it is more specific
+        than the nearest route covering it and sends traffic to a different
+        target. Default routes and the local route of the vpc are expected
+        to cover everything else, so they never shadow a route. The declared
+        and current routes are loaded into a binary prefix trie per address
+        family. No api calls are made, so this can run before any change.
+        Prefix list destinations are only checked for conflicts.
+    Args:
+        routes (list): List of routes, as passed to this module.
+
+    Kwargs:
+        current_routes (list): List of the routes already in the route
+            table, as returned by describe_route_tables. Current routes with
+            the same destination as a declared route are ignored, since the
+            declared route replaces them. Shadowing between two current
+            routes is not reported.
+
+    Basic Usage:
+        >>> routes = [
+            {'dest': '0.0.0.0/0', 'nat_gateway_id': 'nat-1234567'},
+            {'dest': '10.1.0.0/16', 'vpc_peering_connection_id': 'pcx-1234567'},
+            {'dest': '10.1.2.0/24', 'gateway_id': 'vgw-1234567'}
+        ]
+        >>> analyze_routes(routes)
+        [
+            true,
+            "",
+            {
+                "duplicates": [],
+                "overlaps": [
+                    {
+                        "dest": "10.1.0.0/16",
+                        "target": "pcx-1234567",
+                        "source": "declared",
+                        "more_specific_dest": "10.1.2.0/24",
+                        "more_specific_target": "vgw-1234567",
+                        "more_specific_source": "declared"
+                    }
+                ]
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    success = True
+    err_msg = ''
+    analysis = {
+        'duplicates': list(),
+        'overlaps': list(),
+    }
+    entries = set()
+    declared = dict()
+    for route in routes or list():
+        dest = canonical_destination(route['dest'])
+        key = (destination_type(dest), dest)
+        target = route_target(route)
+        declared.setdefault(key, set()).add(target)
+        entries.add((key, target, 'declared'))
+
+    for (dest_type, dest), targets in sorted(declared.items()):
+        if len(targets) > 1:
+            analysis['duplicates'].append(
+                {
+                    'dest': dest,
+                    'targets': sorted(targets),
+                }
+            )
+            success = False
+            err_msg = (
+                '{0} is declared more than once with different targets'
+                .format(dest)
+            )
+
+    for route in current_routes or list():
+        key = route_destination(route)
+        if key[1] and key not in declared:
+            entries.add((key, route_target(route), 'current'))
+
+    tries = dict()
+    for (dest_type, dest), target, source in sorted(entries):
+        if dest_type == 'prefix_list':
+            continue
+        try:
+            family, network, prefix_len = cidr_to_prefix(dest)
+        except (ValueError, socket.error):
+            return False, '{0} is not a valid cidr'.format(dest), analysis
+        width = 32 if family == 'ipv4' else 128
+        node = tries.setdefault(family, {'children': {}, 'routes': []})
+        for i in range(prefix_len):
+            bit = (network >> (width - 1 - i)) & 1
+            node = node['children'].setdefault(
+                bit, {'children': {}, 'routes': []}
+            )
+        node['routes'].append(
+            {
+                'dest': dest,
+                'target': target,
+                'source': source,
+                'prefix_len': prefix_len,
+            }
+        )
+
+    for family in sorted(tries.keys()):
+        stack = [(tries[family], None)]
+        while stack:
+            node, covering = stack.pop()
+            for route in node['routes']:
+                if not covering:
+                    continue
+                if covering['prefix_len'] == 0 or covering['target'] == 'local':
+                    continue
+                if covering['target'] == route['target']:
+                    continue
+                if covering['source'] == 'current' and route['source'] == 'current':
+                    continue
+                analysis['overlaps'].append(
+                    {
+                        'dest': covering['dest'],
+                        'target': covering['target'],
+                        'source': covering['source'],
+                        'more_specific_dest': route['dest'],
+                        'more_specific_target': route['target'],
+                        'more_specific_source': route['source'],
+                    }
+                )
+            if node['routes']:
+                covering = node['routes'][0]
+            for bit in sorted(node['children'].keys(), reverse=True):
+                stack.append((node['children'][bit], covering))
+
+    return success, err_msg, analysis
+
 def route_keys(client, vpc_id, routes, check_mode=False):
     """Return a new list containing updated keys.
     Args:
@@ -303,13 +663,23 @@ def route_keys(client, vpc_id, routes, check_mode=False):
     Basic Usage:
         >>> client = boto3.client('ec2')
         >>> vpc_id = 'vpc-1234567'
-        >>> routes = [{'dest': '0.0.0.0/0', 'nat_gateway_id': 'ngw-123456789'}]
+        >>> routes = [
+            {'dest': '0.0.0.0/0', 'nat_gateway_id': 'ngw-123456789'},
+            {'dest': '::/0', 'egress_only_internet_gateway_id': 'eigw-1234567'}
+        ]
         >>> new_routes = route_keys(client, vpc_id, routes)
         [
             {
                 'dest': '0.0.0.0/0',
+                'dest_type': 'ipv4',
                 'id': 'ngw-123456789',
                 'gateway_type': 'nat_gateway_id'
+            },
+            {
+                'dest': '::/0',
+                'dest_type': 'ipv6',
+                'id': 'eigw-1234567',
+                'gateway_type': 'egress_only_internet_gateway_id'
             }
         ]
 
@@ -317,20 +687,23 @@ def route_keys(client, vpc_id, routes, check_mode=False):
         List
     """
     new_routes = list()
+    igw_id = None
     for route in routes:
         info = dict()
         for key, val in route.items():
             if key != 'dest' and key in valid_gateway_types():
                 if key == 'gateway_id' and val == 'igw':
-                    igw_success, igw_msg, igw_id = (
-                        find_igw(client, vpc_id, check_mode=check_mode)
-                    )
-                    if igw_success and igw_id:
+                    if not igw_id:
+                        igw_success, igw_msg, igw_id = (
+                            find_igw(client, vpc_id, check_mode=check_mode)
+                        )
+                    if igw_id:
                         val = igw_id
                 info['id'] = val
                 info['gateway_type'] = key
             elif key == 'dest':
-                info['dest'] = val
+                info['dest'] = canonical_destination(val)
+                info['dest_type'] = destination_type(val)
         new_routes.append(info)
     return new_routes
 
@@ -751,20 +1124,29 @@ def vgw_action(client, route_table_id, vgw_id, action='create'):
 
     return success, err_msg
 
-def update_vgw(client, route_table_id, current_vgws, vgw_id=None):
-    """Update the virtual gateway status on an Amazon route table.
+def update_vgw(client, route_table_id, current_vgws, vgw_ids=None,
+               check_mode=False):
+    """Reconcile the virtual gateways propagating routes into an Amazon
+        route table. Only the virtual gateways that need to be enabled or
+        disabled are touched.
     Args:
         client (botocore.client.EC2): Boto3 client.
         route_table_id (str): The Amazon resource id.
         current_vgws (list): List, containing enabled virtual gateways.
-        vgw_id (str): The virtual gateway id you want to keep enabled.
+
+    Kwargs:
+        vgw_ids (list): List of the virtual gateway ids you want enabled.
+            Any other enabled virtual gateway will be disabled.
+        check_mode (bool): Enable and disable route propagation do not
+            support DryRun, so in check mode no api calls are made.
+            default=False
 
     Basic Usage:
         >>> client = boto3.client('ec2')
         >>> route_table_id = 'rtb-123345678'
         >>> current_vgws = [{u'GatewayId': 'vgw-1234567'}]
-        >>> vgw_id = 'vgw-1234567'
-        >>> update_vgw(client, route_table_id, current_vgws, vgw_id)
+        >>> vgw_ids = ['vgw-1234567', 'vgw-7654321']
+        >>> update_vgw(client, route_table_id, current_vgws, vgw_ids)
         [True, '']
 
     Returns:
@@ -772,36 +1154,45 @@ def update_vgw(client, route_table_id, current_vgws, vgw_id=None):
     """
     success = True
     err_msg = ''
-    if current_vgws:
-        for vgws in current_vgws:
-            for vgw in vgws.values():
-                if vgw != vgw_id or not vgw_id:
-                    if not vgw_id:
-                       vgw_to_delete_id = vgw
-                    else:
-                        vgw_to_delete_id = vgw_id
-                    disable_success, disable_msg = (
-                        vgw_action(
-                            client, route_table_id, vgw_to_delete_id, 'delete'
-                        )
-                    )
-                    if vgw_id and disable_success:
-                        enable_success, enable_msg = (
-                            vgw_action(client, route_table_id, vgw_id)
-                        )
-                        return enable_success, enable_msg
-                    else:
-                        return disable_success, disable_msg
-    elif not current_vgws and vgw_id:
-        enable_success, enable_msg = (
-            vgw_action(client, route_table_id, vgw_id)
+    current_vgw_ids = set(
+        map(lambda vgw: vgw['GatewayId'], current_vgws or list())
+    )
+    new_vgw_ids = set(vgw_ids or list())
+    vgw_ids_to_enable = sorted(new_vgw_ids.difference(current_vgw_ids))
+    vgw_ids_to_disable = sorted(current_vgw_ids.difference(new_vgw_ids))
+    calls = list()
+    for vgw_id in vgw_ids_to_enable:
+        calls.append(
+            {
+                'client': client,
+                'route_table_id': route_table_id,
+                'vgw_id': vgw_id,
+                'action': 'create',
+            }
         )
-        return enable_success, enable_msg
+    for vgw_id in vgw_ids_to_disable:
+        calls.append(
+            {
+                'client': client,
+                'route_table_id': route_table_id,
+                'vgw_id': vgw_id,
+                'action': 'delete',
+            }
+        )
+
+    if check_mode:
+        return success, err_msg
+
+    for action_success, action_msg in run_concurrently(vgw_action, calls):
+        if not action_success:
+            return action_success, action_msg
+
     return success, err_msg
 
 def subnet_action(client, route_table_id, subnet_id=None, association_id=None,
                   action='create', check_mode=False):
-    """Associate or Disasscoiate subnet_id from an Amazon route table.
+    """Associate, Disasscoiate or Replace a subnet association on an Amazon
+        route table.
     Args:
         client (botocore.client.EC2): Boto3 client.
         route_table_id (str): The Amazon resource id for a route table.
@@ -810,8 +1201,10 @@ def subnet_action(client, route_table_id, subnet_id=None, association_id=None,
         subnet_id (str): The Amazon resource id for a subnet.
         association_id (str): The Amazon resource id for an association.
         action (str): The action to perform.
-            valid actions == create and delete
+            valid actions == create, delete and replace
             default=create
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
 
     Basic Usage:
         >>> client = boto3.client('ec2')
@@ -838,6 +1231,11 @@ def subnet_action(client, route_table_id, subnet_id=None, association_id=None,
             params['AssociationId'] = association_id
             client.disassociate_route_table(**params)
             success = True
+        elif action == 'replace':
+            params['AssociationId'] = association_id
+            params['RouteTableId'] = route_table_id
+            client.replace_route_table_association(**params)
+            success = True
         else:
             err_msg = 'Invalid action {0}'.format(action)
 
@@ -846,40 +1244,46 @@ def subnet_action(client, route_table_id, subnet_id=None, association_id=None,
             success = True
             err_msg = e.message
         else:
-            del routes_to_match[i]
-
-    # NOTE: As of boto==2.38.0, the origin of a route is not available
-    # (for example, whether it came from a gateway with route propagation
-    # enabled). Testing for origin == 'EnableVgwRoutePropagation' is more
-    # correct than checking whether the route uses a propagating VGW.
-    # The current logic will leave non-propagated routes using propagating
-    # VGWs in place.
-    routes_to_delete = [r for r in routes_to_match
-                        if r.gateway_id != 'local'
-                        and (propagating_vgw_ids is not None
-                             and r.gateway_id not in propagating_vgw_ids)]
-
-    changed = routes_to_delete or route_specs_to_create
-    if changed:
-        for route_spec in route_specs_to_create:
-            try:
-                vpc_conn.create_route(route_table.id,
-                                      dry_run=check_mode,
-                                      **route_spec)
-            except EC2ResponseError as e:
-                if e.error_code == 'DryRunOperation':
-                    pass
-
-        for route in routes_to_delete:
-            try:
-                vpc_conn.delete_route(route_table.id,
-                                      route.destination_cidr_block,
-                                      dry_run=check_mode)
-            except EC2ResponseError as e:
-                if e.error_code == 'DryRunOperation':
-                    pass
-
-    return {'changed': bool(changed)}
+            err_msg = str(e)
+
+    return success, err_msg
+
+def run_concurrently(func, calls, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Run func once for every set of keyword arguments in calls, using a
+        bounded pool of threads. Boto3 clients are thread safe, so the same
+        client can be shared across every call.
+    Args:
+        func (function): The function to call.
+        calls (list): List of dictionaries, each one containing the keyword
+            arguments for a single call to func.
+
+    Kwargs:
+        max_workers (int): The maximum number of calls in flight at once.
+            default=MAX_CONCURRENT_REQUESTS
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> calls = [
+            {
+                'client': client,
+                'route_table_id': 'rtb-1234567',
+                'subnet_id': 'subnet-1234567'
+            }
+        ]
+        >>> run_concurrently(subnet_action, calls)
+        [(True, '')]
+
+    Returns:
+        List, containing the result of each call in the same order as calls.
+    """
+    if not calls:
+        return list()
+    pool = ThreadPool(max(1, min(max_workers, len(calls))))
+    try:
+        return pool.map(lambda kwargs: func(**kwargs), calls)
+    finally:
+        pool.close()
+        pool.join()
 
 def update_subnets(client, vpc_id, route_table_id, current_subnets,
                   new_subnet_ids, check_mode=False):
@@ -915,11 +1319,9 @@ def update_subnets(client, vpc_id, route_table_id, current_subnets,
     Returns:
         List (bool, str)
     """
-    current_subnet_ids = (
-        map(
-            lambda subnet: subnet['SubnetId'], current_subnets
-        )
-    )
+    # ansible.module_utils.basic exports the lazy six map, which can only
+    # be consumed once.
+    current_subnet_ids = [subnet['SubnetId'] for subnet in current_subnets]
     subnet_ids_to_add = (
         list(set(new_subnet_ids).difference(current_subnet_ids))
     )
@@ -935,47 +1337,54 @@ def update_subnets(client, vpc_id, route_table_id, current_subnets,
                     subnet['route_table_association_id']
                 )
 
-    success, err_msg, routes = (
-        find_subnet_associations(
-            client, vpc_id, subnet_ids_to_add, check_mode=check_mode
-        )
-    )
-    association_ids_to_remove_before_adding = list()
-    if success:
-        for route in routes:
-            for association in route['Associations']:
-                association_ids_to_remove_before_adding.append(
-                    association['RouteTableAssociationId']
-                )
-        for association_id in association_ids_to_remove_before_adding:
-            delete_success, delete_msg = (
-                subnet_action(
-                    client, route_table_id, association_id=association_id,
-                    action='delete', check_mode=check_mode
-                )
+    # Subnets that are already associated with another route table are moved
+    # with ReplaceRouteTableAssociation, so they never fall back to the main
+    # route table in between a disassociate and an associate.
+    existing_associations = dict()
+    if subnet_ids_to_add:
+        success, err_msg, route_tables = (
+            find_subnet_associations(
+                client, vpc_id, subnet_ids_to_add, check_mode=check_mode
             )
-            if not delete_success:
-                return delete_success, delete_msg
+        )
+        if not success:
+            return success, err_msg
+        for route_table in route_tables:
+            for association in route_table['Associations']:
+                if association.get('SubnetId') in subnet_ids_to_add:
+                    existing_associations[association['SubnetId']] = (
+                        association['RouteTableAssociationId']
+                    )
 
+    calls = list()
     for subnet_id in subnet_ids_to_add:
-        create_success, create_msg = (
-            subnet_action(
-                client, route_table_id, subnet_id, action='create',
-                check_mode=check_mode
-            )
-        )
-        if not create_success:
-            return create_success, create_msg
+        call = {
+            'client': client,
+            'route_table_id': route_table_id,
+            'check_mode': check_mode,
+        }
+        if subnet_id in existing_associations:
+            call['association_id'] = existing_associations[subnet_id]
+            call['action'] = 'replace'
+        else:
+            call['subnet_id'] = subnet_id
+            call['action'] = 'create'
+        calls.append(call)
 
     for association_id in association_ids_to_remove:
-        delete_success, delete_msg = (
-            subnet_action(
-                client, route_table_id, association_id=association_id,
-                action='delete', check_mode=False
-            )
+        calls.append(
+            {
+                'client': client,
+                'route_table_id': route_table_id,
+                'association_id': association_id,
+                'action': 'delete',
+                'check_mode': check_mode,
+            }
         )
-        if not delete_success:
-            return delete_success, delete_msg
+
+    for action_success, action_msg in run_concurrently(subnet_action, calls):
+        if not action_success:
+            return action_success, action_msg
 
     return True, ''
 
@@ -1036,7 +1445,7 @@ def route_table_action(client, vpc_id=None, route_table_id=None,
 
 def route_action(client, route, route_table_id, action='create',
                  check_mode=False):
-    """Create or Delete a route on an Amazon route table.
+    """Create, Replace or Delete a route on an Amazon route table.
     Args:
         client (botocore.client.EC2): Boto3 client.
         route (dict): Dictionary, containing the necessary data for a route.
@@ -1044,7 +1453,7 @@ def route_action(client, route, route_table_id, action='create',
 
     Kwargs:
         action (str): The action to perform.
-            valid actions == create and delete
+            valid actions == create, replace and delete
             default=create
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
@@ -1053,6 +1462,7 @@ def route_action(client, route, route_table_id, action='create',
         >>> client = boto3.client('ec2')
         >>> route = {
             'dest': '0.0.0.0/0',
+            'dest_type': 'ipv4',
             'gateway_type': 'nat_gateway_id',
             'id': 'ngw-12345678'
         }
@@ -1065,17 +1475,21 @@ def route_action(client, route, route_table_id, action='create',
     """
     success = False
     err_msg = ''
+    dest_type = route.get('dest_type', destination_type(route['dest']))
     params = {
-        'DestinationCidrBlock': route['dest'],
+        DESTINATION_MAP[dest_type]: route['dest'],
         'RouteTableId': route_table_id,
         'DryRun': check_mode
     }
-    if action == 'create':
+    if action == 'create' or action == 'replace':
         params[GATEWAY_MAP[route['gateway_type']]] =  route['id']
 
     try:
         if action == 'create':
             success = client.create_route(**params)['Return']
+        elif action == 'replace':
+            client.replace_route(**params)
+            success = True
         elif action == 'delete':
             client.delete_route(**params)
             success = True
@@ -1088,6 +1502,11 @@ def route_action(client, route, route_table_id, action='create',
             err_msg = e.message
         else:
             err_msg = str(e)
+    except botocore.exceptions.ParamValidationError as e:
+        err_msg = (
+            'botocore {0} can not {1} the route for {2}: {3}'
+            .format(botocore.__version__, action, route['dest'], str(e))
+        )
 
     return success, err_msg
 
@@ -1097,9 +1516,10 @@ def update_route(client, route_table_id, current_routes, route_to_update,
     Args:
         client (botocore.client.EC2): Boto3 client.
         route_table_id (str): The Amazon resource id of the route table.
-        current_routes (list): List, containing the current routes.
-        route_to_update (str): List, containing the new subnet ids you want
-            associated with this route table.
+        current_routes (dict): Dictionary, containing the current routes
+            indexed by (destination type, destination). See index_routes.
+        route_to_update (dict): Dictionary, containing the route you want
+            to exist in this route table.
 
     Kwargs:
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
@@ -1109,7 +1529,7 @@ def update_route(client, route_table_id, current_routes, route_to_update,
         >>> client = boto3.client('ec2')
         >>> vpc_id = 'vpc-1234567'
         >>> route_table_id = 'rtb-123345678'
-        >>> current_routes = [
+        >>> current_routes = index_routes([
             {
                 u'GatewayId': 'local',
                 u'DestinationCidrBlock': '10.100.0.0/16',
@@ -1122,55 +1542,50 @@ def update_route(client, route_table_id, current_routes, route_to_update,
                 u'GatewayId': 'igw-1234567',
                 u'State': 'active'
             }
-        ]
-        >>> routes_to_update = [
-            {
-                'dest': '0.0.0.0/0',
-                'gateway_type': 'nat_gateway_id',
-                'id': 'nat-987654321'
-            }
-        ]
-        >>> update_route(client, route_table_id, current_routes, routes_to_update)
+        ])
+        >>> route_to_update = {
+            'dest': '0.0.0.0/0',
+            'dest_type': 'ipv4',
+            'gateway_type': 'nat_gateway_id',
+            'id': 'nat-987654321'
+        }
+        >>> update_route(client, route_table_id, current_routes, route_to_update)
         [True, '']
 
     Returns:
         List (bool, str)
     """
-    for route in current_routes:
-        route = convert_to_lower(route)
-        if route['origin'] != 'create_route_table' and len(current_routes) > 1:
-            if route['destination_cidr_block'] == route_to_update['dest']:
-                gateway_key = route_to_update['gateway_type']
-                if route.has_key(gateway_key):
-                    return True, 'route already exists'
-                else:
-                    delete_success, delete_msg = (
-                        route_action(
-                            client, route_to_update, route_table_id,
-                            'delete', check_mode=check_mode
-                        )
-                    )
-                    if delete_success:
-                        create_success, create_msg = (
-                            route_action(
-                                client, route_to_update, route_table_id,
-                                'create', check_mode=check_mode
-                            )
-                        )
-                        return create_success, create_msg
-                    else:
-                        return delete_success, delete_msg
-        elif len(current_routes) == 1:
-            create_success, create_msg = (
-                route_action(
-                    client, route_to_update, route_table_id,
-                    'create', check_mode
-                )
+    route_key = (route_to_update['dest_type'], route_to_update['dest'])
+    current_route = current_routes.get(route_key)
+    if not current_route:
+        return (
+            route_action(
+                client, route_to_update, route_table_id, 'create',
+                check_mode=check_mode
             )
-            return create_success, create_msg
+        )
+
+    gateway_key = GATEWAY_MAP[route_to_update['gateway_type']]
+    if current_route.get(gateway_key) == route_to_update['id']:
+        return True, 'route already exists'
+
+    if current_route.get('Origin') == 'CreateRouteTable':
+        err_msg = 'Can not replace the local route for {0}'.format(
+            route_to_update['dest']
+        )
+        return False, err_msg
+
+    # ReplaceRoute swaps the target in place, so traffic is never dropped
+    # the way it would be between a delete and a create.
+    return (
+        route_action(
+            client, route_to_update, route_table_id, 'replace',
+            check_mode=check_mode
+        )
+    )
 
 def update(client, vpc_id, route_table_id, current_route_table, routes=None,
-           subnets=None, tags=None, vgw_id=None, check_mode=False):
+           subnets=None, tags=None, vgw_ids=None, check_mode=False):
     """Update the attributes of a route table.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -1183,7 +1598,7 @@ def update(client, vpc_id, route_table_id, current_route_table, routes=None,
         subnets (str): List, containing the new subnet ids you want
             associated with this route table.
         tags (dict): Dictionary containing the tags you want to search by.
-        vgw_id (str): The Virtual Gateway you want to enable.
+        vgw_ids (list): The Virtual Gateways you want to enable.
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
 
@@ -1238,11 +1653,11 @@ def update(client, vpc_id, route_table_id, current_route_table, routes=None,
 
     if routes:
         routes = route_keys(client, vpc_id, routes, check_mode)
+        current_routes = index_routes(current_route_table['Routes'])
         for route in routes:
             routes_success, routes_msg = (
                 update_route(
-                    client, route_table_id, current_route_table['Routes'],
-                    route, check_mode
+                    client, route_table_id, current_routes, route, check_mode
                 )
             )
             if not routes_success:
@@ -1252,7 +1667,7 @@ def update(client, vpc_id, route_table_id, current_route_table, routes=None,
     vgw_success, vgw_msg = (
         update_vgw(
             client, route_table_id, current_route_table['PropagatingVgws'],
-            vgw_id
+            vgw_ids, check_mode=check_mode
         )
     )
     if not vgw_success:
@@ -1261,7 +1676,7 @@ def update(client, vpc_id, route_table_id, current_route_table, routes=None,
 
     return success, err_msg
 
-def pre_create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
+def pre_create_route_table(client, vpc_id, routes, subnets, tags, vgw_ids=None,
                            route_table_id=None, check_mode=False):
     """Find route and if it exists update it. If not return back to
         create_route_table. This should not be called directly, except by
@@ -1275,7 +1690,7 @@ def pre_create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
         tags (dict): Dictionary containing the tags you want to search by.
 
     Kwargs:
-        vgw_id (str): The Virtual Gateway you want to enable.
+        vgw_ids (list): The Virtual Gateways you want to enable.
         route_table_id (str): The Amazon resource id of the route table.
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
@@ -1318,10 +1733,15 @@ def pre_create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
     if route_table_exist:
         if not route_table_id:
             route_table_id = route_table['RouteTableId']
+        route_analysis = None
+        if routes:
+            _, _, route_analysis = (
+                analyze_routes(routes, route_table.get('Routes'))
+            )
         success, err_msg = (
             update(
                 client, vpc_id, route_table_id, route_table, routes, subnets,
-                tags, vgw_id, check_mode=check_mode
+                tags, vgw_ids, check_mode=check_mode
             )
         )
 
@@ -1334,13 +1754,15 @@ def pre_create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
             )
         else:
             changed = False
+        if route_analysis and isinstance(route_table, dict):
+            route_table['RouteAnalysis'] = route_analysis
 
         return success, changed, err_msg, route_table
 
     else:
         return False, False, 'Route table does not exist', dict()
 
-def create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
+def create_route_table(client, vpc_id, routes, subnets, tags, vgw_ids=None,
                        route_table_id=None, check_mode=False):
     """Create a new route table. If route table is found by id if not
         by tag, it will then update the existing one.
@@ -1353,7 +1775,7 @@ def create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
         tags (dict): Dictionary containing the tags you want to search by.
 
     Kwargs:
-        vgw_id (str): The Virtual Gateway you want to enable.
+        vgw_ids (list): The Virtual Gateways you want to enable.
         route_table_id (str): The Amazon resource id of the route table.
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
@@ -1423,33 +1845,54 @@ def create_route_table(client, vpc_id, routes, subnets, tags, vgw_id=None,
     """
     success, changed, err_msg, results = (
         pre_create_route_table(
-            client, vpc_id, routes, subnets, tags, vgw_id,
+            client, vpc_id, routes, subnets, tags, vgw_ids,
             route_table_id, check_mode=check_mode
         )
     )
     if not success and not changed and err_msg == 'Route table does not exist':
+        route_analysis = None
+        if routes:
+            _, _, route_analysis = analyze_routes(routes)
         route_table_success, route_table_msg, route_table = (
             route_table_action(
                 client, vpc_id=vpc_id, action='create', check_mode=check_mode
             )
         )
-        if route_table_success:
-            route_table_id = route_table['RouteTableId']
-            success, changed, err_msg, results = (
-                update(
-                    client, vpc_id, route_table_id, route_table, routes,
-                    subnets, tags, vgw_id, check_mode
+        if not route_table_success:
+            return route_table_success, False, route_table_msg, dict()
+
+        if check_mode:
+            results = dict()
+            if route_analysis:
+                results['RouteAnalysis'] = route_analysis
+            return True, True, route_table_msg, convert_to_lower(results)
+
+        route_table_id = route_table['RouteTableId']
+        success, err_msg = (
+            update(
+                client, vpc_id, route_table_id, route_table, routes,
+                subnets, tags, vgw_ids, check_mode
+            )
+        )
+        changed = True
+        if success:
+            success, err_msg, results = (
+                find_route_table(
+                    client, vpc_id, route_table_id=route_table_id,
+                    check_mode=check_mode
                 )
             )
-            if success:
-                err_msg = 'Route table {0} created.'.format(route_table_id)
-            return success, changed, err_msg, convert_to_lower(results)
+            err_msg = 'Route table {0} created.'.format(route_table_id)
+        else:
+            results = route_table
+        if route_analysis and isinstance(results, dict):
+            results['RouteAnalysis'] = route_analysis
 
-    else:
-        if success and changed:
-            route_table_id = results['RouteTableId']
-            err_msg = 'Route table {0} updated.'.format(route_table_id)
-        return success, changed, err_msg, convert_to_lower(results)
+    elif success and changed:
+        route_table_id = results['RouteTableId']
+        err_msg = 'Route table {0} updated.'.format(route_table_id)
+
+    return success, changed, err_msg, convert_to_lower(results)
 
 def delete_route_table(client, route_table_id, check_mode=False):
     """Create a new route table. If route table is found by id if not
@@ -1510,20 +1953,6 @@ def main():
     tags = module.params.get('tags')
     vpc_id = module.params.get('vpc_id')
 
-    #In order to maintain backward compatability with the original version
-    #I am leaving propagating_vgw_ids parameter as a list. Though you can
-    #only have 1 virtual gateway enabled on a route table.
-    if isinstance(propagating_vgw_ids, list):
-        if len(propagating_vgw_ids) == 1:
-            propagating_vgw_ids = propagating_vgw_ids[0]
-        elif len(propagating_vgw_ids) == 0:
-            propagating_vgw_ids = None
-        else:
-            module.fail_json(
-                success=False, changed=False,
-                msg='propagating_vgw_ids can only take in 1 parameter.'
-            )
-
     if not HAS_BOTO3:
         module.fail_json(msg='boto3 is required.')
 
@@ -1550,6 +1979,12 @@ def main():
             module.fail_json(
                 success=False, changed=False, result={}, msg=err_msg
             )
+        routes_analyzed, err_msg, route_analysis = analyze_routes(routes)
+        if not routes_analyzed:
+            module.fail_json(
+                success=False, changed=False, msg=err_msg,
+                route_analysis=route_analysis
+            )
 
     if state == 'present':
         success, changed, err_msg, results = (
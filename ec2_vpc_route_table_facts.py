@@ -0,0 +1,582 @@
+#!/usr/bin/python
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+DOCUMENTATION = '''
+---
+module: ec2_vpc_route_table_facts
+short_description: Retrieve the facts of route tables in one or many AWS virtual private clouds.
+description:
+  - Retrieve the route tables of one or many VPCs, indexed by route table id.
+  - The vpc, tag, subnet and route table id filters are applied by Amazon. The destination and target filters are applied to the returned route tables before they are converted, so only the matching route tables are serialized.
+version_added: "2.2"
+author: "Allen Sanabria (@linuxdynasty)"
+requirements: [boto3, botocore]
+options:
+  vpc_ids:
+    description:
+      - List of VPC ids to retrieve the route tables from. All VPCs in the region are searched when not set.
+    required: false
+    aliases: [ "vpc_id" ]
+  route_table_ids:
+    description:
+      - List of route table ids to retrieve.
+    required: false
+  tags:
+    description:
+      - "A dictionary of resource tags of the form: { tag1: value1, tag2: value2 }. Only route tables that match every tag are returned."
+    required: false
+  subnet_ids:
+    description:
+      - Only return the route tables associated with one of these subnets.
+    required: false
+  destinations:
+    description:
+      - Only return the route tables that contain a route for one of these destinations. A destination can be an IPv4 cidr, an IPv6 cidr or a managed prefix list id.
+    required: false
+  targets:
+    description:
+      - Only return the route tables that contain a route to one of these targets, such as an internet gateway, a nat gateway, an instance, a network interface or a vpc peering connection id. When destinations are also given, the same route has to have one of the destinations and one of the targets.
+    required: false
+extends_documentation_fragment:
+    - aws
+    - ec2
+requirements: ['boto3']
+'''
+
+EXAMPLES = '''
+# Retrieve every route table in a VPC
+- ec2_vpc_route_table_facts:
+    vpc_ids:
+      - vpc-1234567
+  register: route_tables
+
+# Retrieve the route tables in 2 VPCs that send the default route through a nat gateway
+- ec2_vpc_route_table_facts:
+    vpc_ids:
+      - vpc-1234567
+      - vpc-7654321
+    destinations:
+      - 0.0.0.0/0
+    targets:
+      - nat-1234567
+  register: route_tables
+
+# Retrieve the route table associated with a subnet
+- ec2_vpc_route_table_facts:
+    subnet_ids:
+      - subnet-1234567
+  register: route_tables
+
+# Retrieve the route tables tagged as public
+- ec2_vpc_route_table_facts:
+    vpc_ids:
+      - vpc-1234567
+    tags:
+      Tier: public
+  register: route_tables
+'''
+
+RETURN = '''
+route_tables:
+    description: The matching route tables, indexed by route table id.
+    returned: success
+    type: dict
+    sample: {
+        "rtb-1234567": {
+            "route_table_id": "rtb-1234567",
+            "vpc_id": "vpc-1234567",
+            "associations": [
+                {
+                    "subnet_id": "subnet-1234567",
+                    "route_table_id": "rtb-1234567",
+                    "main": false,
+                    "route_table_association_id": "rtbassoc-1234567"
+                }
+            ],
+            "propagating_vgws": [],
+            "routes": [
+                {
+                    "gateway_id": "local",
+                    "origin": "CreateRouteTable",
+                    "state": "active",
+                    "destination_cidr_block": "10.100.0.0/16"
+                },
+                {
+                    "origin": "CreateRoute",
+                    "state": "active",
+                    "nat_gateway_id": "nat-1234567",
+                    "destination_cidr_block": "0.0.0.0/0"
+                }
+            ],
+            "tags": [
+                {
+                    "key": "Name",
+                    "value": "private"
+                }
+            ]
+        }
+    }
+'''
+import re
+import datetime
+import socket
+
+try:
+    import boto3
+    import botocore.exceptions
+    HAS_BOTO3 = True
+except ImportError:
+    HAS_BOTO3 = False
+
+DESTINATION_KEYS = [
+    'DestinationCidrBlock',
+    'DestinationIpv6CidrBlock',
+    'DestinationPrefixListId',
+]
+
+TARGET_KEYS = [
+    'GatewayId',
+    'EgressOnlyInternetGatewayId',
+    'InstanceId',
+    'NetworkInterfaceId',
+    'VpcPeeringConnectionId',
+    'NatGatewayId',
+]
+
+DRY_RUN_ROUTE_TABLES = [
+    {
+        u'RouteTableId': 'rtb-1234567',
+        u'VpcId': 'vpc-1234567',
+        u'Associations': [
+            {
+                u'SubnetId': 'subnet-1234567',
+                u'RouteTableAssociationId': 'rtbassoc-1234567',
+                u'Main': False,
+                u'RouteTableId': 'rtb-1234567'
+            }
+        ],
+        u'PropagatingVgws': [],
+        u'Routes': [
+            {
+                u'GatewayId': 'local',
+                u'DestinationCidrBlock': '10.100.0.0/16',
+                u'State': 'active',
+                u'Origin': 'CreateRouteTable'
+            },
+            {
+                u'NatGatewayId': 'nat-1234567',
+                u'DestinationCidrBlock': '0.0.0.0/0',
+                u'State': 'active',
+                u'Origin': 'CreateRoute'
+            }
+        ],
+        u'Tags': [
+            {
+                u'Key': 'Name',
+                u'Value': 'private'
+            }
+        ]
+    },
+    {
+        u'RouteTableId': 'rtb-7654321',
+        u'VpcId': 'vpc-1234567',
+        u'Associations': [
+            {
+                u'SubnetId': 'subnet-7654321',
+                u'RouteTableAssociationId': 'rtbassoc-7654321',
+                u'Main': False,
+                u'RouteTableId': 'rtb-7654321'
+            }
+        ],
+        u'PropagatingVgws': [],
+        u'Routes': [
+            {
+                u'GatewayId': 'local',
+                u'DestinationCidrBlock': '10.100.0.0/16',
+                u'State': 'active',
+                u'Origin': 'CreateRouteTable'
+            },
+            {
+                u'GatewayId': 'igw-1234567',
+                u'DestinationCidrBlock': '0.0.0.0/0',
+                u'State': 'active',
+                u'Origin': 'CreateRoute'
+            },
+            {
+                u'EgressOnlyInternetGatewayId': 'eigw-1234567',
+                u'DestinationIpv6CidrBlock': '::/0',
+                u'State': 'active',
+                u'Origin': 'CreateRoute'
+            }
+        ],
+        u'Tags': [
+            {
+                u'Key': 'Name',
+                u'Value': 'public'
+            }
+        ]
+    }
+]
+
+
+def convert_to_lower(data):
+    """Convert all uppercase keys in dict with lowercase_
+    Args:
+        data (dict): Dictionary with keys that have upper cases in them
+            Example.. FooBar == foo_bar
+            if a val is of type datetime.datetime, it will be converted to
+            the ISO 8601
+    Basic Usage:
+        >>> test = {'FooBar': []}
+        >>> test = convert_to_lower(test)
+        {
+            'foo_bar': []
+        }
+
+    Returns:
+        Dictionary
+    """
+    results = dict()
+    if isinstance(data, dict):
+        for key, val in data.items():
+            key = re.sub(r'(([A-Z]{1,3}){1})', r'_\1', key).lower()
+            if key[0] == '_':
+                key = key[1:]
+            if isinstance(val, datetime.datetime):
+                results[key] = val.isoformat()
+            elif isinstance(val, dict):
+                results[key] = convert_to_lower(val)
+            elif isinstance(val, list):
+                converted = list()
+                for item in val:
+                    converted.append(convert_to_lower(item))
+                results[key] = converted
+            else:
+                results[key] = val
+    elif isinstance(data, basestring):
+        return data
+    return results
+
+
+def build_filters(vpc_ids=None, tags=None, subnet_ids=None):
+    """Build the filters that are sent to describe_route_tables.
+    Kwargs:
+        vpc_ids (list): List of vpc ids.
+        tags (dict): Dictionary of tags that every route table has to match.
+        subnet_ids (list): List of subnet ids.
+
+    Basic Usage:
+        >>> build_filters(vpc_ids=['vpc-1234567'], tags={'Name': 'public'})
+        [
+            {
+                'Name': 'vpc-id',
+                'Values': ['vpc-1234567']
+            },
+            {
+                'Name': 'tag:Name',
+                'Values': ['public']
+            }
+        ]
+
+    Returns:
+        List
+    """
+    filters = list()
+    if vpc_ids:
+        filters.append({'Name': 'vpc-id', 'Values': vpc_ids})
+    if tags:
+        for key, val in tags.items():
+            filters.append({'Name': 'tag:{0}'.format(key), 'Values': [val]})
+    if subnet_ids:
+        filters.append(
+            {'Name': 'association.subnet-id', 'Values': subnet_ids}
+        )
+    return filters
+
+
+def describe_route_tables(client, filters=None, route_table_ids=None,
+                          check_mode=False):
+    """Retrieve every route table that matches the filters. The pinned
+        botocore has no MaxResults or NextToken for DescribeRouteTables, so
+        a single call returns every route table.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        filters (list): List of filters. See build_filters.
+        route_table_ids (list): List of route table ids.
+        check_mode (bool): Return DRY_RUN_ROUTE_TABLES instead of making
+            the api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> filters = build_filters(vpc_ids=['vpc-1234567'])
+        >>> describe_route_tables(client, filters)
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = True
+    err_msg = ''
+    results = list()
+    params = dict()
+    if filters:
+        params['Filters'] = filters
+    if route_table_ids:
+        params['RouteTableIds'] = route_table_ids
+    try:
+        if check_mode:
+            results = list(DRY_RUN_ROUTE_TABLES)
+        else:
+            results = client.describe_route_tables(**params)['RouteTables']
+    except botocore.exceptions.ClientError as e:
+        success = False
+        err_msg = str(e)
+
+    return success, err_msg, results
+
+
+def canonical_destination(dest):
+    """Normalise an IPv6 cidr, so that the same prefix written with a
+        different case or zero compression compares equal. IPv4 cidrs and
+        prefix list ids are returned unchanged.
+    Args:
+        dest (str): An IPv4 cidr, an IPv6 cidr or a managed prefix list id.
+
+    Basic Usage:
+        >>> canonical_destination('2001:DB8:0:0::/56')
+        '2001:db8::/56'
+
+    Returns:
+        String
+    """
+    if dest.startswith('pl-') or ':' not in dest:
+        return dest
+    address, _, prefix_len = dest.partition('/')
+    try:
+        address = socket.inet_ntop(
+            socket.AF_INET6, socket.inet_pton(socket.AF_INET6, address)
+        )
+    except (ValueError, socket.error):
+        return dest
+    if prefix_len:
+        return '{0}/{1}'.format(address, prefix_len)
+    return address
+
+
+def route_matches(route, destinations=None, targets=None):
+    """Check if a single route has one of the destinations and one of the
+        targets.
+    Args:
+        route (dict): The route, as returned by Amazon.
+
+    Kwargs:
+        destinations (set): Set of canonical destinations, see
+            canonical_destination. Any destination matches when empty.
+        targets (set): Set of gateway ids. Any target matches when empty.
+
+    Basic Usage:
+        >>> route = {'DestinationCidrBlock': '0.0.0.0/0', 'NatGatewayId': 'nat-1234567'}
+        >>> route_matches(route, set(['0.0.0.0/0']), set(['nat-1234567']))
+        True
+
+    Returns:
+        Bool
+    """
+    if destinations and not [
+            key for key in DESTINATION_KEYS
+            if route.get(key)
+            and canonical_destination(route[key]) in destinations]:
+        return False
+    if targets and not [
+            key for key in TARGET_KEYS if route.get(key) in targets]:
+        return False
+    return True
+
+
+def route_table_matches(route_table, filters=None, route_table_ids=None,
+                        destinations=None, targets=None):
+    """Check if a route table matches the filters that were passed. The
+        api applies the filters and route table ids itself, they are only
+        checked here for the route tables returned in check mode.
+    Args:
+        route_table (dict): The route table, as returned by Amazon.
+
+    Kwargs:
+        filters (list): List of filters. See build_filters.
+        route_table_ids (list): List of route table ids.
+        destinations (set): Set of canonical destinations, see
+            canonical_destination.
+        targets (set): Set of gateway ids. A single route of the route
+            table has to have one of the destinations and one of the targets.
+
+    Basic Usage:
+        >>> route_table = DRY_RUN_ROUTE_TABLES[0]
+        >>> route_table_matches(route_table, targets=set(['nat-1234567']))
+        True
+
+    Returns:
+        Bool
+    """
+    if route_table_ids and route_table['RouteTableId'] not in route_table_ids:
+        return False
+
+    for route_filter in filters or list():
+        name = route_filter['Name']
+        values = set(route_filter['Values'])
+        if name == 'vpc-id':
+            found = set([route_table['VpcId']])
+        elif name.startswith('tag:'):
+            found = set(
+                [
+                    tag['Value'] for tag in route_table.get('Tags', list())
+                    if tag['Key'] == name[4:]
+                ]
+            )
+        elif name == 'association.subnet-id':
+            found = set(
+                [
+                    association.get('SubnetId')
+                    for association in route_table.get('Associations', list())
+                ]
+            )
+        else:
+            continue
+        if not values.intersection(found):
+            return False
+
+    if not destinations and not targets:
+        return True
+
+    for route in route_table.get('Routes', list()):
+        if route_matches(route, destinations, targets):
+            return True
+    return False
+
+
+def get_route_tables(client, vpc_ids=None, route_table_ids=None, tags=None,
+                     subnet_ids=None, destinations=None, targets=None,
+                     check_mode=False):
+    """Retrieve the route tables that match the filters, indexed by route
+        table id. Only the matching route tables are converted.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        vpc_ids (list): List of vpc ids.
+        route_table_ids (list): List of route table ids.
+        tags (dict): Dictionary of tags that every route table has to match.
+        subnet_ids (list): List of subnet ids.
+        destinations (list): List of route destinations. IPv6 cidrs match
+            whatever their case or zero compression.
+        targets (list): List of route targets, a route has to have one of
+            the destinations and one of the targets.
+        check_mode (bool): Use DRY_RUN_ROUTE_TABLES instead of making the
+            api call.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('ec2')
+        >>> get_route_tables(client, vpc_ids=['vpc-1234567'], targets=['nat-1234567'])
+        (
+            True,
+            '',
+            {
+                'rtb-1234567': {
+                    'route_table_id': 'rtb-1234567',
+                    'vpc_id': 'vpc-1234567',
+                    ...
+                }
+            }
+        )
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    results = dict()
+    filters = build_filters(vpc_ids, tags, subnet_ids)
+    success, err_msg, route_tables = (
+        describe_route_tables(client, filters, route_table_ids, check_mode)
+    )
+    if not success:
+        return success, err_msg, results
+
+    destinations = set(
+        canonical_destination(dest) for dest in destinations or list()
+    )
+    targets = set(targets or list())
+    for route_table in route_tables:
+        if route_table_matches(
+                route_table, filters, route_table_ids, destinations, targets):
+            results[route_table['RouteTableId']] = (
+                convert_to_lower(route_table)
+            )
+
+    return success, err_msg, results
+
+
+def main():
+    argument_spec = ec2_argument_spec()
+    argument_spec.update(dict(
+        vpc_ids=dict(type='list', aliases=['vpc_id']),
+        route_table_ids=dict(type='list'),
+        tags=dict(type='dict'),
+        subnet_ids=dict(type='list'),
+        destinations=dict(type='list'),
+        targets=dict(type='list'),
+    ))
+
+    module = (
+        AnsibleModule(
+            argument_spec=argument_spec,
+            supports_check_mode=True,
+        )
+    )
+
+    if not HAS_BOTO3:
+        module.fail_json(msg='boto3 required for this module')
+
+    try:
+        region, ec2_url, aws_connect_kwargs = get_aws_connection_info(module, boto3=True)
+        client = boto3_conn(module, conn_type='client', resource='ec2', region=region, endpoint=ec2_url, **aws_connect_kwargs)
+    except botocore.exceptions.ClientError as e:
+        module.fail_json(msg="Boto3 Client Error - " + str(e.msg))
+
+    success, err_msg, results = (
+        get_route_tables(
+            client,
+            vpc_ids=module.params.get('vpc_ids'),
+            route_table_ids=module.params.get('route_table_ids'),
+            tags=module.params.get('tags'),
+            subnet_ids=module.params.get('subnet_ids'),
+            destinations=module.params.get('destinations'),
+            targets=module.params.get('targets'),
+            check_mode=module.check_mode
+        )
+    )
+    if success:
+        module.exit_json(success=success, route_tables=results)
+    else:
+        module.fail_json(msg=err_msg)
+
+
+# import module snippets
+from ansible.module_utils.basic import *
+from ansible.module_utils.ec2 import *
+
+if __name__ == '__main__':
+    main()
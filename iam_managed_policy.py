@@ -34,8 +34,8 @@ options:
     required: true
   policy_name:
     description:
-      - The name label for the policy to create or remove.
-    required: true
+      - The name label for the policy to create or remove. Required unless C(policies) or C(policy_directory) is set.
+    required: false
   policy_document:
     description:
       - The path to the properly json formatted policy file (mutually exclusive with C(policy_json))
@@ -44,6 +44,16 @@ options:
     description:
       - A properly json formatted policy as string (mutually exclusive with C(policy_document), see https://github.com/ansible/ansible/issues/7005#issuecomment-42894813 on how to use it properly)
     required: false
+  policies:
+    description:
+      - A list of policies to reconcile in a single run, each with a C(name) and either a C(policy) (json string or dict) or a C(document) (path to a json file). Only policies whose default version differs are created or versioned. Before a policy is versioned, its versions other than the default are deleted, keeping the current and the previous one. Only valid with state=present.
+    required: false
+    version_added: "2.3"
+  policy_directory:
+    description:
+      - A directory of C(.json) policy files to reconcile in a single run, one policy per file, named after the file. Behaves like C(policies).
+    required: false
+    version_added: "2.3"
   state:
     description:
       - Whether to create or delete the IAM policy.
@@ -53,6 +63,7 @@ options:
 
 notes:
   - 'Currently boto does not support the removal of Managed Policies, the module will not work removing/adding managed policies.'
+  - 'Policies are looked up directly by an arn built from the account id of the caller. When the id can not be read, as with role credentials, the local policies are listed once per run instead.'
 author: "Allen Sanabria (@linuxdynasty)"
 extends_documentation_fragment:
     - aws
@@ -98,6 +109,20 @@ policies:
     policy_name: "dev_s3_access"
     policy_document: "dev_s3.json"
 
+# Reconcile every policy in a directory, fetching the account's policies once.
+- name: Create or update the IAM managed policies in policies/
+  local_action:
+    module: iam_managed_policy
+    state: present
+    policy_directory: "policies"
+
+# Reconcile a list of policies in a single task.
+- name: Create or update multiple IAM managed policies at once
+  local_action:
+    module: iam_managed_policy
+    state: present
+    policies: "{{ policies }}"
+
 # Delete an IAM managed policy.
 - name: Delete s3 IAM managed policy
   local_action:
@@ -115,10 +140,14 @@ except ImportError:
     HAS_BOTO3 = False
 
 from json import dumps, loads
+import hashlib
+import os
 import re
 import datetime
+from multiprocessing.pool import ThreadPool
 from random import randint
 from time import sleep
+from urllib import unquote
 
 EXAMPLE_POLICY_DICT = {
     "Version": "2012-10-17",
@@ -295,6 +324,29 @@ EXAMPLE_LIST_POLICY_VERSIONS = {
     'IsTruncated': False
 }
 
+EXAMPLE_ACCOUNT_ID = '123456789'
+
+# The largest page list_policies will return.
+MAX_ITEMS = 1000
+
+# IAM throttles per account, so batch mode keeps few calls in flight.
+MAX_CONCURRENT_REQUESTS = 10
+
+# Statement elements whose values may be a single string or a list.
+POLICY_LIST_ELEMENTS = ['Action', 'NotAction', 'Resource', 'NotResource']
+POLICY_MAP_ELEMENTS = ['Principal', 'NotPrincipal']
+
+# Local managed policies by name, and the digests of policy versions by
+# (arn, version id), for the life of this run. find_policy lists the
+# policies at most once and policy_action keeps the cache current as
+# policies are created, versioned and deleted.
+POLICY_CACHE = {
+    'account_id': None,
+    'listed': False,
+    'policies': dict(),
+    'digests': dict(),
+}
+
 
 def convert_to_lower(data):
     """Convert all uppercase keys in dict with lowercase_
@@ -384,6 +436,102 @@ def validate_json(policy_json, is_file=False):
             )
     return policy, err_msg
 
+def run_concurrently(func, calls, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Run func once for every set of keyword arguments in calls, using a
+        bounded pool of threads. Boto3 clients are thread safe, so the same
+        client can be shared across every call.
+    Args:
+        func (function): The function to call.
+        calls (list): List of dictionaries, each one containing the keyword
+            arguments for a single call to func.
+
+    Kwargs:
+        max_workers (int): The maximum number of calls in flight at once.
+            default=MAX_CONCURRENT_REQUESTS
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> calls = [
+            {
+                'client': client,
+                'policy_arn': 'arn:aws:iam::123456789:policy/test',
+                'version_id': 'v1'
+            }
+        ]
+        >>> run_concurrently(get_policy_version, calls)
+
+    Returns:
+        List, containing the result of each call in the same order as calls.
+    """
+    if not calls:
+        return list()
+    pool = ThreadPool(max(1, min(max_workers, len(calls))))
+    try:
+        return pool.map(lambda kwargs: func(**kwargs), calls)
+    finally:
+        pool.close()
+        pool.join()
+
+def load_policy_specs(policies=None, policy_directory=None):
+    """Read and validate the policies of a batch run.
+
+    Kwargs:
+        policies (list): List of dictionaries, each with a name and either
+            a policy (json string or dict) or a document (path to a json file).
+        policy_directory (str): Directory of .json files, one policy per
+            file, named after the file.
+
+    Basic Usage:
+        >>> policies = [{'name': 'test', 'policy': EXAMPLE_POLICY_DICT}]
+        >>> load_policy_specs(policies, 'policies')
+        (True, '', [{'name': 'test', 'policy': '{"Version": ...}'}])
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ''
+    specs = list()
+    sources = list()
+    for spec in policies or list():
+        if not isinstance(spec, dict) or not spec.get('name'):
+            err_msg = 'Every policy needs a name: {0}'.format(spec)
+            return success, err_msg, specs
+        if spec.get('document'):
+            sources.append((spec['name'], spec['document'], True))
+        else:
+            sources.append((spec['name'], spec.get('policy'), False))
+
+    if policy_directory:
+        try:
+            file_names = sorted(os.listdir(policy_directory))
+        except OSError as e:
+            err_msg = (
+                'Failed to read policy_directory {0}: {1}'
+                .format(policy_directory, str(e))
+            )
+            return success, err_msg, specs
+        for file_name in file_names:
+            name, extension = os.path.splitext(file_name)
+            if extension == '.json':
+                path = os.path.join(policy_directory, file_name)
+                sources.append((name, path, True))
+
+    names = set()
+    for name, source, is_file in sources:
+        if name in names:
+            err_msg = 'Policy {0} is defined more than once'.format(name)
+            return success, err_msg, list()
+        names.add(name)
+        policy, policy_err = validate_json(source, is_file=is_file)
+        if policy_err:
+            err_msg = 'Policy {0}: {1}'.format(name, policy_err)
+            return success, err_msg, list()
+        specs.append({'name': name, 'policy': policy})
+
+    success = True
+    return success, err_msg, specs
+
 def get_policy(client, policy_arn, check_mode=False):
     """Retrieve an IAM Managed Policy.
 
@@ -415,13 +563,13 @@ def get_policy(client, policy_arn, check_mode=False):
             success = True
         else:
             if policy_arn == 'arn:aws:iam::123456789:policy/test':
-                policy = EXAMPLE_POLICY_CREATE_RESULT
+                policy = EXAMPLE_POLICY_CREATE_RESULT['Policy']
                 success = True
             else:
                 success = False
                 err_msg = (
-                    'An error occurred (NoSuchEntity) when calling the ListPolicies operation: {0} does not exist.'
-                    .format(policy_name)
+                    'An error occurred (NoSuchEntity) when calling the GetPolicy operation: Policy {0} was not found.'
+                    .format(policy_arn)
                 )
                 return success, err_msg, policy
 
@@ -479,12 +627,16 @@ def get_policy_version(client, policy_arn, version_id, check_mode=False):
 
     return success, err_msg, policy
 
-def find_policy(client, policy_name, check_mode=False):
-    """Retrieve an IAM Managed Policy.
+def get_account_id(client, check_mode=False):
+    """Retrieve the id of the account the client is authenticated against.
+        The id is read from the arn of the calling user. When get_user is
+        denied, the AccessDenied error names the caller's arn and the id is
+        read from there. Role credentials get a ValidationError without an
+        arn, and the pinned botocore has no sts get_caller_identity, so the
+        id stays unknown and find_policy falls back to listing the policies.
 
     Args:
         client (botocore.client.EC2): Boto3 client.
-        policy_name (str): Name of the managed policy you are retrieving.
 
     Kwargs:
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
@@ -492,58 +644,172 @@ def find_policy(client, policy_name, check_mode=False):
 
     Basic Usage:
         >>> client = boto3.client('iam')
-        >>> policy_name = 'test'
-        >>> find_policy(client, policy_name)
+        >>> get_account_id(client)
+        (True, '', '123456789')
 
     Returns:
-        Tuple (bool, str, dict)
+        Tuple (bool, str, str)
     """
     success = False
     err_msg = ''
-    params = {
-        'Scope': 'Local'
-    }
-    result = dict()
+    account_id = None
     try:
-        is_truncated = True
-        i = 0
-        marker = None
-        policies = dict()
-        while is_truncated:
-            if i > 0:
-                params['Marker'] = marker
-            if not check_mode:
-                policies = client.list_policies(**params)
-                for policy in policies['Policies']:
-                    if policy['PolicyName'] == policy_name:
-                        result = policy
-                        success = True
-                        err_msg = '{0} policy found.'.format(policy_name)
-                        return success, err_msg, result
+        if not check_mode:
+            arn = client.get_user()['User']['Arn']
+        else:
+            arn = 'arn:aws:iam::{0}:user/test'.format(EXAMPLE_ACCOUNT_ID)
+    except botocore.exceptions.ClientError, e:
+        arn = str(e)
+    match = re.search(r'arn:aws[\w-]*:(?:iam|sts)::(\d+):', arn)
+    if match:
+        account_id = match.group(1)
+        success = True
+    else:
+        err_msg = 'Could not read the account id: {0}'.format(arn)
 
-            else:
-                if policy_name == 'test':
-                    policies = EXAMPLE_LIST_POLICIES
-                    success = True
-                else:
-                    success = False
-                    err_msg = (
-                        'An error occurred (NoSuchEntity) when calling the ListPolicies operation: {0} does not exist.'
-                        .format(policy_name)
-                    )
-                    return success, err_msg, result
+    return success, err_msg, account_id
 
-            is_truncated = policies['IsTruncated']
-            if is_truncated:
-                i += 1
-                marker = policies.get('Marker', None)
-                sleep(randint(1,2))
+def policy_arn_from_name(account_id, policy_name, policy_path='/'):
+    """Build the arn of a local managed policy.
+
+    Args:
+        account_id (str): The id of the account that owns the policy.
+        policy_name (str): Name of the managed policy.
+
+    Kwargs:
+        policy_path (str): The path the policy was created under.
+            default=/
+
+    Basic Usage:
+        >>> policy_arn_from_name('123456789', 'test')
+        'arn:aws:iam::123456789:policy/test'
+
+    Returns:
+        String
+    """
+    return (
+        'arn:aws:iam::{0}:policy{1}{2}'
+        .format(account_id, policy_path, policy_name)
+    )
+
+def list_local_policies(client, check_mode=False):
+    """List every local managed policy in the account, MAX_ITEMS at a time.
 
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> list_local_policies(client)
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    success = False
+    err_msg = ''
+    params = {
+        'Scope': 'Local',
+        'MaxItems': MAX_ITEMS
+    }
+    results = list()
+    try:
+        if not check_mode:
+            while True:
+                policies = client.list_policies(**params)
+                results.extend(policies['Policies'])
+                if not policies['IsTruncated']:
+                    break
+                params['Marker'] = policies['Marker']
+        else:
+            results.extend(EXAMPLE_LIST_POLICIES['Policies'])
         success = True
     except botocore.exceptions.ClientError, e:
         err_msg = str(e)
 
-    return success, err_msg, result
+    return success, err_msg, results
+
+def index_policies(client, check_mode=False):
+    """Index the local managed policies by name in POLICY_CACHE. The
+        policies are only listed the first time this is called.
+
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> success, err_msg, policies = index_policies(client)
+        >>> policies['test']['Arn']
+        'arn:aws:iam::123456789:policy/test'
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    success = True
+    err_msg = ''
+    if not POLICY_CACHE['listed']:
+        success, err_msg, policies = list_local_policies(client, check_mode)
+        if success:
+            for policy in policies:
+                POLICY_CACHE['policies'][policy['PolicyName']] = policy
+            POLICY_CACHE['listed'] = True
+
+    return success, err_msg, POLICY_CACHE['policies']
+
+def find_policy(client, policy_name, check_mode=False, policy_path='/'):
+    """Retrieve an IAM Managed Policy.
+        Policies already in POLICY_CACHE are returned without calling AWS.
+        Otherwise, when the account id is known, the policy is fetched
+        directly by its arn. The local policies are only listed, once, when
+        the id is unknown or the policy is not under policy_path.
+
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        policy_name (str): Name of the managed policy you are retrieving.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+        policy_path (str): The path the policy is expected under.
+            default=/
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> policy_name = 'test'
+        >>> find_policy(client, policy_name)
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    policies = POLICY_CACHE['policies']
+    if policy_name in policies:
+        return True, '{0} policy found.'.format(policy_name), policies[policy_name]
+
+    account_id = POLICY_CACHE['account_id']
+    if account_id and not POLICY_CACHE['listed'] and not check_mode:
+        policy_arn = policy_arn_from_name(account_id, policy_name, policy_path)
+        try:
+            policy = client.get_policy(PolicyArn=policy_arn)['Policy']
+            policies[policy_name] = policy
+            return True, '{0} policy found.'.format(policy_name), policy
+        except botocore.exceptions.ClientError, e:
+            if e.response['Error']['Code'] != 'NoSuchEntity':
+                return False, str(e), dict()
+
+    success, err_msg, policies = index_policies(client, check_mode)
+    if not success:
+        return success, err_msg, dict()
+    if policy_name in policies:
+        return True, '{0} policy found.'.format(policy_name), policies[policy_name]
+
+    return True, '', dict()
 
 def list_attached_policies(client, resource_name, resource_type, check_mode=False):
     """List all attached policies to a resource (group, user, role).
@@ -747,6 +1013,48 @@ def list_entities_for_policy(client, policy_arn, check_mode=False):
 
     return success, err_msg, users, groups, roles
 
+def update_policy_cache(action, policy_arn, response, policy_json=None):
+    """Keep POLICY_CACHE in step with a policy_action call, so find_policy
+        and get_policy_digest do not have to ask AWS again.
+
+    Args:
+        action (str): The action that was run.
+            valid actions == create and delete and create_version and delete_version
+        policy_arn (str): The Amazon resource identifier, or None for create.
+        response (dict): What AWS returned for the action.
+
+    Kwargs:
+        policy_json (str): The json policy that was created or versioned.
+
+    Basic Usage:
+        >>> response = client.create_policy(**params)
+        >>> update_policy_cache('create', None, response, policy_json)
+    """
+    policies = POLICY_CACHE['policies']
+    if action == 'create':
+        policy = response['Policy']
+        policies[policy['PolicyName']] = policy
+        POLICY_CACHE['digests'][(policy['Arn'], policy['DefaultVersionId'])] = (
+            policy_digest(policy_json)
+        )
+        return
+
+    if action == 'create_version':
+        version_id = response['PolicyVersion']['VersionId']
+        POLICY_CACHE['digests'][(policy_arn, version_id)] = (
+            policy_digest(policy_json)
+        )
+
+    for name, policy in policies.items():
+        if policy['Arn'] == policy_arn:
+            if action == 'delete':
+                del policies[name]
+            elif action == 'create_version':
+                policy = dict(policy)
+                policy['DefaultVersionId'] = version_id
+                policies[name] = policy
+            break
+
 def policy_action(client, policy_name=None, policy_arn=None, policy_json=None,
                   policy_path='/', description='', version=None,
                   action='create', check_mode=False):
@@ -834,7 +1142,8 @@ def policy_action(client, policy_name=None, policy_arn=None, policy_json=None,
 
     try:
         if not check_mode:
-            actions[action]['run'](**actions[action]['params'])
+            response = actions[action]['run'](**actions[action]['params'])
+            update_policy_cache(action, policy_arn, response, policy_json)
             success = True
         else:
             success = True
@@ -1025,6 +1334,140 @@ def delete_policy_versions(client, policy_arn, except_version=None,
 
     return success, changed, err_msg
 
+def canonical_values(values):
+    """Sort and deduplicate the values of a policy element, which may be a
+        single value or a list.
+
+    Args:
+        values (str|list): The value or values of the element.
+
+    Basic Usage:
+        >>> canonical_values(['s3:PutObject', 's3:GetObject', 's3:PutObject'])
+        ['s3:GetObject', 's3:PutObject']
+        >>> canonical_values('*')
+        ['*']
+
+    Returns:
+        List
+    """
+    if not isinstance(values, list):
+        values = [values]
+    canonical = dict()
+    for value in values:
+        canonical[dumps(value, sort_keys=True)] = value
+    return [canonical[key] for key in sorted(canonical.keys())]
+
+def canonical_policy(document):
+    """Rewrite a policy document in a canonical form, so that documents
+        that grant the same permissions compare equal. Url-encoded and json
+        documents are decoded, a single statement becomes a list, scalar
+        Action, Resource, Principal and Condition values become lists, and
+        every list of values and of statements is sorted and deduplicated.
+
+    Args:
+        document (str|dict): The policy, as returned by get_policy_version
+            or as passed to the module.
+
+    Basic Usage:
+        >>> canonical_policy('%7B%22Statement%22%3A%7B%22Action%22%3A%22*%22%7D%7D')
+        {u'Statement': [{u'Action': [u'*']}]}
+
+    Returns:
+        Dictionary
+    """
+    if isinstance(document, basestring):
+        document = document.strip()
+        if not document.startswith('{'):
+            document = unquote(document)
+        document = loads(document)
+    canonical = dict(document)
+    statements = document.get('Statement', list())
+    if not isinstance(statements, list):
+        statements = [statements]
+    canonical_statements = list()
+    for statement in statements:
+        statement = dict(statement)
+        for key in POLICY_LIST_ELEMENTS:
+            if key in statement:
+                statement[key] = canonical_values(statement[key])
+        for key in POLICY_MAP_ELEMENTS:
+            if isinstance(statement.get(key), dict):
+                statement[key] = dict(
+                    (name, canonical_values(values))
+                    for name, values in statement[key].items()
+                )
+        if isinstance(statement.get('Condition'), dict):
+            statement['Condition'] = dict(
+                (
+                    operator,
+                    dict(
+                        (name, canonical_values(values))
+                        for name, values in conditions.items()
+                    )
+                )
+                for operator, conditions in statement['Condition'].items()
+            )
+        canonical_statements.append(statement)
+    canonical['Statement'] = canonical_values(canonical_statements)
+    return canonical
+
+def policy_digest(document):
+    """Hash the canonical form of a policy document. Documents that only
+        differ in statement or value order, scalar versus list values or
+        encoding share a digest.
+
+    Args:
+        document (str|dict): The policy, as returned by get_policy_version
+            or as passed to the module.
+
+    Basic Usage:
+        >>> policy_digest(EXAMPLE_POLICY_STR) == policy_digest(EXAMPLE_POLICY_DICT)
+        True
+
+    Returns:
+        String, the hex sha256 of the canonical json.
+    """
+    canonical = dumps(
+        canonical_policy(document), sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def get_policy_digest(client, policy_arn, version_id, check_mode=False):
+    """Retrieve the digest of a policy version. Versions never change, so
+        the digest is kept in POLICY_CACHE and the document is only fetched
+        the first time.
+
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        policy_arn (str): The Amazon resource identifier.
+        version_id (str): The version of the policy.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> policy_arn = 'arn:aws:iam::123456789:policy/test'
+        >>> get_policy_digest(client, policy_arn, 'v1')
+
+    Returns:
+        Tuple (bool, str, str)
+    """
+    key = (policy_arn, version_id)
+    if key in POLICY_CACHE['digests']:
+        return True, '', POLICY_CACHE['digests'][key]
+
+    success, err_msg, version_policy = (
+        get_policy_version(client, policy_arn, version_id, check_mode)
+    )
+    digest = None
+    if success:
+        digest = policy_digest(version_policy['Document'])
+        POLICY_CACHE['digests'][key] = digest
+
+    return success, err_msg, digest
+
 def create_policy_version(client, policy_arn, policy_json, current_policy,
                           check_mode=False):
     """Create a new version of the current policy with an updated policy.
@@ -1058,7 +1501,8 @@ def create_policy_version(client, policy_arn, policy_json, current_policy,
         >>> create_policy_version(client, policy_arn, policy_json, current_policy)
 
     Returns:
-        List (bool, bool, str)
+        List (bool, bool, str, str), the last item being the digest of
+        the version that was the default before this call.
     """
 
     success = False
@@ -1066,13 +1510,15 @@ def create_policy_version(client, policy_arn, policy_json, current_policy,
     err_msg = ''
     policy_arn = current_policy['Arn']
     current_policy_version = current_policy['DefaultVersionId']
-    version_success, version_err, version_policy = (
-        get_policy_version(
+    version_success, version_err, digest = (
+        get_policy_digest(
             client, policy_arn, current_policy_version, check_mode
         )
     )
-    if version_success and version_policy:
-        if version_policy['Document'] == loads(policy_json):
+    if not version_success:
+        err_msg = version_err
+    else:
+        if digest == policy_digest(policy_json):
             success = True
             changed = False
             err_msg = (
@@ -1100,7 +1546,7 @@ def create_policy_version(client, policy_arn, policy_json, current_policy,
                     )
                 )
                 changed = True
-    return success, changed, err_msg, version_policy
+    return success, changed, err_msg, digest
 
 def create(client, policy_name, policy_json, resource_name=None,
            resource_type=None, delete_previous_versions_except_last=False,
@@ -1220,13 +1666,24 @@ def create(client, policy_name, policy_json, resource_name=None,
             policy_exists, exists_err_msg, current_policy = (
                 find_policy(client, policy_name, check_mode)
             )
-            if policy_exists:
+            if policy_exists and current_policy:
                 policy_arn = current_policy['Arn']
                 err_msg = (
                     'Policy {0} created. ARN = {1}'
                     .format(policy_name, policy_arn)
                 )
+            elif policy_exists and check_mode:
+                # Nothing was created, so there is nothing to find yet.
+                policy_arn = policy_arn_from_name(
+                    POLICY_CACHE['account_id'] or EXAMPLE_ACCOUNT_ID,
+                    policy_name
+                )
+                err_msg = (
+                    'Policy {0} would be created. ARN = {1}'
+                    .format(policy_name, policy_arn)
+                )
             else:
+                success = create_success = False
                 err_msg = (
                     'Policy {0} could not be found. Error: {1}'
                     .format(policy_name, exists_err_msg)
@@ -1261,7 +1718,7 @@ def create(client, policy_name, policy_json, resource_name=None,
             success = create_success
 
         _, _, current_policy = (
-            find_policy(client, policy_name, check_mode)
+            get_policy(client, policy_arn, check_mode)
         )
         _, _, users, groups, roles = (
             list_entities_for_policy(client, policy_arn, check_mode)
@@ -1275,6 +1732,210 @@ def create(client, policy_name, policy_json, resource_name=None,
 
     return success, changed, policy_modified, resource_modified, err_msg, result
 
+def apply_policy_spec(client, policy_name, policy_json, policy_arn=None,
+                      delete_previous_versions_except_last=False,
+                      check_mode=False):
+    """Create a managed policy, or a new default version of it when
+        policy_arn is set. A policy can only have 5 versions, so the
+        versions other than the default can be deleted first.
+
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        policy_name (str): Name of the managed policy.
+        policy_json (str): The json policy.
+
+    Kwargs:
+        policy_arn (str): The Amazon resource identifier of the existing policy.
+        delete_previous_versions_except_last (bool): Delete every version
+            but the default before creating the new one, leaving the
+            current and the previous version.
+            default=False
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> policy_arn = 'arn:aws:iam::123456789:policy/test'
+        >>> apply_policy_spec(client, 'test', policy_json, policy_arn, True)
+
+    Returns:
+        List (bool, str)
+    """
+    if not policy_arn:
+        return policy_action(
+            client, policy_name=policy_name, policy_json=policy_json,
+            action='create', check_mode=check_mode
+        )
+
+    if delete_previous_versions_except_last and not check_mode:
+        delete_success, _, delete_err_msg = (
+            delete_policy_versions(client, policy_arn, check_mode=check_mode)
+        )
+        if not delete_success:
+            return delete_success, delete_err_msg
+
+    return policy_action(
+        client, policy_arn=policy_arn, policy_json=policy_json,
+        action='create_version', check_mode=check_mode
+    )
+
+def batch(client, specs, delete_previous_versions_except_last=True,
+          check_mode=False):
+    """Create or version many managed policies at once. The local policies
+        are listed once and the default versions of the existing ones are
+        fetched concurrently. Only the policies that are missing or whose
+        default version has a different digest are then created or
+        versioned, again concurrently.
+
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        specs (list): The output of load_policy_specs.
+
+    Kwargs:
+        delete_previous_versions_except_last (bool): Delete the versions
+            other than the default of a policy before versioning it, so
+            that it never reaches the limit of 5 versions.
+            default=True
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('iam')
+        >>> success, err_msg, specs = load_policy_specs(policy_directory='policies')
+        >>> batch(client, specs)
+        [
+            true,
+            true,
+            "1 policies created, 1 policies versioned, 1 policies unchanged",
+            {
+                "policies": {
+                    "admin": {
+                        "arn": "arn:aws:iam::123456789:policy/admin",
+                        "changed": true,
+                        "default_version_id": "v1",
+                        "msg": "Policy admin created"
+                    },
+                    "s3": {
+                        "arn": "arn:aws:iam::123456789:policy/s3",
+                        "changed": true,
+                        "default_version_id": "v3",
+                        "msg": "Policy s3 updated with a new default version: v3"
+                    },
+                    "test": {
+                        "arn": "arn:aws:iam::123456789:policy/test",
+                        "changed": false,
+                        "default_version_id": "v1",
+                        "digest": "5f1c3a...",
+                        "msg": "Policy test has not changed"
+                    }
+                }
+            }
+        ]
+
+    Returns:
+        List (bool, bool, str, dict)
+    """
+    success = False
+    changed = False
+    err_msg = ''
+    results = {'policies': dict()}
+    index_success, index_err, policies = index_policies(client, check_mode)
+    if not index_success:
+        return success, changed, index_err, results
+
+    existing = [spec for spec in specs if spec['name'] in policies]
+    missing = [spec for spec in specs if spec['name'] not in policies]
+    digest_calls = [
+        {
+            'client': client,
+            'policy_arn': policies[spec['name']]['Arn'],
+            'version_id': policies[spec['name']]['DefaultVersionId'],
+            'check_mode': check_mode
+        }
+        for spec in existing
+    ]
+    digests = run_concurrently(get_policy_digest, digest_calls)
+
+    errors = list()
+    updates = list()
+    for spec, (digest_success, digest_err, digest) in zip(existing, digests):
+        if not digest_success:
+            errors.append('Policy {0}: {1}'.format(spec['name'], digest_err))
+        elif digest != policy_digest(spec['policy']):
+            updates.append(spec)
+        else:
+            results['policies'][spec['name']] = {
+                'changed': False,
+                'msg': 'Policy {0} has not changed'.format(spec['name'])
+            }
+
+    action_calls = [
+        {
+            'client': client,
+            'policy_name': spec['name'],
+            'policy_json': spec['policy'],
+            'check_mode': check_mode
+        }
+        for spec in missing
+    ]
+    action_calls.extend([
+        {
+            'client': client,
+            'policy_name': spec['name'],
+            'policy_json': spec['policy'],
+            'policy_arn': policies[spec['name']]['Arn'],
+            'delete_previous_versions_except_last': (
+                delete_previous_versions_except_last
+            ),
+            'check_mode': check_mode
+        }
+        for spec in updates
+    ])
+    actions = run_concurrently(apply_policy_spec, action_calls)
+    action_specs = missing + updates
+    for spec, call, (action_success, action_err) in zip(action_specs, action_calls, actions):
+        name = spec['name']
+        if not action_success:
+            errors.append('Policy {0}: {1}'.format(name, action_err))
+            continue
+        changed = True
+        if check_mode:
+            msg = (
+                'Policy {0} would be {1}'
+                .format(name, 'versioned' if call.get('policy_arn') else 'created')
+            )
+        elif not call.get('policy_arn'):
+            msg = 'Policy {0} created'.format(name)
+        else:
+            msg = (
+                'Policy {0} updated with a new default version: {1}'
+                .format(name, policies[name]['DefaultVersionId'])
+            )
+        results['policies'][name] = {'changed': True, 'msg': msg}
+
+    for spec in specs:
+        result = results['policies'].get(spec['name'])
+        if result is not None:
+            result['digest'] = policy_digest(spec['policy'])
+    for name, result in results['policies'].items():
+        if name in policies:
+            result['arn'] = policies[name]['Arn']
+            result['default_version_id'] = policies[name]['DefaultVersionId']
+
+    if errors:
+        err_msg = ', '.join(errors)
+    else:
+        success = True
+        err_msg = (
+            '{0} policies created, {1} policies versioned, {2} policies unchanged'
+            .format(
+                len(missing), len(updates),
+                len(specs) - len(missing) - len(updates)
+            )
+        )
+
+    return success, changed, err_msg, results
+
 def delete(client, policy_name, check_mode=False):
     """Delete a managed policy.
 
@@ -1378,9 +2039,11 @@ def main():
                     'present', 'absent'
                 ]
             ),
-            policy_name=dict(type='str', default=None, required=True),
+            policy_name=dict(type='str', default=None, required=False),
             policy_document=dict(type='str', default=None, required=False),
             policy_json=dict(default=None, required=False),
+            policies=dict(type='list', default=None, required=False),
+            policy_directory=dict(type='str', default=None, required=False),
         )
     )
 
@@ -1400,6 +2063,8 @@ def main():
     policy_name = module.params.get('policy_name')
     policy_document = module.params.get('policy_document')
     policy_json = module.params.get('policy_json')
+    policies = module.params.get('policies')
+    policy_directory = module.params.get('policy_directory')
     check_mode = module.check_mode
 
     if policy_document and policy_json:
@@ -1407,6 +2072,26 @@ def main():
             msg='Only one of "policy_document" or "policy_json" may be set'
         )
 
+    specs = None
+    if policies or policy_directory:
+        if policy_name or policy_document or policy_json or iam_name:
+            module.fail_json(
+                msg='policies and policy_directory can not be used with policy_name, policy_document, policy_json or iam_name'
+            )
+        if state != 'present':
+            module.fail_json(
+                msg='policies and policy_directory are only valid with state=present'
+            )
+        success, err_msg, specs = (
+            load_policy_specs(policies, policy_directory)
+        )
+        if not success:
+            module.fail_json(msg=err_msg)
+    elif not policy_name:
+        module.fail_json(
+            msg='One of policy_name, policies or policy_directory is required'
+        )
+
     if policy_document:
         policy, err_msg = validate_json(policy_document, is_file=True)
         if err_msg:
@@ -1435,6 +2120,18 @@ def main():
         err_msg = 'Boto3 Client Error - {0}'.format(str(e.msg))
         module.fail_json(msg=err_msg)
 
+    # Without the account id find_policy falls back to listing the policies.
+    _, _, POLICY_CACHE['account_id'] = get_account_id(client, check_mode)
+
+    if specs is not None:
+        success, changed, err_msg, result = batch(client, specs, check_mode=check_mode)
+        if success:
+            module.exit_json(
+                success=success, changed=changed, msg=err_msg, **result
+            )
+        else:
+            module.fail_json(msg=err_msg, **result)
+
     if state == 'present':
         success, changed, policy_modified, resource_modified, err_msg, result = (
             create(
@@ -0,0 +1,125 @@
+#!/usr/bin/python
+
+import boto3
+import botocore.exceptions
+import botocore.model
+import botocore.validate
+import copy
+import threading
+
+from botocore import xform_name
+
+SERVICE_MODELS = dict()
+
+
+def installed_model(service_name):
+    """The model of service_name in the installed botocore."""
+    if service_name not in SERVICE_MODELS:
+        SERVICE_MODELS[service_name] = (
+            boto3.client(service_name, region_name='us-east-1')
+            .meta.service_model
+        )
+    return SERVICE_MODELS[service_name]
+
+
+def newer_model(service_name, members, shapes=None, required=None):
+    """The model of service_name in the installed botocore, with the
+        members that newer releases added to its shapes.
+
+    Args:
+        service_name (str): The service, e.g. ec2.
+        members (dict): Shape name to a dictionary of member name to
+            the name of the member's shape.
+
+    Kwargs:
+        shapes (dict): Shape name to the definition of the shapes that
+            the new members need and the installed botocore lacks.
+        required (dict): Shape name to its new list of required members.
+    """
+    description = copy.deepcopy(
+        installed_model(service_name)._service_description
+    )
+    description['shapes'].update(copy.deepcopy(shapes or dict()))
+    for shape_name, shape_members in members.items():
+        shape = description['shapes'][shape_name]
+        for member_name, member_shape in shape_members.items():
+            shape['members'][member_name] = {'shape': member_shape}
+    for shape_name, shape_required in (required or dict()).items():
+        description['shapes'][shape_name]['required'] = shape_required
+    return botocore.model.ServiceModel(description, service_name)
+
+
+def client_error(code, operation_name, message=None):
+    return botocore.exceptions.ClientError(
+        {'Error': {'Code': code, 'Message': message or code}}, operation_name
+    )
+
+
+def shape_response(value, shape):
+    """Drop from value every member that shape does not have, the way the
+        botocore parser drops what its model does not know about.
+    """
+    if shape is None or value is None:
+        return value
+    if shape.type_name == 'structure':
+        return dict(
+            (key, shape_response(item, shape.members[key]))
+            for key, item in value.items() if key in shape.members
+        )
+    if shape.type_name == 'list':
+        return [shape_response(item, shape.member) for item in value]
+    if shape.type_name == 'map':
+        return dict(
+            (key, shape_response(item, shape.value))
+            for key, item in value.items()
+        )
+    return value
+
+
+class FakeMeta(object):
+
+    def __init__(self, service_model):
+        self.service_model = service_model
+        self.method_to_api_mapping = dict(
+            (xform_name(name), name) for name in service_model.operation_names
+        )
+
+
+class FakeClient(object):
+    """Record the calls made to a boto3 client, after validating their
+        parameters against service_model, which is the model of the
+        installed botocore unless a test stands in for a newer one.
+        Subclasses keep the state of the service in memory, answer each
+        call from it and pass the answer through respond, which drops what
+        service_model would not return.
+    """
+
+    service_name = None
+
+    def __init__(self, service_model=None):
+        self.meta = FakeMeta(
+            service_model or installed_model(self.service_name)
+        )
+        self.calls = list()
+        self.lock = threading.Lock()
+
+    def operation_model(self, name):
+        return self.meta.service_model.operation_model(
+            self.meta.method_to_api_mapping[name]
+        )
+
+    def record(self, name, params):
+        botocore.validate.validate_parameters(
+            params, self.operation_model(name).input_shape
+        )
+        with self.lock:
+            self.calls.append((name, params))
+
+    def respond(self, name, response):
+        return shape_response(response, self.operation_model(name).output_shape)
+
+    def count(self, name):
+        return len([call for call in self.calls if call[0] == name])
+
+    def called(self, name):
+        return [call[1] for call in self.calls if call[0] == name]
@@ -1,12 +1,265 @@
 #!/usr/bin/python
 
 import boto3
+import botocore
+import datetime
 import unittest
 
 import ec2_vpc_nat_gateway as ng
 
+from fakes import FakeClient, client_error, newer_model
+
 aws_region = 'us-west-2'
 
+# The ec2 model of a botocore that creates private nat gateways.
+PRIVATE_NAT_SERVICE_MODEL = newer_model(
+    'ec2',
+    {'CreateNatGatewayRequest': {'ConnectivityType': 'String'}},
+    required={'CreateNatGatewayRequest': ['SubnetId']}
+)
+
+# The ec2 model of a botocore that reads and replaces IPv6 routes.
+IPV6_ROUTE_SERVICE_MODEL = newer_model(
+    'ec2',
+    {
+        'Route': {'DestinationIpv6CidrBlock': 'String'},
+        'ReplaceRouteRequest': {'DestinationIpv6CidrBlock': 'String'}
+    },
+    required={'ReplaceRouteRequest': ['RouteTableId']}
+)
+
+
+def has_tag(resource, key, values):
+    return [
+        tag for tag in resource.get('Tags', list())
+        if tag['Key'] == key and tag['Value'] in values
+    ]
+
+
+class FakeEc2Client(FakeClient):
+    """Keep the subnets, nat gateways and elastic ips in memory. New nat
+        gateways are available right away.
+    """
+
+    service_name = 'ec2'
+
+    def __init__(self, subnets=None, gateways=None, page_size=1, eips=None,
+                 deletion_polls=None, route_tables=None, service_model=None):
+        super(FakeEc2Client, self).__init__(service_model)
+        self.subnets = subnets or ng.DRY_RUN_SUBNETS
+        self.route_tables = route_tables or list()
+        self.gateways = gateways or list()
+        self.eips = eips or list()
+        self.deletion_polls = deletion_polls or dict()
+        self.page_size = page_size
+        self.addresses = list()
+
+    def describe_subnets(self, **params):
+        self.record('describe_subnets', params)
+        return {
+            'Subnets': [
+                subnet for subnet in self.subnets
+                if subnet['SubnetId'] in params['SubnetIds']
+            ]
+        }
+
+    def describe_nat_gateways(self, **params):
+        self.record('describe_nat_gateways', params)
+        gateways = self.gateways
+        if params.get('NatGatewayIds'):
+            gateways = [
+                gw for gw in gateways
+                if gw['NatGatewayId'] in params['NatGatewayIds']
+            ]
+            for gw in gateways:
+                if gw['State'] == 'deleting' and not params.get('NextToken'):
+                    polls = self.deletion_polls.get(gw['NatGatewayId'], 1) - 1
+                    self.deletion_polls[gw['NatGatewayId']] = polls
+                    if polls <= 0:
+                        gw['State'] = 'deleted'
+        keys = {
+            'vpc-id': 'VpcId', 'state': 'State', 'subnet-id': 'SubnetId',
+            'nat-gateway-id': 'NatGatewayId'
+        }
+        for gw_filter in params.get('Filter', []):
+            if gw_filter['Name'].startswith('tag:'):
+                key = gw_filter['Name'][len('tag:'):]
+                gateways = [
+                    gw for gw in gateways
+                    if has_tag(gw, key, gw_filter['Values'])
+                ]
+                continue
+            gateways = [
+                gw for gw in gateways
+                if gw[keys[gw_filter['Name']]] in gw_filter['Values']
+            ]
+        return self.page(gateways, 'NatGateways', params)
+
+    def page(self, items, key, params):
+        start = int(params.get('NextToken', 0))
+        response = {key: items[start:start + self.page_size]}
+        if start + self.page_size < len(items):
+            response['NextToken'] = str(start + self.page_size)
+        return response
+
+    def describe_addresses(self, **params):
+        self.record('describe_addresses', params)
+        addresses = self.eips
+        for address_filter in params.get('Filters', list()):
+            if address_filter['Name'] == 'domain':
+                addresses = [
+                    address for address in addresses
+                    if address['Domain'] in address_filter['Values']
+                ]
+            else:
+                key = address_filter['Name'][len('tag:'):]
+                addresses = [
+                    address for address in addresses
+                    if has_tag(address, key, address_filter['Values'])
+                ]
+        return self.respond('describe_addresses', {'Addresses': addresses})
+
+    def describe_route_tables(self, **params):
+        self.record('describe_route_tables', params)
+        nat_gateway_ids = params['Filters'][0]['Values']
+        route_tables = [
+            route_table for route_table in self.route_tables
+            if [
+                route for route in route_table['Routes']
+                if route.get('NatGatewayId') in nat_gateway_ids
+            ]
+        ]
+        return self.respond(
+            'describe_route_tables', {'RouteTables': route_tables}
+        )
+
+    def replace_route(self, **params):
+        self.record('replace_route', params)
+        for route_table in self.route_tables:
+            if route_table['RouteTableId'] != params['RouteTableId']:
+                continue
+            for route in route_table['Routes']:
+                for _, key in ng.ROUTE_DESTINATION_KEYS:
+                    if route.get(key) and route[key] == params.get(key):
+                        route['NatGatewayId'] = params['NatGatewayId']
+
+    def delete_nat_gateway(self, **params):
+        self.record('delete_nat_gateway', params)
+        for gw in self.gateways:
+            if gw['NatGatewayId'] == params['NatGatewayId']:
+                gw['State'] = 'deleting'
+
+    def allocate_address(self, **params):
+        self.record('allocate_address', params)
+        with self.lock:
+            allocation_id = 'eipalloc-{0}'.format(len(self.addresses))
+            self.addresses.append(allocation_id)
+        return {'AllocationId': allocation_id}
+
+    def release_address(self, **params):
+        self.record('release_address', params)
+        with self.lock:
+            if params['AllocationId'] in self.addresses:
+                self.addresses.remove(params['AllocationId'])
+
+    def create_nat_gateway(self, **params):
+        self.record('create_nat_gateway', params)
+        subnet = [
+            subnet for subnet in self.subnets
+            if subnet['SubnetId'] == params['SubnetId']
+        ][0]
+        gw = {
+            'NatGatewayId': params['SubnetId'].replace('subnet', 'nat'),
+            'SubnetId': params['SubnetId'],
+            'VpcId': subnet['VpcId'],
+            'State': 'available',
+            'NatGatewayAddresses': [
+                {'AllocationId': params.get('AllocationId')}
+            ],
+            'CreateTime': datetime.datetime.utcnow()
+        }
+        if params.get('ConnectivityType'):
+            gw['ConnectivityType'] = params['ConnectivityType']
+            gw['NatGatewayAddresses'] = [{'PrivateIp': '10.0.1.10'}]
+        with self.lock:
+            self.gateways.append(gw)
+        return {'NatGateway': gw}
+
+
+class FailingEc2Client(FakeEc2Client):
+    """Fail the allocate_address calls after the first allocations, the
+        create_nat_gateway calls in the subnets of failing_subnet_ids and
+        the describe_route_tables calls after the first route_table_lookups.
+        Gateways created in the subnets of failed_subnet_ids are failed.
+    """
+
+    def __init__(self, allocations=None, failing_subnet_ids=None,
+                 failed_subnet_ids=None, route_table_lookups=None, **kwargs):
+        super(FailingEc2Client, self).__init__(**kwargs)
+        self.allocations = allocations
+        self.failing_subnet_ids = failing_subnet_ids or list()
+        self.failed_subnet_ids = failed_subnet_ids or list()
+        self.route_table_lookups = route_table_lookups
+
+    def describe_route_tables(self, **params):
+        if (self.route_table_lookups is not None
+                and self.count('describe_route_tables')
+                >= self.route_table_lookups):
+            self.record('describe_route_tables', params)
+            raise client_error(
+                'RequestLimitExceeded', 'DescribeRouteTables',
+                'Request limit exceeded.'
+            )
+        return super(FailingEc2Client, self).describe_route_tables(**params)
+
+    def allocate_address(self, **params):
+        with self.lock:
+            failed = self.allocations is not None and self.allocations <= 0
+            if self.allocations is not None:
+                self.allocations -= 1
+        if failed:
+            self.record('allocate_address', params)
+            raise client_error(
+                'AddressLimitExceeded', 'AllocateAddress',
+                'The maximum number of addresses has been reached.'
+            )
+        return super(FailingEc2Client, self).allocate_address(**params)
+
+    def create_nat_gateway(self, **params):
+        if params['SubnetId'] in self.failing_subnet_ids:
+            self.record('create_nat_gateway', params)
+            raise client_error(
+                'InvalidSubnet', 'CreateNatGateway',
+                'The subnet is not available.'
+            )
+        response = super(FailingEc2Client, self).create_nat_gateway(**params)
+        if params['SubnetId'] in self.failed_subnet_ids:
+            response['NatGateway']['State'] = 'failed'
+            response['NatGateway']['FailureMessage'] = 'Subnet is full'
+        return response
+
+
+class FakeTime(object):
+    """A clock that only moves forward when something sleeps."""
+
+    def __init__(self):
+        self.now = 0
+        self.sleeps = list()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+def gateway(nat_gateway_id, allocation_id, state='available'):
+    return dict(
+        ng.DRY_RUN_GATEWAY_UNCONVERTED[0], NatGatewayId=nat_gateway_id,
+        State=state, NatGatewayAddresses=[{'AllocationId': allocation_id}]
+    )
+
 
 class AnsibleEc2VpcNatGatewayFunctions(unittest.TestCase):
 
@@ -226,6 +479,900 @@ class AnsibleEc2VpcNatGatewayFunctions(unittest.TestCase):
         self.assertFalse(success)
         self.assertFalse(changed)
 
+    def test_describe_vpc_nat_gateways(self):
+        client = FakeEc2Client(
+            gateways=[
+                ng.DRY_RUN_GATEWAY_UNCONVERTED[0],
+                dict(ng.DRY_RUN_GATEWAY_UNCONVERTED[0], NatGatewayId='nat-2'),
+                dict(ng.DRY_RUN_GATEWAY_UNCONVERTED[0], VpcId='vpc-2'),
+            ]
+        )
+        success, err_msg, gws = (
+            ng.describe_vpc_nat_gateways(client, 'vpc-12345678')
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            [gw['nat_gateway_id'] for gw in gws],
+            ['nat-123456789', 'nat-2']
+        )
+        self.assertEqual(client.count('describe_nat_gateways'), 2)
+
+    def test_fleet(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = (
+            ng.fleet(client, subnet_ids, wait=True, check_mode=True)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        gws = results['nat_gateways']
+        self.assertEqual(
+            sorted(gws.keys()), ['us-west-2a', 'us-west-2b', 'us-west-2c']
+        )
+        self.assertEqual(gws['us-west-2a'], ng.DRY_RUN_GATEWAYS[0])
+        self.assertEqual(gws['us-west-2b']['subnet_id'], 'subnet-234567891')
+        self.assertEqual(gws['us-west-2c']['subnet_id'], 'subnet-456789123')
+
+    def test_fleet_idempotent(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.fleet(client, ['subnet-123456789'], check_mode=True)
+        )
+        self.assertTrue(success)
+        self.assertFalse(changed)
+        self.assertEqual(
+            results['nat_gateways'].keys(), ['us-west-2a']
+        )
+
+    def test_fleet_subnet_does_not_exist(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.fleet(
+                client, ['subnet-123456789', 'subnet-1234'], check_mode=True
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'Subnets subnet-1234 do not exist')
+
+    def test_fleet_batches_calls(self):
+        client = FakeEc2Client(gateways=[ng.DRY_RUN_GATEWAY_UNCONVERTED[0]])
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = (
+            ng.fleet(client, subnet_ids, wait=True, wait_timeout=30)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('describe_subnets'), 1)
+        self.assertEqual(client.count('allocate_address'), 2)
+        self.assertEqual(client.count('create_nat_gateway'), 2)
+        # One filtered describe for the snapshot, one batched describe per
+        # page while waiting.
+        self.assertEqual(client.count('describe_nat_gateways'), 3)
+        self.assertEqual(
+            client.calls[1][1]['Filter'][0],
+            {'Name': 'vpc-id', 'Values': ['vpc-12345678']}
+        )
+        self.assertEqual(
+            results['nat_gateways']['us-west-2c']['nat_gateway_id'],
+            'nat-456789123'
+        )
+
+    def test_fleet_releases_eips_when_an_allocation_fails(self):
+        client = FailingEc2Client(allocations=2)
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = ng.fleet(client, subnet_ids)
+        self.assertFalse(success)
+        self.assertTrue('AddressLimitExceeded' in err_msg)
+        self.assertEqual(client.count('allocate_address'), 3)
+        self.assertEqual(client.count('release_address'), 2)
+        self.assertEqual(client.addresses, [])
+        self.assertEqual(client.count('create_nat_gateway'), 0)
+
+    def test_fleet_releases_the_eip_of_a_failed_create(self):
+        client = FailingEc2Client(failing_subnet_ids=['subnet-234567891'])
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = ng.fleet(client, subnet_ids)
+        self.assertFalse(success)
+        self.assertTrue(changed)
+        self.assertTrue(err_msg.startswith('us-west-2b: '))
+        self.assertEqual(client.count('allocate_address'), 3)
+        self.assertEqual(client.count('release_address'), 1)
+        self.assertEqual(
+            sorted(client.addresses),
+            sorted(
+                gw['NatGatewayAddresses'][0]['AllocationId']
+                for gw in client.gateways
+            )
+        )
+
+    def test_get_pool_allocation_ids(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, allocation_ids = (
+            ng.get_pool_allocation_ids(
+                client, {'pool': 'partners'}, 2, check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            allocation_ids, ['eipalloc-2345678', 'eipalloc-3456789']
+        )
+
+    def test_get_pool_allocation_ids_pool_too_small(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, allocation_ids = (
+            ng.get_pool_allocation_ids(
+                client, {'pool': 'partners'}, 2,
+                exclude=['eipalloc-2345678'], check_mode=True
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            err_msg,
+            "EIP pool {'pool': 'partners'} has 1 unassociated addresses, "
+            "2 are needed"
+        )
+        self.assertEqual(allocation_ids, [])
+
+    def test_pre_create_from_eip_pool(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.pre_create(
+                client, 'subnet-123456', eip_pool_tags={'pool': 'other'},
+                check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            results['NatGatewayAddresses'][0]['AllocationId'],
+            'eipalloc-5678912'
+        )
+
+    def test_fleet_from_eip_pool(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = (
+            ng.fleet(
+                client, subnet_ids, eip_pool_tags={'pool': 'partners'},
+                check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        gws = results['nat_gateways']
+        self.assertEqual(
+            gws['us-west-2b']['nat_gateway_addresses'][0]['allocation_id'],
+            'eipalloc-2345678'
+        )
+        self.assertEqual(
+            gws['us-west-2c']['nat_gateway_addresses'][0]['allocation_id'],
+            'eipalloc-3456789'
+        )
+
+    def test_get_pool_allocation_ids_filters_by_tag(self):
+        client = FakeEc2Client(
+            eips=ng.DRY_RUN_ALLOCATION_UNCONVERTED['Addresses']
+        )
+        success, err_msg, allocation_ids = (
+            ng.get_pool_allocation_ids(client, {'pool': 'partners'}, 2)
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            allocation_ids, ['eipalloc-2345678', 'eipalloc-3456789']
+        )
+        self.assertEqual(
+            client.called('describe_addresses'),
+            [
+                {
+                    'Filters': [
+                        {'Name': 'domain', 'Values': ['vpc']},
+                        {'Name': 'tag:pool', 'Values': ['partners']}
+                    ]
+                }
+            ]
+        )
+
+    def test_pre_create_from_eip_pool_without_tags_in_responses(self):
+        # The installed botocore drops the tags of the addresses it reads.
+        client = FakeEc2Client(
+            gateways=[ng.DRY_RUN_GATEWAY_UNCONVERTED[0]],
+            eips=ng.DRY_RUN_ALLOCATION_UNCONVERTED['Addresses']
+        )
+        success, changed, err_msg, results = (
+            ng.pre_create(
+                client, 'subnet-234567891', eip_pool_tags={'pool': 'other'}
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            client.called('create_nat_gateway')[0]['AllocationId'],
+            'eipalloc-5678912'
+        )
+
+    def test_fleet_eip_pool_too_small_creates_nothing(self):
+        eips = [
+            address for address in ng.DRY_RUN_ALLOCATION_UNCONVERTED['Addresses']
+            if address['AllocationId'] != 'eipalloc-3456789'
+        ]
+        client = FakeEc2Client(
+            gateways=[ng.DRY_RUN_GATEWAY_UNCONVERTED[0]], eips=eips
+        )
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = (
+            ng.fleet(client, subnet_ids, eip_pool_tags={'pool': 'partners'})
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertEqual(client.count('describe_addresses'), 1)
+        self.assertEqual(client.count('allocate_address'), 0)
+        self.assertEqual(client.count('create_nat_gateway'), 0)
+
+    def test_bulk_remove(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.bulk_remove(
+                client, ['nat-123456789', 'nat-1234'], release_eip=True,
+                check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            results['nat_gateways']['nat-123456789']['state'], 'deleted'
+        )
+        self.assertEqual(results['released_eips'], ['eipalloc-1234567'])
+        self.assertEqual(
+            err_msg,
+            'Nat gateways nat-123456789 were deleted successfully '
+            'Nat gateways nat-1234 do not exist'
+        )
+
+    def test_bulk_remove_releases_eips_as_gateways_are_deleted(self):
+        client = FakeEc2Client(
+            gateways=[
+                gateway('nat-1', 'eipalloc-1'),
+                gateway('nat-2', 'eipalloc-2', state='pending'),
+                gateway('nat-3', 'eipalloc-3', state='deleted'),
+            ],
+            deletion_polls={'nat-1': 1, 'nat-2': 3}, page_size=10
+        )
+        clock = FakeTime()
+        success, changed, err_msg, results = (
+            ng.bulk_remove(
+                client, ['nat-1', 'nat-2', 'nat-3'], wait_timeout=60,
+                release_eip=True, poll_options={'clock': clock}
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('delete_nat_gateway'), 2)
+        self.assertEqual(results['released_eips'], ['eipalloc-1', 'eipalloc-2'])
+        # One snapshot, then one batched describe per poll.
+        self.assertEqual(client.count('describe_nat_gateways'), 4)
+        self.assertEqual(len(clock.sleeps), 2)
+        names = [call[0] for call in client.calls]
+        self.assertEqual(
+            names[names.index('release_address') - 1],
+            'describe_nat_gateways'
+        )
+        self.assertEqual(names.index('release_address'), 4)
+        self.assertEqual(
+            client.calls[5][1]['NatGatewayIds'], ['nat-2']
+        )
+
+    def test_describe_nat_routes(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, routes = (
+            ng.describe_nat_routes(client, 'nat-123456789', check_mode=True)
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            routes,
+            [
+                {
+                    'route_table_id': 'rtb-1234567',
+                    'destination': '0.0.0.0/0',
+                    'destination_type': 'ipv4'
+                },
+                {
+                    'route_table_id': 'rtb-2345678',
+                    'destination': '0.0.0.0/0',
+                    'destination_type': 'ipv4'
+                },
+                {
+                    'route_table_id': 'rtb-2345678',
+                    'destination': '64:ff9b::/96',
+                    'destination_type': 'ipv6'
+                },
+            ]
+        )
+
+    def test_describe_nat_routes_without_readable_destinations(self):
+        # The installed botocore drops the destination of IPv6 routes.
+        client = FakeEc2Client(
+            route_tables=[
+                {
+                    'RouteTableId': 'rtb-1234567',
+                    'Routes': [
+                        {
+                            'DestinationIpv6CidrBlock': '64:ff9b::/96',
+                            'NatGatewayId': 'nat-old'
+                        },
+                        {
+                            'DestinationPrefixListId': 'pl-1234567',
+                            'NatGatewayId': 'nat-old'
+                        }
+                    ]
+                }
+            ]
+        )
+        success, err_msg, routes = ng.describe_nat_routes(client, 'nat-old')
+        self.assertTrue(success)
+        self.assertEqual(
+            routes,
+            [
+                {
+                    'route_table_id': 'rtb-1234567',
+                    'destination': None,
+                    'destination_type': None
+                },
+                {
+                    'route_table_id': 'rtb-1234567',
+                    'destination': 'pl-1234567',
+                    'destination_type': 'prefix_list'
+                },
+            ]
+        )
+        self.assertEqual(
+            ng.unreplaceable_routes(client, routes),
+            [
+                'rtb-1234567: botocore {0} can not read the destination of '
+                'a route'.format(botocore.__version__),
+                'rtb-1234567 pl-1234567: botocore {0} can not replace the '
+                'route, ReplaceRoute has no DestinationPrefixListId'
+                .format(botocore.__version__)
+            ]
+        )
+
+    def test_replace_route_reports_param_validation_errors(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg = (
+            ng.replace_route(
+                client, 'rtb-1234567', '64:ff9b::/96', 'nat-234567891',
+                destination_type='ipv6'
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue(
+            err_msg.startswith(
+                'botocore {0} can not replace the route: '
+                .format(botocore.__version__)
+            )
+        )
+
+    def test_replace(self):
+        client = FakeEc2Client(service_model=IPV6_ROUTE_SERVICE_MODEL)
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-123456789', eip_address='55.55.55.55',
+                release_eip=True, check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(results['replaced_nat_gateway_id'], 'nat-123456789')
+        self.assertEqual(len(results['replaced_routes']), 3)
+        self.assertEqual(results['released_eips'], ['eipalloc-1234567'])
+
+    def test_replace_ipv6_routes_with_the_installed_botocore(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-123456789', eip_address='55.55.55.55',
+                check_mode=True
+            )
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertEqual(
+            err_msg,
+            'Nat gateway nat-123456789 can not be replaced, some of its '
+            'routes can not be swapped: rtb-2345678 64:ff9b::/96: botocore '
+            '{0} can not replace the route, ReplaceRoute has no '
+            'DestinationIpv6CidrBlock'.format(botocore.__version__)
+        )
+
+    def test_replace_checks_the_routes_before_creating(self):
+        route_tables = [
+            {
+                'RouteTableId': 'rtb-1234567',
+                'Routes': [
+                    {
+                        'DestinationCidrBlock': '0.0.0.0/0',
+                        'NatGatewayId': 'nat-old'
+                    },
+                    {
+                        'DestinationIpv6CidrBlock': '64:ff9b::/96',
+                        'NatGatewayId': 'nat-old'
+                    }
+                ]
+            }
+        ]
+        client = FakeEc2Client(
+            gateways=[gateway('nat-old', 'eipalloc-old')],
+            route_tables=route_tables
+        )
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-old', subnet_id='subnet-234567891',
+                wait_timeout=30
+            )
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertEqual(
+            err_msg,
+            'Nat gateway nat-old can not be replaced, some of its routes can '
+            'not be swapped: rtb-1234567: botocore {0} can not read the '
+            'destination of a route'.format(botocore.__version__)
+        )
+        self.assertEqual(
+            sorted(set(name for name, _ in client.calls)),
+            ['describe_nat_gateways', 'describe_route_tables']
+        )
+
+    def test_replace_swaps_ipv6_routes_with_a_newer_botocore(self):
+        route_tables = [
+            {
+                'RouteTableId': 'rtb-1234567',
+                'Routes': [
+                    {
+                        'DestinationIpv6CidrBlock': '64:ff9b::/96',
+                        'NatGatewayId': 'nat-old'
+                    }
+                ]
+            }
+        ]
+        client = FakeEc2Client(
+            gateways=[gateway('nat-old', 'eipalloc-old')],
+            route_tables=route_tables, service_model=IPV6_ROUTE_SERVICE_MODEL
+        )
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-old', subnet_id='subnet-234567891',
+                allocation_id='eipalloc-new', wait_timeout=30
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            client.called('replace_route'),
+            [
+                {
+                    'RouteTableId': 'rtb-1234567',
+                    'DestinationIpv6CidrBlock': '64:ff9b::/96',
+                    'NatGatewayId': 'nat-234567891'
+                }
+            ]
+        )
+        self.assertEqual(
+            route_tables[0]['Routes'][0]['NatGatewayId'], 'nat-234567891'
+        )
+
+    def test_replace_does_not_exist(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.replace(client, 'nat-1234', check_mode=True)
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertEqual(
+            err_msg, 'Nat gateway nat-1234 does not exist or is not available'
+        )
+
+    def test_replace_swaps_routes_before_deleting(self):
+        route_tables = [
+            {
+                'RouteTableId': 'rtb-{0}'.format(i),
+                'Routes': [
+                    {
+                        'DestinationCidrBlock': '0.0.0.0/0',
+                        'NatGatewayId': 'nat-old'
+                    }
+                ]
+            }
+            for i in range(3)
+        ]
+        client = FakeEc2Client(
+            gateways=[gateway('nat-old', 'eipalloc-old')],
+            route_tables=route_tables, page_size=10
+        )
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-old', subnet_id='subnet-234567891',
+                allocation_id='eipalloc-new', wait_timeout=30,
+                release_eip=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results['nat_gateway_id'], 'nat-234567891')
+        self.assertEqual(results['released_eips'], ['eipalloc-old'])
+        self.assertEqual(client.count('replace_route'), 3)
+        # Checked before creating, and looked up again before swapping.
+        self.assertEqual(client.count('describe_route_tables'), 2)
+        names = [call[0] for call in client.calls]
+        self.assertTrue(
+            names.index('create_nat_gateway') < names.index('replace_route')
+        )
+        self.assertTrue(
+            max(i for i, name in enumerate(names) if name == 'replace_route')
+            < names.index('delete_nat_gateway')
+        )
+        for route_table in route_tables:
+            self.assertEqual(
+                route_table['Routes'][0]['NatGatewayId'], 'nat-234567891'
+            )
+
+    def test_describe_nat_routes_in_one_call(self):
+        client = FakeEc2Client(
+            route_tables=[
+                {
+                    'RouteTableId': 'rtb-{0}'.format(i),
+                    'Routes': [
+                        {
+                            'DestinationCidrBlock': '0.0.0.0/0',
+                            'NatGatewayId': 'nat-old'
+                        }
+                    ]
+                }
+                for i in range(3)
+            ]
+        )
+        success, err_msg, routes = ng.describe_nat_routes(client, 'nat-old')
+        self.assertTrue(success)
+        self.assertEqual(len(routes), 3)
+        self.assertEqual(
+            client.calls,
+            [
+                (
+                    'describe_route_tables',
+                    {
+                        'Filters': [
+                            {
+                                'Name': 'route.nat-gateway-id',
+                                'Values': ['nat-old']
+                            }
+                        ]
+                    }
+                )
+            ]
+        )
+
+    def test_replace_deletes_the_new_gateway_when_routes_can_not_be_read(self):
+        client = FailingEc2Client(
+            gateways=[gateway('nat-old', 'eipalloc-old')],
+            route_table_lookups=1
+        )
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-old', subnet_id='subnet-234567891',
+                wait_timeout=30
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue('RequestLimitExceeded' in err_msg)
+        self.assertTrue(
+            err_msg.endswith('Nat gateway nat-234567891 was deleted')
+        )
+        self.assertEqual(
+            [params['NatGatewayId'] for name, params in client.calls
+             if name == 'delete_nat_gateway'],
+            ['nat-234567891']
+        )
+        # The EIP allocated for the new gateway is released, the old
+        # gateway is left alone.
+        self.assertEqual(client.addresses, [])
+        self.assertEqual(client.gateways[0]['State'], 'available')
+
+    def test_replace_keeps_a_given_eip_of_a_discarded_gateway(self):
+        client = FailingEc2Client(
+            gateways=[gateway('nat-old', 'eipalloc-old')],
+            route_table_lookups=1
+        )
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-old', subnet_id='subnet-234567891',
+                allocation_id='eipalloc-new', wait_timeout=30
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(client.count('delete_nat_gateway'), 1)
+        self.assertEqual(client.count('release_address'), 0)
+
+    def test_replace_releases_the_eip_of_a_failed_gateway(self):
+        client = FailingEc2Client(
+            gateways=[gateway('nat-old', 'eipalloc-old')],
+            failed_subnet_ids=['subnet-234567891']
+        )
+        success, changed, err_msg, results = (
+            ng.replace(
+                client, 'nat-old', subnet_id='subnet-234567891',
+                wait_timeout=30
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue('Subnet is full' in err_msg)
+        self.assertEqual(client.count('delete_nat_gateway'), 0)
+        self.assertEqual(
+            [params['AllocationId'] for name, params in client.calls
+             if name == 'release_address'],
+            ['eipalloc-0']
+        )
+        self.assertEqual(client.addresses, [])
+        self.assertEqual(client.count('describe_route_tables'), 1)
+
+    def test_poll_is_rate_limited(self):
+        clock = FakeTime()
+        calls = list()
+
+        def check():
+            calls.append(clock.time())
+            clock.now += 2
+            return len(calls) == 4, len(calls)
+
+        metrics = {'calls': 1}
+        stopped, result, poll_metrics = (
+            ng.poll(check, 60, polling_secs=5, metrics=metrics, clock=clock)
+        )
+        self.assertTrue(stopped)
+        self.assertEqual(result, 4)
+        self.assertEqual(calls, [0, 5, 10, 15])
+        self.assertEqual(clock.sleeps, [3, 3, 3])
+        self.assertEqual(poll_metrics, {'calls': 4, 'elapsed_secs': 17})
+        self.assertEqual(metrics, {'calls': 5, 'elapsed_secs': 17})
+
+    def test_poll_stops_at_max_calls(self):
+        clock = FakeTime()
+        stopped, result, poll_metrics = (
+            ng.poll(
+                lambda: (False, None), 300, polling_secs=5, max_calls=3,
+                clock=clock
+            )
+        )
+        self.assertFalse(stopped)
+        self.assertEqual(poll_metrics['calls'], 3)
+        self.assertEqual(clock.sleeps, [5, 5])
+
+    def test_wait_for_status_sleeps_while_pending(self):
+        client = FakeEc2Client(
+            gateways=[gateway('nat-1', 'eipalloc-1', state='pending')]
+        )
+        clock = FakeTime()
+        metrics = dict()
+        success, err_msg, gw = (
+            ng.wait_for_status(
+                client, 60, 'nat-1', 'available', polling_secs=10,
+                metrics=metrics, clock=clock
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            err_msg, 'Wait time out reached, while waiting for results'
+        )
+        self.assertEqual(gw['state'], 'pending')
+        # One describe every 10 seconds, never one past the timeout.
+        self.assertEqual(client.count('describe_nat_gateways'), 7)
+        self.assertEqual(clock.sleeps, [10] * 6)
+        self.assertEqual(metrics, {'calls': 7, 'elapsed_secs': 60})
+
+    def test_wait_for_status_failed(self):
+        failed = dict(
+            gateway('nat-1', 'eipalloc-1', state='failed'),
+            FailureMessage='Subnet has no route to an internet gateway'
+        )
+        client = FakeEc2Client(gateways=[failed])
+        clock = FakeTime()
+        success, err_msg, gw = (
+            ng.wait_for_status(
+                client, 60, 'nat-1', 'available', clock=clock
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            err_msg, 'Subnet has no route to an internet gateway'
+        )
+        self.assertEqual(clock.sleeps, [])
+
+    def test_gateway_in_subnet_exists_private(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        gws, _ = (
+            ng.gateway_in_subnet_exists(
+                client, 'subnet-456789123', connectivity_type='private',
+                check_mode=True
+            )
+        )
+        self.assertEqual(
+            gws,
+            [ng.convert_to_lower(ng.DRY_RUN_PRIVATE_GATEWAY_UNCONVERTED[0])]
+        )
+        gws, _ = (
+            ng.gateway_in_subnet_exists(
+                client, 'subnet-123456789', connectivity_type='private',
+                check_mode=True
+            )
+        )
+        self.assertEqual(gws, [])
+
+    def test_create_private(self):
+        client = FakeEc2Client(service_model=PRIVATE_NAT_SERVICE_MODEL)
+        success, changed, err_msg, results = (
+            ng.create(
+                client, 'subnet-123456', None, connectivity_type='private',
+                wait=True, check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(results['connectivity_type'], 'private')
+        self.assertNotIn(
+            'allocation_id', results['nat_gateway_addresses'][0]
+        )
+
+    def test_supports_connectivity_type(self):
+        self.assertFalse(ng.supports_connectivity_type(FakeEc2Client()))
+        self.assertTrue(
+            ng.supports_connectivity_type(
+                FakeEc2Client(service_model=PRIVATE_NAT_SERVICE_MODEL)
+            )
+        )
+
+    def test_create_private_needs_botocore_support(self):
+        for check_mode in [True, False]:
+            client = FakeEc2Client()
+            success, changed, err_msg, results = (
+                ng.create(
+                    client, 'subnet-123456789', None,
+                    connectivity_type='private', check_mode=check_mode
+                )
+            )
+            self.assertFalse(success)
+            self.assertFalse(changed)
+            self.assertEqual(
+                err_msg,
+                'botocore {0} can not create a private nat gateway, '
+                'CreateNatGateway has no ConnectivityType. A newer botocore '
+                'is required.'.format(botocore.__version__)
+            )
+            self.assertEqual(client.calls, [])
+
+    def test_create_reports_param_validation_errors(self):
+        # Validated by botocore before anything is sent.
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.create(client, 'subnet-123456789', None)
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertTrue(
+            err_msg.startswith(
+                'botocore {0} can not create the nat gateway: '
+                .format(botocore.__version__)
+            )
+        )
+        self.assertTrue('AllocationId' in err_msg)
+
+    def test_pre_create_private_idempotent(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, changed, err_msg, results = (
+            ng.pre_create(
+                client, 'subnet-456789123', connectivity_type='private',
+                check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertFalse(changed)
+        self.assertEqual(results['nat_gateway_id'], 'nat-234567891')
+
+    def test_pre_create_private_skips_eips(self):
+        client = FakeEc2Client(
+            gateways=[ng.DRY_RUN_GATEWAY_UNCONVERTED[0]],
+            service_model=PRIVATE_NAT_SERVICE_MODEL
+        )
+        success, changed, err_msg, results = (
+            ng.pre_create(
+                client, 'subnet-123456789', connectivity_type='private'
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('describe_addresses'), 0)
+        self.assertEqual(client.count('allocate_address'), 0)
+        self.assertEqual(
+            client.calls[-1],
+            (
+                'create_nat_gateway',
+                {'SubnetId': 'subnet-123456789', 'ConnectivityType': 'private'}
+            )
+        )
+
+    def test_fleet_private(self):
+        client = FakeEc2Client(service_model=PRIVATE_NAT_SERVICE_MODEL)
+        subnet_ids = [subnet['SubnetId'] for subnet in ng.DRY_RUN_SUBNETS]
+        success, changed, err_msg, results = (
+            ng.fleet(
+                client, subnet_ids, connectivity_type='private',
+                check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        gws = results['nat_gateways']
+        self.assertEqual(gws['us-west-2c']['nat_gateway_id'], 'nat-234567891')
+        self.assertEqual(gws['us-west-2a']['connectivity_type'], 'private')
+        self.assertEqual(err_msg, 'Nat gateways created in us-west-2a, us-west-2b')
+
+    def test_get_nat_gateways_pushes_filters(self):
+        client = FakeEc2Client(
+            gateways=[
+                dict(
+                    gateway('nat-1', 'eipalloc-1'),
+                    Tags=[{'Key': 'env', 'Value': 'prod'}]
+                ),
+                dict(
+                    gateway('nat-2', 'eipalloc-2'),
+                    Tags=[{'Key': 'env', 'Value': 'prod'}]
+                ),
+                gateway('nat-3', 'eipalloc-3'),
+                dict(gateway('nat-4', 'eipalloc-4'), VpcId='vpc-2'),
+            ]
+        )
+        success, err_msg, gws = (
+            ng.get_nat_gateways(
+                client, vpc_id='vpc-12345678', tags={'env': 'prod'}
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            [gw['nat_gateway_id'] for gw in gws], ['nat-1', 'nat-2']
+        )
+        self.assertEqual(client.count('describe_nat_gateways'), 2)
+        self.assertEqual(
+            client.calls[0][1]['Filter'],
+            [
+                {'Name': 'vpc-id', 'Values': ['vpc-12345678']},
+                {'Name': 'state', 'Values': ['available', 'pending']},
+                {'Name': 'tag:env', 'Values': ['prod']},
+            ]
+        )
+
+    def test_gateway_in_subnet_exists_converts_only_matches(self):
+        client = FakeEc2Client(
+            gateways=[
+                gateway('nat-{0}'.format(i), 'eipalloc-{0}'.format(i))
+                for i in range(5)
+            ],
+            page_size=2
+        )
+        converted = list()
+        real_convert = ng.convert_to_lower
+
+        def convert_to_lower(data):
+            if 'NatGatewayId' in data:
+                converted.append(data['NatGatewayId'])
+            return real_convert(data)
+
+        ng.convert_to_lower = convert_to_lower
+        try:
+            gws, allocation_id_exists = (
+                ng.gateway_in_subnet_exists(
+                    client, 'subnet-123456789', 'eipalloc-3'
+                )
+            )
+        finally:
+            ng.convert_to_lower = real_convert
+        self.assertTrue(allocation_id_exists)
+        self.assertEqual([gw['nat_gateway_id'] for gw in gws], ['nat-3'])
+        self.assertEqual(converted, ['nat-3'])
+        self.assertEqual(client.count('describe_nat_gateways'), 3)
+
 def main():
     unittest.main()
 
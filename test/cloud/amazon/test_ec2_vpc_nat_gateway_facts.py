@@ -0,0 +1,151 @@
+#!/usr/bin/python
+
+import boto3
+import unittest
+
+import ec2_vpc_nat_gateway_facts as ngf
+
+from fakes import FakeClient
+
+aws_region = 'us-west-2'
+CHECK_MODE = True
+
+
+class FakeEc2Client(FakeClient):
+    """Answer the ec2 calls from the DRY_RUN data. Nat gateways come one
+        per page.
+    """
+
+    service_name = 'ec2'
+
+    def page(self, items, key, params):
+        start = int(params.get('NextToken', 0))
+        response = {key: items[start:start + 1]}
+        if start + 1 < len(items):
+            response['NextToken'] = str(start + 1)
+        return response
+
+    def describe_nat_gateways(self, **params):
+        self.record('describe_nat_gateways', params)
+        return self.page(ngf.DRY_RUN_NAT_GATEWAYS, 'NatGateways', params)
+
+    def describe_route_tables(self, **params):
+        self.record('describe_route_tables', params)
+        return {'RouteTables': ngf.DRY_RUN_ROUTE_TABLES}
+
+    def describe_subnets(self, **params):
+        self.record('describe_subnets', params)
+        return {'Subnets': ngf.DRY_RUN_SUBNETS}
+
+
+class AnsibleEc2VpcNatGatewayFactsFunctions(unittest.TestCase):
+
+    def test_route_references(self):
+        references = ngf.route_references(ngf.DRY_RUN_ROUTE_TABLES)
+        self.assertEqual(
+            [ref['route_table_id'] for ref in references['nat-123456789']],
+            ['rtb-1234567', 'rtb-2345678']
+        )
+        self.assertEqual(
+            references['nat-234567891'],
+            [
+                {
+                    'route_table_id': 'rtb-2345678',
+                    'destination': '192.168.0.0/16',
+                    'main': True,
+                    'subnet_ids': []
+                }
+            ]
+        )
+        self.assertNotIn('nat-345678912', references)
+
+    def test_index_nat_gateways(self):
+        subnet_zones = {
+            'subnet-123456789': 'us-west-2a', 'subnet-234567891': 'us-west-2b'
+        }
+        index = ngf.index_nat_gateways(ngf.DRY_RUN_NAT_GATEWAYS, subnet_zones)
+        self.assertEqual(
+            index['availability_zone']['us-west-2a'],
+            set(['nat-123456789', 'nat-345678912'])
+        )
+        self.assertEqual(
+            index['public_ip']['55.55.55.56'], set(['nat-234567891'])
+        )
+        self.assertEqual(
+            index['allocation_id']['eipalloc-3456789'], set(['nat-345678912'])
+        )
+        self.assertEqual(index['state']['deleted'], set(['nat-345678912']))
+
+    def test_get_nat_gateways(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            ngf.get_nat_gateways(client, 'vpc-12345678', check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        gws = results['nat_gateways']
+        self.assertEqual(
+            sorted(gws.keys()),
+            ['nat-123456789', 'nat-234567891', 'nat-345678912']
+        )
+        self.assertEqual(gws['nat-234567891']['availability_zone'], 'us-west-2b')
+        self.assertEqual(
+            [ref['route_table_id'] for ref in gws['nat-123456789']['route_tables']],
+            ['rtb-1234567', 'rtb-2345678']
+        )
+        self.assertEqual(gws['nat-345678912']['route_tables'], [])
+
+    def test_get_nat_gateways_by_zone_and_state(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            ngf.get_nat_gateways(
+                client, 'vpc-12345678', availability_zones=['us-west-2a'],
+                states=['available'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results['nat_gateways'].keys(), ['nat-123456789'])
+
+    def test_get_nat_gateways_by_eip(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            ngf.get_nat_gateways(
+                client, 'vpc-12345678',
+                eip_addresses=['55.55.55.56', 'eipalloc-3456789'],
+                check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            sorted(results['nat_gateways'].keys()),
+            ['nat-234567891', 'nat-345678912']
+        )
+
+    def test_get_nat_gateways_describes_once(self):
+        client = FakeEc2Client()
+        success, err_msg, results = (
+            ngf.get_nat_gateways(
+                client, 'vpc-12345678', subnet_ids=['subnet-123456789']
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            sorted(results['nat_gateways'].keys()),
+            ['nat-123456789', 'nat-345678912']
+        )
+        # One call per page of nat gateways, no call per gateway.
+        self.assertEqual(client.count('describe_nat_gateways'), 3)
+        self.assertEqual(client.count('describe_route_tables'), 1)
+        self.assertEqual(client.count('describe_subnets'), 1)
+        self.assertEqual(len(client.calls), 5)
+        self.assertEqual(
+            [params for name, params in client.calls
+             if name == 'describe_route_tables'],
+            [{'Filters': [{'Name': 'vpc-id', 'Values': ['vpc-12345678']}]}]
+        )
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1550 @@
+#!/usr/bin/python
+
+import boto3
+import botocore.exceptions
+import botocore.stub
+import copy
+import threading
+import time
+import unittest
+
+import ec2_vpc_peer as vp
+
+from fakes import FakeClient, client_error, newer_model
+
+TAGS = [
+    {'Key': 'Name', 'Value': 'development-to-staging'},
+    {'Key': 'env', 'Value': 'development'},
+]
+
+
+class FakeEc2Client(FakeClient):
+    """Keep the peering connections and their tags in memory. Tags are kept
+        per account, like in ec2.
+    """
+
+    service_name = 'ec2'
+
+    def __init__(self, peerings=None, route_tables=None, vpcs=None,
+                 service_model=None):
+        super(FakeEc2Client, self).__init__(service_model)
+        self.peerings = dict() if peerings is None else peerings
+        self.vpcs = VPCS if vpcs is None else vpcs
+        self.route_tables = copy.deepcopy(route_tables or list())
+        self.tags = dict()
+
+    def matches(self, peering, filters):
+        values = {
+            'status-code': peering['Status']['Code'],
+            'requester-vpc-info.vpc-id': peering['RequesterVpcInfo']['VpcId'],
+            'accepter-vpc-info.vpc-id': peering['AccepterVpcInfo']['VpcId'],
+        }
+        for peering_filter in filters:
+            if values[peering_filter['Name']] not in peering_filter['Values']:
+                return False
+        return True
+
+    def describe_vpcs(self, **params):
+        self.record('describe_vpcs', params)
+        return self.respond(
+            'describe_vpcs',
+            {
+                'Vpcs': [
+                    self.vpcs[vpc_id] for vpc_id in params['VpcIds']
+                    if vpc_id in self.vpcs
+                ]
+            }
+        )
+
+    def describe_vpc_peering_connections(self, **params):
+        self.record('describe_vpc_peering_connections', params)
+        peerings = list()
+        for vpc_peering_id in sorted(self.peerings):
+            if (params.get('VpcPeeringConnectionIds') and vpc_peering_id
+                    not in params['VpcPeeringConnectionIds']):
+                continue
+            peering = copy.deepcopy(self.peerings[vpc_peering_id])
+            if not self.matches(peering, params.get('Filters', list())):
+                continue
+            peering['Tags'] = copy.deepcopy(
+                self.tags.get(vpc_peering_id, list())
+            )
+            peerings.append(peering)
+        return {'VpcPeeringConnections': peerings}
+
+    def create_vpc_peering_connection(self, **params):
+        self.record('create_vpc_peering_connection', params)
+        vpc_peering_id = 'pcx-{0}'.format(len(self.peerings) + 1)
+        self.peerings[vpc_peering_id] = {
+            'VpcPeeringConnectionId': vpc_peering_id,
+            'Status': {'Code': 'pending-acceptance'},
+            'RequesterVpcInfo': {
+                'VpcId': params['VpcId'], 'CidrBlock': '10.100.0.0/16'
+            },
+            'AccepterVpcInfo': {
+                'VpcId': params['PeerVpcId'], 'CidrBlock': '10.200.0.0/16'
+            },
+        }
+        return {
+            'VpcPeeringConnection': copy.deepcopy(self.peerings[vpc_peering_id]),
+            'ResponseMetadata': {'HTTPStatusCode': 200},
+        }
+
+    def accept_vpc_peering_connection(self, **params):
+        self.record('accept_vpc_peering_connection', params)
+        self.peerings[params['VpcPeeringConnectionId']]['Status'] = (
+            {'Code': 'active'}
+        )
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def reject_vpc_peering_connection(self, **params):
+        self.record('reject_vpc_peering_connection', params)
+        return {'Return': True, 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def delete_vpc_peering_connection(self, **params):
+        self.record('delete_vpc_peering_connection', params)
+        return {'Return': True, 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def describe_route_tables(self, **params):
+        self.record('describe_route_tables', params)
+        route_tables = list()
+        for route_table in self.route_tables:
+            matched = (
+                not params.get('RouteTableIds')
+                or route_table['RouteTableId'] in params['RouteTableIds']
+            )
+            for route_filter in params.get('Filters', list()):
+                name = route_filter['Name']
+                if name == 'vpc-id':
+                    found = [route_table['VpcId']]
+                elif name == 'association.subnet-id':
+                    found = route_table['SubnetIds']
+                else:
+                    found = [route_table['Tags'].get(name[4:])]
+                if not set(found).intersection(route_filter['Values']):
+                    matched = False
+            if matched:
+                route_tables.append(route_table)
+        return {'RouteTables': route_tables}
+
+    def find_route(self, params):
+        for route_table in self.route_tables:
+            if route_table['RouteTableId'] != params['RouteTableId']:
+                continue
+            for route in route_table.setdefault('Routes', list()):
+                if (route['DestinationCidrBlock']
+                        == params['DestinationCidrBlock']):
+                    return route_table, route
+            return route_table, None
+        return None, None
+
+    def create_route(self, **params):
+        self.record('create_route', params)
+        route_table, route = self.find_route(params)
+        if not route_table:
+            raise client_error(
+                'InvalidRouteTableID.NotFound', 'CreateRoute',
+                "The routeTable ID '{0}' does not exist"
+                .format(params['RouteTableId'])
+            )
+        if route:
+            raise client_error(
+                'RouteAlreadyExists', 'CreateRoute',
+                'The route identified by {0} already exists.'
+                .format(params['DestinationCidrBlock'])
+            )
+        route_table['Routes'].append(
+            {
+                'DestinationCidrBlock': params['DestinationCidrBlock'],
+                'VpcPeeringConnectionId': params['VpcPeeringConnectionId'],
+            }
+        )
+        return {'Return': True}
+
+    def replace_route(self, **params):
+        self.record('replace_route', params)
+        route_table, route = self.find_route(params)
+        route.clear()
+        route.update(
+            {
+                'DestinationCidrBlock': params['DestinationCidrBlock'],
+                'VpcPeeringConnectionId': params['VpcPeeringConnectionId'],
+            }
+        )
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def describe_tags(self, **params):
+        self.record('describe_tags', params)
+        return {'Tags': list()}
+
+    def create_tags(self, **params):
+        self.record('create_tags', params)
+        for vpc_peering_id in params['Resources']:
+            current = vp.convert_list_of_tags(self.tags.get(vpc_peering_id, list()))
+            current.update(vp.convert_list_of_tags(params['Tags']))
+            self.tags[vpc_peering_id] = vp.make_tags_in_aws_format(current)
+
+    def delete_tags(self, **params):
+        self.record('delete_tags', params)
+        keys = [tag['Key'] for tag in params['Tags']]
+        self.tags[params['Resources'][0]] = [
+            tag for tag in self.tags.get(params['Resources'][0], list())
+            if tag['Key'] not in keys
+        ]
+
+
+class FakeAccepterAccount(FakeEc2Client):
+    """The accepter account sees the same peering connections as the
+        requester account, but not its tags.
+    """
+
+    def __init__(self, requester, route_tables=None):
+        super(FakeAccepterAccount, self).__init__(
+            requester.peerings, route_tables
+        )
+
+
+class FakeBoto3(object):
+    """Stand in for the boto3 module, recording the sessions and clients
+        that are built. A client is the (profile, region, service) it was
+        built for. Building one takes delay seconds, to widen any race.
+    """
+
+    def __init__(self, fail=False, delay=0):
+        fake = self
+        self.fail = fail
+        self.delay = delay
+        self.sessions = list()
+        self.clients = list()
+
+        class Session(object):
+
+            def __init__(self, profile_name=None, region_name=None):
+                if fake.fail:
+                    raise botocore.exceptions.ProfileNotFound(
+                        profile=profile_name
+                    )
+                time.sleep(fake.delay)
+                self.key = (profile_name, region_name)
+                fake.sessions.append(self.key)
+
+            def client(self, service_name):
+                time.sleep(fake.delay)
+                client = self.key + (service_name,)
+                fake.clients.append(client)
+                return client
+
+        self.session = self
+        self.Session = Session
+
+
+class OptionsClient(FakeEc2Client):
+    """Add modify_vpc_peering_connection_options, which the installed
+        botocore does not have, so its calls are recorded without being
+        validated.
+    """
+
+    def __init__(self, peerings=None, dry_run=False):
+        super(OptionsClient, self).__init__(peerings)
+        self.dry_run = dry_run
+
+    def modify_vpc_peering_connection_options(self, **params):
+        with self.lock:
+            self.calls.append(
+                ('modify_vpc_peering_connection_options', params)
+            )
+        if self.dry_run:
+            raise client_error(
+                'DryRunOperation', 'ModifyVpcPeeringConnectionOptions',
+                'Request would have succeeded'
+            )
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+class FakeClock(object):
+    """Stand in for the time module, sleeping without waiting."""
+
+    def __init__(self):
+        self.now = 0
+        self.sleeps = list()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+class StatusSequenceClient(FakeEc2Client):
+    """Answer each describe_vpc_peering_connections poll with the next
+        entry of polls, the last one repeating. An entry is either an
+        exception to raise or a dictionary of vpc peering id to status
+        code, where a missing id is not found.
+    """
+
+    def __init__(self, polls):
+        super(StatusSequenceClient, self).__init__()
+        self.polls = polls
+
+    def describe_vpc_peering_connections(self, **params):
+        self.record('describe_vpc_peering_connections', params)
+        poll = self.polls[
+            min(self.count('describe_vpc_peering_connections'),
+                len(self.polls)) - 1
+        ]
+        if isinstance(poll, Exception):
+            raise poll
+        peerings = list()
+        for vpc_peering_id in params['VpcPeeringConnectionIds']:
+            if poll.get(vpc_peering_id):
+                peerings.append(
+                    {
+                        'VpcPeeringConnectionId': vpc_peering_id,
+                        'Status': {'Code': poll[vpc_peering_id]},
+                    }
+                )
+        return {'VpcPeeringConnections': peerings}
+
+
+class InFlight(object):
+    """Hold every call until expected calls are in flight at the same time,
+        or until a timeout, and keep the highest number of calls seen in
+        flight.
+    """
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.count = 0
+        self.max_count = 0
+        self.condition = threading.Condition()
+
+    def enter(self):
+        with self.condition:
+            self.count += 1
+            self.max_count = max(self.max_count, self.count)
+            self.condition.notify_all()
+            deadline = time.time() + 5
+            while self.max_count < self.expected and time.time() < deadline:
+                self.condition.wait(0.1)
+            self.count -= 1
+
+
+class ConcurrentRoutesClient(FakeEc2Client):
+    """Route every create_route call through an InFlight tracker, which can
+        be shared by the clients of many accounts.
+    """
+
+    def __init__(self, in_flight, route_tables=None):
+        super(ConcurrentRoutesClient, self).__init__(route_tables=route_tables)
+        self.in_flight = in_flight
+
+    def create_route(self, **params):
+        self.in_flight.enter()
+        return super(ConcurrentRoutesClient, self).create_route(**params)
+
+
+VPCS = {
+    'vpc-1234567': {
+        'VpcId': 'vpc-1234567', 'CidrBlock': '10.100.0.0/16',
+        'CidrBlockAssociationSet': [
+            {
+                'CidrBlock': '10.100.0.0/16',
+                'CidrBlockState': {'State': 'associated'}
+            },
+            {
+                'CidrBlock': '10.101.0.0/16',
+                'CidrBlockState': {'State': 'associated'}
+            }
+        ]
+    },
+    'vpc-7654321': {'VpcId': 'vpc-7654321', 'CidrBlock': '10.200.0.0/16'},
+    'vpc-1111111': {
+        'VpcId': 'vpc-1111111', 'CidrBlock': '172.31.0.0/16',
+        'CidrBlockAssociationSet': [
+            {
+                'CidrBlock': '10.101.128.0/20',
+                'CidrBlockState': {'State': 'associated'}
+            }
+        ]
+    },
+}
+
+# The ec2 model of a botocore that returns the secondary cidr blocks of vpcs.
+SECONDARY_CIDR_MODEL = newer_model(
+    'ec2',
+    {'Vpc': {'CidrBlockAssociationSet': 'VpcCidrBlockAssociationSet'}},
+    shapes={
+        'VpcCidrBlockAssociationSet': {
+            'type': 'list',
+            'member': {'shape': 'VpcCidrBlockAssociation', 'locationName': 'item'}
+        },
+        'VpcCidrBlockAssociation': {
+            'type': 'structure',
+            'members': {
+                'CidrBlock': {'shape': 'String'},
+                'CidrBlockState': {'shape': 'VpcCidrBlockState'}
+            }
+        },
+        'VpcCidrBlockState': {
+            'type': 'structure',
+            'members': {'State': {'shape': 'String'}}
+        },
+    }
+)
+
+
+def peering(vpc_peering_id, requester_vpc_id, accepter_vpc_id, code):
+    return {
+        'VpcPeeringConnectionId': vpc_peering_id,
+        'Status': {'Code': code},
+        'RequesterVpcInfo': {
+            'VpcId': requester_vpc_id,
+            'CidrBlock': VPCS[requester_vpc_id]['CidrBlock']
+        },
+        'AccepterVpcInfo': {
+            'VpcId': accepter_vpc_id,
+            'CidrBlock': VPCS[accepter_vpc_id]['CidrBlock']
+        },
+    }
+
+
+ROUTE_TABLES = [
+    {
+        'RouteTableId': 'rtb-1111111', 'VpcId': 'vpc-1234567',
+        'SubnetIds': ['subnet-1111111'], 'Tags': {'Tier': 'public'}
+    },
+    {
+        'RouteTableId': 'rtb-2222222', 'VpcId': 'vpc-1234567',
+        'SubnetIds': ['subnet-2222222'], 'Tags': {'Tier': 'private'}
+    },
+    {
+        'RouteTableId': 'rtb-3333333', 'VpcId': 'vpc-7654321',
+        'SubnetIds': ['subnet-3333333'], 'Tags': {'Tier': 'private'}
+    },
+]
+
+
+class AnsibleEc2VpcPeerFunctions(unittest.TestCase):
+
+    def setUp(self):
+        vp.CLIENT_POOL.clear()
+        vp.SESSION_POOL.clear()
+        del vp.CLIENT_TIMINGS[:]
+        self.boto3 = vp.boto3
+        self.time = vp.time
+
+    def tearDown(self):
+        vp.CLIENT_POOL.clear()
+        vp.SESSION_POOL.clear()
+        del vp.CLIENT_TIMINGS[:]
+        vp.boto3 = self.boto3
+        vp.time = self.time
+
+    def test_client_pool_reuses_sessions_and_clients(self):
+        vp.boto3 = FakeBoto3()
+        client, err_msg = vp.create_client_with_profile('lab01', 'us-west-2')
+        self.assertEqual(err_msg, '')
+        self.assertEqual(client, ('lab01', 'us-west-2', 'ec2'))
+        self.assertEqual(
+            vp.create_client_with_profile('lab01', 'us-west-2'), (client, '')
+        )
+        self.assertEqual(
+            vp.create_client_with_profile('lab01', 'us-west-2', 'iam'),
+            (('lab01', 'us-west-2', 'iam'), '')
+        )
+        vp.create_client_with_profile('lab02', 'us-west-2')
+        self.assertEqual(
+            vp.boto3.session.sessions,
+            [('lab01', 'us-west-2'), ('lab02', 'us-west-2')]
+        )
+        self.assertEqual(
+            vp.boto3.session.clients,
+            [
+                ('lab01', 'us-west-2', 'ec2'),
+                ('lab01', 'us-west-2', 'iam'),
+                ('lab02', 'us-west-2', 'ec2'),
+            ]
+        )
+        self.assertEqual(
+            [
+                (timing['profile'], timing['region'], timing['service'])
+                for timing in vp.CLIENT_TIMINGS
+            ],
+            vp.boto3.session.clients
+        )
+        for timing in vp.CLIENT_TIMINGS:
+            self.assertTrue(timing['session_secs'] >= 0)
+            self.assertTrue(timing['client_secs'] >= 0)
+
+    def test_client_pool_uses_registered_clients(self):
+        vp.boto3 = FakeBoto3()
+        client = FakeEc2Client()
+        vp.register_client(client, None, 'us-west-2')
+        self.assertEqual(
+            vp.create_client_with_profile(None, 'us-west-2'), (client, '')
+        )
+        self.assertEqual(vp.boto3.session.sessions, [])
+        self.assertEqual(vp.CLIENT_TIMINGS, [])
+
+    def test_client_pool_does_not_keep_failures(self):
+        vp.boto3 = FakeBoto3(fail=True)
+        client, err_msg = vp.create_client_with_profile('lab01', 'us-west-2')
+        self.assertEqual(client, None)
+        self.assertEqual(
+            err_msg, 'The config profile (lab01) could not be found'
+        )
+        self.assertEqual(vp.CLIENT_POOL, {})
+        self.assertEqual(vp.SESSION_POOL, {})
+        self.assertEqual(vp.CLIENT_TIMINGS, [])
+
+    def test_client_pool_is_thread_safe(self):
+        vp.boto3 = FakeBoto3(delay=0.01)
+        calls = [
+            {'profile_name': 'lab01', 'region': 'us-west-2'}
+            for _ in range(20)
+        ]
+        results = vp.run_concurrently(vp.create_client_with_profile, calls)
+        self.assertEqual(
+            set(results), set([(('lab01', 'us-west-2', 'ec2'), '')])
+        )
+        self.assertEqual(vp.boto3.session.sessions, [('lab01', 'us-west-2')])
+        self.assertEqual(
+            vp.boto3.session.clients, [('lab01', 'us-west-2', 'ec2')]
+        )
+        self.assertEqual(len(vp.CLIENT_TIMINGS), 1)
+
+    def test_wait_for_peering_status_backs_off(self):
+        vp.time = FakeClock()
+        client = StatusSequenceClient(
+            [{'pcx-1': 'initiating-request', 'pcx-2': 'pending-acceptance'}] * 2
+            + [{'pcx-1': 'pending-acceptance', 'pcx-2': 'active'}] * 4
+            + [{'pcx-1': 'active', 'pcx-2': 'active'}]
+        )
+        success, err_msg, peerings = (
+            vp.wait_for_peering_status(client, ['pcx-1', 'pcx-2'], 'active')
+        )
+        self.assertTrue(success)
+        self.assertEqual(err_msg, '')
+        self.assertEqual(sorted(peerings), ['pcx-1', 'pcx-2'])
+        self.assertEqual(vp.time.sleeps, [1, 2, 4, 8, 16, 16])
+        # Only the peering connections still being waited on are described.
+        self.assertEqual(
+            [params['VpcPeeringConnectionIds'] for _, params in client.calls],
+            [['pcx-1', 'pcx-2']] * 3 + [['pcx-1']] * 4
+        )
+
+    def test_wait_for_peering_status_past_status(self):
+        vp.time = FakeClock()
+        client = StatusSequenceClient([{'pcx-1': 'active'}])
+        success, err_msg, peerings = (
+            vp.wait_for_peering_status(client, ['pcx-1'], 'pending-acceptance')
+        )
+        self.assertTrue(success)
+        self.assertEqual(peerings['pcx-1']['Status']['Code'], 'active')
+        self.assertEqual(vp.time.sleeps, [])
+
+    def test_wait_for_peering_status_fails_on_failed_status_codes(self):
+        for code in vp.PEERING_FAILED_STATUS_CODES:
+            vp.time = FakeClock()
+            client = StatusSequenceClient(
+                [{'pcx-1': 'pending-acceptance', 'pcx-2': code}]
+                + [{'pcx-1': 'active', 'pcx-2': code}]
+            )
+            success, err_msg, peerings = (
+                vp.wait_for_peering_status(
+                    client, ['pcx-1', 'pcx-2'], 'active'
+                )
+            )
+            self.assertFalse(success)
+            self.assertEqual(err_msg, 'pcx-2 is {0}'.format(code))
+            self.assertEqual(sorted(peerings), ['pcx-1', 'pcx-2'])
+            self.assertEqual(vp.time.sleeps, [1])
+
+    def test_wait_for_peering_status_times_out(self):
+        vp.time = FakeClock()
+        client = StatusSequenceClient([{'pcx-1': 'pending-acceptance'}])
+        success, err_msg, peerings = (
+            vp.wait_for_peering_status(
+                client, ['pcx-1'], 'active', wait_timeout=10
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            err_msg, 'pcx-1 did not reach active, last status pending-acceptance'
+        )
+        self.assertEqual(peerings, {})
+        self.assertEqual(vp.time.sleeps, [1, 2, 4])
+        self.assertEqual(client.count('describe_vpc_peering_connections'), 4)
+
+    def test_wait_for_peering_status_until_visible(self):
+        vp.time = FakeClock()
+        not_found = client_error(
+            'InvalidVpcPeeringConnectionID.NotFound',
+            'DescribeVpcPeeringConnections', 'not found'
+        )
+        client = StatusSequenceClient([not_found, {}, {'pcx-1': 'active'}])
+        success, err_msg, peerings = (
+            vp.wait_for_peering_status(client, ['pcx-1'], 'active')
+        )
+        self.assertTrue(success)
+        self.assertEqual(vp.time.sleeps, [1, 2])
+
+        vp.time = FakeClock()
+        client = StatusSequenceClient([{}])
+        success, err_msg, peerings = (
+            vp.wait_for_peering_status(
+                client, ['pcx-1'], 'active', wait_timeout=3
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            err_msg, 'pcx-1 did not reach active, last status unknown'
+        )
+
+    def test_wait_for_peering_status_fails_on_other_errors(self):
+        vp.time = FakeClock()
+        client = StatusSequenceClient(
+            [
+                client_error(
+                    'UnauthorizedOperation', 'DescribeVpcPeeringConnections',
+                    'denied'
+                )
+            ]
+        )
+        success, err_msg, peerings = (
+            vp.wait_for_peering_status(client, ['pcx-1'], 'active')
+        )
+        self.assertFalse(success)
+        self.assertTrue('UnauthorizedOperation' in err_msg)
+        self.assertEqual(vp.time.sleeps, [])
+
+    def test_wait_for_peering_status_in_check_mode(self):
+        client = StatusSequenceClient([{}])
+        self.assertEqual(
+            vp.wait_for_peering_status(
+                client, ['pcx-1'], 'active', check_mode=True
+            ),
+            (True, '', {})
+        )
+        self.assertEqual(client.calls, [])
+
+    def test_update_waits_up_to_wait_timeout(self):
+        vp.time = FakeClock()
+        peering_conn = peering(
+            'pcx-1', 'vpc-1234567', 'vpc-7654321', 'initiating-request'
+        )
+        peering_conn['Tags'] = list(TAGS)
+        client = StatusSequenceClient([{'pcx-1': 'initiating-request'}])
+        success, changed, err_msg, results = (
+            vp.update(
+                client, 'pcx-1', TAGS, accept_peer=True, peering=peering_conn,
+                wait_timeout=3
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            err_msg,
+            'pcx-1 did not reach pending-acceptance, last status '
+            'initiating-request'
+        )
+        self.assertEqual(vp.time.sleeps, [1, 2])
+        self.assertEqual(client.count('accept_vpc_peering_connection'), 0)
+
+    def test_modify_peering_options_needs_botocore_support(self):
+        client = FakeEc2Client()
+        success, err_msg = (
+            vp.modify_peering_options(
+                client, 'pcx-1', 'requester',
+                {'AllowDnsResolutionFromRemoteVpc': True}
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue(err_msg.startswith('botocore'))
+        self.assertTrue('modify_vpc_peering_connection_options' in err_msg)
+        self.assertEqual(client.calls, [])
+
+    def test_modify_peering_options_in_check_mode(self):
+        client = OptionsClient(dry_run=True)
+        self.assertEqual(
+            vp.modify_peering_options(
+                client, 'pcx-1', 'accepter',
+                {'AllowDnsResolutionFromRemoteVpc': True}, check_mode=True
+            ),
+            (True, '')
+        )
+        self.assertEqual(
+            client.calls,
+            [
+                (
+                    'modify_vpc_peering_connection_options',
+                    {
+                        'VpcPeeringConnectionId': 'pcx-1',
+                        'DryRun': True,
+                        'AccepterPeeringConnectionOptions': {
+                            'AllowDnsResolutionFromRemoteVpc': True
+                        },
+                    }
+                )
+            ]
+        )
+
+    def test_update_peering_options_only_modifies_differing_sides(self):
+        client = OptionsClient()
+        accepter_client = OptionsClient()
+        peer_info = vp.convert_to_lower(
+            peering('pcx-1', 'vpc-1234567', 'vpc-7654321', 'active')
+        )
+        peer_info['requester_vpc_info']['peering_options'] = {
+            'allow_dns_resolution_from_remote_vpc': True,
+        }
+        success, changed, err_msg = (
+            vp.update_peering_options(
+                client, peer_info,
+                requester_options={
+                    'allow_dns_resolution_from_remote_vpc': True
+                },
+                accepter_options={
+                    'allow_dns_resolution_from_remote_vpc': True,
+                    'allow_egress_from_local_vpc_to_remote_classic_link': None,
+                },
+                accepter_client=accepter_client
+            )
+        )
+        self.assertEqual((success, changed, err_msg), (True, True, ''))
+        self.assertEqual(client.calls, [])
+        self.assertEqual(
+            accepter_client.calls,
+            [
+                (
+                    'modify_vpc_peering_connection_options',
+                    {
+                        'VpcPeeringConnectionId': 'pcx-1',
+                        'DryRun': False,
+                        'AccepterPeeringConnectionOptions': {
+                            'AllowDnsResolutionFromRemoteVpc': True
+                        },
+                    }
+                )
+            ]
+        )
+
+        accepter_client.calls = list()
+        peer_info['accepter_vpc_info']['peering_options'] = {
+            'allow_dns_resolution_from_remote_vpc': True,
+        }
+        self.assertEqual(
+            vp.update_peering_options(
+                client, peer_info,
+                accepter_options={'allow_dns_resolution_from_remote_vpc': True},
+                accepter_client=accepter_client
+            ),
+            (True, False, '')
+        )
+        self.assertEqual(accepter_client.calls, [])
+
+    def test_create_applies_options_once_active(self):
+        client = OptionsClient()
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True,
+                requester_options={
+                    'allow_dns_resolution_from_remote_vpc': True
+                }
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('modify_vpc_peering_connection_options'), 1)
+
+    def test_create_fails_on_options_before_active(self):
+        client = OptionsClient()
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS,
+                requester_options={
+                    'allow_dns_resolution_from_remote_vpc': True
+                }
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            err_msg,
+            'Can not apply the peering options of pcx-1 on a '
+            'pending-acceptance state, they are applied once it is active. '
+            'Accept it and run again.'
+        )
+        self.assertEqual(client.count('modify_vpc_peering_connection_options'), 0)
+
+    def test_create_fails_on_options_without_botocore_support(self):
+        client = FakeEc2Client()
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True,
+                requester_options={
+                    'allow_dns_resolution_from_remote_vpc': True
+                }
+            )
+        )
+        self.assertFalse(success)
+        self.assertTrue(err_msg.startswith('botocore'))
+
+    def test_update_tags_from_payload_without_changes(self):
+        client = FakeEc2Client()
+        success, changed, err_msg = (
+            vp.update_tags(client, 'pcx-1', TAGS, current_tags=list(TAGS))
+        )
+        self.assertTrue(success)
+        self.assertFalse(changed)
+        self.assertEqual(client.calls, [])
+
+    def test_update_tags_overwrites_changed_values(self):
+        client = FakeEc2Client()
+        current_tags = [
+            {'Key': 'Name', 'Value': 'development-to-staging'},
+            {'Key': 'env', 'Value': 'staging'},
+        ]
+        success, changed, err_msg = (
+            vp.update_tags(client, 'pcx-1', TAGS, current_tags=current_tags)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            client.calls,
+            [
+                (
+                    'create_tags',
+                    {
+                        'Resources': ['pcx-1'],
+                        'Tags': [{'Key': 'env', 'Value': 'development'}],
+                        'DryRun': False,
+                    }
+                )
+            ]
+        )
+
+    def test_update_tags_deletes_removed_keys(self):
+        client = FakeEc2Client()
+        current_tags = TAGS + [{'Key': 'owner', 'Value': 'ops'}]
+        success, changed, err_msg = (
+            vp.update_tags(client, 'pcx-1', TAGS, current_tags=current_tags)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('delete_tags'), 1)
+        self.assertEqual(client.count('create_tags'), 0)
+
+    def test_update_tags_without_payload_describes_tags(self):
+        client = FakeEc2Client()
+        success, changed, err_msg = vp.update_tags(client, 'pcx-1', TAGS)
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('describe_tags'), 1)
+        self.assertEqual(client.count('create_tags'), 1)
+
+    def test_create_tags_after_creation(self):
+        client = FakeEc2Client()
+        success, changed, err_msg, results = (
+            vp.create(client, 'vpc-1234567', 'vpc-7654321', TAGS)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            [name for name, _ in client.calls if 'tags' in name
+             or name == 'create_vpc_peering_connection'],
+            ['create_vpc_peering_connection', 'create_tags']
+        )
+        self.assertEqual(client.count('describe_tags'), 0)
+        self.assertEqual(client.count('delete_tags'), 0)
+        self.assertEqual(client.count('describe_vpc_peering_connections'), 2)
+        self.assertEqual(
+            results['tags'],
+            {'Name': 'development-to-staging', 'env': 'development'}
+        )
+
+    def test_runner_with_botocore_validation(self):
+        client = boto3.client('ec2', region_name='us-west-2')
+        stubber = botocore.stub.Stubber(client)
+        stubber.add_response(
+            'create_vpc_peering_connection',
+            {
+                'VpcPeeringConnection': {
+                    'VpcPeeringConnectionId': 'pcx-1',
+                    'Status': {'Code': 'initiating-request'},
+                },
+                'ResponseMetadata': {'HTTPStatusCode': 200},
+            },
+            {'VpcId': 'vpc-1234567', 'PeerVpcId': 'vpc-7654321', 'DryRun': False}
+        )
+        stubber.activate()
+        params = {
+            'VpcId': 'vpc-1234567', 'PeerVpcId': 'vpc-7654321', 'DryRun': False
+        }
+        success, changed, err_msg, result = (
+            vp.runner(client, 'present', params)
+        )
+        self.assertTrue(success)
+        self.assertEqual(result['vpc_peering_connection_id'], 'pcx-1')
+        stubber.assert_no_pending_responses()
+        stubber.deactivate()
+
+        # Rejected by botocore before anything is sent.
+        params['TagSpecifications'] = [
+            {'ResourceType': 'vpc-peering-connection', 'Tags': TAGS}
+        ]
+        success, changed, err_msg, result = (
+            vp.runner(client, 'present', params)
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertTrue(err_msg.startswith('botocore'))
+
+    def test_create_and_accept_in_the_same_account(self):
+        client = FakeEc2Client()
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(results['status']['code'], 'active')
+        self.assertEqual(client.count('accept_vpc_peering_connection'), 1)
+        self.assertEqual(client.count('describe_tags'), 0)
+        self.assertEqual(client.count('create_tags'), 1)
+        # the search for an existing peering, the describe in update and
+        # a single poll for active.
+        self.assertEqual(client.count('describe_vpc_peering_connections'), 3)
+
+    def test_update_existing_peering_is_idempotent(self):
+        client = FakeEc2Client()
+        vp.create(client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True)
+        client.calls = list()
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertFalse(changed)
+        self.assertEqual(client.count('create_vpc_peering_connection'), 0)
+        self.assertEqual(client.count('accept_vpc_peering_connection'), 0)
+        self.assertEqual(client.count('create_tags'), 0)
+        self.assertEqual(client.count('describe_tags'), 0)
+        self.assertEqual(client.count('describe_vpc_peering_connections'), 2)
+
+    def test_accept_with_profile_tags_the_accepter_account_once(self):
+        client = FakeEc2Client()
+        accepter_client = FakeAccepterAccount(client)
+        vp.register_client(accepter_client, 'accepter', 'us-west-2')
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True,
+                accept_with_profile='accepter', region='us-west-2'
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('create_tags'), 1)
+        self.assertEqual(accepter_client.count('accept_vpc_peering_connection'), 1)
+        self.assertEqual(accepter_client.count('describe_tags'), 0)
+        self.assertEqual(accepter_client.count('create_tags'), 1)
+        self.assertEqual(
+            vp.convert_list_of_tags(accepter_client.tags['pcx-1']),
+            vp.convert_list_of_tags(TAGS)
+        )
+
+    def test_select_route_tables_in_one_call(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES)
+        success, err_msg, route_table_ids = (
+            vp.select_route_tables(client, 'vpc-1234567', {'all': True})
+        )
+        self.assertTrue(success)
+        self.assertEqual(route_table_ids, ['rtb-1111111', 'rtb-2222222'])
+        self.assertEqual(
+            client.calls,
+            [
+                (
+                    'describe_route_tables',
+                    {'Filters': [{'Name': 'vpc-id', 'Values': ['vpc-1234567']}]}
+                )
+            ]
+        )
+
+    def test_select_route_tables_by_tag_and_subnet(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES)
+        _, _, by_tag = (
+            vp.select_route_tables(
+                client, 'vpc-1234567', {'tags': {'Tier': 'private'}}
+            )
+        )
+        _, _, by_subnet = (
+            vp.select_route_tables(
+                client, 'vpc-1234567', {'subnet_ids': ['subnet-1111111']}
+            )
+        )
+        self.assertEqual(by_tag, ['rtb-2222222'])
+        self.assertEqual(by_subnet, ['rtb-1111111'])
+
+    def test_select_route_tables_needs_a_selector(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES)
+        success, err_msg, route_table_ids = (
+            vp.select_route_tables(client, 'vpc-1234567', {'all': False})
+        )
+        self.assertFalse(success)
+        self.assertEqual(client.calls, [])
+
+    def test_create_routes_the_selected_route_tables(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES)
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS, accept_peer=True,
+                accepter_routes=['rtb-1111111'],
+                accepter_routes_selector={'tags': {'Tier': 'private'}},
+                requester_routes_selector={'all': True}
+            )
+        )
+        self.assertTrue(success)
+        # the route tables are only described by the preflight, once for
+        # accepter_routes and once per selector.
+        self.assertEqual(client.count('describe_route_tables'), 3)
+        routes = sorted(
+            (params['RouteTableId'], params['DestinationCidrBlock'])
+            for name, params in client.calls if name == 'create_route'
+        )
+        self.assertEqual(
+            routes,
+            [
+                ('rtb-1111111', '10.200.0.0/16'),
+                ('rtb-2222222', '10.200.0.0/16'),
+                ('rtb-3333333', '10.100.0.0/16'),
+            ]
+        )
+
+    def test_update_route_creates_route(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES)
+        self.assertEqual(
+            vp.update_route(client, 'pcx-1', '10.200.0.0/16', 'rtb-1111111'),
+            (True, True, '')
+        )
+        self.assertEqual(
+            client.calls,
+            [
+                (
+                    'create_route',
+                    {
+                        'RouteTableId': 'rtb-1111111',
+                        'DestinationCidrBlock': '10.200.0.0/16',
+                        'VpcPeeringConnectionId': 'pcx-1',
+                        'DryRun': False,
+                    }
+                )
+            ]
+        )
+
+    def test_update_route_keeps_route_through_the_peering(self):
+        route_tables = copy.deepcopy(ROUTE_TABLES)
+        route_tables[0]['Routes'] = [
+            {
+                'DestinationCidrBlock': '10.200.0.0/16',
+                'VpcPeeringConnectionId': 'pcx-1'
+            }
+        ]
+        client = FakeEc2Client(route_tables=route_tables)
+        self.assertEqual(
+            vp.update_route(client, 'pcx-1', '10.200.0.0/16', 'rtb-1111111'),
+            (True, False, '')
+        )
+        self.assertEqual(
+            [name for name, _ in client.calls],
+            ['create_route', 'describe_route_tables']
+        )
+
+    def test_update_route_replaces_route_to_another_target(self):
+        route_tables = copy.deepcopy(ROUTE_TABLES)
+        route_tables[0]['Routes'] = [
+            {
+                'DestinationCidrBlock': '10.200.0.0/16',
+                'VpcPeeringConnectionId': 'pcx-2'
+            }
+        ]
+        client = FakeEc2Client(route_tables=route_tables)
+        self.assertEqual(
+            vp.update_route(client, 'pcx-1', '10.200.0.0/16', 'rtb-1111111'),
+            (True, True, '')
+        )
+        self.assertEqual(
+            [name for name, _ in client.calls],
+            ['create_route', 'describe_route_tables', 'replace_route']
+        )
+        self.assertEqual(
+            client.route_tables[0]['Routes'],
+            [
+                {
+                    'DestinationCidrBlock': '10.200.0.0/16',
+                    'VpcPeeringConnectionId': 'pcx-1'
+                }
+            ]
+        )
+
+    def test_update_route_fails_on_other_errors(self):
+        client = FakeEc2Client()
+        success, changed, err_msg = (
+            vp.update_route(client, 'pcx-1', '10.200.0.0/16', 'rtb-1111111')
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertTrue('InvalidRouteTableID.NotFound' in err_msg)
+        self.assertEqual(client.count('replace_route'), 0)
+
+    def test_aggregate_route_results(self):
+        self.assertEqual(vp.aggregate_route_results([]), (True, False, ''))
+        self.assertEqual(
+            vp.aggregate_route_results(
+                [(True, False, ''), (True, True, ''), (True, False, '')]
+            ),
+            (True, True, '')
+        )
+        self.assertEqual(
+            vp.aggregate_route_results(
+                [
+                    (False, False, 'rtb-1111111 failed'),
+                    (True, True, ''),
+                    (False, False, 'rtb-2222222 failed'),
+                ]
+            ),
+            (False, True, 'rtb-1111111 failed, rtb-2222222 failed')
+        )
+
+    def test_pre_update_routes_runs_both_sides_concurrently(self):
+        in_flight = InFlight(3)
+        client = ConcurrentRoutesClient(in_flight, ROUTE_TABLES)
+        accepter_client = ConcurrentRoutesClient(in_flight, ROUTE_TABLES)
+        peer_info = vp.convert_to_lower(
+            peering('pcx-1', 'vpc-1234567', 'vpc-7654321', 'active')
+        )
+        success, changed, err_msg = (
+            vp.pre_update_routes(
+                client, peer_info, ['rtb-1111111', 'rtb-2222222'],
+                ['rtb-3333333'], accepter_client=accepter_client
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(in_flight.max_count, 3)
+        self.assertEqual(
+            sorted(
+                (params['RouteTableId'], params['DestinationCidrBlock'])
+                for name, params in client.calls if name == 'create_route'
+            ),
+            [
+                ('rtb-1111111', '10.200.0.0/16'),
+                ('rtb-2222222', '10.200.0.0/16'),
+            ]
+        )
+        self.assertEqual(
+            [
+                (params['RouteTableId'], params['DestinationCidrBlock'])
+                for name, params in accepter_client.calls
+                if name == 'create_route'
+            ],
+            [('rtb-3333333', '10.100.0.0/16')]
+        )
+
+    def test_pre_update_routes_needs_routes(self):
+        peer_info = vp.convert_to_lower(
+            peering('pcx-1', 'vpc-1234567', 'vpc-7654321', 'active')
+        )
+        self.assertEqual(
+            vp.pre_update_routes(FakeEc2Client(), peer_info),
+            (
+                False, False,
+                'Need to pass either accepter_routes or requester_routes.'
+            )
+        )
+
+    def test_find_overlapping_cidrs(self):
+        entries = [
+            {'cidr': '10.0.0.0/8'}, {'cidr': '10.100.0.0/16'},
+            {'cidr': '10.100.4.0/24'}, {'cidr': '10.200.0.0/16'},
+            {'cidr': '192.168.0.0/16'},
+        ]
+        index = vp.build_cidr_index(entries)
+        overlapping = vp.find_overlapping_cidrs(index, '10.100.0.0/20')
+        self.assertEqual(
+            [entry['cidr'] for entry in overlapping],
+            ['10.0.0.0/8', '10.100.0.0/16', '10.100.4.0/24']
+        )
+        self.assertEqual(vp.find_overlapping_cidrs(index, '172.16.0.0/12'), [])
+
+    def test_preflight_fails_on_overlapping_secondary_cidr(self):
+        client = FakeEc2Client(service_model=SECONDARY_CIDR_MODEL)
+        success, changed, err_msg, results = (
+            vp.create(client, 'vpc-1234567', 'vpc-1111111', TAGS)
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertEqual(
+            results['cidr_conflicts'],
+            ['vpc-1234567 10.101.0.0/16 overlaps vpc-1111111 10.101.128.0/20']
+        )
+        self.assertEqual(
+            sorted(set(name for name, _ in client.calls)),
+            ['describe_vpc_peering_connections', 'describe_vpcs']
+        )
+
+    def test_preflight_fails_on_more_specific_route(self):
+        route_tables = [
+            {
+                'RouteTableId': 'rtb-1111111', 'VpcId': 'vpc-1234567',
+                'SubnetIds': [], 'Tags': {},
+                'Routes': [
+                    {'DestinationCidrBlock': '10.100.0.0/16', 'GatewayId': 'local'},
+                    {'DestinationCidrBlock': '0.0.0.0/0', 'GatewayId': 'igw-1234567'},
+                    {'DestinationCidrBlock': '10.200.0.0/16', 'NatGatewayId': 'nat-1111111'},
+                    {'DestinationCidrBlock': '10.200.8.0/24', 'NatGatewayId': 'nat-1234567'},
+                ]
+            }
+        ]
+        client = FakeEc2Client(route_tables=route_tables)
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS,
+                accepter_routes=['rtb-1111111']
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(
+            results['cidr_conflicts'],
+            [
+                'rtb-1111111: route 10.200.8.0/24 to nat-1234567 is more '
+                'specific than 10.200.0.0/16'
+            ]
+        )
+        self.assertEqual(client.count('create_vpc_peering_connection'), 0)
+
+    def test_mesh_plan_in_check_mode(self):
+        client = FakeEc2Client(
+            peerings={
+                'pcx-a': peering('pcx-a', 'vpc-1234567', 'vpc-7654321', 'active'),
+                'pcx-b': peering(
+                    'pcx-b', 'vpc-1234567', 'vpc-1111111', 'pending-acceptance'
+                ),
+            }
+        )
+        vpcs = [{'vpc_id': vpc_id} for vpc_id in sorted(VPCS)]
+        success, changed, err_msg, results = (
+            vp.mesh(client, vpcs, TAGS, check_mode=True)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            [
+                (edge['requester_vpc_id'], edge['accepter_vpc_id'],
+                 edge['action'], edge['vpc_peering_connection_id'])
+                for edge in results['edges']
+            ],
+            [
+                ('vpc-1234567', 'vpc-1111111', 'accept', 'pcx-b'),
+                ('vpc-1111111', 'vpc-7654321', 'create', None),
+                ('vpc-1234567', 'vpc-7654321', 'exists', 'pcx-a'),
+            ]
+        )
+        self.assertEqual(
+            sorted(set(name for name, _ in client.calls)),
+            ['describe_vpc_peering_connections', 'describe_vpcs']
+        )
+
+    def test_mesh_creates_accepts_tags_and_routes(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES)
+        vpcs = [
+            {'vpc_id': 'vpc-1234567', 'route_tables': ['rtb-1111111']},
+            {'vpc_id': 'vpc-7654321', 'route_tables': ['rtb-3333333']},
+        ]
+        success, changed, err_msg, results = vp.mesh(client, vpcs, TAGS)
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(results['edges'][0]['action'], 'create')
+        self.assertEqual(results['edges'][0]['vpc_peering_connection_id'], 'pcx-1')
+        self.assertEqual(client.peerings['pcx-1']['Status']['Code'], 'active')
+        self.assertEqual(client.count('create_vpc_peering_connection'), 1)
+        self.assertEqual(client.count('accept_vpc_peering_connection'), 1)
+        self.assertEqual(client.count('create_tags'), 1)
+        self.assertEqual(
+            vp.convert_list_of_tags(client.tags['pcx-1']),
+            vp.convert_list_of_tags(TAGS)
+        )
+        self.assertEqual(
+            dict(
+                (route_table['RouteTableId'], route_table['Routes'])
+                for route_table in client.route_tables
+                if route_table.get('Routes')
+            ),
+            {
+                'rtb-1111111': [
+                    {
+                        'DestinationCidrBlock': '10.200.0.0/16',
+                        'VpcPeeringConnectionId': 'pcx-1'
+                    }
+                ],
+                'rtb-3333333': [
+                    {
+                        'DestinationCidrBlock': '10.100.0.0/16',
+                        'VpcPeeringConnectionId': 'pcx-1'
+                    }
+                ],
+            }
+        )
+
+        client.calls = list()
+        success, changed, err_msg, results = vp.mesh(client, vpcs, TAGS)
+        self.assertTrue(success)
+        self.assertFalse(changed)
+        self.assertEqual(results['edges'][0]['action'], 'exists')
+        self.assertEqual(client.count('create_vpc_peering_connection'), 0)
+        self.assertEqual(client.count('create_tags'), 0)
+        self.assertEqual(client.count('create_route'), 2)
+        self.assertEqual(client.count('replace_route'), 0)
+
+    def test_mesh_routes_existing_active_edge(self):
+        route_tables = copy.deepcopy(ROUTE_TABLES)
+        route_tables[0]['Routes'] = [
+            {
+                'DestinationCidrBlock': '10.200.0.0/16',
+                'NatGatewayId': 'nat-1234567'
+            }
+        ]
+        client = FakeEc2Client(
+            peerings={
+                'pcx-a': peering('pcx-a', 'vpc-1234567', 'vpc-7654321', 'active'),
+            },
+            route_tables=route_tables
+        )
+        vpcs = [
+            {'vpc_id': 'vpc-1234567', 'route_tables': ['rtb-1111111']},
+            {'vpc_id': 'vpc-7654321'},
+        ]
+        success, changed, err_msg, results = vp.mesh(client, vpcs, TAGS)
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(results['edges'][0]['action'], 'exists')
+        self.assertEqual(client.count('replace_route'), 1)
+        self.assertEqual(
+            client.route_tables[0]['Routes'],
+            [
+                {
+                    'DestinationCidrBlock': '10.200.0.0/16',
+                    'VpcPeeringConnectionId': 'pcx-a'
+                }
+            ]
+        )
+        self.assertEqual(client.count('create_tags'), 0)
+        self.assertEqual(client.count('accept_vpc_peering_connection'), 0)
+
+    def test_mesh_accepts_across_accounts(self):
+        client = FakeEc2Client(route_tables=ROUTE_TABLES[:1])
+        accepter_client = FakeAccepterAccount(client, ROUTE_TABLES[2:])
+        vp.register_client(accepter_client, 'accepter', 'us-west-2')
+        vpcs = [
+            {'vpc_id': 'vpc-1234567', 'route_tables': ['rtb-1111111']},
+            {
+                'vpc_id': 'vpc-7654321', 'profile': 'accepter',
+                'owner_id': '210987654321', 'route_tables': ['rtb-3333333']
+            },
+        ]
+        success, changed, err_msg, results = (
+            vp.mesh(client, vpcs, TAGS, region='us-west-2')
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            client.called('create_vpc_peering_connection'),
+            [
+                {
+                    'VpcId': 'vpc-1234567', 'PeerVpcId': 'vpc-7654321',
+                    'PeerOwnerId': '210987654321', 'DryRun': False
+                }
+            ]
+        )
+        self.assertEqual(client.count('accept_vpc_peering_connection'), 0)
+        self.assertEqual(accepter_client.count('accept_vpc_peering_connection'), 1)
+        self.assertEqual(client.count('create_tags'), 1)
+        self.assertEqual(accepter_client.count('create_tags'), 1)
+        self.assertEqual(client.count('create_route'), 1)
+        self.assertEqual(accepter_client.count('create_route'), 1)
+
+    def test_mesh_needs_the_account_of_other_profiles(self):
+        # describe_vpcs answers without an OwnerId, like ec2 does.
+        vpcs_with_owner = dict(
+            (vpc_id, dict(vpc, OwnerId='210987654321'))
+            for vpc_id, vpc in VPCS.items()
+        )
+        client = FakeEc2Client(vpcs=vpcs_with_owner)
+        accepter_client = FakeAccepterAccount(client)
+        vp.register_client(accepter_client, 'accepter', 'us-west-2')
+        vpcs = [
+            {'vpc_id': 'vpc-1234567'},
+            {'vpc_id': 'vpc-7654321', 'profile': 'accepter'},
+        ]
+        success, changed, err_msg, results = (
+            vp.mesh(client, vpcs, TAGS, region='us-west-2')
+        )
+        self.assertFalse(success)
+        self.assertFalse(changed)
+        self.assertEqual(
+            err_msg,
+            'Failed edges: vpc-1234567-vpc-7654321: The account of '
+            'vpc-7654321 is unknown, set the owner_id of vpc-7654321 in vpcs'
+        )
+        self.assertEqual(client.count('create_vpc_peering_connection'), 0)
+
+    def test_mesh_takes_the_account_from_peering_connections(self):
+        client = FakeEc2Client()
+        client.peerings['pcx-outside'] = {
+            'VpcPeeringConnectionId': 'pcx-outside',
+            'Status': {'Code': 'active'},
+            'RequesterVpcInfo': {
+                'VpcId': 'vpc-7654321', 'OwnerId': '210987654321',
+                'CidrBlock': '10.200.0.0/16'
+            },
+            'AccepterVpcInfo': {
+                'VpcId': 'vpc-9999999', 'OwnerId': '210987654321',
+                'CidrBlock': '10.99.0.0/16'
+            },
+        }
+        accepter_client = FakeAccepterAccount(client)
+        vp.register_client(accepter_client, 'accepter', 'us-west-2')
+        vpcs = [
+            {'vpc_id': 'vpc-1234567'},
+            {'vpc_id': 'vpc-7654321', 'profile': 'accepter'},
+        ]
+        success, changed, err_msg, results = (
+            vp.mesh(client, vpcs, TAGS, region='us-west-2')
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            client.called('create_vpc_peering_connection')[0]['PeerOwnerId'],
+            '210987654321'
+        )
+
+    def test_mesh_purge_edges(self):
+        peerings = {
+            'pcx-a': peering('pcx-a', 'vpc-1234567', 'vpc-7654321', 'active'),
+            'pcx-b': peering('pcx-b', 'vpc-1234567', 'vpc-1111111', 'active'),
+        }
+        vpcs = [{'vpc_id': vpc_id} for vpc_id in sorted(VPCS)]
+        edges = [['vpc-1234567', 'vpc-7654321']]
+        client = FakeEc2Client(peerings=peerings)
+        success, changed, err_msg, results = (
+            vp.mesh(client, vpcs, TAGS, edges=edges)
+        )
+        self.assertTrue(success)
+        self.assertFalse(changed)
+        self.assertEqual(len(results['edges']), 1)
+        self.assertEqual(client.count('delete_vpc_peering_connection'), 0)
+
+        success, changed, err_msg, results = (
+            vp.mesh(client, vpcs, TAGS, edges=edges, purge_edges=True)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            [edge['action'] for edge in results['edges']], ['exists', 'delete']
+        )
+        self.assertEqual(
+            [
+                params['VpcPeeringConnectionId'] for name, params in client.calls
+                if name == 'delete_vpc_peering_connection'
+            ],
+            ['pcx-b']
+        )
+
+    def test_mesh_rejects_unknown_vpcs(self):
+        client = FakeEc2Client()
+        success, changed, err_msg, results = (
+            vp.mesh(
+                client, [{'vpc_id': 'vpc-1234567'}], TAGS,
+                edges=[['vpc-1234567', 'vpc-7654321']]
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'vpc-7654321 is not part of vpcs')
+        self.assertEqual(client.calls, [])
+
+    def test_route_conflicts_ignore_routes_through_the_peering(self):
+        route_tables = [
+            {
+                'RouteTableId': 'rtb-1111111',
+                'Routes': [
+                    {
+                        'DestinationCidrBlock': '10.200.8.0/24',
+                        'VpcPeeringConnectionId': 'pcx-a'
+                    },
+                    {
+                        'DestinationCidrBlock': '10.200.9.0/24',
+                        'NatGatewayId': 'nat-1234567'
+                    },
+                ]
+            }
+        ]
+        self.assertEqual(
+            vp.route_conflicts(route_tables, '10.200.0.0/16', 'pcx-a'),
+            [
+                'rtb-1111111: route 10.200.9.0/24 to nat-1234567 is more '
+                'specific than 10.200.0.0/16'
+            ]
+        )
+        self.assertEqual(
+            len(vp.route_conflicts(route_tables, '10.200.0.0/16')), 2
+        )
+
+    def test_create_rerun_passes_the_preflight(self):
+        route_tables = copy.deepcopy(ROUTE_TABLES)
+        route_tables[0]['Routes'] = [
+            {'DestinationCidrBlock': '10.100.0.0/16', 'GatewayId': 'local'},
+            {
+                'DestinationCidrBlock': '10.200.8.0/24',
+                'VpcPeeringConnectionId': 'pcx-a'
+            },
+        ]
+        client = FakeEc2Client(
+            peerings={
+                'pcx-a': peering('pcx-a', 'vpc-1234567', 'vpc-7654321', 'active'),
+            },
+            route_tables=route_tables
+        )
+        client.tags['pcx-a'] = list(TAGS)
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS,
+                accepter_routes=['rtb-1111111']
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(client.count('create_vpc_peering_connection'), 0)
+        self.assertEqual(
+            [
+                (params['RouteTableId'], params['DestinationCidrBlock'])
+                for name, params in client.calls if name == 'create_route'
+            ],
+            [('rtb-1111111', '10.200.0.0/16')]
+        )
+
+        client.calls = list()
+        success, changed, err_msg, results = (
+            vp.create(
+                client, 'vpc-1234567', 'vpc-7654321', TAGS,
+                accepter_routes=['rtb-1111111']
+            )
+        )
+        self.assertTrue(success)
+        self.assertFalse(changed)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
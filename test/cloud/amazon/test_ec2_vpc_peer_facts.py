@@ -0,0 +1,163 @@
+#!/usr/bin/python
+
+import boto3
+import unittest
+
+import ec2_vpc_peer_facts as vpf
+
+from fakes import FakeClient
+
+aws_region = 'us-west-2'
+CHECK_MODE = True
+
+
+class FakeEc2Client(FakeClient):
+    """Answer the ec2 calls from the DRY_RUN data."""
+
+    service_name = 'ec2'
+
+    def describe_vpc_peering_connections(self, **params):
+        self.record('describe_vpc_peering_connections', params)
+        return {'VpcPeeringConnections': vpf.DRY_RUN_PEERING_CONNECTIONS}
+
+
+class AnsibleEc2VpcPeerFactsFunctions(unittest.TestCase):
+
+    def test_describe_peering_connections(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, peerings = (
+            vpf.describe_peering_connections(client, check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        self.assertEqual(peerings, vpf.DRY_RUN_PEERING_CONNECTIONS)
+
+    def test_describe_peering_connections_by_status(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, peerings = (
+            vpf.describe_peering_connections(
+                client, ['active'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(peerings, vpf.DRY_RUN_PEERING_CONNECTIONS[:1])
+
+    def test_describe_peering_connections_params(self):
+        client = FakeEc2Client()
+        success, err_msg, peerings = (
+            vpf.describe_peering_connections(client, ['active'])
+        )
+        self.assertTrue(success)
+        self.assertEqual(peerings, vpf.DRY_RUN_PEERING_CONNECTIONS)
+        self.assertEqual(
+            client.called('describe_vpc_peering_connections'),
+            [{'Filters': [{'Name': 'status-code', 'Values': ['active']}]}]
+        )
+
+    def test_index_peering_connections(self):
+        index = vpf.index_peering_connections(vpf.DRY_RUN_PEERING_CONNECTIONS)
+        self.assertEqual(
+            index['vpc_id']['vpc-1111111'], set(['pcx-7654321', 'pcx-1111111'])
+        )
+        self.assertEqual(index['cidr']['10.101.0.0/16'], set(['pcx-1234567']))
+        self.assertEqual(
+            index['cidr']['2600:1f14:abc:de00::/56'], set(['pcx-1234567'])
+        )
+        self.assertEqual(
+            index['owner_id']['123456789012'],
+            set(['pcx-1234567', 'pcx-7654321', 'pcx-1111111'])
+        )
+        self.assertEqual(index['status']['deleted'], set(['pcx-1111111']))
+        self.assertEqual(
+            index['pair'][('vpc-1234567', 'vpc-7654321')], set(['pcx-1234567'])
+        )
+
+    def test_get_peering_connections_indexed_by_id(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            vpf.get_peering_connections(client, check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        peerings = results['vpc_peering_connections']
+        self.assertEqual(
+            sorted(peerings.keys()),
+            ['pcx-1111111', 'pcx-1234567', 'pcx-7654321']
+        )
+        self.assertEqual(
+            peerings['pcx-1234567'],
+            vpf.convert_to_lower(vpf.DRY_RUN_PEERING_CONNECTIONS[0])
+        )
+        self.assertEqual(
+            peerings['pcx-1234567']['requester_vpc_info']['owner_id'],
+            '123456789012'
+        )
+        self.assertNotIn('pairs', results)
+
+    def test_get_peering_connections_by_vpc_and_owner(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            vpf.get_peering_connections(
+                client, vpc_ids=['vpc-1111111'], owner_ids=['210987654321'],
+                status_codes=['pending-acceptance', 'active'],
+                check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            results['vpc_peering_connections'].keys(), ['pcx-7654321']
+        )
+
+    def test_get_peering_connections_by_cidr(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            vpf.get_peering_connections(
+                client, cidrs=['10.200.0.0/16'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            sorted(results['vpc_peering_connections'].keys()),
+            ['pcx-1111111', 'pcx-1234567']
+        )
+
+    def test_get_peering_connections_by_pairs(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        pairs = [
+            ['vpc-7654321', 'vpc-1234567'],
+            ['vpc-1111111', 'vpc-7654321'],
+            ['vpc-1234567', 'vpc-2222222'],
+        ]
+        success, err_msg, results = (
+            vpf.get_peering_connections(
+                client, status_codes=['active', 'pending-acceptance'],
+                pairs=pairs, check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            results['pairs'],
+            {
+                'vpc-7654321,vpc-1234567': ['pcx-1234567'],
+                'vpc-1111111,vpc-7654321': [],
+                'vpc-1234567,vpc-2222222': [],
+            }
+        )
+        self.assertEqual(
+            results['vpc_peering_connections'].keys(), ['pcx-1234567']
+        )
+
+    def test_get_peering_connections_invalid_pair(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            vpf.get_peering_connections(
+                client, pairs=[['vpc-1234567']], check_mode=CHECK_MODE
+            )
+        )
+        self.assertFalse(success)
+        self.assertEqual(err_msg, "Invalid pair ['vpc-1234567']")
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/python
+
+import botocore
+import unittest
+
+import ec2_vpc_route_table as rt
+
+from fakes import FakeClient
+
+
+class FakeEc2Client(FakeClient):
+    """Answer the ec2 calls from route_tables."""
+
+    service_name = 'ec2'
+
+    def __init__(self, route_tables=None):
+        super(FakeEc2Client, self).__init__()
+        self.route_tables = route_tables or list()
+
+    def describe_route_tables(self, **params):
+        self.record('describe_route_tables', params)
+        subnet_ids = None
+        for search in params.get('Filters', list()):
+            if search['Name'] == 'association.subnet-id':
+                subnet_ids = search['Values']
+        route_tables = list()
+        for route_table in self.route_tables:
+            subnets = [
+                association.get('SubnetId')
+                for association in route_table['Associations']
+            ]
+            if subnet_ids is None or set(subnets).intersection(subnet_ids):
+                route_tables.append(route_table)
+        return {'RouteTables': route_tables}
+
+    def associate_route_table(self, **params):
+        self.record('associate_route_table', params)
+        return {'AssociationId': 'rtbassoc-new'}
+
+    def disassociate_route_table(self, **params):
+        self.record('disassociate_route_table', params)
+        return dict()
+
+    def replace_route_table_association(self, **params):
+        self.record('replace_route_table_association', params)
+        return {'NewAssociationId': 'rtbassoc-replaced'}
+
+    def enable_vgw_route_propagation(self, **params):
+        self.record('enable_vgw_route_propagation', params)
+        return dict()
+
+    def disable_vgw_route_propagation(self, **params):
+        self.record('disable_vgw_route_propagation', params)
+        return dict()
+
+    def create_route(self, **params):
+        self.record('create_route', params)
+        return {'Return': True}
+
+    def replace_route(self, **params):
+        self.record('replace_route', params)
+        return dict()
+
+    def delete_route(self, **params):
+        self.record('delete_route', params)
+        return dict()
+
+
+def association(route_table_id, subnet_id, association_id):
+    return {
+        'RouteTableId': route_table_id,
+        'SubnetId': subnet_id,
+        'RouteTableAssociationId': association_id,
+        'Main': False
+    }
+
+
+class AnsibleEc2VpcRouteTableFunctions(unittest.TestCase):
+
+    def test_update_subnets_replaces_existing_association(self):
+        other = {
+            'RouteTableId': 'rtb-7654321',
+            'Associations': [
+                association('rtb-7654321', 'subnet-2222222', 'rtbassoc-2222222')
+            ]
+        }
+        client = FakeEc2Client([other])
+        current_subnets = [
+            association('rtb-1234567', 'subnet-1111111', 'rtbassoc-1111111')
+        ]
+        success, err_msg = rt.update_subnets(
+            client, 'vpc-1234567', 'rtb-1234567', current_subnets,
+            ['subnet-2222222', 'subnet-3333333']
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            client.called('replace_route_table_association'),
+            [
+                {
+                    'DryRun': False,
+                    'AssociationId': 'rtbassoc-2222222',
+                    'RouteTableId': 'rtb-1234567'
+                }
+            ]
+        )
+        self.assertEqual(
+            client.called('associate_route_table'),
+            [
+                {
+                    'DryRun': False,
+                    'SubnetId': 'subnet-3333333',
+                    'RouteTableId': 'rtb-1234567'
+                }
+            ]
+        )
+        self.assertEqual(
+            client.called('disassociate_route_table'),
+            [{'DryRun': False, 'AssociationId': 'rtbassoc-1111111'}]
+        )
+        # One lookup covers every subnet being added.
+        self.assertEqual(client.count('describe_route_tables'), 1)
+
+    def test_update_subnets_unchanged(self):
+        client = FakeEc2Client()
+        current_subnets = [
+            association('rtb-1234567', 'subnet-1111111', 'rtbassoc-1111111')
+        ]
+        success, err_msg = rt.update_subnets(
+            client, 'vpc-1234567', 'rtb-1234567', current_subnets,
+            ['subnet-1111111']
+        )
+        self.assertTrue(success)
+        self.assertEqual(client.calls, list())
+
+    def test_update_vgw_diff(self):
+        client = FakeEc2Client()
+        current_vgws = [
+            {'GatewayId': 'vgw-1111111'}, {'GatewayId': 'vgw-2222222'}
+        ]
+        success, err_msg = rt.update_vgw(
+            client, 'rtb-1234567', current_vgws,
+            ['vgw-2222222', 'vgw-3333333', 'vgw-4444444']
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            sorted(
+                params['GatewayId'] for params in
+                client.called('enable_vgw_route_propagation')
+            ),
+            ['vgw-3333333', 'vgw-4444444']
+        )
+        self.assertEqual(
+            client.called('disable_vgw_route_propagation'),
+            [{'GatewayId': 'vgw-1111111', 'RouteTableId': 'rtb-1234567'}]
+        )
+
+    def test_update_vgw_disables_all(self):
+        client = FakeEc2Client()
+        success, err_msg = rt.update_vgw(
+            client, 'rtb-1234567', [{'GatewayId': 'vgw-1111111'}]
+        )
+        self.assertTrue(success)
+        self.assertEqual(client.count('enable_vgw_route_propagation'), 0)
+        self.assertEqual(client.count('disable_vgw_route_propagation'), 1)
+
+    def test_update_vgw_unchanged_and_check_mode(self):
+        client = FakeEc2Client()
+        current_vgws = [{'GatewayId': 'vgw-1111111'}]
+        success, err_msg = rt.update_vgw(
+            client, 'rtb-1234567', current_vgws, ['vgw-1111111']
+        )
+        self.assertTrue(success)
+        success, err_msg = rt.update_vgw(
+            client, 'rtb-1234567', current_vgws, ['vgw-2222222'],
+            check_mode=True
+        )
+        self.assertTrue(success)
+        self.assertEqual(client.calls, list())
+
+    def test_canonical_destination(self):
+        self.assertEqual(
+            rt.canonical_destination('2001:DB8:0:0::/56'), '2001:db8::/56'
+        )
+        self.assertEqual(
+            rt.canonical_destination('2001:0db8::0001/128'), '2001:db8::1/128'
+        )
+        self.assertEqual(rt.canonical_destination('10.0.0.0/8'), '10.0.0.0/8')
+        self.assertEqual(rt.canonical_destination('pl-1234567'), 'pl-1234567')
+
+    def test_index_routes_ipv6(self):
+        routes = [
+            {
+                'DestinationIpv6CidrBlock': '2001:DB8::/56',
+                'EgressOnlyInternetGatewayId': 'eigw-1234567'
+            },
+            {
+                'DestinationCidrBlock': '10.100.0.0/16',
+                'GatewayId': 'local'
+            }
+        ]
+        index = rt.index_routes(routes)
+        self.assertEqual(
+            sorted(index.keys()),
+            [('ipv4', '10.100.0.0/16'), ('ipv6', '2001:db8::/56')]
+        )
+        declared = rt.route_keys(
+            None, 'vpc-1234567',
+            [
+                {
+                    'dest': '2001:db8:0::/56',
+                    'egress_only_internet_gateway_id': 'eigw-1234567'
+                }
+            ]
+        )
+        route_key = (declared[0]['dest_type'], declared[0]['dest'])
+        self.assertIn(route_key, index)
+
+    def test_update_route_existing_ipv6_route(self):
+        client = FakeEc2Client()
+        current_routes = rt.index_routes(
+            [
+                {
+                    'DestinationIpv6CidrBlock': '2001:DB8::/56',
+                    'EgressOnlyInternetGatewayId': 'eigw-1234567'
+                }
+            ]
+        )
+        route = {
+            'dest': '2001:db8::/56',
+            'dest_type': 'ipv6',
+            'gateway_type': 'egress_only_internet_gateway_id',
+            'id': 'eigw-1234567'
+        }
+        success, err_msg = rt.update_route(
+            client, 'rtb-1234567', current_routes, route
+        )
+        self.assertTrue(success)
+        self.assertEqual(err_msg, 'route already exists')
+        self.assertEqual(client.calls, list())
+
+    def test_update_route_replaces_target(self):
+        client = FakeEc2Client()
+        current_routes = rt.index_routes(
+            [{'DestinationCidrBlock': '0.0.0.0/0', 'GatewayId': 'igw-1234567'}]
+        )
+        route = {
+            'dest': '0.0.0.0/0',
+            'dest_type': 'ipv4',
+            'gateway_type': 'nat_gateway_id',
+            'id': 'nat-1234567'
+        }
+        success, err_msg = rt.update_route(
+            client, 'rtb-1234567', current_routes, route
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            client.called('replace_route'),
+            [
+                {
+                    'DestinationCidrBlock': '0.0.0.0/0',
+                    'RouteTableId': 'rtb-1234567',
+                    'NatGatewayId': 'nat-1234567',
+                    'DryRun': False
+                }
+            ]
+        )
+        self.assertEqual(client.count('delete_route'), 0)
+        self.assertEqual(client.count('create_route'), 0)
+
+    def test_route_action_unsupported_parameter(self):
+        client = FakeEc2Client()
+        route = {
+            'dest': '::/0',
+            'dest_type': 'ipv6',
+            'gateway_type': 'egress_only_internet_gateway_id',
+            'id': 'eigw-1234567'
+        }
+        operation = client.operation_model('create_route')
+        if 'DestinationIpv6CidrBlock' in operation.input_shape.members:
+            return
+        success, err_msg = rt.route_action(client, route, 'rtb-1234567')
+        self.assertFalse(success)
+        self.assertTrue(
+            err_msg.startswith(
+                'botocore {0} can not create the route for ::/0'
+                .format(botocore.__version__)
+            )
+        )
+
+    def test_analyze_routes_ignores_default_and_local_routes(self):
+        routes = [
+            {'dest': '0.0.0.0/0', 'nat_gateway_id': 'nat-1234567'},
+            {'dest': '10.1.0.0/16', 'vpc_peering_connection_id': 'pcx-1234567'},
+            {'dest': '::/0', 'egress_only_internet_gateway_id': 'eigw-1234567'},
+            {'dest': '2001:db8::/56', 'gateway_id': 'igw-1234567'},
+        ]
+        current_routes = [
+            {'DestinationCidrBlock': '10.100.0.0/16', 'GatewayId': 'local'},
+        ]
+        routes.append({'dest': '10.100.1.0/24', 'gateway_id': 'vgw-1234567'})
+        success, err_msg, analysis = rt.analyze_routes(routes, current_routes)
+        self.assertTrue(success)
+        self.assertEqual(analysis, {'duplicates': [], 'overlaps': []})
+
+    def test_analyze_routes_shadowed_routes(self):
+        routes = [
+            {'dest': '10.1.0.0/16', 'vpc_peering_connection_id': 'pcx-1234567'},
+            {'dest': '10.1.2.0/24', 'gateway_id': 'vgw-1234567'},
+            {'dest': '10.1.3.0/24', 'vpc_peering_connection_id': 'pcx-1234567'},
+        ]
+        current_routes = [
+            {'DestinationCidrBlock': '10.1.4.0/24', 'GatewayId': 'vgw-7654321'},
+            {'DestinationCidrBlock': '10.1.2.0/24', 'GatewayId': 'vgw-7654321'},
+        ]
+        success, err_msg, analysis = rt.analyze_routes(routes, current_routes)
+        self.assertTrue(success)
+        self.assertEqual(
+            analysis['overlaps'],
+            [
+                {
+                    'dest': '10.1.0.0/16',
+                    'target': 'pcx-1234567',
+                    'source': 'declared',
+                    'more_specific_dest': '10.1.2.0/24',
+                    'more_specific_target': 'vgw-1234567',
+                    'more_specific_source': 'declared'
+                },
+                {
+                    'dest': '10.1.0.0/16',
+                    'target': 'pcx-1234567',
+                    'source': 'declared',
+                    'more_specific_dest': '10.1.4.0/24',
+                    'more_specific_target': 'vgw-7654321',
+                    'more_specific_source': 'current'
+                }
+            ]
+        )
+
+    def test_analyze_routes_duplicates(self):
+        routes = [
+            {'dest': '10.1.0.0/16', 'vpc_peering_connection_id': 'pcx-1234567'},
+            {'dest': '10.1.0.0/16', 'vpc_peering_connection_id': 'pcx-1234567'},
+            {'dest': '10.1.2.0/24', 'gateway_id': 'vgw-1234567'},
+            {'dest': '10.1.2.0/24', 'gateway_id': 'vgw-1234567'},
+        ]
+        success, err_msg, analysis = rt.analyze_routes(routes)
+        self.assertTrue(success)
+        self.assertEqual(analysis['duplicates'], [])
+        self.assertEqual(len(analysis['overlaps']), 1)
+
+        routes.append({'dest': '2001:DB8::/56', 'gateway_id': 'igw-1234567'})
+        routes.append(
+            {'dest': '2001:db8::/56', 'egress_only_internet_gateway_id': 'eigw-1'}
+        )
+        success, err_msg, analysis = rt.analyze_routes(routes)
+        self.assertFalse(success)
+        self.assertEqual(
+            analysis['duplicates'],
+            [{'dest': '2001:db8::/56', 'targets': ['eigw-1', 'igw-1234567']}]
+        )
+        self.assertEqual(
+            err_msg,
+            '2001:db8::/56 is declared more than once with different targets'
+        )
+
+    def test_analyze_routes_invalid_cidr(self):
+        success, err_msg, analysis = rt.analyze_routes(
+            [{'dest': '10.1.0/16', 'gateway_id': 'vgw-1234567'}]
+        )
+        self.assertFalse(success)
+        self.assertEqual(err_msg, '10.1.0/16 is not a valid cidr')
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+
+import boto3
+import unittest
+
+import ec2_vpc_route_table_facts as rtf
+
+from fakes import FakeClient
+
+aws_region = 'us-west-2'
+CHECK_MODE = True
+
+
+class FakeEc2Client(FakeClient):
+    """Answer the ec2 calls from the DRY_RUN data."""
+
+    service_name = 'ec2'
+
+    def describe_route_tables(self, **params):
+        self.record('describe_route_tables', params)
+        return {'RouteTables': rtf.DRY_RUN_ROUTE_TABLES}
+
+
+class AnsibleEc2VpcRouteTableFactsFunctions(unittest.TestCase):
+
+    def test_build_filters(self):
+        filters = (
+            rtf.build_filters(
+                vpc_ids=['vpc-1234567'], tags={'Name': 'public'},
+                subnet_ids=['subnet-1234567']
+            )
+        )
+        self.assertEqual(
+            filters,
+            [
+                {'Name': 'vpc-id', 'Values': ['vpc-1234567']},
+                {'Name': 'tag:Name', 'Values': ['public']},
+                {'Name': 'association.subnet-id', 'Values': ['subnet-1234567']}
+            ]
+        )
+
+    def test_describe_route_tables(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, route_tables = (
+            rtf.describe_route_tables(client, check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        self.assertEqual(route_tables, rtf.DRY_RUN_ROUTE_TABLES)
+
+    def test_describe_route_tables_params(self):
+        client = FakeEc2Client()
+        filters = rtf.build_filters(vpc_ids=['vpc-1234567'])
+        success, err_msg, route_tables = (
+            rtf.describe_route_tables(client, filters)
+        )
+        self.assertTrue(success)
+        self.assertEqual(route_tables, rtf.DRY_RUN_ROUTE_TABLES)
+        self.assertEqual(
+            client.called('describe_route_tables'), [{'Filters': filters}]
+        )
+
+    def test_get_route_tables_indexed_by_id(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, vpc_ids=['vpc-1234567'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(sorted(results.keys()), ['rtb-1234567', 'rtb-7654321'])
+        self.assertEqual(
+            results['rtb-1234567'],
+            rtf.convert_to_lower(rtf.DRY_RUN_ROUTE_TABLES[0])
+        )
+
+    def test_get_route_tables_by_tag(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, tags={'Name': 'public'}, check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results.keys(), ['rtb-7654321'])
+
+    def test_get_route_tables_by_subnet(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, subnet_ids=['subnet-1234567'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results.keys(), ['rtb-1234567'])
+
+    def test_get_route_tables_by_destination_and_target(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, destinations=['0.0.0.0/0'], targets=['nat-1234567'],
+                check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results.keys(), ['rtb-1234567'])
+
+    def test_get_route_tables_by_ipv6_destination(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, destinations=['::/0'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results.keys(), ['rtb-7654321'])
+
+    def test_get_route_tables_destination_and_target_of_different_routes(self):
+        # rtb-7654321 routes 0.0.0.0/0 and targets eigw-1234567, but not
+        # with the same route.
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, destinations=['0.0.0.0/0'], targets=['eigw-1234567'],
+                check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results, {})
+
+    def test_get_route_tables_by_non_canonical_ipv6_destination(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, destinations=['0:0::0/0'], targets=['eigw-1234567'],
+                check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results.keys(), ['rtb-7654321'])
+
+    def test_canonical_destination(self):
+        self.assertEqual(
+            rtf.canonical_destination('2001:DB8:0:0::/56'), '2001:db8::/56'
+        )
+        self.assertEqual(rtf.canonical_destination('10.0.0.0/8'), '10.0.0.0/8')
+        self.assertEqual(rtf.canonical_destination('pl-1234567'), 'pl-1234567')
+
+    def test_get_route_tables_no_match(self):
+        client = boto3.client('ec2', region_name=aws_region)
+        success, err_msg, results = (
+            rtf.get_route_tables(
+                client, vpc_ids=['vpc-7654321'], check_mode=CHECK_MODE
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(results, {})
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,474 @@
+#!/usr/bin/python
+
+import boto3
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import urllib
+
+import iam_managed_policy as imp
+
+from fakes import FakeClient, client_error
+
+CHECK_MODE = True
+
+
+def policy(name, path='/', version='v1'):
+    return {
+        'PolicyName': name,
+        'Arn': 'arn:aws:iam::123456789:policy{0}{1}'.format(path, name),
+        'Path': path,
+        'DefaultVersionId': version,
+    }
+
+
+class FakeIamClient(FakeClient):
+    """Answer the iam calls from policies, page_size policies per page."""
+
+    service_name = 'iam'
+
+    def __init__(self, policies=None, page_size=2, user_arn=None,
+                 documents=None, versions=None):
+        super(FakeIamClient, self).__init__()
+        self.policies = list(policies or list())
+        self.page_size = page_size
+        self.user_arn = user_arn
+        self.documents = dict(documents or dict())
+        self.versions = dict(versions or dict())
+
+    def get_user(self, **params):
+        self.record('get_user', params)
+        if not self.user_arn:
+            raise client_error('AccessDenied', 'GetUser')
+        return {'User': {'Arn': self.user_arn}}
+
+    def list_policies(self, **params):
+        self.record('list_policies', params)
+        start = int(params.get('Marker', 0))
+        end = start + min(self.page_size, params.get('MaxItems', 100))
+        response = {
+            'Policies': self.policies[start:end],
+            'IsTruncated': end < len(self.policies)
+        }
+        if response['IsTruncated']:
+            response['Marker'] = str(end)
+        return response
+
+    def get_policy(self, **params):
+        self.record('get_policy', params)
+        for item in self.policies:
+            if item['Arn'] == params['PolicyArn']:
+                return {'Policy': item}
+        raise client_error('NoSuchEntity', 'GetPolicy')
+
+    def create_policy(self, **params):
+        self.record('create_policy', params)
+        item = policy(params['PolicyName'], params['Path'])
+        self.policies.append(item)
+        return {'Policy': item}
+
+    def get_policy_version(self, **params):
+        self.record('get_policy_version', params)
+        return {
+            'PolicyVersion': {
+                'Document': self.documents[params['PolicyArn']],
+                'VersionId': params['VersionId'],
+                'IsDefaultVersion': True
+            }
+        }
+
+    def create_policy_version(self, **params):
+        self.record('create_policy_version', params)
+        for item in self.policies:
+            if item['Arn'] == params['PolicyArn']:
+                version = int(item['DefaultVersionId'][1:]) + 1
+                item['DefaultVersionId'] = 'v{0}'.format(version)
+                return {'PolicyVersion': {'VersionId': item['DefaultVersionId']}}
+        raise client_error('NoSuchEntity', 'CreatePolicyVersion')
+
+    def list_policy_versions(self, **params):
+        self.record('list_policy_versions', params)
+        for item in self.policies:
+            if item['Arn'] == params['PolicyArn']:
+                version_ids = self.versions.get(
+                    item['Arn'], [item['DefaultVersionId']]
+                )
+                return {
+                    'Versions': [
+                        {
+                            'VersionId': version_id,
+                            'IsDefaultVersion': (
+                                version_id == item['DefaultVersionId']
+                            )
+                        }
+                        for version_id in version_ids
+                    ],
+                    'IsTruncated': False
+                }
+        raise client_error('NoSuchEntity', 'ListPolicyVersions')
+
+    def delete_policy_version(self, **params):
+        self.record('delete_policy_version', params)
+        if params['PolicyArn'] in self.versions:
+            self.versions[params['PolicyArn']].remove(params['VersionId'])
+        return dict()
+
+    def delete_policy(self, **params):
+        self.record('delete_policy', params)
+        self.policies = [
+            item for item in self.policies
+            if item['Arn'] != params['PolicyArn']
+        ]
+        return dict()
+
+
+class RoleIamClient(FakeIamClient):
+    """Answer get_user the way IAM does for role credentials."""
+
+    def get_user(self, **params):
+        self.record('get_user', params)
+        raise client_error(
+            'ValidationError', 'GetUser',
+            'Must specify userName when calling with non-User credentials'
+        )
+
+
+class AnsibleIamManagedPolicyFunctions(unittest.TestCase):
+
+    def setUp(self):
+        imp.POLICY_CACHE['account_id'] = None
+        imp.POLICY_CACHE['listed'] = False
+        imp.POLICY_CACHE['policies'] = dict()
+        imp.POLICY_CACHE['digests'] = dict()
+
+    def test_get_account_id_from_user(self):
+        client = FakeIamClient(user_arn='arn:aws:iam::210987654321:user/ci')
+        success, err_msg, account_id = imp.get_account_id(client)
+        self.assertTrue(success)
+        self.assertEqual(account_id, '210987654321')
+
+    def test_get_account_id_without_user(self):
+        client = FakeIamClient()
+        success, err_msg, account_id = imp.get_account_id(client)
+        self.assertFalse(success)
+        self.assertIsNone(account_id)
+
+    def test_get_account_id_with_role_credentials(self):
+        client = RoleIamClient()
+        success, err_msg, account_id = imp.get_account_id(client)
+        self.assertFalse(success)
+        self.assertIsNone(account_id)
+        self.assertTrue(err_msg.startswith('Could not read the account id'))
+
+    def test_policy_arn_from_name(self):
+        self.assertEqual(
+            imp.policy_arn_from_name('123456789', 'test', '/ops/'),
+            'arn:aws:iam::123456789:policy/ops/test'
+        )
+
+    def test_find_policy_by_arn(self):
+        client = FakeIamClient([policy('test1'), policy('test2')])
+        imp.POLICY_CACHE['account_id'] = '123456789'
+        success, err_msg, result = imp.find_policy(client, 'test2')
+        self.assertTrue(success)
+        self.assertEqual(result, policy('test2'))
+        success, err_msg, result = imp.find_policy(client, 'test2')
+        self.assertEqual(result, policy('test2'))
+        self.assertEqual(client.count('get_policy'), 1)
+        self.assertEqual(client.count('list_policies'), 0)
+
+    def test_find_policy_lists_once(self):
+        policies = [policy('test{0}'.format(i)) for i in range(5)]
+        policies.append(policy('other', path='/ops/'))
+        client = FakeIamClient(policies)
+        for name in ['test4', 'test0', 'missing', 'other']:
+            success, err_msg, result = imp.find_policy(client, name)
+            self.assertTrue(success)
+        self.assertEqual(result, policy('other', path='/ops/'))
+        # Three pages, listed once for every lookup.
+        self.assertEqual(client.count('list_policies'), 3)
+        self.assertEqual(client.calls[0][1]['MaxItems'], imp.MAX_ITEMS)
+        self.assertEqual(client.calls[1][1]['Marker'], '2')
+
+    def test_find_policy_outside_path_falls_back_to_list(self):
+        client = FakeIamClient([policy('other', path='/ops/')])
+        imp.POLICY_CACHE['account_id'] = '123456789'
+        success, err_msg, result = imp.find_policy(client, 'other')
+        self.assertTrue(success)
+        self.assertEqual(result['Path'], '/ops/')
+        self.assertEqual(client.count('get_policy'), 1)
+        self.assertEqual(client.count('list_policies'), 1)
+
+    def test_policy_action_keeps_cache_current(self):
+        client = FakeIamClient([policy('test1')])
+        imp.find_policy(client, 'test1')
+        success, err_msg = imp.policy_action(
+            client, policy_name='test2', policy_json='{}', action='create'
+        )
+        self.assertTrue(success)
+        success, err_msg, result = imp.find_policy(client, 'test2')
+        self.assertEqual(result, policy('test2'))
+        imp.policy_action(
+            client, policy_arn=policy('test1')['Arn'], action='delete'
+        )
+        success, err_msg, result = imp.find_policy(client, 'test1')
+        self.assertTrue(success)
+        self.assertEqual(result, dict())
+        self.assertEqual(client.count('list_policies'), 1)
+
+    def test_find_policy_check_mode(self):
+        client = boto3.client('iam', region_name='us-east-1')
+        success, err_msg, result = (
+            imp.find_policy(client, 'test', check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        self.assertEqual(result['Arn'], 'arn:aws:iam::123456789:policy/test')
+
+    def test_create_missing_policy_check_mode(self):
+        client = FakeIamClient()
+        success, changed, policy_modified, resource_modified, err_msg, result = (
+            imp.create(
+                client, 'missing', imp.EXAMPLE_POLICY_STR, check_mode=True
+            )
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            err_msg,
+            'Policy missing would be created. '
+            'ARN = arn:aws:iam::123456789:policy/missing'
+        )
+        self.assertEqual(client.calls, [])
+
+    def test_load_policy_specs(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for name in ['s3.json', 'admin.json', 'README.md']:
+                with open(os.path.join(directory, name), 'w') as f:
+                    f.write(imp.EXAMPLE_POLICY_STR)
+            success, err_msg, specs = imp.load_policy_specs(
+                [{'name': 'test', 'policy': imp.EXAMPLE_POLICY_DICT}],
+                directory
+            )
+        finally:
+            shutil.rmtree(directory)
+        self.assertTrue(success)
+        self.assertEqual(
+            [spec['name'] for spec in specs], ['test', 'admin', 's3']
+        )
+        self.assertEqual(
+            json.loads(specs[1]['policy']), imp.EXAMPLE_POLICY_DICT
+        )
+
+    def test_load_policy_specs_duplicate_name(self):
+        success, err_msg, specs = imp.load_policy_specs(
+            [
+                {'name': 'test', 'policy': imp.EXAMPLE_POLICY_DICT},
+                {'name': 'test', 'policy': imp.EXAMPLE_POLICY_STR},
+            ]
+        )
+        self.assertFalse(success)
+        self.assertEqual(err_msg, 'Policy test is defined more than once')
+
+    def test_batch(self):
+        changed_policy = dict(imp.EXAMPLE_POLICY_DICT, Version='2008-10-17')
+        policies = [policy('test{0}'.format(i)) for i in range(4)]
+        documents = dict(
+            (item['Arn'], imp.EXAMPLE_POLICY_DICT) for item in policies
+        )
+        documents[policy('test3')['Arn']] = changed_policy
+        client = FakeIamClient(policies, documents=documents)
+        specs = [
+            {'name': item['PolicyName'], 'policy': imp.EXAMPLE_POLICY_STR}
+            for item in policies
+        ]
+        specs.append({'name': 'new', 'policy': imp.EXAMPLE_POLICY_STR})
+        success, changed, err_msg, results = imp.batch(client, specs)
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            err_msg,
+            '1 policies created, 1 policies versioned, 3 policies unchanged'
+        )
+        self.assertEqual(
+            dict(
+                (name, result['changed'])
+                for name, result in results['policies'].items()
+            ),
+            {
+                'test0': False, 'test1': False, 'test2': False,
+                'test3': True, 'new': True
+            }
+        )
+        self.assertEqual(
+            results['policies']['test3']['default_version_id'], 'v2'
+        )
+        self.assertEqual(
+            results['policies']['new']['arn'],
+            'arn:aws:iam::123456789:policy/new'
+        )
+        # Listed once, one version fetch per existing policy.
+        self.assertEqual(client.count('list_policies'), 2)
+        self.assertEqual(client.count('get_policy_version'), 4)
+        self.assertEqual(client.count('create_policy_version'), 1)
+        self.assertEqual(client.count('create_policy'), 1)
+        self.assertEqual(client.count('get_policy'), 0)
+
+    def test_batch_check_mode(self):
+        client = boto3.client('iam', region_name='us-east-1')
+        specs = [
+            {'name': 'test', 'policy': imp.EXAMPLE_POLICY_STR},
+            {'name': 'new', 'policy': imp.EXAMPLE_POLICY_STR},
+        ]
+        success, changed, err_msg, results = (
+            imp.batch(client, specs, check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        self.assertFalse(results['policies']['test']['changed'])
+        self.assertTrue(results['policies']['new']['changed'])
+        self.assertNotIn('arn', results['policies']['new'])
+
+    def test_batch_prunes_versions_before_versioning(self):
+        changed_policy = dict(imp.EXAMPLE_POLICY_DICT, Version='2008-10-17')
+        item = policy('test', version='v5')
+        client = FakeIamClient(
+            [item],
+            documents={item['Arn']: changed_policy},
+            versions={item['Arn']: ['v1', 'v2', 'v3', 'v4', 'v5']}
+        )
+        specs = [{'name': 'test', 'policy': imp.EXAMPLE_POLICY_STR}]
+        success, changed, err_msg, results = imp.batch(client, specs)
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(
+            results['policies']['test']['msg'],
+            'Policy test updated with a new default version: v6'
+        )
+        names = [name for name, _ in client.calls]
+        self.assertEqual(
+            names[names.index('list_policy_versions'):],
+            ['list_policy_versions'] + ['delete_policy_version'] * 4 +
+            ['create_policy_version']
+        )
+        # The default version is kept, so it becomes the previous one.
+        self.assertEqual(client.versions[item['Arn']], ['v5'])
+
+    def test_batch_without_pruning(self):
+        changed_policy = dict(imp.EXAMPLE_POLICY_DICT, Version='2008-10-17')
+        item = policy('test', version='v2')
+        client = FakeIamClient(
+            [item],
+            documents={item['Arn']: changed_policy},
+            versions={item['Arn']: ['v1', 'v2']}
+        )
+        specs = [{'name': 'test', 'policy': imp.EXAMPLE_POLICY_STR}]
+        success, changed, err_msg, results = (
+            imp.batch(
+                client, specs, delete_previous_versions_except_last=False
+            )
+        )
+        self.assertTrue(success)
+        self.assertEqual(client.count('list_policy_versions'), 0)
+        self.assertEqual(client.count('delete_policy_version'), 0)
+        self.assertEqual(client.count('create_policy_version'), 1)
+
+    def test_batch_check_mode_messages(self):
+        changed_policy = dict(imp.EXAMPLE_POLICY_DICT, Version='2008-10-17')
+        client = boto3.client('iam', region_name='us-east-1')
+        specs = [
+            {'name': 'test', 'policy': json.dumps(changed_policy)},
+            {'name': 'new', 'policy': imp.EXAMPLE_POLICY_STR},
+        ]
+        success, changed, err_msg, results = (
+            imp.batch(client, specs, check_mode=CHECK_MODE)
+        )
+        self.assertTrue(success)
+        self.assertEqual(
+            results['policies']['test']['msg'], 'Policy test would be versioned'
+        )
+        self.assertEqual(
+            results['policies']['new']['msg'], 'Policy new would be created'
+        )
+
+    def test_canonical_policy(self):
+        document = {
+            'Version': '2012-10-17',
+            'Statement': {
+                'Effect': 'Allow',
+                'Action': ['s3:PutObject', 's3:GetObject', 's3:PutObject'],
+                'Resource': 'arn:aws:s3:::bucket/*',
+                'Principal': {'AWS': 'arn:aws:iam::123456789:root'},
+                'Condition': {'IpAddress': {'aws:SourceIp': '10.0.0.0/8'}}
+            }
+        }
+        self.assertEqual(
+            imp.canonical_policy(document),
+            {
+                'Version': '2012-10-17',
+                'Statement': [
+                    {
+                        'Effect': 'Allow',
+                        'Action': ['s3:GetObject', 's3:PutObject'],
+                        'Resource': ['arn:aws:s3:::bucket/*'],
+                        'Principal': {'AWS': ['arn:aws:iam::123456789:root']},
+                        'Condition': {
+                            'IpAddress': {'aws:SourceIp': ['10.0.0.0/8']}
+                        }
+                    }
+                ]
+            }
+        )
+        self.assertEqual(document['Statement']['Resource'], 'arn:aws:s3:::bucket/*')
+
+    def test_policy_digest_ignores_order_and_encoding(self):
+        statements = [
+            {'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'},
+            {'Effect': 'Deny', 'Action': ['iam:*', 'ec2:*'], 'Resource': ['*']},
+        ]
+        document = {'Version': '2012-10-17', 'Statement': statements}
+        reordered = {
+            'Version': '2012-10-17',
+            'Statement': [
+                {'Effect': 'Deny', 'Action': ['ec2:*', 'iam:*'], 'Resource': '*'},
+                {'Effect': 'Allow', 'Action': ['s3:*'], 'Resource': ['*']},
+                {'Effect': 'Allow', 'Action': ['s3:*'], 'Resource': ['*']},
+            ]
+        }
+        encoded = urllib.quote(json.dumps(reordered))
+        digest = imp.policy_digest(document)
+        self.assertEqual(digest, imp.policy_digest(json.dumps(reordered)))
+        self.assertEqual(digest, imp.policy_digest(encoded))
+        statements[0]['Action'] = 's3:GetObject'
+        self.assertNotEqual(digest, imp.policy_digest(document))
+
+    def test_create_policy_version_caches_digests(self):
+        changed_policy = dict(imp.EXAMPLE_POLICY_DICT, Version='2008-10-17')
+        current = policy('test')
+        client = FakeIamClient(
+            [current], documents={current['Arn']: changed_policy}
+        )
+        success, changed, err_msg, digest = imp.create_policy_version(
+            client, current['Arn'], imp.EXAMPLE_POLICY_STR, dict(current)
+        )
+        self.assertTrue(success)
+        self.assertTrue(changed)
+        self.assertEqual(digest, imp.policy_digest(changed_policy))
+        self.assertEqual(
+            imp.POLICY_CACHE['digests'][(current['Arn'], 'v2')],
+            imp.policy_digest(imp.EXAMPLE_POLICY_DICT)
+        )
+        success, changed, err_msg, digest = imp.create_policy_version(
+            client, current['Arn'], imp.EXAMPLE_POLICY_STR, dict(current)
+        )
+        self.assertFalse(changed)
+        self.assertEqual(err_msg, 'Policy test has not changed')
+        self.assertEqual(client.count('get_policy_version'), 1)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()